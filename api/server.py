@@ -19,6 +19,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import dynamic backtest module
 from core.dynamic_backtest import run_dynamic_backtest, validate_dates
+from utils.tracing import tracer
 
 app = FastAPI()
 
@@ -103,18 +104,20 @@ def run_backtest_job(job_id: str, request: BacktestRequest):
             backtest_jobs[job_id]["progress"] = pct
             backtest_jobs[job_id]["message"] = step
         
-        result = run_dynamic_backtest(
-            train_start=request.train_start,
-            train_end=request.train_end,
-            test_end=request.test_end,
-            initial_capital=request.initial_capital,
-            progress_callback=progress_callback
-        )
+        # config.TRACE_ENABLED ise aşama süreleri reports/traces altına yazılır
+        with tracer.run(f"dynamic_backtest_{job_id[:8]}"):
+            result = run_dynamic_backtest(
+                train_start=request.train_start,
+                train_end=request.train_end,
+                test_end=request.test_end,
+                initial_capital=request.initial_capital,
+                progress_callback=progress_callback
+            )
         
         if result["success"]:
             backtest_jobs[job_id]["status"] = "completed"
             backtest_jobs[job_id]["progress"] = 100
-            backtest_jobs[job_id]["message"] = "Tamamlandı!"
+            backtest_jobs[job_id]["message"] = "Tamamlandı! (cache)" if result.get("cached") else "Tamamlandı!"
             backtest_jobs[job_id]["result"] = result
         else:
             backtest_jobs[job_id]["status"] = "error"
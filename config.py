@@ -123,6 +123,80 @@ TEST_START_DATE = "2024-01-01" # Daha uzun bir test dönemi (Ralliyi de görsün
 # KAP (Kamuyu Aydınlatma Platformu) Entegrasyonu
 ENABLE_KAP_FEATURES = True  # KAP bildirim feature'larını modele dahil et (Backtest hızı için kapalı)
 
+# Dinamik Backtest Sonuç Cache'i (API)
+RESULT_CACHE_MAX_MODELS = 4        # Bellekte tutulacak eğitilmiş model sayısı
+RESULT_CACHE_MAX_PAYLOADS = 64     # Bellekte tutulacak sonuç payload sayısı
+RESULT_CACHE_MAX_DISK_MB = 512     # cache/models + cache/payloads disk sınırı (her biri)
+
+# Ranking Eğitim Matrisi / LightGBM Binary Dataset Cache'i (models/ranking_dataset.py)
+LGBM_DATASET_CACHE = True          # Bin'lenmiş Dataset'ler cache/lgbm_datasets altına yazılsın
+LGBM_DATASET_CACHE_SIZE = 8        # Bellekte tutulacak kurulmuş Dataset sayısı
+LGBM_DATASET_CACHE_MAX_DISK_MB = 1024
+RANKING_MATRIX_CACHE_SIZE = 4      # Bellekte tutulacak float32 eğitim matrisi sayısı
+
+# CatBoost Quantize Pool Cache'i (models/catboost_pool_cache.py)
+CATBOOST_POOL_CACHE = True         # Quantize edilmiş pool'lar cache/catboost_pools altına yazılsın
+CATBOOST_POOL_CACHE_SIZE = 4       # Bellekte tutulacak pool sayısı
+CATBOOST_POOL_CACHE_MAX_DISK_MB = 1024
+
+# Model Registry (models/model_registry.py) - Versiyonlu, native formatlı model paketleri
+MODEL_REGISTRY_DIR = "models/registry"
+
+# Offline Feature Budama (research/feature_pruning.py -> models/feature_selection.py)
+FEATURE_SELECTION_PATH = "models/saved/feature_selection.json"  # Seçilen feature listesi + rapor
+USE_FEATURE_SELECTION = True       # Seçim dosyası varsa train_models.py sadece bu feature'larla eğitir
+FEATURE_PRUNING_FOLDS = 4          # Walk-forward fold sayısı
+FEATURE_PRUNING_MIN_SHAP_SHARE = 0.002  # Toplam |SHAP| içindeki asgari pay
+FEATURE_PRUNING_MIN_FEATURES = 15
+
+# Artımlı (Warm-Start) Ranker Eğitimi (models/incremental_training.py, train_models.py --mode auto)
+WARM_START_ROUNDS = 100            # Artımlı eğitimde eklenecek en fazla ağaç
+WARM_START_WINDOW_DAYS = 250       # Yeni ağaçların eğitildiği son işlem günü sayısı
+WARM_START_MAX_NEW_DAYS = 60       # Son eğitimden bu yana daha fazla yeni gün -> tam eğitim
+WARM_START_MAX_CHAIN = 10          # Art arda artımlı eğitim sınırı (sonra tam eğitim)
+WARM_START_MAX_AGE_DAYS = 30       # Son tam eğitim bundan eskiyse -> tam eğitim
+WARM_START_NDCG_TOLERANCE = 0.01   # Artımlı model validasyon NDCG@5'te bundan fazla gerilerse -> tam eğitim
+# Dinamik backtest: ay başı taban modelden artımlı eğitim. Kapalı: modeli (sonuçları) değiştirir ve
+# soğuk cache'te daha yavaştır (taban + artımlı eğitim + NDCG karşılaştırması); gece / uzun çalıştırmalarda açın
+DYNAMIC_BACKTEST_WARM_START = False
+
+# TFT Hızlı CPU Çıkarımı (models/tft_inference.py) - Ensemble'ın TFT üyesi
+TFT_MODEL_PATH = "models/saved/tft_model.pth"
+TFT_HPARAMS_PATH = "models/saved/tft_hparams.joblib"  # Model hiperparametreleri (dataset parametreleri dahil)
+TFT_INFERENCE_THREADS = None       # Intra-op thread sayısı (None: çekirdek sayısı)
+TFT_INFERENCE_BATCH_SIZE = 256     # Tek ileri geçişteki encoder penceresi sayısı
+
+# TFT Dataset Cache'i (models/tft_dataset.py) - fit edilmiş parametreler + encode edilmiş satırlar
+TFT_DATASET_DIR = "models/saved/tft_dataset"  # tft_config.joblib'in yanında
+TFT_DATASET_REFIT_DAYS = 250       # Son fit'ten bu yana daha fazla yeni gün -> scaler/normalizer yeniden fit
+
+# CPU TFT Eğitim Profili (models/tft_training.py) - GPU yoksa kullanılır
+TFT_CPU_PRECISION = "32-true"      # "bf16-mixed" | "auto" (işlemci bf16 destekliyorsa bf16) - önce benchmark ile ölçün
+TFT_CPU_NUM_WORKERS = None         # DataLoader worker sayısı (None: çekirdek/4, en fazla 2)
+TFT_CPU_THREADS = None             # torch intra-op thread (None: çekirdek - worker)
+TFT_ACCUMULATE_GRAD_BATCHES = 1    # >1: efektif batch = batch_size * bu değer
+TFT_CHECKPOINT_DIR = "models/saved/tft_checkpoints"  # best.ckpt + last.ckpt + run.json
+TFT_RESUME_TRAINING = True         # Yarıda kalan aynı eğitim last.ckpt'ten devam eder
+
+# Örneklem Dışı Skor Deposu (core/score_store.py) - (model versiyonu, tarih, hisse) skorları
+# Backtest / tuning / raporlar skorları buradan okur; eksik satırlar bir kez tahmin edilip eklenir
+SCORE_STORE = True
+SCORE_STORE_DIR = "data/score_store"
+SCORE_STORE_MAX_PARTS = 64         # Model başına parquet parça sayısı; aşılırsa tek dosyada birleştirilir
+
+# Backtest Checkpoint (run_backtest.py --resume)
+BACKTEST_CHECKPOINT_DIR = "reports/checkpoints"
+
+# Tracing (utils/tracing.py) - Aşama bazlı süre ölçümü
+# Kapalıyken maliyeti ihmal edilebilir; açıkken her çalıştırma için JSON trace yazılır
+TRACE_ENABLED = False
+TRACE_DIR = "reports/traces"
+
+# İstatistiksel Anlamlılık (research/significance.py)
+# Backtest sonrası Sharpe/CAGR/MaxDD güven aralıkları ve Deflated Sharpe
+SIGNIFICANCE_RESAMPLES = 2000      # Stationary bootstrap resample sayısı
+SIGNIFICANCE_N_TRIALS = 50         # reports/trial_returns.json yoksa DSR için varsayılan trial sayısı
+
 
 
 
@@ -139,7 +213,43 @@ MACRO_TICKERS = {
 
 # --- PARAMETRELER ---
 # Zaman Periyodu
-TIMEFRAME = 'D'  # 'D' for Daily (CHANGED FROM WEEKLY)
+TIMEFRAME = 'D'  # 'D' for Daily (CHANGED FROM WEEKLY) | 'W' | Intraday: '1h', '15m'
+
+# Intraday (Seans) Ayarları
+TRADING_DAYS_PER_YEAR = 252
+SESSION_START = "10:00"      # BIST Pay Piyasası sürekli işlem başlangıcı
+SESSION_END = "18:00"        # Kapanış
+INTRADAY_TIMEFRAMES = ('1h', '15m')
+BARS_PER_SESSION = {'1h': 8, '15m': 32}
+YF_INTERVAL_MAP = {'D': '1d', 'W': '1wk', 'M': '1mo', '1h': '60m', '15m': '15m'}
+INTRADAY_HISTORY_PERIOD = {'1h': '730d', '15m': '60d'}  # Yahoo intraday geçmiş limitleri
+
+
+def is_intraday(timeframe=None):
+    return (timeframe or TIMEFRAME) in INTRADAY_TIMEFRAMES
+
+
+def get_bars_per_day(timeframe=None):
+    """Bir işlem gününe (seans) düşen bar sayısı."""
+    tf = timeframe or TIMEFRAME
+    if tf == 'W':
+        return 1 / 5
+    return BARS_PER_SESSION.get(tf, 1)
+
+
+def get_bars_per_year(timeframe=None):
+    """Yıllıklandırma çarpanı (252 gün / 52 hafta / 252 x seans bar sayısı)."""
+    tf = timeframe or TIMEFRAME
+    if tf == 'W':
+        return 52
+    if tf == 'M':
+        return 12
+    return TRADING_DAYS_PER_YEAR * get_bars_per_day(tf)
+
+
+def days_to_bars(days, timeframe=None):
+    """Gün cinsinden bir pencereyi (örn. 5 günlük değişim) bar sayısına çevirir."""
+    return max(1, int(round(days * get_bars_per_day(timeframe))))
 
 # Teknik İndikatörler (Günlük Standart)
 RSI_PERIOD = 14         # Standart
@@ -163,6 +273,12 @@ HYBRID_WEIGHT = 0.85          # Daha çok raw rank odaklı (0.7 -> 0.85)
 FORWARD_WINDOWS = [1, 5]     # T+1 ve T+5
 FORWARD_WEIGHTS = [0.6, 0.4] # T+1 daha ağır
 
+# HybridEnsemble ağırlık optimizasyonu (models/ensemble_weights.py)
+# Registry'de yüklü üyeler için optimize edilmiş ağırlık yoksa ensemble HYBRID_WEIGHT'i kullanır
+ENSEMBLE_WEIGHT_STEP = 0.05   # LightGBM ağırlık ızgarası adımı (0..1)
+ENSEMBLE_WEIGHT_OBJECTIVE = 'sharpe' # 'sharpe' (top-k) veya 'rank_ic'
+ENSEMBLE_NORMALIZATIONS = ['global_rank', 'date_rank', 'date_zscore']
+
 # Sızıntı (Leakage) sütunları - Bunlar asla model girdisi olmamalı
 LEAKAGE_COLS = [
     'NextDay_Close', 'NextDay_Return', 'Excess_Return', 
@@ -211,6 +327,7 @@ RISK_PER_TRADE = 0.05        # %25 -> %5 (GÜVENLİ LİMİT)
 ENABLE_MOMENTUM_FILTER = False # Aggressive Mode: Filter OFF (Düşen bıçakları da tutsun)
 MAX_SINGLE_POS_WEIGHT = 0.33 # Tek bir hisseye ayrılacak max ağırlık (limit)
 ENABLE_RISK_SIZING = True    # Risk-based sizing aktif/pasif
+KELLY_LOOKBACK_TRADES = 100  # Kelly oranı son N trade'den (geçmiş uzun / streaming çalıştırmalarda sınırsız büyümez)
 
 CONFIDENCE_THRESHOLDS = {
     'TIER_1': 0.30  # 0.35 -> 0.30 (Ultra Aggressive - Low Confidence OK)
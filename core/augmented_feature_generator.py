@@ -0,0 +1,409 @@
+"""
+Sentetik BIST Piyasa Üreticisi
+Yük/ölçek testleri, benchmark'lar ve internetsiz (offline) çalıştırma için
+N hisse × M yıllık, birbiriyle ilişkili sentetik piyasa verisi üretir.
+
+Üretilenler (hepsi aynı takvim ve rejim yolu üzerinde):
+- Rejim yolu (Trend_Up / Sideways / Crash_Bear, Markov zinciri veya elle verilen yol)
+- XU100 (piyasa faktörü), XBANK (bankacılık sektör endeksi)
+- Makro seriler: USDTRY, VIX, SP500, GOLD, OIL (DataLoader.get_combined_data kolonlarıyla aynı)
+- Hisse OHLCV: beta * piyasa + sektör faktörü + idiosenkratik gürültü
+- Temel veriler: Feature Store fundamentals şeması (Forward_PE, PB_Ratio, EBITDA_Margin...)
+- KAP bildirim akışı: pykap formatında (publishDate), kriz dönemlerinde ve bilanço sezonunda yoğunlaşır
+
+Tüm hesaplar (gün × hisse) matrisleri üzerinde vektörize; 500 hisse × 20 yıl birkaç saniyede üretilir.
+
+Kullanım:
+    from core.augmented_feature_generator import augmented_generator
+    market = augmented_generator.generate_panel(n_tickers=500, n_days=20 * 252)
+    df = market.frame('AKBNK.IS')
+
+    python core/augmented_feature_generator.py --tickers 500 --years 20 --output data/synthetic
+"""
+
+import os
+import sys
+import zlib
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+REGIMES = ['Trend_Up', 'Sideways', 'Crash_Bear']
+
+# Rejim bazlı piyasa parametreleri (günlük log getiri)
+# mean_duration: Rejimde ortalama kalış süresi (işlem günü)
+DEFAULT_REGIME_PARAMS = {
+    'Trend_Up': {'drift': 0.0012, 'vol': 0.012, 'mean_duration': 120, 'vix': 15.0, 'usdtry_drift': 0.0004},
+    'Sideways': {'drift': 0.0001, 'vol': 0.010, 'mean_duration': 90, 'vix': 19.0, 'usdtry_drift': 0.0008},
+    'Crash_Bear': {'drift': -0.0025, 'vol': 0.028, 'mean_duration': 30, 'vix': 35.0, 'usdtry_drift': 0.0030},
+}
+
+# Rejimden çıkınca hangi rejime geçileceği (satır: mevcut, sütun: REGIMES sırası)
+DEFAULT_TRANSITIONS = np.array([
+    [0.0, 0.8, 0.2],  # Trend_Up -> Sideways / Crash
+    [0.7, 0.0, 0.3],  # Sideways -> Trend / Crash
+    [0.4, 0.6, 0.0],  # Crash_Bear -> Trend / Sideways
+])
+
+FUNDAMENTAL_COLUMNS = ['Price', 'Net_Income_TTM', 'Equity', 'Forward_PE', 'PB_Ratio',
+                       'EBITDA_Margin', 'Shares', 'Debt_to_Equity']
+
+
+@dataclass
+class SyntheticMarket:
+    """
+    generate_panel çıktısı. Fiyatlar (gün × hisse) matrisleri olarak tutulur;
+    hisse bazlı DataFrame'ler ve uzun formatlı tablolar ihtiyaç anında üretilir.
+    """
+    dates: pd.DatetimeIndex
+    tickers: list
+    sectors: list
+    regimes: pd.Series
+    macro: pd.DataFrame
+    ohlcv: dict                     # {'Open'|'High'|'Low'|'Close'|'Volume': (n_days, n_tickers)}
+    fundamentals: dict              # {kolon: (n_days, n_tickers)}
+    disclosure_days: np.ndarray     # Bildirim olan gün indeksleri
+    disclosure_tickers: np.ndarray  # Aynı sırada hisse indeksleri
+    _ticker_pos: dict = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._ticker_pos = {t: i for i, t in enumerate(self.tickers)}
+
+    def frame(self, ticker, with_fundamentals=False) -> pd.DataFrame:
+        """DataLoader.get_combined_data formatında tek hisse verisi (OHLCV + makro)."""
+        j = self._ticker_pos[ticker]
+        df = pd.DataFrame({col: values[:, j] for col, values in self.ohlcv.items()}, index=self.dates)
+        df = df.join(self.macro)
+        if with_fundamentals:
+            for col in ('Forward_PE', 'EBITDA_Margin', 'PB_Ratio', 'Debt_to_Equity'):
+                df[col] = self.fundamentals[col][:, j]
+        return df
+
+    def frames(self, tickers=None) -> dict:
+        return {t: self.frame(t) for t in (tickers or self.tickers)}
+
+    def fundamentals_frame(self, tickers=None) -> pd.DataFrame:
+        """Feature Store fundamentals.parquet şemasında uzun tablo (Ticker, Date, ...)."""
+        cols = [self._ticker_pos[t] for t in tickers] if tickers else list(range(len(self.tickers)))
+        n_days = len(self.dates)
+        out = pd.DataFrame({
+            'Ticker': pd.Categorical(np.repeat(np.asarray(self.tickers)[cols], n_days), categories=self.tickers),
+            'Date': np.tile(self.dates.values, len(cols)),
+        })
+        for col in FUNDAMENTAL_COLUMNS:
+            # Hisse bazlı sıralama için sütun öncelikli (Fortran) düzleştir
+            out[col] = self.fundamentals[col][:, cols].ravel(order='F')
+        return out
+
+    def disclosures_for(self, ticker) -> list:
+        """KAPDataFetcher cache formatında (pykap) bildirim listesi."""
+        j = self._ticker_pos[ticker]
+        days = self.disclosure_days[self.disclosure_tickers == j]
+        return [{'publishDate': d, 'subject': 'Özel Durum Açıklaması', 'disclosureType': 'ODA'}
+                for d in self.dates[days].strftime('%Y-%m-%d')]
+
+    def to_long(self) -> pd.DataFrame:
+        """(Date, Ticker) MultiIndex'li panel (ranking modeli girdi formatı)."""
+        frames = []
+        for ticker in self.tickers:
+            df = self.frame(ticker)
+            df['Ticker'] = ticker
+            frames.append(df)
+        return pd.concat(frames).reset_index(names='Date').set_index(['Date', 'Ticker']).sort_index()
+
+
+class SyntheticMarketGenerator:
+    def __init__(self, seed=42, regime_params=None, transitions=None):
+        """
+        seed: Temel seed. Aynı (seed, hisseler, tarih aralığı) her zaman aynı veriyi üretir.
+        regime_params: DEFAULT_REGIME_PARAMS üzerine yazılacak rejim parametreleri
+        transitions: Rejim geçiş matrisi (REGIMES sırasıyla 3x3)
+        """
+        self.seed = seed
+        self.regime_params = {r: dict(p) for r, p in DEFAULT_REGIME_PARAMS.items()}
+        for regime, params in (regime_params or {}).items():
+            self.regime_params[regime].update(params)
+        self.transitions = np.asarray(transitions if transitions is not None else DEFAULT_TRANSITIONS, dtype=float)
+
+    # ==========================================
+    # YARDIMCILAR
+    # ==========================================
+
+    def _rng(self, *parts):
+        """Parçalara bağlı, sürümden bağımsız (crc32) seed ile Generator."""
+        key = zlib.crc32('|'.join(map(str, parts)).encode())
+        return np.random.default_rng([self.seed, key])
+
+    @staticmethod
+    def _tickers(n_tickers):
+        tickers = list(config.TICKERS[:n_tickers])
+        tickers += [f"SYN{i:03d}.IS" for i in range(n_tickers - len(tickers))]
+        return tickers
+
+    @staticmethod
+    def _sectors(tickers):
+        """Gerçek hisseler config.SECTOR_MAP'ten, sentetikler sırayla sektörlere dağıtılır."""
+        known = sorted(set(config.SECTOR_MAP.values()))
+        sectors = []
+        for i, ticker in enumerate(tickers):
+            sector = config.get_sector(ticker)
+            sectors.append(sector if sector != 'Other' else known[i % len(known)])
+        return sectors
+
+    def _regime_path(self, rng, n_days):
+        """Markov zinciri: rejim süreleri geometrik dağılımdan, geçişler self.transitions'tan."""
+        mean_durations = np.array([self.regime_params[r]['mean_duration'] for r in REGIMES], dtype=float)
+        states, lengths = [], []
+        state, total = 1, 0  # Sideways ile başla
+        while total < n_days:
+            length = int(rng.geometric(1.0 / mean_durations[state]))
+            states.append(state)
+            lengths.append(length)
+            total += length
+            state = int(rng.choice(3, p=self.transitions[state]))
+        return np.repeat(states, lengths)[:n_days]
+
+    @staticmethod
+    def _ar1(shocks, phi, x0=0.0):
+        """x_t = phi * x_{t-1} + shock_t (axis=0 boyunca, lfilter ile vektörize)."""
+        zi = np.full((1,) + shocks.shape[1:], phi * x0)
+        out, _ = lfilter([1.0], [1.0, -phi], shocks, axis=0, zi=zi)
+        return out
+
+    # ==========================================
+    # ÜRETİM
+    # ==========================================
+
+    def generate_panel(self, n_tickers=None, tickers=None, start_date=None, end_date=None,
+                       n_days=None, regimes=None, disclosure_rate=0.04) -> SyntheticMarket:
+        """
+        Args:
+            n_tickers / tickers: Hisse sayısı (config.TICKERS + SYNxxx.IS) veya açık liste
+            start_date, end_date / n_days: İş günü takvimi (end_date yoksa n_days kullanılır)
+            regimes: Elle rejim yolu (REGIMES etiketleri, uzunluk = gün sayısı); None ise Markov zinciri
+            disclosure_rate: Normal dönemde hisse başına günlük ortalama KAP bildirimi
+        """
+        if tickers is None:
+            tickers = self._tickers(n_tickers or len(config.TICKERS))
+        tickers = list(tickers)
+        start_date = start_date or config.START_DATE
+        if end_date is not None:
+            dates = pd.bdate_range(start_date, end_date, name='Date')
+        else:
+            dates = pd.bdate_range(start_date, periods=n_days or 252 * 5, name='Date')
+        n, k = len(dates), len(tickers)
+        if n == 0:
+            raise ValueError("Boş tarih aralığı")
+
+        rng = self._rng(','.join(tickers), dates[0].date(), n)
+        sectors = self._sectors(tickers)
+
+        # --- Rejim yolu ---
+        if regimes is not None:
+            regime_labels = np.asarray(regimes)
+            if len(regime_labels) != n:
+                raise ValueError(f"regimes uzunluğu ({len(regime_labels)}) gün sayısıyla ({n}) uyuşmuyor")
+            state = np.array([REGIMES.index(r) for r in regime_labels])
+        else:
+            state = self._regime_path(rng, n)
+        params = [self.regime_params[r] for r in REGIMES]
+        drift = np.array([p['drift'] for p in params])[state]
+        vol = np.array([p['vol'] for p in params])[state]
+        crash = state == REGIMES.index('Crash_Bear')
+
+        # --- Global + piyasa faktörleri ---
+        global_ret = rng.normal(0.0003, 0.009, n)
+        market_ret = drift + vol * (0.3 * global_ret / 0.009 + np.sqrt(1 - 0.09) * rng.standard_normal(n))
+
+        sector_names = sorted(set(sectors))
+        sector_ret = (market_ret[:, None] * rng.uniform(0.8, 1.3, len(sector_names))
+                      + vol[:, None] * 0.5 * rng.standard_normal((n, len(sector_names))))
+        sector_idx = np.array([sector_names.index(s) for s in sectors])
+
+        # --- Makro ---
+        vix_target = np.array([p['vix'] for p in params])[state]
+        phi = 0.97
+        vix = self._ar1((1 - phi) * vix_target + 1.2 * rng.standard_normal(n), phi, x0=vix_target[0])
+        usdtry_drift = np.array([p['usdtry_drift'] for p in params])[state]
+        bank_ret = (sector_ret[:, sector_names.index('Banking')] if 'Banking' in sector_names
+                    else 1.2 * market_ret + 0.006 * rng.standard_normal(n))
+        macro = pd.DataFrame({
+            'USDTRY': 3.0 * np.exp(np.cumsum(usdtry_drift + 0.006 * rng.standard_normal(n))),
+            'VIX': np.clip(vix, 9.0, 85.0),
+            'SP500': 2000 * np.exp(np.cumsum(global_ret)),
+            'XBANK': 1500 * np.exp(np.cumsum(bank_ret)),
+            'XU100': 800 * np.exp(np.cumsum(market_ret)),
+            'GOLD': 1200 * np.exp(np.cumsum(0.0002 - 0.3 * global_ret + 0.008 * rng.standard_normal(n))),
+            'OIL': 55 * np.exp(np.cumsum(0.4 * global_ret + 0.02 * rng.standard_normal(n))),
+        }, index=dates)
+        # ABD piyasaları bir gün geriden gelir (DataLoader ile aynı look-ahead önlemi)
+        macro[['VIX', 'SP500']] = macro[['VIX', 'SP500']].shift(1).bfill()
+
+        # --- Hisse getirileri: beta * piyasa + sektör + idiosenkratik ---
+        beta = rng.uniform(0.6, 1.4, k)
+        idio_vol = rng.uniform(0.008, 0.02, k)
+        ret = (beta * market_ret[:, None]
+               + 0.5 * (sector_ret[:, sector_idx] - market_ret[:, None])
+               + idio_vol * (1 + crash[:, None]) * rng.standard_normal((n, k)))
+        ret[0] = 0.0
+        close = rng.uniform(5, 200, k) * np.exp(np.cumsum(ret, axis=0))
+
+        day_vol = np.sqrt(vol[:, None] ** 2 + idio_vol ** 2)
+        prev_close = np.vstack([close[:1], close[:-1]])
+        open_ = prev_close * np.exp(0.3 * day_vol * rng.standard_normal((n, k)))
+        open_[0] = close[0]
+        wick = np.abs(0.5 * day_vol * rng.standard_normal((n, k)))
+        high = np.maximum(open_, close) * np.exp(wick)
+        low = np.minimum(open_, close) * np.exp(-np.abs(0.5 * day_vol * rng.standard_normal((n, k))))
+        base_volume = np.exp(rng.uniform(13, 17, k))
+        volume = np.round(base_volume * np.exp(0.3 * rng.standard_normal((n, k)))
+                          * (1 + 30 * np.abs(ret)) * (1 + crash[:, None]))
+
+        ohlcv = {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}
+        fundamentals = self._fundamentals(rng, dates, close, sectors)
+
+        # --- KAP bildirimleri: krizde 2x, bilanço sezonunda (çeyrek sonrası 30-60 gün) 1.5x ---
+        days_into_quarter = (dates - dates.to_period('Q').start_time).days.values
+        season = (days_into_quarter >= 30) & (days_into_quarter < 60)
+        intensity = disclosure_rate * (1 + crash) * (1 + 0.5 * season)
+        counts = rng.poisson(intensity[:, None] * rng.uniform(0.5, 1.5, k), size=(n, k))
+        disclosure_days, disclosure_tickers = np.nonzero(counts)
+
+        return SyntheticMarket(
+            dates=dates,
+            tickers=tickers,
+            sectors=sectors,
+            regimes=pd.Series(np.asarray(REGIMES)[state], index=dates, name='Regime'),
+            macro=macro,
+            ohlcv=ohlcv,
+            fundamentals=fundamentals,
+            disclosure_days=disclosure_days,
+            disclosure_tickers=disclosure_tickers,
+        )
+
+    def _fundamentals(self, rng, dates, close, sectors):
+        """Çeyreklik kâr/özkaynak adımları, günlük fiyatla Forward_PE ve PB_Ratio."""
+        n, k = close.shape
+        quarter = dates.year.values * 4 + dates.quarter.values
+        quarter_idx = quarter - quarter[0]
+        n_quarters = quarter_idx[-1] + 1
+
+        shares = np.exp(rng.uniform(19.5, 23.5, k))
+        market_cap0 = close[0] * shares
+        net_income0 = market_cap0 / rng.uniform(4, 15, k)
+        growth = rng.normal(0.03, 0.10, (n_quarters, k))
+        growth[0] = 0.0
+        net_income = net_income0 * np.exp(np.cumsum(growth, axis=0))
+        equity = net_income / rng.uniform(0.10, 0.30, k)
+        is_bank = np.array([s == 'Banking' for s in sectors])
+        margin = np.where(is_bank, 0.25, rng.uniform(0.08, 0.35, k)) + 0.02 * rng.standard_normal((n_quarters, k))
+        debt_to_equity = np.where(is_bank, 1.5, rng.uniform(0.2, 2.0, k))
+
+        net_income_daily = net_income[quarter_idx]
+        equity_daily = equity[quarter_idx]
+        market_cap = close * shares
+        return {
+            'Price': close,
+            'Net_Income_TTM': net_income_daily,
+            'Equity': equity_daily,
+            'Forward_PE': market_cap / net_income_daily,
+            'PB_Ratio': market_cap / equity_daily,
+            'EBITDA_Margin': np.clip(margin[quarter_idx], 0.0, 0.8),
+            'Shares': np.broadcast_to(shares, (n, k)).copy(),
+            'Debt_to_Equity': np.broadcast_to(debt_to_equity, (n, k)).copy(),
+        }
+
+    def generate_synthetic_data(self, ticker, start_date, end_date) -> pd.DataFrame:
+        """Tek hisse için OHLCV + makro + temel veri (Forward_PE, EBITDA_Margin, PB_Ratio, Debt_to_Equity)."""
+        market = self.generate_panel(tickers=[ticker], start_date=start_date, end_date=end_date)
+        return market.frame(ticker, with_fundamentals=True)
+
+
+# ==========================================
+# PIPELINE ENTEGRASYONU (OFFLINE MOD)
+# ==========================================
+
+class SyntheticDataLoader:
+    """
+    DataLoader yerine geçer: get_combined_data / fetch_stock_data / fetch_macro_data
+    sentetik piyasadan döner (internet gerekmez).
+    """
+
+    def __init__(self, market: SyntheticMarket):
+        self.market = market
+        self.tickers = list(market.tickers)
+
+    def fetch_stock_data(self, ticker):
+        if ticker not in self.market.tickers:
+            return None
+        return self.market.frame(ticker)[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+    def fetch_macro_data(self):
+        return self.market.macro.copy()
+
+    def get_combined_data(self, ticker):
+        if ticker not in self.market.tickers:
+            return None
+        return self.market.frame(ticker)
+
+
+def write_feature_store(market: SyntheticMarket, base_dir, tickers=None):
+    """Temel verileri ve hisse bar verisini verilen dizinde bir Feature Store'a yazar."""
+    from core.feature_store import FeatureStore
+    store = FeatureStore(base_dir=base_dir)
+    store.save_fundamentals(market.fundamentals_frame(tickers))
+    for ticker in (tickers or market.tickers):
+        store.save_market_data(ticker, market.frame(ticker))
+    return store
+
+
+def write_kap_cache(market: SyntheticMarket, cache_dir, lookback_days=30, tickers=None):
+    """
+    Bildirimleri KAPDataFetcher cache'ine yazar; create_event_features(ticker, fiyat_df, lookback_days)
+    aynı tarih aralığıyla çağrıldığında canlı veri çekmeden bu kayıtları okur.
+    """
+    from datetime import timedelta
+    from utils.kap_data_fetcher import KAPDataFetcher
+    fetcher = KAPDataFetcher(cache_dir=cache_dir)
+    params = {
+        'from': str(market.dates[0].date() - timedelta(days=lookback_days)),
+        'to': str(market.dates[-1].date()),
+        'type': 'ODA',
+    }
+    for ticker in (tickers or market.tickers):
+        fetcher._save_cache(fetcher._get_cache_path(ticker, 'disclosures', params), market.disclosures_for(ticker))
+    return fetcher
+
+
+augmented_generator = SyntheticMarketGenerator()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Sentetik BIST piyasası üret")
+    parser.add_argument('--tickers', type=int, default=len(config.TICKERS))
+    parser.add_argument('--years', type=float, default=10)
+    parser.add_argument('--start', type=str, default=config.START_DATE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=None, help='Feature Store + KAP cache dizini')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    market = SyntheticMarketGenerator(seed=args.seed).generate_panel(
+        n_tickers=args.tickers, start_date=args.start, n_days=int(args.years * 252))
+    print(f"✅ {len(market.tickers)} hisse × {len(market.dates)} gün üretildi ({time.perf_counter() - t0:.2f} s)")
+    print(f"   Rejim dağılımı: {market.regimes.value_counts(normalize=True).round(2).to_dict()}")
+    print(f"   KAP bildirimi: {len(market.disclosure_days)}")
+
+    if args.output:
+        write_feature_store(market, os.path.join(args.output, 'feature_store'))
+        write_kap_cache(market, os.path.join(args.output, 'kap'))
+        print(f"💾 Yazıldı: {args.output}")
@@ -0,0 +1,345 @@
+"""
+Backtest Kernel (Derlenmiş Döngü)
+`Backtester._simulate_bars` Python döngüsünün birebir sayısal karşılığı.
+
+Intraday (1h/15m) veride bar sayısı ~100 kat arttığı için bar döngüsü Numba ile
+derlenir. Numba yoksa `NUMBA_AVAILABLE = False` olur ve Backtester Python döngüsüne döner.
+Mantık değişikliği yapılırken iki yol birlikte güncellenmelidir
+(bkz. tests/test_backtest_kernel.py parity testleri).
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        def wrap(func):
+            return func
+        return wrap
+
+# Exit reason kodları (kernel içinde string kullanılamaz)
+EXIT_REASONS = [None, 'CIRCUIT_BREAKER', 'STOP_LOSS', 'TRAILING_STOP', 'TAKE_PROFIT',
+                'WEIGHT_ZERO', 'SIGNAL_LOST', 'REBALANCE']
+EXIT_NONE, EXIT_CIRCUIT_BREAKER, EXIT_STOP_LOSS, EXIT_TRAILING_STOP, EXIT_TAKE_PROFIT, \
+    EXIT_WEIGHT_ZERO, EXIT_SIGNAL_LOST, EXIT_REBALANCE = range(8)
+
+# Rejim kodları: RiskManager.adjust_for_regime ile aynı dallar (bilinmeyen -> Trend_Up)
+REGIME_CODES = {'Trend_Up': 0, 'Crash_Bear': 1, 'Sideways': 2}
+
+ACTION_HOLD, ACTION_BUY, ACTION_SELL, ACTION_REBALANCE_SELL = range(4)
+
+
+@njit(cache=True)
+def _slippage(volume, avg_volume, qty):
+    # Backtester.calculate_slippage
+    if np.isnan(volume) or np.isnan(avg_volume) or avg_volume == 0:
+        return 0.001
+    volume_impact = qty / avg_volume
+    if volume_impact < 0.01:
+        return 0.0002
+    elif volume_impact < 0.05:
+        return 0.0005
+    return 0.001
+
+
+@njit(cache=True)
+def _market_impact(price, qty, avg_volume, is_buy):
+    # Backtester.apply_market_impact
+    if np.isnan(avg_volume) or avg_volume == 0:
+        return price
+    volume_impact = qty / avg_volume
+    if volume_impact > 0.10:
+        impact = (volume_impact - 0.10) * 0.001
+        if is_buy:
+            return price * (1 + impact)
+        return price * (1 - impact)
+    return price
+
+
+@njit(cache=True)
+def _py_min(a, b):
+    # Python min() semantiği (NaN davranışı dahil): sadece b < a ise b
+    if b < a:
+        return b
+    return a
+
+
+@njit(cache=True, error_model='numpy')
+def _kelly_fraction(n_wins, n_losses, sum_wins, sum_losses, initial_fraction, max_fraction):
+    # KellyPositionSizer.calculate_kelly
+    if n_wins < 5 or n_losses < 5:
+        return initial_fraction
+    p = n_wins / (n_wins + n_losses)
+    avg_win = sum_wins / n_wins
+    avg_loss = abs(sum_losses / n_losses)
+    if avg_loss == 0:
+        return max_fraction
+    b = avg_win / avg_loss
+    q = 1 - p
+    kelly = (p * b - q) / b
+    if kelly <= 0:
+        return 0.0
+    kelly_fraction = kelly * initial_fraction
+    return min(max(kelly_fraction, 0.05), max_fraction)
+
+
+@njit(cache=True, error_model='numpy')
+def simulate_kernel(prices, opens, highs, atrs, regime_codes, day_nums, input_values,
+                    volumes, avg_volumes, is_weighted, start,
+                    cash, holdings_qty, entry_price, entry_day, peak_price, days_held,
+                    peak_equity, circuit_breaker_triggered, last_equity,
+                    commission, regime_params, max_stop_loss_pct, trailing_active,
+                    min_holding_periods, min_holding_days, enable_risk_sizing, enable_kelly,
+                    risk_per_trade, max_single_pos_weight,
+                    kelly_stats, kelly_window, kelly_count, kelly_initial, kelly_max):
+    """
+    regime_params: (3, 3) dizisi -> [stop_loss_mult, trailing_stop_mult, take_profit_mult] (rejim koduna göre)
+    kelly_stats: [n_wins, n_losses, sum_wins, sum_losses] (yerinde güncellenir)
+    kelly_window: Son trade'ler (eskiden yeniye ilk kelly_count eleman; boyutu KellyPositionSizer.lookback,
+        boş dizi: sınırsız). Dolunca en eski trade istatistiklerden düşülür (deque(maxlen) ile aynı)
+    """
+    n = len(prices)
+    positions = np.zeros(n)
+    current_weights = np.zeros(n)
+    trades = np.zeros(n)
+    exit_codes = np.zeros(n, dtype=np.int64)
+    equities = np.zeros(n)
+    for i in range(min(start, n)):
+        equities[i] = last_equity
+
+    closed_pnls = np.zeros(n)
+    n_closed = 0
+    circuit_breaker_idx = -1
+    entry_idx = -1
+
+    kelly_size = len(kelly_window)
+    kelly_head = 0
+
+    in_position = holdings_qty > 0
+    equity = last_equity
+    holdings_value = 0.0
+
+    for i in range(start, n):
+        current_close = prices[i]
+        current_open = opens[i]
+        current_high = highs[i]
+        current_atr = atrs[i]
+        input_val = input_values[i]
+
+        # --- Valuation Update ---
+        if holdings_qty > 0:
+            holdings_value = holdings_qty * current_close
+            in_position = True
+        else:
+            holdings_value = 0.0
+            in_position = False
+
+        equity = cash + holdings_value
+        if equity > peak_equity:
+            peak_equity = equity
+
+        dd = (equity - peak_equity) / peak_equity if peak_equity > 0 else 0.0
+
+        if dd < -0.30 and not circuit_breaker_triggered:
+            if holdings_qty > 0:
+                trades[i] = 1
+                exit_codes[i] = EXIT_CIRCUIT_BREAKER
+                cash += holdings_qty * current_open * (1 - commission)
+                holdings_qty = 0.0
+                holdings_value = 0.0
+            circuit_breaker_triggered = True
+            circuit_breaker_idx = i
+            positions[i] = 0
+            current_weights[i] = 0
+            equity = cash
+            equities[i] = equity
+            continue
+
+        if circuit_breaker_triggered:
+            positions[i] = 0
+            current_weights[i] = 0
+            equities[i] = cash
+            continue
+
+        # Risk Parameters Update (adjust_for_regime)
+        code = regime_codes[i]
+        stop_loss_mult = regime_params[code, 0]
+        trailing_stop_mult = regime_params[code, 1]
+        take_profit_mult = regime_params[code, 2]
+
+        if np.isnan(current_atr):
+            current_atr = current_close * 0.03
+
+        action = ACTION_HOLD
+        target_qty = holdings_qty
+        exit_code = EXIT_NONE
+
+        # 1. RISK MANAGER CHECKS (check_exit_conditions)
+        if in_position:
+            days_held = day_nums[i] - entry_day
+            if current_high > peak_price:
+                peak_price = current_high
+
+            check_atr = current_atr if not np.isnan(current_atr) else entry_price * 0.05
+            initial_stop_price = entry_price - check_atr * stop_loss_mult
+            hard_stop_price = entry_price * (1 - max_stop_loss_pct)
+            effective_initial_stop = max(initial_stop_price, hard_stop_price)
+
+            if current_close < effective_initial_stop:
+                action = ACTION_SELL
+                exit_code = EXIT_STOP_LOSS
+            elif trailing_active and current_close < peak_price - (check_atr * trailing_stop_mult):
+                action = ACTION_SELL
+                exit_code = EXIT_TRAILING_STOP
+            elif current_close >= entry_price + (check_atr * take_profit_mult):
+                action = ACTION_SELL
+                exit_code = EXIT_TAKE_PROFIT
+
+        # 2. SIGNAL / WEIGHT CHECK
+        if action == ACTION_HOLD:
+            if is_weighted:
+                base_weight = input_val
+                if enable_risk_sizing:
+                    # get_stop_distance
+                    if np.isnan(current_atr) or current_atr == 0:
+                        stop_dist = max_stop_loss_pct
+                    else:
+                        stop_dist = _py_min((current_atr * stop_loss_mult) / current_close, max_stop_loss_pct)
+                    risk_weight = risk_per_trade / (stop_dist + 1e-6)
+                    target_weight = _py_min(_py_min(base_weight, risk_weight), max_single_pos_weight)
+                elif enable_kelly:
+                    kelly_pct = _kelly_fraction(kelly_stats[0], kelly_stats[1], kelly_stats[2], kelly_stats[3],
+                                                kelly_initial, kelly_max)
+                    kelly_size_tl = equity * (kelly_pct * input_val)
+                    kelly_weight = kelly_size_tl / equity
+                    target_weight = _py_min(kelly_weight, max_single_pos_weight)
+                else:
+                    target_weight = base_weight
+
+                if target_weight < 0:
+                    target_weight = 0.0
+                if target_weight > 1:
+                    target_weight = 1.0
+
+                target_value = equity * target_weight
+                target_qty_calc = target_value / current_close
+
+                if holdings_qty > 0:
+                    qty_diff_pct = abs(target_qty_calc - holdings_qty) / holdings_qty
+                else:
+                    qty_diff_pct = 1.0 if target_qty_calc > 0 else 0.0
+
+                if qty_diff_pct > 0.10:
+                    if target_qty_calc > holdings_qty:
+                        action = ACTION_BUY
+                        target_qty = target_qty_calc
+                    elif target_qty_calc < holdings_qty:
+                        if days_held >= min_holding_days:
+                            if target_qty_calc < (holdings_qty * 0.1):
+                                action = ACTION_SELL
+                                exit_code = EXIT_WEIGHT_ZERO
+                            else:
+                                action = ACTION_REBALANCE_SELL
+                            target_qty = target_qty_calc
+                        else:
+                            action = ACTION_HOLD
+            else:
+                if input_val == 1 and not in_position:
+                    action = ACTION_BUY
+                    target_qty = (cash * 0.99) / current_close
+                elif input_val == 0 and in_position:
+                    if days_held >= min_holding_periods:
+                        action = ACTION_SELL
+                        exit_code = EXIT_SIGNAL_LOST
+                        target_qty = 0.0
+
+        # --- EXECUTION ---
+        current_volume = volumes[i]
+        current_avg_vol = avg_volumes[i]
+
+        if action == ACTION_BUY or action == ACTION_REBALANCE_SELL:
+            diff_qty = target_qty - holdings_qty
+            if diff_qty > 0:
+                slippage = _slippage(current_volume, current_avg_vol, diff_qty)
+                executed_price = _market_impact(current_close, diff_qty, current_avg_vol, True)
+                cost = diff_qty * executed_price * (1 + slippage)
+                total_cost = cost * (1 + commission)
+                if cash >= total_cost:
+                    cash -= total_cost
+                    holdings_qty += diff_qty
+                    trades[i] = 1
+                    if in_position and holdings_qty > 0:
+                        entry_price = (entry_price * (holdings_qty - diff_qty) + executed_price * diff_qty) / holdings_qty
+                    else:
+                        entry_price = executed_price
+                        entry_day = day_nums[i]
+                        entry_idx = i
+                        peak_price = current_close
+            elif diff_qty < 0:
+                sell_qty = abs(diff_qty)
+                slippage = _slippage(current_volume, current_avg_vol, sell_qty)
+                executed_price = _market_impact(current_close, sell_qty, current_avg_vol, False)
+                proceeds = sell_qty * executed_price * (1 - slippage)
+                cash += proceeds * (1 - commission)
+                holdings_qty -= sell_qty
+                trades[i] = 1
+                if holdings_qty < 1e-6:
+                    holdings_qty = 0.0
+                    in_position = False
+                    exit_codes[i] = exit_code if exit_code != EXIT_NONE else EXIT_REBALANCE
+
+        elif action == ACTION_SELL:
+            if holdings_qty > 0:
+                slippage = _slippage(current_volume, current_avg_vol, holdings_qty)
+                executed_price = _market_impact(current_close, holdings_qty, current_avg_vol, False)
+                proceeds = holdings_qty * executed_price * (1 - slippage)
+                cash += proceeds * (1 - commission)
+                holdings_qty = 0.0
+                trades[i] = 1
+                in_position = False
+                exit_codes[i] = exit_code
+
+                # Kelly Update (Trade Result)
+                if entry_price > 0:
+                    pnl_pct = (executed_price - entry_price) / entry_price
+                    closed_pnls[n_closed] = pnl_pct
+                    n_closed += 1
+                    if kelly_size > 0:
+                        if kelly_count == kelly_size:
+                            oldest = kelly_window[kelly_head]
+                            if oldest > 0:
+                                kelly_stats[0] -= 1
+                                kelly_stats[2] -= oldest
+                            else:
+                                kelly_stats[1] -= 1
+                                kelly_stats[3] -= oldest
+                            kelly_window[kelly_head] = pnl_pct
+                            kelly_head = (kelly_head + 1) % kelly_size
+                        else:
+                            kelly_window[(kelly_head + kelly_count) % kelly_size] = pnl_pct
+                            kelly_count += 1
+                    if pnl_pct > 0:
+                        kelly_stats[0] += 1
+                        kelly_stats[2] += pnl_pct
+                    else:
+                        kelly_stats[1] += 1
+                        kelly_stats[3] += pnl_pct
+
+        # Kayıt
+        positions[i] = 1 if holdings_qty > 0 else 0
+        if holdings_qty > 0:
+            holdings_value = holdings_qty * current_close
+        else:
+            holdings_value = 0.0
+        equity = cash + holdings_value
+        equities[i] = equity
+        current_weights[i] = (holdings_qty * current_close) / equity if equity > 0 else 0.0
+
+    state = (cash, holdings_qty, entry_price, entry_day, peak_price, days_held,
+             peak_equity, circuit_breaker_triggered)
+    return (positions, current_weights, trades, exit_codes, equities, state,
+            closed_pnls[:n_closed], circuit_breaker_idx, entry_idx)
@@ -1,9 +1,76 @@
+import copy
+import hashlib
+import os
+from dataclasses import dataclass, field
+
+import joblib
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import config
 from core.risk_manager import RiskManager
 from core.position_sizing import KellyPositionSizer
+from core.backtest_kernel import NUMBA_AVAILABLE, EXIT_REASONS, REGIME_CODES, simulate_kernel
+from utils.tracing import traced
+
+
+@dataclass
+class BacktestState:
+    """
+    Simülatörün bar'lar arasında taşıdığı durum.
+    Streaming modunda chunk sınırlarında bu nesne aktarılır.
+    """
+    cash: float
+    holdings_qty: float = 0.0
+    entry_price: float = 0.0
+    entry_date: object = None
+    peak_price: float = 0.0
+    days_held: int = 0
+    peak_equity: float = 0.0
+    circuit_breaker_triggered: bool = False
+    last_equity: float = 0.0
+    last_close: float = float('nan')
+
+    @classmethod
+    def initial(cls, initial_capital):
+        return cls(cash=initial_capital, peak_equity=initial_capital, last_equity=initial_capital)
+
+
+# Ortalama hacim penceresi (slippage / market impact için)
+AVG_VOLUME_WINDOW = 20
+
+
+@dataclass
+class BacktestCheckpoint:
+    """
+    Son bar itibarıyla backtest'in tam durumu.
+    Sonraki çalıştırmada sadece yeni barlar simüle edilir (run_backtest(..., checkpoint=...)).
+    """
+    state: BacktestState
+    kelly_history: list
+    volume_tail: np.ndarray      # Ortalama hacim penceresi için son barların hacmi
+    is_weighted: bool
+    last_date: object
+    initial_capital: float
+    commission: float
+    inputs_hash: str             # Checkpoint'e kadarki sinyal/ağırlık serisinin hash'i
+    results: pd.DataFrame = field(repr=False)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        joblib.dump(self, path)
+        return path
+
+    @staticmethod
+    def load(path):
+        if not os.path.exists(path):
+            return None
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            print(f"Checkpoint okunamadı ({path}): {e}")
+            return None
+
 
 class Backtester:
     def __init__(self, data, initial_capital=10000, commission=0.002):
@@ -11,6 +78,8 @@ class Backtester:
         self.initial_capital = initial_capital
         self.commission = commission
         self.position_sizer = KellyPositionSizer()
+        # Derlenmiş (Numba) bar döngüsü; yoksa Python referans döngüsü kullanılır
+        self.use_compiled = getattr(config, 'USE_COMPILED_BACKTEST', True) and NUMBA_AVAILABLE
         
     def calculate_slippage(self, volume, avg_volume, position_size_qty):
         """
@@ -52,28 +121,184 @@ class Backtester:
                 
         return price
 
-    def run_backtest(self, signals_or_weights):
+    @traced('backtest.run_backtest')
+    def run_backtest(self, signals_or_weights, checkpoint=None):
         """
         Event-driven Backtest with Risk Management.
         signals_or_weights: 
             - Series of 1/0 for Signals (All-in/All-out)
             - Series of floats (0.0-1.0) for Weights (Dynamic Sizing)
+        checkpoint: Önceki çalıştırmanın BacktestCheckpoint'i. Verilirse sadece
+            checkpoint'ten sonraki barlar simüle edilir (sonuç tam backtest ile aynıdır).
         """
-        # Risk Yöneticisi
-        risk_manager = RiskManager()
-        
         # Veri boyutu kontrolü
         common_index = self.data.index.intersection(signals_or_weights.index)
         df = self.data.loc[common_index].copy()
         inputs = signals_or_weights.loc[common_index]
         
+        self.resumed = False
+        if checkpoint is not None:
+            if self.can_resume(df, inputs, checkpoint):
+                return self._resume_backtest(df, inputs, checkpoint)
+            print("UYARI: Checkpoint bu veriyle uyumsuz (geçmiş değişmiş olabilir), tam backtest çalıştırılıyor.")
+        
         # Input tipini belirle
-        is_weighted = False
+        is_weighted = self.infer_weighted(inputs)
+        
+        df = self.prepare_bars(df)
+        
+        # Volume ve Avg Volume hazırlığı (Slippage için)
+        # Basit 20 günlük ortalama hacim (pandas 3.0 uyumlu)
+        avg_volumes = df['Volume'].rolling(AVG_VOLUME_WINDOW).mean().bfill().values if 'Volume' in df.columns else np.zeros(len(df))
+        
+        # Simülatör durumu (Streaming / checkpoint modunda chunk'lar arasında taşınır)
+        state = BacktestState.initial(self.initial_capital)
+        bars = self._simulate_bars(df, inputs.values, avg_volumes, is_weighted, state, start=1)
+        self._state = state
+        self._is_weighted = is_weighted
+        
+        # Sonuçları DataFrame'e yaz
+        df['Position'] = bars['Position']
+        df['Actual_Weight'] = bars['Actual_Weight'] # FIX BUG-2 part 1: Track actual weight
+        df['Trades'] = bars['Trades'] 
+        df['ExitReason'] = bars['ExitReason']
+        df['Equity'] = bars['Equity']
+        
+        self._inputs = inputs
+        self.results = self._finalize_results(df)
+        return self.results
+
+    @staticmethod
+    def hash_inputs(inputs):
+        """Sinyal/ağırlık serisinin (tarih + değer) hash'i; model/veri değiştiyse checkpoint geçersiz olur."""
+        hashed = pd.util.hash_pandas_object(inputs.astype(float), index=True).to_numpy()
+        return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+    def _finalize_results(self, df):
+        """Simülasyon kolonlarından getiri / maliyet / kümülatif kolonları üretir."""
+        # Getiri Hesabı
+        # FIX BUG-2 part 2: Strategy return should be based on prior day's WEIGHT, not binary position
+        df['Strategy_Return_Gross'] = df['Actual_Weight'].shift(1).fillna(0) * df['Log_Return']
+        
+        # Maliyetler: Komisyon + Slippage
+        # Komisyon her işlemde (Al/Sat)
+        commission_cost = df['Trades'] * self.commission
+        
+        # Slippage her işlemde (Varsayılan %0.1)
+        slippage_rate = 0.001
+        slippage_cost = df['Trades'] * slippage_rate
+        
+        df['Transaction_Costs'] = commission_cost + slippage_cost
+        
+        # FIX BUG-3: Use Equity.pct_change() as the Source of Truth for returns.
+        # This is the most robust way to calculate net daily returns for a ticker
+        # because it captures all realized trades, costs, and mark-to-market.
+        df['Net_Strategy_Return'] = df['Equity'].pct_change().fillna(0)
+        
+        df['Cumulative_Market_Return'] = (1 + df['Log_Return']).cumprod()
+        df['Cumulative_Strategy_Return'] = (1 + df['Net_Strategy_Return']).cumprod()
+        
+        # Benchmark (XU100) Getirisi (Eğer veride varsa)
+        if 'XU100' in df.columns:
+            # XU100 getirisi hesapla
+            df['XU100_Return'] = df['XU100'].pct_change().fillna(0)
+            df['Cumulative_Benchmark_Return'] = (1 + df['XU100_Return']).cumprod()
+            
+            # İlk günleri normalize et (Backtest başlangıcında 1 olsun)
+            # df['Cumulative_Benchmark_Return'] = df['Cumulative_Benchmark_Return'] / df['Cumulative_Benchmark_Return'].iloc[0]
+        
+        # Checkpoint'e sadece simülasyonun ürettiği kolonlar girer (plot_drawdown / save_trade_log
+        # sonradan self.results'a Drawdown / Pos_Diff ekler)
+        self._simulation_columns = list(df.columns)
+        return df
+
+    # Simülasyon sonrası türetilen kolonlar (resume'da yeniden hesaplanır)
+    DERIVED_COLUMNS = ['Strategy_Return_Gross', 'Transaction_Costs', 'Net_Strategy_Return',
+                       'Cumulative_Market_Return', 'Cumulative_Strategy_Return',
+                       'XU100_Return', 'Cumulative_Benchmark_Return']
+
+    def get_checkpoint(self):
+        """Son run_backtest sonrası durumun checkpoint'i."""
+        if not hasattr(self, 'results'):
+            print("Önce run_backtest() çalıştırılmalı.")
+            return None
+        volumes = self.results['Volume'].to_numpy(dtype=float) if 'Volume' in self.results.columns else np.array([])
+        return BacktestCheckpoint(
+            state=copy.deepcopy(self._state),
+            kelly_history=[dict(t) for t in self.position_sizer.trade_history],
+            volume_tail=volumes[-(AVG_VOLUME_WINDOW - 1):],
+            is_weighted=self._is_weighted,
+            last_date=self.results.index[-1],
+            initial_capital=self.initial_capital,
+            commission=self.commission,
+            inputs_hash=self.hash_inputs(self._inputs),
+            results=self.results[getattr(self, '_simulation_columns', list(self.results.columns))].copy(),
+        )
+
+    def can_resume(self, df, inputs, checkpoint):
+        """
+        Checkpoint bu veri üzerinde devam ettirilebilir mi?
+        - Aynı sermaye / komisyon
+        - Checkpoint'in son barı veride var ve kapanış fiyatı değişmemiş
+        - Checkpoint'e kadarki sinyaller aynı (model / tahminler değişmemiş)
+        - Ortalama hacim penceresi dolmuş (ilk barlardaki bfill davranışı tekrar üretilemez)
+        """
+        if checkpoint.initial_capital != self.initial_capital or checkpoint.commission != self.commission:
+            return False
+        if len(checkpoint.results) < AVG_VOLUME_WINDOW or checkpoint.last_date not in df.index:
+            return False
+        if list(df.columns) != [c for c in checkpoint.results.columns if c in df.columns]:
+            return False
+        if not np.isclose(df.loc[checkpoint.last_date, 'Close'], checkpoint.state.last_close, rtol=1e-12):
+            return False
+        return self.hash_inputs(inputs.loc[:checkpoint.last_date]) == checkpoint.inputs_hash
+
+    def _resume_backtest(self, df, inputs, checkpoint):
+        """Checkpoint durumundan devam ederek sadece yeni barları simüle eder."""
+        state = copy.deepcopy(checkpoint.state)
+        self.position_sizer.reset(dict(t) for t in checkpoint.kelly_history)
+        self._state = state
+        self._is_weighted = checkpoint.is_weighted
+        self._inputs = inputs
+        self.resumed = True
+        
+        new = self.prepare_bars(df[df.index > checkpoint.last_date].copy())
+        previous = checkpoint.results.drop(columns=[c for c in self.DERIVED_COLUMNS if c in checkpoint.results.columns])
+        if new.empty:
+            self.results = checkpoint.results.copy()
+            self._simulation_columns = list(self.results.columns)
+            return self.results
+        
+        if 'Volume' in new.columns:
+            joined = np.concatenate([checkpoint.volume_tail, new['Volume'].to_numpy(dtype=float)])
+            avg_volumes = pd.Series(joined).rolling(AVG_VOLUME_WINDOW).mean().to_numpy()[len(checkpoint.volume_tail):]
+        else:
+            avg_volumes = np.zeros(len(new))
+        
+        bars = self._simulate_bars(new, inputs.loc[new.index].values, avg_volumes, checkpoint.is_weighted, state, start=0)
+        new['Position'] = bars['Position']
+        new['Actual_Weight'] = bars['Actual_Weight']
+        new['Trades'] = bars['Trades']
+        new['ExitReason'] = bars['ExitReason']
+        new['Equity'] = bars['Equity']
+        
+        # Türetilmiş kolonlar (kümülatif getiriler) tüm seri üzerinde vektörel olarak yeniden hesaplanır
+        df_all = pd.concat([previous, new[previous.columns]])
+        self.results = self._finalize_results(df_all)
+        return self.results
+
+    @staticmethod
+    def infer_weighted(inputs):
+        """Sinyal serisinin ağırlık (0.0-1.0 float) mı yoksa 1/0 sinyal mi olduğunu belirler."""
         if inputs.dtype == float:
             # Eğer float ve 0-1 arasındaysa weighted varsay
             if inputs.max() <= 1.0 and inputs.min() >= 0.0:
-                 is_weighted = True
-        
+                return True
+        return False
+
+    @staticmethod
+    def prepare_bars(df):
+        """Simülasyon için zorunlu kolonları (ATR, Regime) varsayılanlarla tamamlar."""
         # ATR verisi
         if 'ATR' not in df.columns:
             # print("UYARI: ATR sütunu bulunamadı, varsayılan volatilite kullanılacak.")
@@ -82,25 +307,124 @@ class Backtester:
         # Rejim Verisi
         if 'Regime' not in df.columns:
             df['Regime'] = 'Trend_Up' # Varsayılan
+        return df
+
+    @staticmethod
+    def day_numbers(dates):
+        """
+        Bar tarihlerini takvim günü numarasına çevirir (days_held hesabı için).
+        Intraday barlarda aynı seanstaki barlar aynı günü paylaşır.
+        """
+        return pd.DatetimeIndex(dates).values.astype('datetime64[D]').astype(np.int64)
+
+    @staticmethod
+    def _entry_day(entry_date):
+        if entry_date is None:
+            return 0
+        return int(np.datetime64(pd.Timestamp(entry_date), 'D').astype(np.int64))
+
+    def _simulate_bars(self, df, input_values, avg_volumes, is_weighted, state, start=0):
+        """
+        Bar bazlı simülasyon döngüsü.
+        `state` (BacktestState) giriş durumunu taşır ve döngü sonunda güncellenir;
+        böylece aynı döngü chunk chunk (streaming) veya kaldığı yerden devam ederek çalışabilir.
+        `start` öncesindeki barlar işlenmez (tam backtest'te ilk bar sadece başlangıç noktasıdır).
+        """
+        if self.use_compiled:
+            return self._simulate_bars_compiled(df, input_values, avg_volumes, is_weighted, state, start)
+        return self._simulate_bars_python(df, input_values, avg_volumes, is_weighted, state, start)
+
+    def _simulate_bars_compiled(self, df, input_values, avg_volumes, is_weighted, state, start=0):
+        """`_simulate_bars_python` ile birebir aynı mantık, Numba ile derlenmiş (core/backtest_kernel.py)."""
+        n = len(df)
+        dates = df.index
+        risk_manager = RiskManager()
+
+        # Rejim -> [stop_loss, trailing_stop, take_profit] çarpan tablosu (adjust_for_regime'den)
+        regime_params = np.zeros((3, 3))
+        for name, code in REGIME_CODES.items():
+            risk_manager.adjust_for_regime(name)
+            regime_params[code] = [risk_manager.stop_loss_mult, risk_manager.trailing_stop_mult,
+                                   risk_manager.take_profit_mult]
+        regime_codes = pd.Series(df['Regime'].values).map(REGIME_CODES).fillna(0).to_numpy(dtype=np.int64)
+
+        pnls = [t['pnl'] for t in self.position_sizer.trade_history]
+        wins = [p for p in pnls if p > 0]
+        losses = [p for p in pnls if p <= 0]
+        kelly_stats = np.array([len(wins), len(losses), sum(wins), sum(losses)], dtype=float)
+        # Sınırlı Kelly penceresi (deque maxlen) kernel'de halka tampon olarak sürdürülür
+        kelly_window = np.zeros(self.position_sizer.trade_history.maxlen or 0)
+        if len(kelly_window):
+            kelly_window[:len(pnls)] = pnls
+
+        volumes = df['Volume'].to_numpy(dtype=float) if 'Volume' in df.columns else np.zeros(n)
+
+        (positions, current_weights, trades, exit_codes, equities, new_state,
+         closed_pnls, cb_idx, entry_idx) = simulate_kernel(
+            df['Close'].to_numpy(dtype=float), df['Open'].to_numpy(dtype=float),
+            df['High'].to_numpy(dtype=float), df['ATR'].to_numpy(dtype=float),
+            regime_codes, self.day_numbers(dates),
+            np.asarray(input_values, dtype=float), volumes, np.asarray(avg_volumes, dtype=float),
+            bool(is_weighted), int(start),
+            float(state.cash), float(state.holdings_qty), float(state.entry_price),
+            self._entry_day(state.entry_date), float(state.peak_price), int(state.days_held),
+            float(state.peak_equity), bool(state.circuit_breaker_triggered), float(state.last_equity),
+            float(self.commission), regime_params, float(risk_manager.max_stop_loss_pct),
+            bool(risk_manager.trailing_active), int(risk_manager.min_holding_periods),
+            int(getattr(config, 'MIN_HOLDING_DAYS', 0)),
+            bool(getattr(config, 'ENABLE_RISK_SIZING', False)), bool(getattr(config, 'ENABLE_KELLY', True)),
+            float(getattr(config, 'RISK_PER_TRADE', 0.0)), float(config.MAX_SINGLE_POS_WEIGHT),
+            kelly_stats, kelly_window, int(len(pnls)),
+            float(self.position_sizer.initial_fraction), float(self.position_sizer.max_fraction))
+
+        if cb_idx >= 0:
+            print(f"!!! CIRCUIT BREAKER TETİKLENDİ ({dates[cb_idx].date()}) !!! İşlemler durduruluyor.")
+        for pnl in closed_pnls:
+            self.position_sizer.add_trade(float(pnl))
+
+        (state.cash, state.holdings_qty, state.entry_price, _, state.peak_price,
+         state.days_held, state.peak_equity, state.circuit_breaker_triggered) = new_state
+        if entry_idx >= 0:
+            state.entry_date = dates[entry_idx]
+        state.circuit_breaker_triggered = bool(state.circuit_breaker_triggered)
+        if n > start:
+            state.last_equity = equities[-1]
+            state.last_close = df['Close'].iloc[-1]
+
+        return {
+            'Position': positions,
+            'Actual_Weight': current_weights,
+            'Trades': trades,
+            'ExitReason': [EXIT_REASONS[c] for c in exit_codes],
+            'Equity': equities,
+        }
+
+    def _simulate_bars_python(self, df, input_values, avg_volumes, is_weighted, state, start=0):
+        """Referans (yorumlanan) bar döngüsü. Mantık değişiklikleri backtest_kernel.py'ye de yansıtılmalı."""
+        # Risk Yöneticisi
+        # Parametreleri her bar adjust_for_regime ile yeniden set edildiği için durumsuzdur.
+        risk_manager = RiskManager()
+        n = len(df)
         
         # Sonuç saklama
-        positions = np.zeros(len(df)) # 1 (Long) or 0 (Flat) - or actual weight?
+        positions = np.zeros(n) # 1 (Long) or 0 (Flat) - or actual weight?
         # Ağırlıklı sistemde position = current_weight
-        current_weights = np.zeros(len(df))
+        current_weights = np.zeros(n)
         
-        trades = np.zeros(len(df))
-        exit_reasons = [None] * len(df)
+        trades = np.zeros(n)
+        exit_reasons = [None] * n
         
         # YENİ: Equity Tracking Array
-        equities = np.zeros(len(df))
-        equities[0] = self.initial_capital
+        equities = np.zeros(n)
+        equities[:start] = state.last_equity
         
         # Durum Değişkenleri
-        in_position = False
-        entry_price = 0.0
-        entry_date = None
-        peak_price = 0.0
-        days_held = 0
+        in_position = state.holdings_qty > 0
+        entry_price = state.entry_price
+        entry_date = state.entry_date
+        entry_day = self._entry_day(entry_date)
+        peak_price = state.peak_price
+        days_held = state.days_held
         
         prices = df['Close'].values
         opens = df['Open'].values
@@ -109,23 +433,20 @@ class Backtester:
         atrs = df['ATR'].values
         regimes = df['Regime'].values
         dates = df.index
-        input_values = inputs.values
+        day_nums = self.day_numbers(dates)
         
-        # Volume ve Avg Volume hazırlığı (Slippage için)
-        volumes = df['Volume'].values if 'Volume' in df.columns else np.zeros(len(df))
-        # Basit 20 günlük ortalama hacim (pandas 3.0 uyumlu)
-        avg_volumes = df['Volume'].rolling(20).mean().bfill().values if 'Volume' in df.columns else np.zeros(len(df))
+        volumes = df['Volume'].values if 'Volume' in df.columns else np.zeros(n)
         
         # Equity Tracking
-        equity = self.initial_capital
-        cash = self.initial_capital
+        equity = state.last_equity
+        cash = state.cash
         holdings_value = 0.0
-        holdings_qty = 0.0 # Lot sayısı
+        holdings_qty = state.holdings_qty # Lot sayısı
         
-        peak_equity = equity
-        circuit_breaker_triggered = False
+        peak_equity = state.peak_equity
+        circuit_breaker_triggered = state.circuit_breaker_triggered
         
-        for i in range(1, len(df)):
+        for i in range(start, n):
             current_close = prices[i]
             current_open = opens[i]
             current_high = highs[i]
@@ -190,7 +511,8 @@ class Backtester:
             # 1. RISK MANAGER CHECKS (Stop Loss / Take Profit)
             # Sadece pozisyondaysak kontrol et
             if in_position:
-                days_held = (current_date - entry_date).days
+                # Takvim günü farkı (intraday'de seans içi barlar aynı gün sayılır)
+                days_held = int(day_nums[i] - entry_day)
                 if current_high > peak_price: peak_price = current_high
                 
                 check_res, reason = risk_manager.check_exit_conditions(current_close, entry_price, peak_price, current_atr, days_held)
@@ -306,6 +628,7 @@ class Backtester:
                              # Fresh entry
                              entry_price = executed_price # Use executed_price (slippage included)
                              entry_date = current_date
+                             entry_day = day_nums[i]
                              peak_price = current_close
                              
                  elif diff_qty < 0: # SELL
@@ -365,47 +688,29 @@ class Backtester:
             
             current_weights[i] = (holdings_qty * current_close) / equity if equity > 0 else 0
         
-        # Sonuçları DataFrame'e yaz
-        df['Position'] = positions
-        df['Actual_Weight'] = current_weights # FIX BUG-2 part 1: Track actual weight
-        df['Trades'] = trades 
-        df['ExitReason'] = exit_reasons
-        df['Equity'] = equities
-        
-        # Getiri Hesabı
-        # FIX BUG-2 part 2: Strategy return should be based on prior day's WEIGHT, not binary position
-        df['Strategy_Return_Gross'] = df['Actual_Weight'].shift(1).fillna(0) * df['Log_Return']
-        
-        # Maliyetler: Komisyon + Slippage
-        # Komisyon her işlemde (Al/Sat)
-        commission_cost = df['Trades'] * self.commission
-        
-        # Slippage her işlemde (Varsayılan %0.1)
-        slippage_rate = 0.001
-        slippage_cost = df['Trades'] * slippage_rate
-        
-        df['Transaction_Costs'] = commission_cost + slippage_cost
-        
-        # FIX BUG-3: Use Equity.pct_change() as the Source of Truth for returns.
-        # This is the most robust way to calculate net daily returns for a ticker
-        # because it captures all realized trades, costs, and mark-to-market.
-        df['Net_Strategy_Return'] = df['Equity'].pct_change().fillna(0)
-        
-        df['Cumulative_Market_Return'] = (1 + df['Log_Return']).cumprod()
-        df['Cumulative_Strategy_Return'] = (1 + df['Net_Strategy_Return']).cumprod()
+        # Durumu bir sonraki chunk için sakla
+        state.cash = cash
+        state.holdings_qty = holdings_qty
+        state.entry_price = entry_price
+        state.entry_date = entry_date
+        state.peak_price = peak_price
+        state.days_held = days_held
+        state.peak_equity = peak_equity
+        state.circuit_breaker_triggered = circuit_breaker_triggered
+        if n > start:
+            state.last_equity = equities[-1]
+            state.last_close = prices[-1]
         
-        # Benchmark (XU100) Getirisi (Eğer veride varsa)
-        if 'XU100' in df.columns:
-            # XU100 getirisi hesapla
-            df['XU100_Return'] = df['XU100'].pct_change().fillna(0)
-            df['Cumulative_Benchmark_Return'] = (1 + df['XU100_Return']).cumprod()
-            
-            # İlk günleri normalize et (Backtest başlangıcında 1 olsun)
-            # df['Cumulative_Benchmark_Return'] = df['Cumulative_Benchmark_Return'] / df['Cumulative_Benchmark_Return'].iloc[0]
-        
-        self.results = df
-        return df
+        return {
+            'Position': positions,
+            'Actual_Weight': current_weights,
+            'Trades': trades,
+            'ExitReason': exit_reasons,
+            'Equity': equities,
+        }
+
         
+    @traced('backtest.calculate_metrics', rows=None)
     def calculate_metrics(self):
         """Gelişmiş performans metriklerini hesaplar."""
         if not hasattr(self, 'results'):
@@ -422,10 +727,12 @@ class Backtester:
         # Per-ticker çoğu gün pozisyonda olmadığında daily_mean sıfırla dilüte oluyordu
         # → yıllık getiri < risk_free → Sharpe zorunlu negatif çıkıyordu.
         # CAGR = (1 + total_return)^(252 / trading_days) - 1
+        # Intraday'de yıllıklandırma bar sayısı üzerinden yapılır (252 x seans bar sayısı)
+        bars_per_year = config.get_bars_per_year()
         n_trading_days = max(len(returns), 1)
-        annual_return = (1 + total_return) ** (252.0 / n_trading_days) - 1 if total_return > -1 else 0.0
+        annual_return = (1 + total_return) ** (bars_per_year / n_trading_days) - 1 if total_return > -1 else 0.0
 
-        annual_volatility = returns.std() * np.sqrt(252)
+        annual_volatility = returns.std() * np.sqrt(bars_per_year)
 
         # FIX-A1: risk_free = 0  (per-ticker exposure-adjusted kontekst;
         # Türkiye risk-free %19-45 → anlamlı bir karşılaştırma yapılmaz)
@@ -457,7 +764,7 @@ class Backtester:
         
         # Sortino Ratio (Downside deviation)
         downside_returns = returns[returns < 0]
-        downside_std = downside_returns.std() * np.sqrt(252)
+        downside_std = downside_returns.std() * np.sqrt(bars_per_year)
         sortino_ratio = annual_return / downside_std if downside_std > 0 else 0
 
         # Information Ratio: Portföy vs XU100 (varsa)
@@ -473,9 +780,9 @@ class Backtester:
                 strat = returns.loc[common]
                 bench = df.loc[common, 'XU100_Return']
                 active = strat - bench
-                tracking_error = active.std() * np.sqrt(252)
+                tracking_error = active.std() * np.sqrt(bars_per_year)
                 if tracking_error > 0:
-                    information_ratio = (active.mean() * 252) / tracking_error
+                    information_ratio = (active.mean() * bars_per_year) / tracking_error
 
         # Omega Ratio (0 eşik etrafında getiri dağılımı)
         gains = returns[returns > 0]
@@ -495,20 +802,14 @@ class Backtester:
             pos = df['Position']
 
         if not pos.empty:
-            in_trade = False
-            start_idx = None
-            durations = []
-            for i, (idx, val) in enumerate(pos.items()):
-                if not in_trade and val > 0:
-                    in_trade = True
-                    start_idx = idx
-                elif in_trade and val == 0:
-                    # round-trip tamamlandı
-                    end_idx = idx
-                    durations.append((end_idx - start_idx).days)
-                    in_trade = False
-                    start_idx = None
-            if durations:
+            # Pozisyon geçişleri: 0 -> >0 giriş, >0 -> 0 çıkış (kapanmamış son trade hariç)
+            values = pos.to_numpy()
+            prev_in = np.concatenate([[False], values[:-1] > 0])
+            entries = np.flatnonzero((values > 0) & ~prev_in)
+            exits = np.flatnonzero((values == 0) & prev_in)
+            if len(exits):
+                dates = pd.DatetimeIndex(pos.index)
+                durations = (dates[exits] - dates[entries[:len(exits)]]).days
                 avg_holding_days = float(np.mean(durations))
 
         metrics = {
@@ -1,6 +1,7 @@
 """
 Dinamik Backtest Modülü - Optimize Edilmiş Versiyon
 Toplu veri indirme + Disk cache kullanarak hızlandırılmış.
+Eğitilmiş modeller ve sonuç payload'ları da cache'lenir (core/result_cache.py).
 """
 
 import pandas as pd
@@ -18,10 +19,25 @@ from configs import banking as config_banking
 from utils.feature_engineering import FeatureEngineer
 from models.ranking_model import RankingModel
 from core.backtesting import Backtester
+from core.result_cache import ResultCache, make_key, config_fingerprint, data_fingerprint
+from utils.tracing import tracer, traced
 
 # Cache directory
 CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
 
+# Model ve sonuç cache'leri (süreç boyunca paylaşılır, API thread'leri dahil)
+model_cache = ResultCache(
+    "models", CACHE_DIR,
+    max_entries=getattr(config, 'RESULT_CACHE_MAX_MODELS', 4),
+    max_disk_mb=getattr(config, 'RESULT_CACHE_MAX_DISK_MB', 512),
+    copy_values=False # Model salt-okunur kullanılıyor
+)
+payload_cache = ResultCache(
+    "payloads", CACHE_DIR,
+    max_entries=getattr(config, 'RESULT_CACHE_MAX_PAYLOADS', 64),
+    max_disk_mb=getattr(config, 'RESULT_CACHE_MAX_DISK_MB', 512)
+)
+
 
 def ensure_cache_dir():
     """Cache klasörünü oluştur."""
@@ -48,6 +64,15 @@ def load_cached_data(cache_key: str) -> Optional[Dict[str, pd.DataFrame]]:
     return None
 
 
+def data_snapshot_id(cache_key: str) -> Optional[str]:
+    """İşlenmiş veri cache dosyasının imzası (boyut + değişiklik zamanı). Dosya yoksa None."""
+    cache_file = os.path.join(CACHE_DIR, f"data_{cache_key}.pkl")
+    if not os.path.exists(cache_file):
+        return None
+    stat = os.stat(cache_file)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
 def save_to_cache(cache_key: str, data: Dict[str, pd.DataFrame]):
     """Veriyi cache'e kaydet."""
     ensure_cache_dir()
@@ -60,6 +85,7 @@ def save_to_cache(cache_key: str, data: Dict[str, pd.DataFrame]):
         print(f"Cache kaydetme hatası: {e}")
 
 
+@traced('data.batch_download', rows=len)
 def batch_download_data(tickers: list, start_date: str, end_date: str, 
                          progress_callback: Optional[callable] = None) -> Dict[str, pd.DataFrame]:
     """
@@ -239,6 +265,7 @@ def validate_dates(train_start: str, train_end: str, test_end: str) -> Dict[str,
     return {"valid": True, "error": None}
 
 
+@traced('dynamic_backtest.run', rows=None)
 def run_dynamic_backtest(
     train_start: str,
     train_end: str,
@@ -250,11 +277,17 @@ def run_dynamic_backtest(
     """
     Dinamik tarihlerle model eğitip backtest çalıştırır.
     Optimize edilmiş versiyon: Toplu indirme + cache.
+    
+    use_cache=True iken:
+    - Aynı veri snapshot'ı + config + parametreler için sonuç payload'ı doğrudan cache'den döner
+    - Aynı anda gelen özdeş istekler tek hesaplamada birleştirilir
+    - Eğitilmiş model, eğitim verisi + config değişmedikçe yeniden kullanılır
     """
     
     def update_progress(step: str, pct: int):
         if progress_callback:
             progress_callback(step, pct)
+        tracer.event(step, pct=pct)
         print(f"[{pct}%] {step}")
     
     # 1. Validasyon
@@ -263,6 +296,121 @@ def run_dynamic_backtest(
     if not validation["valid"]:
         return {"success": False, "error": validation["error"]}
     
+    if not use_cache:
+        return _compute_dynamic_backtest(train_start, train_end, test_end, initial_capital,
+                                         update_progress, use_cache=False)
+    
+    config_fp = config_fingerprint(config, config_banking)
+    request_key = make_key(config_fp, train_start, train_end, test_end, float(initial_capital))
+    cache_key = get_cache_key(train_start, train_end, test_end)
+    
+    def cached_run():
+        # Veri snapshot'ı değişmediyse sonuç doğrudan döner (veri yüklenmez, model eğitilmez)
+        snapshot = data_snapshot_id(cache_key)
+        if snapshot is not None:
+            payload = payload_cache.get(make_key(snapshot, request_key))
+            if payload is not None:
+                update_progress("Sonuç cache'den alındı!", 100)
+                payload["cached"] = True
+                return payload
+        
+        result = _compute_dynamic_backtest(train_start, train_end, test_end, initial_capital,
+                                           update_progress, use_cache=True, config_fp=config_fp)
+        snapshot = data_snapshot_id(cache_key)
+        if result.get("success") and snapshot is not None:
+            payload_cache.put(make_key(snapshot, request_key), result)
+        return result
+    
+    # Eşzamanlı özdeş istekler (örn. UI'dan art arda gelen) tek hesaplamayı bekler
+    return payload_cache.coalesce(request_key, cached_run)
+
+
+def _validation_split(frame):
+    """Son %10 tarih validasyon (run_dynamic_backtest / train_models ile aynı bölme)."""
+    dates = frame.index.get_level_values('Date')
+    unique_dates = dates.unique()
+    val_start_date = unique_dates[int(len(unique_dates) * 0.9)]
+    return frame[dates < val_start_date], frame[dates >= val_start_date]
+
+
+def _warm_start_anchor(df_train):
+    """
+    Artımlı eğitimin tabanı: eğitim verisinin son tarihinin ayının başı.
+    Aynı başlangıç ve aynı ay içinde biten istekler aynı taban modeli paylaşır; sonuç
+    istek sırasından bağımsızdır (taban her zaman aynı veriyle eğitilir).
+    """
+    dates = df_train.index.get_level_values('Date')
+    anchor = pd.Timestamp(dates.max()).to_period('M').start_time
+    new_days = dates[dates >= anchor].unique().size
+    if new_days == 0 or new_days > getattr(config, 'WARM_START_MAX_NEW_DAYS', 60):
+        return None
+    if (dates < anchor).sum() < 0.5 * len(dates): # Taban veri çok kısa: tam eğitim
+        return None
+    return anchor
+
+
+def _train_ranker(df_train, df_valid, all_train_data, update_progress, use_cache=True, config_fp=None):
+    """
+    LightGBM ranker'ı eğitir; eğitim verisi + config aynıysa cache'deki modeli kullanır.
+    DYNAMIC_BACKTEST_WARM_START açıksa model, ay başına kadar olan veriyle eğitilmiş
+    (cache'lenen) taban modelden artımlı eğitilir (models/incremental_training.py).
+    """
+    custom_params = getattr(config, 'OPTIMIZED_MODEL_PARAMS', None)
+    config_fp = config_fp or config_fingerprint(config, config_banking)
+
+    def full_train(frame_train, frame_valid):
+        ranker = RankingModel(frame_train, config_banking)
+        ranker.train(valid_df=frame_valid, custom_params=custom_params)
+        return {'model': ranker.model, 'feature_names': ranker.feature_names}
+
+    def as_ranker(bundle):
+        ranker = RankingModel(pd.DataFrame(), config_banking)
+        ranker.model = bundle['model']
+        ranker.feature_names = bundle['feature_names']
+        return ranker
+
+    def train():
+        update_progress("LightGBM eğitiliyor...", 55)
+        anchor = _warm_start_anchor(df_train) if getattr(config, 'DYNAMIC_BACKTEST_WARM_START', False) else None
+        if anchor is None:
+            return full_train(df_train, df_valid)
+
+        from models.incremental_training import validation_ndcg, warm_start_train
+        dates = df_train.index.get_level_values('Date')
+        base_data = df_train[dates < anchor]
+        base_key = make_key('ranker-base', data_fingerprint([base_data]), config_fp)
+        base_fn = lambda: full_train(*_validation_split(base_data))
+        base = as_ranker(model_cache.get_or_compute(base_key, base_fn) if use_cache else base_fn())
+
+        update_progress("LightGBM artımlı eğitiliyor...", 60)
+        ranker = warm_start_train(base, df_train, df_valid, config_banking, custom_params)
+        # Artımlı model tabandan kötüyse tam eğitim (karar deterministik: aynı veri -> aynı model)
+        if validation_ndcg(ranker, df_valid, config_banking) < \
+                validation_ndcg(base, df_valid, config_banking) - getattr(config, 'WARM_START_NDCG_TOLERANCE', 0.01):
+            return full_train(df_train, df_valid)
+        return {'model': ranker.model, 'feature_names': ranker.feature_names}
+    
+    if use_cache:
+        model_key = make_key('ranker', data_fingerprint(all_train_data), config_fp)
+        bundle = model_cache.get_or_compute(model_key, train)
+    else:
+        bundle = train()
+    
+    return as_ranker(bundle)
+
+
+@traced('dynamic_backtest.compute', rows=None)
+def _compute_dynamic_backtest(
+    train_start: str,
+    train_end: str,
+    test_end: str,
+    initial_capital: float,
+    update_progress: callable,
+    use_cache: bool = True,
+    config_fp: Optional[str] = None
+) -> Dict[str, Any]:
+    """Veri hazırlama + model eğitimi + backtest (sonuç cache'i dışındaki hesaplama yolu)."""
+    
     # 2. Cache kontrol
     cache_key = get_cache_key(train_start, train_end, test_end)
     cached_processed = None
@@ -278,7 +426,7 @@ def run_dynamic_backtest(
     
     if cached_processed is None:
         # Toplu indirme
-        raw_data = batch_download_data(tickers, train_start, test_end, progress_callback)
+        raw_data = batch_download_data(tickers, train_start, test_end, update_progress)
         
         if not raw_data:
             return {"success": False, "error": "Veri indirilemedi"}
@@ -342,20 +490,10 @@ def run_dynamic_backtest(
     full_train.sort_index(inplace=True)
     
     # Validation split
-    dates = full_train.index.get_level_values('Date').unique()
-    split_idx = int(len(dates) * 0.9)
-    val_start_date = dates[split_idx]
-    
-    train_mask = full_train.index.get_level_values('Date') < val_start_date
-    valid_mask = full_train.index.get_level_values('Date') >= val_start_date
+    df_train, df_valid = _validation_split(full_train)
     
-    df_train = full_train[train_mask]
-    df_valid = full_train[valid_mask]
-    
-    update_progress("LightGBM eğitiliyor...", 55)
-    ranker = RankingModel(df_train, config_banking)
-    custom_params = getattr(config, 'OPTIMIZED_MODEL_PARAMS', None)
-    ranker.train(valid_df=df_valid, custom_params=custom_params)
+    ranker = _train_ranker(df_train, df_valid, all_train_data, update_progress,
+                           use_cache=use_cache, config_fp=config_fp)
     
     # 5. Backtest
     update_progress("Backtest çalıştırılıyor...", 70)
@@ -424,13 +562,13 @@ def run_dynamic_backtest(
     
     # Calculate metrics
     n_days = max(len(port_daily_ret), 1)
-    cagr = (1 + total_ret) ** (252.0 / n_days) - 1 if total_ret > -1 else 0.0
-    ann_vol = port_daily_ret.std() * np.sqrt(252)
+    cagr = (1 + total_ret) ** (config.get_bars_per_year() / n_days) - 1 if total_ret > -1 else 0.0
+    ann_vol = port_daily_ret.std() * np.sqrt(config.get_bars_per_year())
     sharpe = cagr / ann_vol if ann_vol > 0 else 0
     
     # Sortino
     neg_rets = port_daily_ret[port_daily_ret < 0]
-    downside_vol = neg_rets.std() * np.sqrt(252) if len(neg_rets) > 0 else ann_vol
+    downside_vol = neg_rets.std() * np.sqrt(config.get_bars_per_year()) if len(neg_rets) > 0 else ann_vol
     sortino = cagr / downside_vol if downside_vol > 0 else 0
     
     # Max Drawdown
@@ -12,6 +12,7 @@ class FeatureStore:
         self.base_dir = base_dir
         self.fundamentals_path = os.path.join(base_dir, 'fundamentals.parquet')
         self.market_data_path = os.path.join(base_dir, 'market_data.parquet') # Gelecek kullanımı için
+        self.market_data_dir = os.path.join(base_dir, 'market_data') # Hisse bazlı bar verisi (chunk okunabilir)
         
         # Dizini oluştur
         os.makedirs(self.base_dir, exist_ok=True)
@@ -76,6 +77,51 @@ class FeatureStore:
         self.save_fundamentals(df)
         return df
 
+    def _market_data_file(self, ticker: str, timeframe: str = 'D') -> str:
+        safe_ticker = ticker.replace('.', '_').replace(':', '')
+        return os.path.join(self.market_data_dir, f"{safe_ticker}_{timeframe}.parquet")
+
+    def save_market_data(self, ticker: str, df: pd.DataFrame, timeframe: str = 'D', row_group_size: int = 50_000):
+        """
+        Hisse bar verisini (OHLCV + feature/sinyal kolonları) Parquet olarak kaydeder.
+        Küçük row group'lar sayesinde dosya daha sonra sabit bellekle chunk chunk okunabilir.
+        """
+        os.makedirs(self.market_data_dir, exist_ok=True)
+        path = self._market_data_file(ticker, timeframe)
+        
+        out = df.reset_index()
+        out.rename(columns={out.columns[0]: 'Date'}, inplace=True)
+        out['Date'] = pd.to_datetime(out['Date'])
+        out.to_parquet(path, engine='pyarrow', index=False, row_group_size=row_group_size)
+        return path
+
+    def iter_market_data(self, ticker: str, timeframe: str = 'D', chunk_size: int = 50_000, columns=None):
+        """
+        Kaydedilmiş bar verisini `chunk_size` satırlık DataFrame parçaları halinde döner (generator).
+        Dosyanın tamamı belleğe alınmaz.
+        """
+        import pyarrow.parquet as pq
+        
+        path = self._market_data_file(ticker, timeframe)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Market data not found: {path}")
+            
+        if columns is not None and 'Date' not in columns:
+            columns = ['Date'] + list(columns)
+            
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            chunk = batch.to_pandas()
+            chunk.set_index('Date', inplace=True)
+            yield chunk
+
+    def load_market_data(self, ticker: str, timeframe: str = 'D') -> pd.DataFrame:
+        """Kaydedilmiş bar verisini tek seferde okur (yoksa boş DataFrame)."""
+        path = self._market_data_file(ticker, timeframe)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_parquet(path, engine='pyarrow').set_index('Date')
+
     def get_latest_ratios(self, ticker: str) -> dict:
         """Belirli bir hisse için en son rasyoları döner (Canlı işlem için)"""
         df = self.load_fundamentals(tickers=[ticker])
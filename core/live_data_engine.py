@@ -44,8 +44,7 @@ class LiveDataEngine:
         try:
             print(f"[LiveData] Attempting YFinance for {len(tickers)} tickers...")
             # Interval map
-            interval_map = {'D': '1d', 'W': '1wk', 'M': '1mo'}
-            yf_interval = interval_map.get(config.TIMEFRAME, '1d')
+            yf_interval = config.YF_INTERVAL_MAP.get(config.TIMEFRAME, '1d')
             
             # yfinance bazen boş döner ama hata atmaz, kontrol et
             data = yf.download(tickers, period="5d", interval=yf_interval, progress=False, group_by='ticker')
@@ -66,7 +66,7 @@ def vectorized_macro_gate(
             usd_change = df["USDTRY_Change"].shift(1)
         else:
             # Fallback: ham seriden hesapla
-            lookback = 1 if getattr(config, "TIMEFRAME", "D") == "W" else 5
+            lookback = 1 if getattr(config, "TIMEFRAME", "D") == "W" else config.days_to_bars(5)
             usd_change = df["USDTRY"].pct_change(lookback).shift(1)
         mask |= usd_change > thresholds["USDTRY_CHANGE_5D"]
 
@@ -75,7 +75,7 @@ def vectorized_macro_gate(
         if "SP500_Return" in df.columns:
             sp_mom = df["SP500_Return"].shift(1)
         else:
-            lookback = 1 if getattr(config, "TIMEFRAME", "D") == "W" else 5
+            lookback = 1 if getattr(config, "TIMEFRAME", "D") == "W" else config.days_to_bars(5)
             sp_mom = df["SP500"].pct_change(lookback).shift(1)
         mask |= sp_mom < thresholds["SP500_MOMENTUM"]
 
@@ -0,0 +1,121 @@
+"""
+Piyasa Durumu Servisi
+Rejim tespitindeki piyasa geneli bileşenleri (USD/TRY şoku, VIX, S&P500 momentumu)
+her tarih için bir kez hesaplar ve tüm hisselere yayınlar.
+
+Bu seriler her hisse için aynıdır; hisse başına yeniden hesaplamak yerine panelin makro
+kolonlarından tek bir tarih indeksinde hesaplanıp cache'lenir. Hisseye özgü kontroller
+(kendi volatilitesi, Close çöküşü, SMA200, RSI) RegimeDetector'da kalır.
+
+Kullanım:
+    from core.market_state import market_state
+    components = market_state.components_for_panel(panel)   # {ticker: df}
+    RegimeDetector(df).detect_regimes(market=components)
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import config
+
+MARKET_COLUMNS = ['USDTRY_Change', 'VIX_Risk', 'SP500_Return']
+
+
+def crisis_window():
+    """Türkiye kriz skorundaki rolling pencereler: haftalıkta 4 bar, diğerlerinde 30 günlük bar sayısı."""
+    return 4 if getattr(config, 'TIMEFRAME', 'D') == 'W' else config.days_to_bars(30)
+
+
+def market_crisis_components(df, window=None):
+    """
+    Kriz skorunun piyasa geneli kısmı (RegimeDetector.detect_turkey_crisis Check 1-3).
+
+    Returns:
+        DataFrame: USD_Crisis, VIX_Crisis, SP500_Crisis ve toplamları Market_Crisis_Score (int)
+    """
+    window = window or crisis_window()
+    out = pd.DataFrame(0, index=df.index, columns=['USD_Crisis', 'VIX_Crisis', 'SP500_Crisis'])
+
+    # Check 1: Extreme USD/TRY movement (30-day persistent)
+    if 'USDTRY_Change' in df.columns:
+        usd_rolling = df['USDTRY_Change'].rolling(window, min_periods=window).sum()
+        out['USD_Crisis'] = (usd_rolling > 0.10).astype(int) * 2 + \
+            ((usd_rolling > 0.05) & (usd_rolling <= 0.10)).astype(int)
+
+    # Check 2: VIX spike
+    if 'VIX_Risk' in df.columns:
+        out['VIX_Crisis'] = (df['VIX_Risk'] > 30.0).astype(int) * 2
+
+    # Check 3: S&P500 momentum (global risk-off)
+    if 'SP500_Return' in df.columns:
+        sp500_rolling = df['SP500_Return'].rolling(window, min_periods=window).sum()
+        out['SP500_Crisis'] = (sp500_rolling < -0.10).astype(int)
+
+    out['Market_Crisis_Score'] = out.sum(axis=1)
+    return out
+
+
+def panel_macro_frame(panel):
+    """
+    Hisse panelinden ({ticker: df}) tek makro tablo: tüm tarihlerin birleşimi,
+    her tarih için ilk dolu değer (makro seriler hisseler arasında aynıdır).
+    """
+    frames = [df[[c for c in MARKET_COLUMNS if c in df.columns]] for df in panel.values()]
+    frames = [f for f in frames if not f.empty and len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+    macro = pd.concat(frames)
+    macro = macro[~macro.index.isna()]
+    return macro.groupby(level=0, sort=True).first()
+
+
+class MarketStateService:
+    """Makro tabloya göre piyasa bileşenlerini hesaplar; aynı içerik için sonucu bellekte tutar (LRU)."""
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(macro, window):
+        digest = hashlib.sha1(str(window).encode())
+        digest.update(repr(list(macro.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(macro, index=True).values.tobytes())
+        return digest.hexdigest()
+
+    def components(self, macro, window=None):
+        """Makro tablo (tarih indeksli) için bileşenler; içerik hash'i ile cache'lenir."""
+        window = window or crisis_window()
+        key = self._key(macro, window)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+
+        result = market_crisis_components(macro, window)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = result
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    def components_for_panel(self, panel, window=None):
+        """Panelin makro kolonlarından bileşenler (tüm hisseler için tek hesap)."""
+        return self.components(panel_macro_frame(panel), window)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+market_state = MarketStateService()
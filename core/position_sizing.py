@@ -1,12 +1,22 @@
 
+from collections import deque
+
 import numpy as np
 import pandas as pd
 
+import config
+
 class KellyPositionSizer:
-    def __init__(self, initial_fraction=0.25, max_fraction=0.50):
+    def __init__(self, initial_fraction=0.25, max_fraction=0.50, lookback=None):
         self.initial_fraction = initial_fraction  # Fractional Kelly (Tam Kelly çok riskli olabilir)
         self.max_fraction = max_fraction          # Tek işlemde sermayenin maksimum ne kadarı riske edilecek
-        self.trade_history = []                   # [{'pnl': 0.05}, {'pnl': -0.02}, ...]
+        # Kelly son `lookback` trade'den hesaplanır (0 / None: sınırsız)
+        self.lookback = lookback if lookback is not None else getattr(config, 'KELLY_LOOKBACK_TRADES', 100)
+        self.reset()
+
+    def reset(self, history=()):
+        """Trade geçmişini (son `lookback` trade'lik deque) sıfırlar / verilen geçmişle kurar."""
+        self.trade_history = deque(history, maxlen=self.lookback or None) # [{'pnl': 0.05}, {'pnl': -0.02}, ...]
         
     def add_trade(self, pnl_pct):
         """Yeni bir trade sonucunu geçmişe ekler."""
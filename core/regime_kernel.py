@@ -0,0 +1,135 @@
+"""
+Rejim Kernel'leri (Derlenmiş Döngüler)
+`RegimeDetector.detect_regimes` içindeki satır döngülerinin birebir sayısal karşılıkları.
+
+- expanding_quantiles: pandas `expanding(min_periods).quantile(q)` (linear interpolasyon) ile aynı;
+  değerler rank'e sıkıştırılıp Fenwick ağacında tutulur, her bar O(log n).
+- debounce_regimes: ham rejim sinyalinin en az `min_days` bar kalıcı olma kuralı.
+- regime_confidence: son 11 barda mevcut rejimle aynı olanların oranı.
+
+Numba yoksa aynı fonksiyonlar Python döngüsü olarak çalışır (bkz. core/backtest_kernel.py).
+Mantık değişikliği yapılırken models/regime_detection.RegimeStream de güncellenmelidir
+(bkz. tests/test_regime_engine.py parity testleri).
+"""
+
+import numpy as np
+
+from core.backtest_kernel import njit
+
+CONFIDENCE_WINDOW = 10
+
+
+@njit(cache=True)
+def _fenwick_kth(tree, k, log_size):
+    # k. en küçük elemanın rank'i (1-indeksli k, 0-indeksli rank döner)
+    pos = 0
+    step = log_size
+    while step > 0:
+        nxt = pos + step
+        if nxt < len(tree) and tree[nxt] < k:
+            pos = nxt
+            k -= tree[nxt]
+        step >>= 1
+    return pos
+
+
+@njit(cache=True)
+def _expanding_quantiles_kernel(values, ranks, sorted_values, quantiles, min_periods):
+    n = len(values)
+    n_q = len(quantiles)
+    out = np.full((n, n_q), np.nan)
+    size = len(sorted_values)
+    tree = np.zeros(size + 1, dtype=np.int64)
+    log_size = 1
+    while log_size * 2 <= size:
+        log_size *= 2
+
+    nobs = 0
+    for i in range(n):
+        r = ranks[i]
+        if r >= 0:
+            j = r + 1
+            while j <= size:
+                tree[j] += 1
+                j += j & (-j)
+            nobs += 1
+
+        if nobs == 0 or nobs < min_periods:
+            continue
+        for qi in range(n_q):
+            # pandas calc_quantile (linear) ile aynı formül
+            idx_with_fraction = quantiles[qi] * (nobs - 1)
+            idx = int(idx_with_fraction)
+            vlow = sorted_values[_fenwick_kth(tree, idx + 1, log_size)]
+            if idx_with_fraction == idx:
+                out[i, qi] = vlow
+            else:
+                vhigh = sorted_values[_fenwick_kth(tree, idx + 2, log_size)]
+                out[i, qi] = vlow + (vhigh - vlow) * (idx_with_fraction - idx)
+    return out
+
+
+def expanding_quantiles(values, quantiles, min_periods=1):
+    """
+    Birden çok expanding quantile'ı tek geçişte hesaplar.
+
+    Returns:
+        (n, len(quantiles)) dizisi; yeterli gözlem yoksa NaN
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    ranks = np.full(len(values), -1, dtype=np.int64)
+    order = np.argsort(values[valid], kind='stable')
+    valid_ranks = np.empty(len(order), dtype=np.int64)
+    valid_ranks[order] = np.arange(len(order))
+    ranks[valid] = valid_ranks
+    sorted_values = values[valid][order]
+    return _expanding_quantiles_kernel(values, ranks, sorted_values,
+                                       np.asarray(quantiles, dtype=np.float64), max(int(min_periods), 1))
+
+
+@njit(cache=True)
+def debounce_regimes(regimes_raw, min_days):
+    """Rejim sinyali en az `min_days` bar boyunca kalıcı olmalı (ilk min_days bar ham değer)."""
+    n = len(regimes_raw)
+    final_regimes = np.zeros(n, dtype=np.int64)
+    current_stable = 0
+    candidate = 0
+    candidate_count = 0
+
+    for i in range(n):
+        r = regimes_raw[i]
+        if i < min_days:
+            final_regimes[i] = r
+            current_stable = r
+            continue
+
+        if r == current_stable:
+            candidate = r
+            candidate_count = 0
+        else:
+            if r == candidate:
+                candidate_count += 1
+            else:
+                candidate = r
+                candidate_count = 1
+            if candidate_count >= min_days:
+                current_stable = candidate
+                candidate_count = 0
+
+        final_regimes[i] = current_stable
+    return final_regimes
+
+
+@njit(cache=True)
+def regime_confidence(regimes, window=CONFIDENCE_WINDOW):
+    """Son window+1 barda (mevcut dahil) mevcut rejimle aynı olanların oranı; ilk window bar 0.5."""
+    n = len(regimes)
+    out = np.full(n, 0.5)
+    for i in range(window, n):
+        same = 0
+        for j in range(i - window, i + 1):
+            if regimes[j] == regimes[i]:
+                same += 1
+        out[i] = same / (window + 1)
+    return out
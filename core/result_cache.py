@@ -0,0 +1,225 @@
+"""
+Sonuç Cache Modülü
+Eğitilmiş modelleri ve backtest sonuç payload'larını (veri snapshot'ı, config hash'i
+ve istek parametrelerine göre) saklar.
+
+- Bellek (LRU) + disk (joblib) katmanı, ikisi de boyut sınırlı
+- Aynı anahtar için eşzamanlı istekler tek hesaplamada birleştirilir (coalescing):
+  ilk gelen hesaplar, diğerleri sonucu bekler
+- Hatalı sonuçlar cache'lenmez
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import pandas as pd
+
+# Hesaplama mantığı değişirse eski sonuçları geçersiz kılmak için artırılır
+CACHE_VERSION = 1
+
+_MISSING = object()
+
+
+def make_key(*parts) -> str:
+    """Parçalardan (str/sayı/dict/list) kararlı bir hash anahtarı üretir."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+def config_fingerprint(*modules) -> str:
+    """
+    Config modüllerindeki BÜYÜK HARFLİ ayarların hash'i.
+    Herhangi bir parametre değişirse (model parametreleri, portföy boyutu, risk ayarları...)
+    cache anahtarı da değişir.
+    """
+    settings = []
+    for module in modules:
+        values = {}
+        for name in dir(module):
+            if not name.isupper():
+                continue
+            value = getattr(module, name)
+            if isinstance(value, (str, int, float, bool, list, tuple, dict, type(None))):
+                values[name] = value
+        settings.append((module.__name__, values))
+    return make_key(CACHE_VERSION, settings)
+
+
+def frame_hash(df) -> str:
+    """
+    DataFrame'in tam içerik hash'i: kolon isimleri, dtype'lar, index ve tüm hücreler.
+    Feature, makro ve label kolonlarından herhangi biri değişirse hash de değişir.
+    """
+    digest = hashlib.sha1(repr(list(df.columns)).encode())
+    digest.update(repr(list(df.dtypes.astype(str))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:20]
+
+
+def data_fingerprint(frames) -> str:
+    """
+    DataFrame listesinin içerik hash'i (frame_hash: tüm kolonlar + index). Sadece Close'a bakmak
+    makro / feature / label değişikliklerinde eski model veya backtest sonucunu döndürüyordu.
+    """
+    return make_key(CACHE_VERSION, [frame_hash(df) for df in frames])
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    def __init__(self, name, cache_dir, max_entries=32, max_disk_mb=256, copy_values=True):
+        """
+        name: Cache adı (disk klasörü: cache_dir/name)
+        max_entries: Bellekte tutulacak en fazla kayıt (LRU)
+        max_disk_mb: Disk kullanım sınırı; aşılırsa en eski kullanılan dosyalar silinir
+        copy_values: Dönen değerler kopyalansın mı (payload'lar için evet, salt-okunur modeller için hayır)
+        """
+        self.name = name
+        self.copy_values = copy_values
+        self.dir = os.path.join(cache_dir, name)
+        self.max_entries = max_entries
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    def _path(self, key):
+        return os.path.join(self.dir, f"{key}.joblib")
+
+    def _copy(self, value):
+        return copy.deepcopy(value) if self.copy_values else value
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Bellekten, yoksa diskten okur. copy_values açıksa dönen değer kopyadır (cache bozulmasın)."""
+        with self._lock:
+            value = self._memory.get(key, _MISSING)
+            if value is not _MISSING:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._copy(value)
+
+        path = self._path(key)
+        if os.path.exists(path):
+            try:
+                value = joblib.load(path)
+                os.utime(path) # LRU için erişim zamanını güncelle
+            except Exception as e:
+                print(f"[Cache:{self.name}] Okuma hatası ({key}): {e}")
+                return default
+            with self._lock:
+                self._remember(key, value)
+                self.stats['hits'] += 1
+            return self._copy(value)
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, self._copy(value))
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            tmp_path = self._path(key) + '.tmp'
+            joblib.dump(value, tmp_path)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        except Exception as e:
+            print(f"[Cache:{self.name}] Kaydetme hatası ({key}): {e}")
+
+    def _evict_disk(self):
+        """Disk sınırı aşılırsa en eski erişilen dosyaları siler."""
+        files = []
+        for fname in os.listdir(self.dir):
+            if fname.endswith('.joblib'):
+                path = os.path.join(self.dir, fname)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def coalesce(self, key, compute_fn):
+        """
+        Aynı anahtar için eşzamanlı çağrıları birleştirir (sonuç saklanmaz).
+        İlk çağrı compute_fn'i çalıştırır, diğerleri bekleyip aynı sonucu alır.
+        """
+        with self._lock:
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = _InFlight()
+                self._inflight[key] = inflight
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return self._copy(inflight.value)
+
+        try:
+            inflight.value = compute_fn()
+            return self._copy(inflight.value)
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.event.set()
+
+    def get_or_compute(self, key, compute_fn, should_cache=None):
+        """
+        Cache'de varsa döner, yoksa (eşzamanlı istekleri birleştirerek) hesaplayıp saklar.
+        should_cache: Sonucun saklanıp saklanmayacağına karar veren fonksiyon (örn. success kontrolü).
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        def compute_and_store():
+            # Beklerken başka bir işlem hesaplamış olabilir
+            cached = self.get(key, _MISSING)
+            if cached is not _MISSING:
+                return cached
+            result = compute_fn()
+            if should_cache is None or should_cache(result):
+                self.put(key, result)
+            return result
+
+        return self.coalesce(key, compute_and_store)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.dir):
+            for fname in os.listdir(self.dir):
+                if fname.endswith('.joblib'):
+                    os.remove(os.path.join(self.dir, fname))
@@ -0,0 +1,360 @@
+"""
+Örneklem Dışı Skor Deposu
+run_backtest.py ve auto_tune her çalıştırmada `ranker.predict(full_df)` ile
+tüm paneli yeniden skorlayıp (Date × Ticker) tablosuna çeviriyordu. Bu modül skorları
+(model versiyonu, tarih, hisse) anahtarıyla `data/score_store/<model versiyonu>/` altında
+Parquet parçaları olarak saklar:
+
+- model_version: Model içeriğinin hash'i (LightGBM booster metni, CatBoost cbm, TFT ağırlıkları
+  + dataset parametreleri). Yeni eğitilen / promote edilen model yeni anahtar demektir
+- predict: df satırlarıyla hizalı skorlar; depoda olan satırlar okunur, sadece eksikler
+  tahmin edilir. Depoya sadece tam geçmişle (config.START_DATE) feature üreten toplu iş
+  (`fill`, persist=True) yazar: kısa geçmişle (örn. auto_tune'un 180 günlük verisi; SMA_200,
+  252 günlük ortalamalar NaN) hesaplanan skorlar depoya girmez, sonuç hangi tüketicinin önce
+  çalıştığına bağlı olmaz. HybridEnsemble'da üyelerin ham skorları ayrı saklanır, karışım
+  okumada yapılır (ağırlık değişikliği yeniden çıkarım gerektirmez); TFT eksik satırları tüm
+  geçmişle tahmin eder
+- matrix: Hazır (Date × Ticker) skor tablosu (feature hesabı ve çıkarım olmadan)
+- Bugünün (kapanışı henüz kesinleşmemiş) satırları tahmin edilir ama depoya yazılmaz
+
+Not: Skorlar feature'lara bağlıdır. Feature hesabı değişirse SCORE_STORE_VERSION artırılır;
+geçmiş veri düzeltilirse ilgili model `drop` ile temizlenir.
+
+Kullanım:
+    from core.score_store import score_store
+    scores = score_store.predict(ranker, full_df)      # full_df satırlarıyla hizalı (depoya yazmaz)
+    pivot = score_store.matrix(model_version(ranker), start='2024-01-01')
+
+    python -m core.score_store fill --model lightgbm   # ilk doldurma / günlük ekleme (kapanıştan sonra)
+    python -m core.score_store list
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# Feature hesabı veya skor mantığı değişirse eski skorları geçersiz kılmak için artırılır
+SCORE_STORE_VERSION = 1
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_DIR = os.path.join(ROOT_DIR, getattr(config, 'SCORE_STORE_DIR', 'data/score_store'))
+
+
+def _inner(model):
+    """Sarmalayıcıların (RankingModel / CatBoostRankingModel) içindeki model nesnesi."""
+    return getattr(model, 'model', None) if hasattr(model, 'feature_names') else model
+
+
+def model_version(model):
+    """
+    Modelin içerik hash'ine dayalı versiyon anahtarı (örn. 'lightgbm-3f2a...').
+    Sarmalayıcıda saklanır; içteki model değişirse (yeniden eğitim) yeniden hesaplanır.
+    """
+    inner = _inner(model)
+    cached = getattr(model, '_score_version', None)
+    if cached is not None and cached[0] == id(inner):
+        return cached[1]
+
+    digest = hashlib.sha1(repr(SCORE_STORE_VERSION).encode())
+    digest.update(repr(list(getattr(model, 'feature_names', None) or [])).encode())
+    module = type(getattr(inner, 'booster_', inner)).__module__ # fit_ranker sonucu TrainedRanker: booster_
+    if module.startswith('lightgbm'):
+        kind = 'lightgbm'
+        booster = getattr(inner, 'booster_', inner)
+        digest.update(booster.model_to_string().encode())
+    elif module.startswith('catboost'):
+        kind = 'catboost'
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'model.cbm')
+            inner.save_model(path, format='cbm')
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    elif hasattr(inner, 'params') and hasattr(inner, 'model') and hasattr(inner.model, 'state_dict'):
+        import joblib
+        kind = 'tft' # TFTPredictor: ağırlıklar + dataset parametreleri (scaler / normalizer'lar)
+        for name, tensor in inner.model.state_dict().items():
+            digest.update(name.encode())
+            digest.update(tensor.detach().cpu().numpy().tobytes())
+        digest.update(joblib.hash(inner.params).encode())
+    else:
+        import joblib
+        kind = type(inner).__name__.lower()
+        digest.update(joblib.hash(inner).encode())
+
+    key = f"{kind}-{digest.hexdigest()[:16]}"
+    try:
+        model._score_version = (id(inner), key)
+    except AttributeError:
+        pass
+    return key
+
+
+def row_index(df):
+    """df satırlarının (Date, Ticker) indeksi (Date indeks veya seviye, Ticker seviye veya kolon)."""
+    if isinstance(df.index, pd.MultiIndex) and {'Date', 'Ticker'} <= set(df.index.names):
+        dates, tickers = df.index.get_level_values('Date'), df.index.get_level_values('Ticker')
+    else:
+        dates = df.index.get_level_values('Date') if 'Date' in (df.index.names or []) else df.index
+        if 'Ticker' not in df.columns:
+            raise ValueError("Skor deposu için Ticker kolonu veya indeks seviyesi gerekli.")
+        tickers = df['Ticker']
+    return pd.MultiIndex.from_arrays([pd.to_datetime(np.asarray(dates)), np.asarray(tickers, dtype=object)],
+                                     names=['Date', 'Ticker'])
+
+
+class ScoreStore:
+    """
+    Model versiyonu başına (Date, Ticker) -> Score. Her ekleme yeni bir Parquet parçası yazar
+    (atomik); okumada parçalar birleştirilir (aynı satır için son yazılan geçerli) ve parça
+    sayısı max_parts'ı aşarsa tek dosyada birleştirilir. Okunan tablolar, parçalar
+    değişmedikçe bellekte tutulur.
+    """
+
+    def __init__(self, base_dir=STORE_DIR, max_parts=64, enabled=True):
+        self.base_dir = base_dir
+        self.max_parts = max_parts
+        self.enabled = enabled
+        self._frames = {} # anahtar -> (parça imzası, Series)
+        self._lock = threading.Lock()
+        self.stats = {'stored_rows': 0, 'scored_rows': 0}
+
+    def _dir(self, key):
+        return os.path.join(self.base_dir, key)
+
+    def _parts(self, key):
+        path = self._dir(key)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.parquet'))
+
+    def keys(self):
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(k for k in os.listdir(self.base_dir) if self._parts(k))
+
+    # --- Okuma -----------------------------------------------------------
+
+    def read(self, key, start=None, end=None, tickers=None):
+        """Depodaki skorlar: (Date, Ticker) indeksli, sıralı Series (yoksa boş)."""
+        parts = self._parts(key)
+        signature = tuple((p, os.stat(p).st_mtime_ns) for p in parts)
+        with self._lock:
+            cached = self._frames.get(key)
+        if cached is not None and cached[0] == signature:
+            scores = cached[1]
+        else:
+            if parts:
+                frame = pd.concat([pd.read_parquet(p, engine='pyarrow') for p in parts], ignore_index=True)
+                frame = frame.drop_duplicates(['Date', 'Ticker'], keep='last')
+                scores = frame.set_index(['Date', 'Ticker'])['Score'].sort_index()
+            else:
+                scores = pd.Series(dtype=np.float64, name='Score',
+                                   index=pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), []], names=['Date', 'Ticker']))
+            with self._lock:
+                self._frames[key] = (signature, scores)
+
+        if start is not None or end is not None or tickers is not None:
+            dates = scores.index.get_level_values('Date')
+            mask = np.ones(len(scores), dtype=bool)
+            if start is not None:
+                mask &= dates >= pd.Timestamp(start)
+            if end is not None:
+                mask &= dates <= pd.Timestamp(end)
+            if tickers is not None:
+                mask &= scores.index.get_level_values('Ticker').isin(list(tickers))
+            scores = scores[mask]
+        return scores
+
+    def matrix(self, key, start=None, end=None, tickers=None):
+        """Hazır (Date × Ticker) skor tablosu."""
+        return self.read(key, start, end, tickers).unstack('Ticker')
+
+    def last_date(self, key):
+        scores = self.read(key)
+        return scores.index.get_level_values('Date').max() if len(scores) else None
+
+    # --- Yazma -----------------------------------------------------------
+
+    def append(self, key, scores):
+        """(Date, Ticker) indeksli skorları yeni parça olarak ekler (aynı satırlar güncellenir)."""
+        if len(scores) == 0:
+            return 0
+        frame = pd.DataFrame({'Date': pd.to_datetime(scores.index.get_level_values('Date')),
+                              'Ticker': scores.index.get_level_values('Ticker').astype(str),
+                              'Score': np.asarray(scores, dtype=np.float64)})
+        directory = self._dir(key)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{time.time_ns()}.parquet")
+        frame.to_parquet(f"{path}.tmp", engine='pyarrow', index=False)
+        os.replace(f"{path}.tmp", path)
+        if len(self._parts(key)) > self.max_parts:
+            self.compact(key)
+        return len(frame)
+
+    def compact(self, key):
+        """Parçaları tek dosyada birleştirir."""
+        parts = self._parts(key)
+        if len(parts) <= 1:
+            return
+        frame = self.read(key).reset_index()
+        path = os.path.join(self._dir(key), f"part-{time.time_ns()}.parquet")
+        frame.to_parquet(f"{path}.tmp", engine='pyarrow', index=False)
+        os.replace(f"{path}.tmp", path)
+        for part in parts:
+            os.remove(part)
+
+    def drop(self, key):
+        shutil.rmtree(self._dir(key), ignore_errors=True)
+        with self._lock:
+            self._frames.pop(key, None)
+
+    # --- Skorlama --------------------------------------------------------
+
+    def predict(self, model, df, persist=False):
+        """
+        df satırlarıyla hizalı skorlar (model.predict(df) ile aynı). Depoda olmayan satırlar
+        tahmin edilir. HybridEnsemble üyeleri ayrı saklanır, karışım burada yapılır.
+
+        Args:
+            persist: Tahmin edilen satırları depoya ekle (sadece tam geçmişli toplu iş: fill)
+        """
+        if not self.enabled:
+            return model.predict(df)
+        if hasattr(model, 'member_predictions') and hasattr(model, 'combine'):
+            return self._predict_ensemble(model, df, persist)
+        return self.member_scores(model, df, persist)
+
+    def _predict_ensemble(self, ensemble, df, persist=False):
+        from models.tft_inference import TFTPredictor
+
+        if ensemble.lgbm is None:
+            raise ValueError("LightGBM modeli yüklü değil.")
+        if ensemble.tft and not isinstance(ensemble.tft, TFTPredictor):
+            return ensemble.predict(df) # Eski TFT sarmalayıcısı satır hizalı değil: depo kullanılmaz
+        lgbm_pred = self.member_scores(ensemble.lgbm, df, persist)
+        tft_pred = None
+        if ensemble.tft:
+            try:
+                tft_pred = self.member_scores(ensemble.tft, df, persist)
+            except ValueError as e:
+                print(f"⚠️ TFT tahmini atlandı: {e}")
+        return ensemble.combine(df, lgbm_pred, tft_pred)
+
+    def member_scores(self, model, df, persist=False):
+        """Tek modelin df satırlarıyla hizalı skorları (depo + eksiklerin tahmini)."""
+        key = model_version(model)
+        rows = row_index(df)
+        stored = self.read(key)
+        at = stored.index.get_indexer(rows) if len(stored) else np.full(len(rows), -1)
+        missing = at < 0
+        out = np.full(len(rows), np.nan)
+        out[~missing] = stored.to_numpy()[at[~missing]]
+        self.stats['stored_rows'] += int((~missing).sum())
+
+        if missing.any():
+            out[missing] = self._predict_rows(model, df, missing)
+            self.stats['scored_rows'] += int(missing.sum())
+            # Bugünün barı kapanmadan hesaplanmış olabilir: depoya yazılmaz
+            final = (missing if persist else np.zeros(len(rows), dtype=bool)) & (rows.get_level_values('Date') < pd.Timestamp.today().normalize())
+            if final.any():
+                self.append(key, pd.Series(out[final], index=rows[final]))
+        return out
+
+    @staticmethod
+    def _predict_rows(model, df, missing):
+        from models.tft_inference import TFTPredictor
+
+        if isinstance(model, TFTPredictor):
+            # Encoder geçmişi için tüm df verilir, sadece eksik satırlar ileri geçirilir
+            return model.predict(df, rows=missing).to_numpy()[missing]
+        return np.asarray(model.predict(df[missing]), dtype=np.float64)
+
+
+score_store = ScoreStore(
+    max_parts=getattr(config, 'SCORE_STORE_MAX_PARTS', 64),
+    enabled=getattr(config, 'SCORE_STORE', True)
+)
+
+
+# ---------------------------------------------------------
+# Toplu skorlama (ilk doldurma + günlük ekleme)
+# ---------------------------------------------------------
+def load_model(name):
+    """run_backtest.py ile aynı modeller: 'lightgbm' | 'catboost' | 'ensemble'."""
+    from configs import banking as config_banking
+    from models.model_registry import model_registry
+
+    if name == 'ensemble':
+        from models.ensemble_model import HybridEnsemble
+        ranker = HybridEnsemble()
+        ranker.load_models("models/saved/global_ranker.pkl", "models/saved/tft_model.pth")
+        return ranker
+    registry_name = 'global_ranker_catboost' if name == 'catboost' else 'global_ranker'
+    return model_registry.load(registry_name, config_banking)
+
+
+def load_panel(tickers=None):
+    """Tüm hisselerin feature'ları (Date indeksli, Ticker kolonlu tek DataFrame)."""
+    from utils.data_loader import DataLoader
+    from utils.feature_engineering import FeatureEngineer
+
+    loader = DataLoader(start_date=config.START_DATE)
+    frames = []
+    for ticker in tickers or config.TICKERS:
+        raw = loader.get_combined_data(ticker)
+        if raw is None or len(raw) < 100:
+            continue
+        df = FeatureEngineer(raw).process_all(ticker)
+        df['Ticker'] = ticker
+        frames.append(df)
+    return pd.concat(frames) if frames else pd.DataFrame()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Örneklem dışı skor deposu")
+    sub = parser.add_subparsers(dest='command', required=True)
+    fill = sub.add_parser('fill', help="Eksik (model, tarih, hisse) skorlarını hesaplayıp ekle")
+    fill.add_argument('--model', default='lightgbm', choices=['lightgbm', 'catboost', 'ensemble'])
+    fill.add_argument('--start', default=None, help="Bu tarihten önceki satırlar skorlanmaz")
+    sub.add_parser('list', help="Depodaki model versiyonları")
+    compact = sub.add_parser('compact', help="Parçaları birleştir")
+    compact.add_argument('key')
+    drop = sub.add_parser('drop', help="Bir model versiyonunun skorlarını sil")
+    drop.add_argument('key')
+    args = parser.parse_args()
+
+    if args.command == 'fill':
+        model = load_model(args.model)
+        if model is None:
+            print(f"❌ {args.model} modeli bulunamadı")
+            return
+        panel = load_panel()
+        if args.start:
+            panel = panel[panel.index >= pd.Timestamp(args.start)]
+        started = time.perf_counter()
+        score_store.predict(model, panel, persist=True)
+        print(f"✅ {len(panel)} satır: {score_store.stats['stored_rows']} depodan, "
+              f"{score_store.stats['scored_rows']} yeni skorlandı ({time.perf_counter() - started:.1f} sn)")
+    elif args.command == 'list':
+        for key in score_store.keys():
+            scores = score_store.read(key)
+            dates = scores.index.get_level_values('Date')
+            print(f"{key:<28} {len(scores):>8} satır | {dates.min():%Y-%m-%d} .. {dates.max():%Y-%m-%d} "
+                  f"| {len(score_store._parts(key))} parça")
+    elif args.command == 'compact':
+        score_store.compact(args.key)
+    else:
+        score_store.drop(args.key)
+
+
+if __name__ == "__main__":
+    main()
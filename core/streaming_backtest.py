@@ -0,0 +1,247 @@
+"""
+Streaming Backtest Modülü
+Bar verisini chunk chunk tüketerek sabit bellekle backtest çalıştırır.
+
+`Backtester.run_backtest` tüm veriyi bellekte tutar ve sonuç kolonlarını ekler.
+Dakikalık bar / geniş evren gibi uzun geçmişlerde bunun yerine:
+- Bar'lar Feature Store'dan (Parquet row group'ları) parça parça okunur
+- Simülatör durumu (nakit, lot, giriş fiyatı/tarihi, zirve, circuit breaker) chunk sınırlarında
+  `BacktestState` ile taşınır; Kelly işlem geçmişi state'te değil, motorun (`self.engine`)
+  position_sizer'ında süreç içinde kalır (son KELLY_LOOKBACK_TRADES trade'lik deque; checkpoint'e
+  BacktestCheckpoint.kelly_history ile girer)
+- Equity ve trade log CSV'ye artımlı yazılır, metrikler akan (running) istatistiklerle hesaplanır
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import config
+
+from core.backtesting import AVG_VOLUME_WINDOW, Backtester, BacktestState
+from core.feature_store import feature_store
+
+
+class StreamingBacktester:
+    def __init__(self, initial_capital=10000, commission=0.002, ticker="UNKNOWN",
+                 output_dir="reports/streaming", signal_col="Weight", weighted=None):
+        """
+        signal_col: Chunk içindeki sinyal/ağırlık kolonu.
+        weighted: None ise ilk chunk'tan çıkarılır (Backtester.infer_weighted).
+        """
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.ticker = ticker
+        self.output_dir = output_dir
+        self.signal_col = signal_col
+        self.weighted = weighted
+
+        # Simülasyon mantığı Backtester'dan gelir (tek kaynak)
+        self.engine = Backtester(pd.DataFrame(), initial_capital=initial_capital, commission=commission)
+        self.state = BacktestState.initial(initial_capital)
+
+        safe_ticker = ticker.replace('.', '_').replace(':', '')
+        self.equity_path = os.path.join(output_dir, f"equity_{safe_ticker}.csv")
+        self.trades_path = os.path.join(output_dir, f"trades_{safe_ticker}.csv")
+
+        self._reset_stream()
+
+    def _reset_stream(self):
+        self._volume_tail = np.array([])
+        self._pending = []
+        self._started = False
+        self._open_trade = None
+        self._prev_position = 0.0
+
+        # Running metrikler (n, ortalama, M2)
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._n_down = 0
+        self._mean_down = 0.0
+        self._m2_down = 0.0
+        self._peak_equity = self.initial_capital
+        self._max_drawdown = 0.0
+        self._num_trades = 0.0
+        self._first_date = None
+        self._last_date = None
+
+    def _avg_volumes(self, chunk):
+        """Önceki chunk'ın son hacimleriyle birleştirerek 20 barlık ortalama hacmi hesaplar."""
+        if 'Volume' not in chunk.columns:
+            return np.zeros(len(chunk))
+
+        volumes = chunk['Volume'].to_numpy(dtype=float)
+        joined = np.concatenate([self._volume_tail, volumes])
+        avg = pd.Series(joined).rolling(AVG_VOLUME_WINDOW).mean()
+        if not self._started:
+            # Tam backtest'teki bfill davranışı (ilk pencere dolana kadar)
+            avg = avg.bfill()
+        self._volume_tail = joined[-(AVG_VOLUME_WINDOW - 1):]
+        return avg.to_numpy()[len(joined) - len(volumes):]
+
+    @staticmethod
+    def _merge_moments(n_a, mean_a, m2_a, values):
+        """Chan/Welford birleştirmesi: önceki (n, mean, M2) ile yeni chunk'ın momentlerini birleştirir."""
+        n_b = len(values)
+        if n_b == 0:
+            return n_a, mean_a, m2_a
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        mean = mean_a + delta * n_b / n
+        m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+        return n, mean, m2
+
+    def _update_metrics(self, returns, equities, trades):
+        self._n, self._mean, self._m2 = self._merge_moments(self._n, self._mean, self._m2, returns)
+        self._n_down, self._mean_down, self._m2_down = self._merge_moments(
+            self._n_down, self._mean_down, self._m2_down, returns[returns < 0])
+
+        running_peak = np.maximum.accumulate(np.concatenate([[self._peak_equity], equities]))[1:]
+        drawdowns = (equities - running_peak) / running_peak
+        self._max_drawdown = min(self._max_drawdown, float(drawdowns.min()))
+        self._peak_equity = float(running_peak[-1])
+        self._num_trades += float(trades.sum())
+
+    def _write_trades(self, chunk, positions, exit_reasons):
+        """Pozisyon geçişlerinden trade log üretir (Backtester.save_trade_log ile aynı format)."""
+        closes = chunk['Close'].to_numpy()
+        rows = []
+        prev = self._prev_position
+        for i, date in enumerate(chunk.index):
+            pos = positions[i]
+            if pos - prev == 1:
+                self._open_trade = (date, closes[i])
+            elif pos - prev == -1 and self._open_trade is not None:
+                entry_date, entry_price = self._open_trade
+                gross_pct = (closes[i] - entry_price) / entry_price
+                total_cost_pct = (self.commission + 0.001) * 2
+                rows.append({
+                    'Entry Date': entry_date,
+                    'Entry Price': entry_price,
+                    'Exit Date': date,
+                    'Exit Price': closes[i],
+                    'Gross Return': gross_pct,
+                    'Net Return': gross_pct - total_cost_pct,
+                    'Reason': exit_reasons[i]
+                })
+                self._open_trade = None
+            prev = pos
+        self._prev_position = prev
+
+        if rows:
+            header = not os.path.exists(self.trades_path)
+            pd.DataFrame(rows).to_csv(self.trades_path, mode='a', header=header, index=False)
+
+    def process_chunk(self, chunk, force=False):
+        """Tek bir bar chunk'ını simüle eder ve sonuçları diske ekler."""
+        if chunk.empty:
+            return
+
+        # İlk simülasyondan önce ortalama hacim penceresini dolduracak kadar bar biriktir
+        # (tam backtest'teki bfill ile birebir aynı sonuç için)
+        if not self._started:
+            self._pending.append(chunk)
+            if not force and sum(len(c) for c in self._pending) < AVG_VOLUME_WINDOW:
+                return
+            chunk = pd.concat(self._pending)
+            self._pending = []
+
+        chunk = self.engine.prepare_bars(chunk.copy())
+        inputs = chunk[self.signal_col].fillna(0)
+
+        if self.weighted is None:
+            self.weighted = self.engine.infer_weighted(inputs)
+
+        avg_volumes = self._avg_volumes(chunk)
+        start = 0 if self._started else 1
+
+        prev_equity = self.state.last_equity
+        bars = self.engine._simulate_bars(chunk, inputs.to_numpy(), avg_volumes, self.weighted, self.state, start=start)
+
+        equities = bars['Equity']
+        returns = equities / np.concatenate([[prev_equity], equities[:-1]]) - 1
+        if not self._started:
+            returns[0] = 0.0 # pct_change().fillna(0) ile aynı
+            self._first_date = chunk.index[0]
+
+        out = pd.DataFrame({
+            'Close': chunk['Close'].to_numpy(),
+            'Position': bars['Position'],
+            'Actual_Weight': bars['Actual_Weight'],
+            'Trades': bars['Trades'],
+            'ExitReason': bars['ExitReason'],
+            'Equity': equities,
+            'Net_Strategy_Return': returns,
+        }, index=chunk.index)
+        out.to_csv(self.equity_path, mode='a', header=not os.path.exists(self.equity_path))
+        self._write_trades(chunk, bars['Position'], bars['ExitReason'])
+
+        self._update_metrics(returns, equities, bars['Trades'])
+        self._last_date = chunk.index[-1]
+        self._started = True
+
+    def run(self, chunks):
+        """
+        chunks: DataFrame iterable'ı (OHLCV + ATR/Regime + sinyal kolonu), tarih sıralı.
+        Dönüş: Özet metrikler (dict).
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        for path in (self.equity_path, self.trades_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+        self.state = BacktestState.initial(self.initial_capital)
+        self.engine.position_sizer.reset() # Kelly geçmişi de baştan
+        self._reset_stream()
+
+        for chunk in chunks:
+            self.process_chunk(chunk)
+
+        # Pencere dolmadan biten kısa seriler
+        if self._pending:
+            self.process_chunk(self._pending.pop(), force=True)
+
+        return self.calculate_metrics()
+
+    def run_from_store(self, ticker=None, timeframe='D', chunk_size=50_000, store=None):
+        """Feature Store'daki bar verisi üzerinde streaming backtest çalıştırır."""
+        store = store or feature_store
+        ticker = ticker or self.ticker
+        return self.run(store.iter_market_data(ticker, timeframe=timeframe, chunk_size=chunk_size))
+
+    def calculate_metrics(self):
+        """Running istatistiklerden Backtester.calculate_metrics ile uyumlu özet metrikler."""
+        n = max(self._n, 1)
+        total_return = self.state.last_equity / self.initial_capital - 1
+        bars_per_year = config.get_bars_per_year()
+        annual_return = (1 + total_return) ** (bars_per_year / n) - 1 if total_return > -1 else 0.0
+
+        std = np.sqrt(self._m2 / (self._n - 1)) if self._n > 1 else 0.0
+        annual_volatility = std * np.sqrt(bars_per_year)
+        sharpe_ratio = annual_return / annual_volatility if annual_volatility > 0 else 0
+
+        downside_std = np.sqrt(self._m2_down / (self._n_down - 1)) * np.sqrt(bars_per_year) if self._n_down > 1 else 0.0
+        sortino_ratio = annual_return / downside_std if downside_std > 0 else 0
+
+        max_drawdown = self._max_drawdown
+        calmar_ratio = annual_return / abs(max_drawdown) if max_drawdown != 0 else 0
+
+        return {
+            'Total Return': total_return,
+            'CAGR': annual_return,
+            'Annual Return': annual_return,
+            'Volatility': annual_volatility,
+            'Sharpe Ratio': sharpe_ratio,
+            'Max Drawdown': max_drawdown,
+            'Calmar Ratio': calmar_ratio,
+            'Sortino Ratio': sortino_ratio,
+            'Num Trades': self._num_trades / 2,
+            'Bars': self._n,
+            'Start': self._first_date,
+            'End': self._last_date,
+            'Final Equity': self.state.last_equity,
+        }
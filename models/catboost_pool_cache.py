@@ -0,0 +1,185 @@
+"""
+CatBoost Quantize Edilmiş Pool Cache'i
+CatBoostRankingModel her eğitimde Pool'u baştan kuruyor (label hesabı + tarih grupları) ve
+CatBoost feature'ları her fit'te yeniden quantize ediyordu (border hesabı). Bu modül
+quantize edilmiş Pool'ları veri içerik hash'i + feature / label ayarları + quantization
+parametrelerine göre `cache/catboost_pools/*.qpool` olarak saklar:
+
+- train_catboost.py çalıştırmaları, Optuna denemeleri ve validasyon split'leri aynı
+  pool'ları yeniden kullanır (bellek LRU + disk)
+- Validasyon pool'u eğitim pool'unun border'larıyla (`*.borders`) quantize edilir; CatBoost'un
+  ham eval_set'i eğitim border'larıyla quantize etmesiyle aynıdır (model değişmez)
+
+Kullanım:
+    train_pool = pool_cache.pool(train_model, params)
+    val_pool = pool_cache.pool(valid_model, params, reference=train_pool)
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import catboost
+from catboost import Pool
+
+import config
+from models.ranking_dataset import matrix_cache
+
+# Border hesabını etkileyen CatBoost parametreleri (pool anahtarına girer)
+QUANTIZATION_PARAMS = ['border_count', 'max_bin', 'feature_border_type', 'per_float_feature_quantization',
+                       'nan_mode']
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "catboost_pools")
+
+
+def quantization_params(params):
+    """Eğitim parametrelerinden quantization'ı etkileyenler."""
+    return {k: params[k] for k in QUANTIZATION_PARAMS if k in params and params[k] is not None}
+
+
+def fit_params(params):
+    """Quantize edilmiş pool ile fit parametreleri (quantization parametreleri pool'da uygulandı)."""
+    return {k: v for k, v in params.items() if k not in QUANTIZATION_PARAMS}
+
+
+class CatBoostPoolCache:
+    """
+    Quantize edilmiş CatBoost Pool'ları: bellek (LRU) + disk (Pool.save).
+    Anahtar: veri içerik hash'i + label ayarları + quantization parametreleri + CatBoost sürümü
+    (+ validasyonda referans pool anahtarı).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=4, max_disk_mb=1024, persist=True):
+        self.dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.persist = persist
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+        self._borders_tmp = None # persist=False iken border dosyaları (cache nesnesi ömürlü geçici dizin)
+
+    def _key(self, model, q_params, reference):
+        data_key = matrix_cache.key(model.data, model.config, True, None, model.data_key())
+        ref_key = getattr(reference, '_cache_key', None) if reference is not None else None
+        payload = repr(('catboost', data_key, sorted(q_params.items()), ref_key, catboost.__version__))
+        return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+    def _path(self, key, ext='qpool'):
+        return os.path.join(self.dir, f"{key}.{ext}")
+
+    def _remember(self, key, pool):
+        with self._lock:
+            self._memory[key] = pool
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def pool(self, model, params, reference=None):
+        """
+        CatBoostRankingModel'in eğitim verisi için quantize edilmiş Pool.
+        reference: Validasyon için eğitim pool'u (aynı border'lar)
+        """
+        q_params = quantization_params(params)
+        key = self._key(model, q_params, reference)
+        model.feature_names = model.feature_columns(model.data)
+        with self._lock:
+            pool = self._memory.get(key)
+            if pool is not None:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                return pool
+
+        path = self._path(key)
+        pool = None
+        if self.persist and os.path.exists(path):
+            try:
+                pool = Pool(f"quantized://{path}")
+                os.utime(path) # LRU için erişim zamanını güncelle
+                self.stats['disk_hits'] += 1
+            except Exception as e:
+                print(f"[PoolCache] Okuma hatası ({key}): {e}")
+                pool = None
+
+        if pool is None:
+            pool = model.prepare_data(is_training=True)
+            if reference is not None:
+                pool.quantize(input_borders=self._borders(reference), **q_params)
+            else:
+                pool.quantize(**q_params)
+            self.stats['misses'] += 1
+            if self.persist:
+                self._save(pool, key)
+
+        pool._cache_key = key
+        self._remember(key, pool)
+        return pool
+
+    def _borders(self, reference):
+        """
+        Referans pool'un border dosyası (yoksa yazılır). persist=False iken cache dizinine
+        yazılmaz; dosya cache nesnesiyle birlikte silinen geçici dizinde tutulur.
+        """
+        key = getattr(reference, '_cache_key', None)
+        if key is None:
+            raise ValueError("Referans pool cache'ten gelmeli (pool_cache.pool)")
+        if self.persist:
+            path = self._path(key, 'borders')
+        else:
+            if self._borders_tmp is None:
+                self._borders_tmp = tempfile.TemporaryDirectory(prefix='catboost_borders_')
+            path = os.path.join(self._borders_tmp.name, f"{key}.borders")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            reference.save_quantization_borders(path)
+        return path
+
+    def _save(self, pool, key):
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            tmp_path = self._path(key) + '.tmp'
+            pool.save(tmp_path)
+            os.replace(tmp_path, self._path(key))
+            pool.save_quantization_borders(self._path(key, 'borders'))
+            self._evict_disk()
+        except Exception as e:
+            print(f"[PoolCache] Kaydetme hatası ({key}): {e}")
+
+    def _evict_disk(self):
+        """Disk sınırı aşılırsa en eski erişilen pool'ları (ve border dosyalarını) siler."""
+        files = []
+        for fname in os.listdir(self.dir):
+            if fname.endswith('.qpool'):
+                path = os.path.join(self.dir, fname)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                borders = path[:-len('qpool')] + 'borders'
+                if os.path.exists(borders):
+                    os.remove(borders)
+            except OSError:
+                pass
+
+    def clear(self, disk=True):
+        with self._lock:
+            self._memory.clear()
+        if disk and os.path.isdir(self.dir):
+            for fname in os.listdir(self.dir):
+                if fname.endswith(('.qpool', '.borders')):
+                    os.remove(os.path.join(self.dir, fname))
+
+
+pool_cache = CatBoostPoolCache(
+    max_entries=getattr(config, 'CATBOOST_POOL_CACHE_SIZE', 4),
+    max_disk_mb=getattr(config, 'CATBOOST_POOL_CACHE_MAX_DISK_MB', 1024),
+    persist=getattr(config, 'CATBOOST_POOL_CACHE', True)
+)
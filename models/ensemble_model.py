@@ -6,97 +6,134 @@ import joblib
 import torch
 
 import config
+from models.ensemble_weights import blend, ensemble_members, load_ensemble_weights
+from models.label_engine import date_codes
 
 class HybridEnsemble:
     def __init__(self, lgbm_model=None, tft_model=None):
         self.lgbm = lgbm_model
         self.tft = tft_model
-        
-        # Load weights from config
-        lgbm_w = getattr(config, 'HYBRID_WEIGHT', 0.6)
-        tft_w = 1.0 - lgbm_w
-        self.weights = {'lgbm': lgbm_w, 'tft': tft_w}
-        print(f"DEBUG: Hybrid Weights set to: {self.weights}")
+        self.set_weights()
+
+    def set_weights(self):
+        """
+        Ağırlıklar: registry'deki optimize edilmiş üretim versiyonu yüklü üyelerle (LightGBM + TFT
+        versiyonu) seçilmişse oradan (models/ensemble_weights.py), yoksa config'ten (rank karışımı).
+        Üyeler load_models ile değişince yeniden çağrılır.
+        """
+        stored = None
+        if self.lgbm is not None:
+            stored = load_ensemble_weights(members=ensemble_members(self.lgbm, self.tft))
+        if stored:
+            self.weights = {'lgbm': stored['lgbm'], 'tft': stored['tft']}
+            self.normalization = stored.get('normalization', 'global_rank')
+        else:
+            lgbm_w = getattr(config, 'HYBRID_WEIGHT', 0.6)
+            self.weights = {'lgbm': lgbm_w, 'tft': 1.0 - lgbm_w}
+            self.normalization = 'global_rank'
+        print(f"DEBUG: Hybrid Weights set to: {self.weights} ({self.normalization})")
         
     def load_models(self, lgbm_path, tft_path, tft_config=None):
         """Eğitilmiş modelleri yükler"""
-        # LightGBM (RankingModel) yükle
-        from models.ranking_model import RankingModel
-        self.lgbm = RankingModel.load(lgbm_path)
+        # LightGBM (RankingModel) yükle - registry'de üretim versiyonu varsa native formattan, bellekte tutulur
+        from models.model_registry import model_registry
+        self.lgbm = model_registry.load_path(lgbm_path)
         print(f"✅ LightGBM modeli yüklendi: {lgbm_path}")
         
-        # TFT Model yükle
-        if tft_config:
-            from models.transformer_model import BIST30TransformerModel
-            # Yeni instance oluştur
-            self.tft_wrapper = BIST30TransformerModel(tft_config)
-            # Modeli yükle (Architecture dataset'ten gelmeliydi ama burada state dict yükleyeceğiz)
-            # NOT: TFT load işlemi dataset parametrelerini gerektirir. 
-            # Bu yüzden eğitimden sonra tüm modeli (pickle) veya parametreleri kaydetmek daha iyi.
-            # Şimdilik placeholder.
-            pass
-            
+        # TFT Model yükle - ağırlıklar + hiperparametreler (dataset parametreleri dahil) bir kez
+        # yüklenip süreç boyunca bellekte tutulur (models/tft_inference.py)
+        try:
+            from models.tft_inference import get_predictor
+            self.tft = get_predictor(tft_path)
+        except Exception as e:
+            print(f"⚠️ TFT yüklenemedi: {e}")
+            self.tft = None
+        if self.tft is None:
+            print(f"⚠️ TFT modeli / hiperparametreleri bulunamadı ({tft_path}), sadece LightGBM kullanılacak.")
+        else:
+            print(f"✅ TFT modeli yüklendi: {tft_path}")
+        self.set_weights()
+
     def predict(self, df, tft_dataset=None):
         """
         Tahminleri birleştirir.
         df: LightGBM için DataFrame
         tft_dataset: TFT için TimeSeriesDataSet veya DataLoader
         """
+        lgbm_pred, tft_pred = self.member_predictions(df)
+        return self.combine(df, lgbm_pred, tft_pred)
+
+    def combine(self, df, lgbm_pred, tft_pred):
+        """Üye tahminlerini karıştırır (core/score_store.py depodaki üye skorlarıyla da çağırır)."""
+        # Eğer TFT yoksa veya başarısızsa sadece LGBM dön (Soft fallback)
+        if tft_pred is None or not np.isfinite(tft_pred).any():
+            return lgbm_pred
+
+        # 3. Ağırlıklı Ortalama
+        # LGBM LambdaRank score üretir (büyük sınır yok), TFT Return tahmini üretir (yüzdesel, küçük);
+        # ikisi de ortak ölçeğe (varsayılan: 0-1 arası rank) çevrilip karıştırılır.
+        # TFT tahmini olmayan satırlarda (kısa geçmiş) LightGBM skoru kullanılır
+        codes, n_groups = (None, None) if self.normalization == 'global_rank' else date_codes(df.index[:len(lgbm_pred)])
+        return blend(lgbm_pred, tft_pred, self.weights['lgbm'], codes, n_groups, self.normalization)
+
+    def member_predictions(self, df):
+        """LightGBM ve TFT tahminleri (TFT yoksa / başarısızsa None; geçmişi yetmeyen satırlar NaN)."""
         if self.lgbm is None:
             raise ValueError("LightGBM modeli yüklü değil.")
-            
         # 1. LightGBM Tahmini
         lgbm_pred = self.lgbm.predict(df)
         
         # 2. TFT Tahmini
         tft_pred = None
         if self.tft:
-            # TFT wrapper üzerinden tahmin al
-            # Eğer self.tft bir wrapper instance ise:
-            tft_pred = self.tft.predict(df) # Wrapper handle data conversion hopefully
-            # Tensor to numpy
-            if isinstance(tft_pred, torch.Tensor):
-                tft_pred = tft_pred.cpu().numpy()
-            
-            # Boyut eşitleme (Flatten)
-            tft_pred = tft_pred.flatten()
-            
-        # Eğer TFT yoksa veya başarısızsa sadece LGBM dön (Soft fallback)
-        if tft_pred is None:
-            return lgbm_pred
-            
-        # Uzunluk kontrolü
-        min_len = min(len(lgbm_pred), len(tft_pred))
-        lgbm_pred = lgbm_pred[:min_len]
-        tft_pred = tft_pred[:min_len]
-        
-        # 3. Ağırlıklı Ortalama
-        # Normalizasyon gerekebilir (Rank vs Return)
-        # LGBM LambdaRank score üretir (büyük sınır yok)
-        # TFT Return tahmini üretir (yüzdesel, küçük)
-        
-        # Bu yüzden ikisini de 0-1 arasına veya Rank'e çevirmek mantıklı.
-        # Basitlik için Rank Averaging yapalım:
-        
-        from scipy.stats import rankdata
-        rank_lgbm = rankdata(lgbm_pred)
-        rank_tft = rankdata(tft_pred)
-        
-        # Normalized Ranks (0 to 1)
-        norm_rank_lgbm = rank_lgbm / len(rank_lgbm)
-        norm_rank_tft = rank_tft / len(rank_tft)
-        
-        ensemble_score = (
-            self.weights['lgbm'] * norm_rank_lgbm + 
-            self.weights['tft'] * norm_rank_tft
-        )
-        
-        return ensemble_score
-    
-    def optimize_weights(self, val_df, val_target):
+            from models.tft_inference import TFTPredictor
+            if isinstance(self.tft, TFTPredictor):
+                # Satır başına tahmin (df ile hizalı); geçmişi yetmeyen satırlar NaN
+                try:
+                    tft_pred = self.tft.predict(df).to_numpy()
+                except ValueError as e:
+                    print(f"⚠️ TFT tahmini atlandı: {e}")
+            else:
+                # TFT wrapper üzerinden tahmin al
+                tft_pred = self.tft.predict(df) # Wrapper handle data conversion hopefully
+                # Tensor to numpy
+                if isinstance(tft_pred, torch.Tensor):
+                    tft_pred = tft_pred.cpu().numpy()
+
+                # Boyut eşitleme (Flatten)
+                tft_pred = tft_pred.flatten()
+
+                # Uzunluk kontrolü
+                min_len = min(len(lgbm_pred), len(tft_pred))
+                lgbm_pred = lgbm_pred[:min_len]
+                tft_pred = tft_pred[:min_len]
+
+        return lgbm_pred, tft_pred
+
+    def optimize_weights(self, val_df, val_target, persist=False, **kwargs):
         """
-        Validation set üzerinde en iyi ağırlıkları bulur (Maximize Sharpe or Correlation).
-        Şimdilik basit bir placeholder.
+        Validation set üzerinde en iyi ağırlıkları ve normalizasyonu bulur (Sharpe veya rank IC;
+        ızgara araması, models/ensemble_weights.py). Üye tahminleri bir kez hesaplanır.
+
+        Args:
+            val_df: (Date, Ticker) indeksli validasyon verisi
+            val_target: val_df ile hizalı ileri getiri (örn. NextDay_Return)
+            persist: Seçimi registry'ye yaz ve üretime al
+        Returns:
+            (best, table): seçilen aday ve tüm adayların metrikleri
         """
-        print("Optimizasyon henüz aktif değil, varsayılan ağırlıklar kullanılacak.")
-        pass
+        from models.ensemble_weights import optimize_ensemble_weights, save_ensemble_weights
+        lgbm_pred, tft_pred = self.member_predictions(val_df)
+        if tft_pred is None:
+            tft_pred = np.full(len(lgbm_pred), np.nan)
+        scores = pd.DataFrame({'lgbm': lgbm_pred, 'tft': tft_pred,
+                               'NextDay_Return': np.asarray(val_target, dtype=np.float64)[:len(lgbm_pred)]},
+                              index=val_df.index[:len(lgbm_pred)])
+        best, table = optimize_ensemble_weights(scores, **kwargs)
+        self.weights = {'lgbm': float(best['lgbm']), 'tft': float(best['tft'])}
+        self.normalization = best['normalization']
+        print(f"✅ Ensemble ağırlıkları: {self.weights} ({self.normalization}) | "
+              f"Sharpe {best['sharpe']:.2f}, rank IC {best['rank_ic']:.4f}")
+        if persist:
+            save_ensemble_weights(best, table, members=ensemble_members(self.lgbm, self.tft))
+        return best, table
@@ -0,0 +1,251 @@
+"""
+HybridEnsemble Ağırlık Optimizasyonu
+LGBM / TFT karışımı sabit HYBRID_WEIGHT'ten geliyordu (label ayarıyla aynı parametre) ve
+HybridEnsemble.optimize_weights boştu. Bu modül iki üyenin önceden hesaplanmış (cache'li)
+örneklem dışı skorları üzerinde:
+
+- normalize_scores: Skor normalizasyonları ('global_rank': HybridEnsemble.predict'in mevcut
+  davranışı, tüm satırlar üzerinde rank; 'date_rank': tarih içi yüzdelik rank;
+  'date_zscore': tarih içi z-skor). Tahmin ve optimizasyon aynı fonksiyonu kullanır
+- candidate_metrics: (aday × gün × hisse) skor küpünde tüm adaylar için aynı anda günlük
+  rank IC (Spearman) ve top-k eşit ağırlıklı portföy Sharpe'ı (aday başına Python döngüsü yok)
+- optimize_ensemble_weights: Yoğun ağırlık ızgarası × normalizasyonlar; hedef Sharpe veya rank IC
+- save_ensemble_weights / load_ensemble_weights: Seçilen ağırlıklar model registry'de
+  ('hybrid_ensemble') versiyonlu olarak, optimize edildikleri üyelerin versiyonlarıyla
+  (core/score_store.model_version) saklanır; HybridEnsemble üretim versiyonunu sadece yüklü
+  üyeler aynıysa kullanır (aksi halde HYBRID_WEIGHT)
+
+Kullanım:
+    best, table = optimize_ensemble_weights(scores) # scores: (Date, Ticker) indeksli lgbm, tft, NextDay_Return
+    save_ensemble_weights(best, table, members=ensemble_members(lgbm, tft))
+
+    python models/ensemble_weights.py optimize --scores oos_scores.pkl --save
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+import config
+from models.label_engine import date_codes, per_date_ranks
+
+NORMALIZATIONS = ['global_rank', 'date_rank', 'date_zscore']
+REGISTRY_NAME = 'hybrid_ensemble'
+
+
+def normalize_scores(values, codes=None, n_groups=None, method='global_rank'):
+    """
+    Skorları karışım için ortak ölçeğe getirir (NaN'lar NaN kalır).
+
+    Args:
+        codes, n_groups: Tarih grup kodları (label_engine.date_codes); tarih içi yöntemler için
+        method: 'global_rank' | 'date_rank' | 'date_zscore'
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    out = np.full(len(values), np.nan)
+    if not valid.any():
+        return out
+    if method == 'global_rank':
+        out[valid] = rankdata(values[valid]) / valid.sum()
+        return out
+
+    counts = np.bincount(codes[valid], minlength=n_groups).astype(np.float64)
+    if method == 'date_rank':
+        out[valid] = per_date_ranks(np.where(valid, values, np.nan), codes, n_groups)[valid] / counts[codes[valid]]
+        return out
+    if method == 'date_zscore':
+        sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+        mean = sums / np.maximum(counts, 1)
+        sq = np.bincount(codes[valid], weights=(values[valid] - mean[codes[valid]]) ** 2, minlength=n_groups)
+        std = np.sqrt(sq / np.maximum(counts - 1, 1))
+        std = np.where(std > 0, std, 1.0)
+        out[valid] = (values[valid] - mean[codes[valid]]) / std[codes[valid]]
+        return out
+    raise ValueError(f"Bilinmeyen normalizasyon: {method}")
+
+
+def blend(lgbm, tft, weight, codes=None, n_groups=None, method='global_rank'):
+    """
+    weight * norm(lgbm) + (1 - weight) * norm(tft). TFT tahmini olmayan satırlarda (kısa geçmiş)
+    LightGBM'in normalize skoru kullanılır. weight dizi olabilir: (ağırlık × satır) döner.
+    """
+    n_lgbm = normalize_scores(lgbm, codes, n_groups, method)
+    n_tft = normalize_scores(tft, codes, n_groups, method)
+    n_tft = np.where(np.isfinite(n_tft), n_tft, n_lgbm)
+    weight = np.asarray(weight, dtype=np.float64)[..., None] # skaler: (1,) -> satırlara yayılır
+    return weight * n_lgbm + (1 - weight) * n_tft
+
+
+def candidate_metrics(S, R, k=5, bars_per_year=None):
+    """
+    Aday skor küpü için metrikler (tüm adaylar aynı anda).
+
+    Args:
+        S: (aday, gün, hisse) skorlar (NaN: skor yok)
+        R: (gün, hisse) ileri getiriler (NaN: getiri yok)
+    Returns:
+        dict: sharpe, total_return, max_drawdown, rank_ic, ic_ir, days -> (aday,) dizileri
+    """
+    bars_per_year = bars_per_year or config.get_bars_per_year()
+    S = np.asarray(S, dtype=np.float64)
+    R = np.broadcast_to(np.asarray(R, dtype=np.float64), S.shape)
+
+    # Top-k portföy: her gün en yüksek skorlu k hisseye eşit ağırlık
+    valid = np.isfinite(S)
+    scored = valid.any(axis=2)
+    top = np.argsort(np.where(valid, -S, np.inf), axis=2, kind='stable')[:, :, :k]
+    picked = np.take_along_axis(np.nan_to_num(R), top, axis=2)
+    picked_valid = np.take_along_axis(valid, top, axis=2)
+    daily = np.where(scored, (picked * picked_valid).sum(axis=2) / np.maximum(picked_valid.sum(axis=2), 1), 0.0)
+
+    days = scored.sum(axis=1)
+    mean = daily.sum(axis=1) / np.maximum(days, 1)
+    var = (np.where(scored, daily - mean[:, None], 0.0) ** 2).sum(axis=1) / np.maximum(days - 1, 1)
+    std = np.sqrt(var)
+    equity = np.cumprod(1 + daily, axis=1) # skorsuz günler 0 getiri
+    drawdown = (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1)
+
+    # Rank IC: skor ve getirinin ikisi de olan hisseler üzerinde günlük Spearman
+    both = valid & np.isfinite(R)
+    n = both.sum(axis=2)
+    rs = rankdata(np.where(both, S, np.nan), axis=2, nan_policy='omit')
+    rr = rankdata(np.where(both, R, np.nan), axis=2, nan_policy='omit')
+    rs = np.where(both, rs - np.nansum(rs, axis=2, keepdims=True) / np.maximum(n, 1)[..., None], 0.0)
+    rr = np.where(both, rr - np.nansum(rr, axis=2, keepdims=True) / np.maximum(n, 1)[..., None], 0.0)
+    den = np.sqrt((rs ** 2).sum(axis=2) * (rr ** 2).sum(axis=2))
+    ic_days = (n > 2) & (den > 0)
+    ic = np.where(ic_days, (rs * rr).sum(axis=2) / np.where(den > 0, den, 1), 0.0)
+    ic_count = ic_days.sum(axis=1)
+    ic_mean = ic.sum(axis=1) / np.maximum(ic_count, 1)
+    ic_std = np.sqrt((np.where(ic_days, ic - ic_mean[:, None], 0.0) ** 2).sum(axis=1) / np.maximum(ic_count - 1, 1))
+
+    return {
+        'sharpe': np.where((days > 1) & (std > 0), mean / np.where(std > 0, std, 1) * np.sqrt(bars_per_year), 0.0),
+        'total_return': equity[:, -1] - 1 if equity.shape[1] else np.zeros(len(S)),
+        'max_drawdown': drawdown if equity.shape[1] else np.zeros(len(S)),
+        'rank_ic': np.where(ic_count > 0, ic_mean, np.nan),
+        'ic_ir': np.where((ic_count > 1) & (ic_std > 0), ic_mean / np.where(ic_std > 0, ic_std, 1), np.nan),
+        'days': days,
+    }
+
+
+def optimize_ensemble_weights(scores, weights=None, normalizations=None, k=5, objective=None,
+                              target_col='NextDay_Return'):
+    """
+    Ağırlık ızgarası × normalizasyonlar üzerinde tüm adayların rank IC ve Sharpe'ı.
+
+    Args:
+        scores: (Date, Ticker) indeksli DataFrame: 'lgbm', 'tft' (NaN olabilir) ve target_col
+        weights: LightGBM ağırlıkları (varsayılan: 0..1, ENSEMBLE_WEIGHT_STEP adımlı)
+        objective: 'sharpe' | 'rank_ic' (varsayılan: ENSEMBLE_WEIGHT_OBJECTIVE)
+    Returns:
+        (best, table): best {'lgbm', 'tft', 'normalization', metrikler}, table tüm adaylar
+    """
+    objective = objective or getattr(config, 'ENSEMBLE_WEIGHT_OBJECTIVE', 'sharpe')
+    if weights is None:
+        step = getattr(config, 'ENSEMBLE_WEIGHT_STEP', 0.05)
+        weights = np.round(np.arange(0, 1 + step / 2, step), 6)
+    weights = np.asarray(weights, dtype=np.float64)
+    normalizations = normalizations or getattr(config, 'ENSEMBLE_NORMALIZATIONS', NORMALIZATIONS)
+
+    scores = scores[scores['lgbm'].notna()]
+    codes, n_groups = date_codes(scores.index)
+    tickers, ticker_names = pd.factorize(scores.index.get_level_values('Ticker'))
+    R = np.full((n_groups, len(ticker_names)), np.nan)
+    R[codes, tickers] = scores[target_col].to_numpy(dtype=np.float64)
+
+    lgbm, tft = scores['lgbm'].to_numpy(dtype=np.float64), scores['tft'].to_numpy(dtype=np.float64)
+    tables = []
+    for method in normalizations:
+        blended = blend(lgbm, tft, weights, codes, n_groups, method) # (ağırlık × satır)
+        S = np.full((len(weights), n_groups, len(ticker_names)), np.nan)
+        S[:, codes, tickers] = blended
+        metrics = candidate_metrics(S, R, k)
+        tables.append(pd.DataFrame(dict(metrics, lgbm=weights, tft=1 - weights, normalization=method)))
+
+    table = pd.concat(tables, ignore_index=True)
+    table = table[['normalization', 'lgbm', 'tft', 'sharpe', 'rank_ic', 'ic_ir', 'total_return', 'max_drawdown',
+                   'days']]
+    # Eşitlikte mevcut davranışa (global_rank) ve daha yüksek LightGBM ağırlığına yakın olan seçilir
+    order = table.sort_values([objective, 'lgbm'], ascending=False, kind='stable')
+    best = order.iloc[0].to_dict()
+    best['objective'] = objective
+    return best, table
+
+
+def ensemble_members(lgbm, tft):
+    """Ağırlıkların bağlı olduğu üye versiyonları (TFT yoksa None)."""
+    from core.score_store import model_version
+    return {'lgbm': model_version(lgbm), 'tft': None if tft is None else model_version(tft)}
+
+
+def save_ensemble_weights(best, table=None, members=None, registry=None, promote=True):
+    """
+    Seçilen ağırlıkları registry'ye yeni versiyon olarak yazar (varsayılan: üretime alır).
+    members: ensemble_members(lgbm, tft); yüklemede bu üyelerle eşleşmezse ağırlıklar kullanılmaz.
+    """
+    if registry is None:
+        from models.model_registry import model_registry as registry
+    params = {'lgbm': float(best['lgbm']), 'tft': float(best['tft']), 'normalization': best['normalization']}
+    metrics = {m: best.get(m) for m in ('sharpe', 'rank_ic', 'ic_ir', 'total_return', 'max_drawdown', 'days')}
+    metrics['objective'] = best.get('objective')
+    metrics['candidates'] = 0 if table is None else len(table)
+    return registry.register_params(REGISTRY_NAME, params, metrics=metrics, members=members, promote=promote)
+
+
+def load_ensemble_weights(registry=None, members=None):
+    """
+    Üretimdeki ensemble ağırlıkları ({'lgbm', 'tft', 'normalization'}) veya None.
+    members verilirse ağırlıklar sadece aynı üyelerle optimize edilmişse döner (başka bir
+    LightGBM / TFT için seçilmiş ağırlıklar uygulanmaz).
+    """
+    if registry is None:
+        from models.model_registry import model_registry as registry
+    manifest = registry.production_manifest(REGISTRY_NAME)
+    if manifest is None:
+        return None
+    if members is not None and manifest.get('members') != members:
+        print(f"⚠️ {REGISTRY_NAME} {manifest.get('version')} başka üyeler için optimize edilmiş "
+              f"({manifest.get('members')}), kullanılmıyor.")
+        return None
+    return manifest.get('params')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HybridEnsemble ağırlık optimizasyonu")
+    sub = parser.add_subparsers(dest='command', required=True)
+    opt = sub.add_parser('optimize', help="Cache'li örneklem dışı skorlarda ağırlık ızgarası")
+    opt.add_argument('--scores', required=True,
+                     help="(Date, Ticker) indeksli pickle / parquet: lgbm, tft, NextDay_Return kolonları")
+    opt.add_argument('--objective', choices=['sharpe', 'rank_ic'], default=None)
+    opt.add_argument('--top-k', type=int, default=5)
+    opt.add_argument('--save', action='store_true', help="Seçimi registry'ye yaz ve üretime al")
+    opt.add_argument('--lgbm-path', default="models/saved/global_ranker.pkl",
+                     help="Skorları üreten LightGBM modeli (--save: üye versiyonu için)")
+    opt.add_argument('--tft-path', default="models/saved/tft_model.pth",
+                     help="Skorları üreten TFT modeli (--save: üye versiyonu için)")
+    args = parser.parse_args()
+
+    scores = pd.read_parquet(args.scores) if args.scores.endswith('.parquet') else pd.read_pickle(args.scores)
+    best, table = optimize_ensemble_weights(scores, k=args.top_k, objective=args.objective)
+    top = table.sort_values(best['objective'], ascending=False).head(10)
+    print(top.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\nEn iyi: lgbm={best['lgbm']:.2f}, tft={best['tft']:.2f}, {best['normalization']} "
+          f"| Sharpe {best['sharpe']:.2f}, rank IC {best['rank_ic']:.4f} ({len(table)} aday)")
+    if args.save:
+        from models.ensemble_model import HybridEnsemble
+        ensemble = HybridEnsemble()
+        ensemble.load_models(args.lgbm_path, args.tft_path)
+        version = save_ensemble_weights(best, table, members=ensemble_members(ensemble.lgbm, ensemble.tft))
+        print(f"✅ Registry: {REGISTRY_NAME} {version} (üretimde)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Feature Seçimi (Walk-Forward SHAP + Permutation Önemi)
+Offline budama işinin (research/feature_pruning.py) yapı taşları ve seçilen feature
+listesinin kalıcı kaydı.
+
+- walk_forward_folds: Genişleyen pencereli tarih fold'ları (eğitim / boşluk / validasyon)
+- run_fold: Tek fold'da model eğitir; süreleri, NDCG@k, top-k Sharpe'ı ve (istenirse)
+  SHAP (LightGBM pred_contrib, tüm eğitim dönemine yayılmış örnek) + permutation
+  (validasyon NDCG düşüşü) önemlerini döner. Process pool'da çalışır.
+- aggregate_importance / select_features: Fold'lar üzerinden önem tablosu ve seçim
+- save_selection / load_selection / selection_summary: models/saved/feature_selection.json
+  (train_models.py seçili feature'larla eğitir, liste registry manifest'ine yazılır)
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+import config
+from models.ranking_dataset import dataset_cache, fit_ranker
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SELECTION_PATH = os.path.join(ROOT_DIR, getattr(config, 'FEATURE_SELECTION_PATH', 'models/saved/feature_selection.json'))
+
+# Fold modelleri için varsayılanlar (RankingModel.train ile aynı aile, budama için daha kısa)
+FOLD_PARAMS = {
+    'objective': 'lambdarank',
+    'learning_rate': 0.05,
+    'num_leaves': 31,
+    'n_estimators': 300,
+    'min_child_samples': 20,
+    'reg_alpha': 0.1,
+    'reg_lambda': 0.1,
+    'random_state': 42,
+    'verbosity': -1,
+}
+
+
+def walk_forward_folds(dates, n_folds=4, min_train_frac=0.5, gap=5):
+    """
+    Genişleyen pencereli walk-forward fold'ları.
+    Tarihlerin ilk min_train_frac'ı her fold'un eğitim setindedir; kalan kısım n_folds
+    validasyon bloğuna bölünür. Eğitim sonu ile validasyon başı arasında gap gün boşluk
+    bırakılır (çok günlük hedeflerin sızmaması için).
+
+    Returns:
+        list[(train_end, valid_start, valid_end)]: train: < train_end, valid: [valid_start, valid_end]
+    """
+    dates = pd.Index(dates).unique().sort_values()
+    first_valid = int(len(dates) * min_train_frac)
+    bounds = np.linspace(first_valid, len(dates), n_folds + 1).astype(int)
+    folds = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if lo - gap <= 0 or hi <= lo:
+            continue
+        folds.append((dates[lo - gap], dates[lo], dates[hi - 1]))
+    return folds
+
+
+def _padded(values, groups, fill):
+    """Grup (tarih) bazlı değerleri (grup × en büyük grup) matrisine yerleştirir."""
+    groups = np.asarray(groups)
+    group_ids = np.repeat(np.arange(len(groups)), groups)
+    position = np.arange(len(values)) - np.repeat(np.cumsum(groups) - groups, groups)
+    out = np.full((len(groups), int(groups.max())), fill, dtype=np.float64)
+    out[group_ids, position] = values
+    return out
+
+
+def ndcg_at_k(scores, relevance, groups, k=5):
+    """Tarih (query) başına NDCG@k ortalaması; doğrusal kazanç (label_gain = 0, 1, 2, ...)."""
+    S = _padded(scores, groups, -np.inf)
+    R = _padded(relevance, groups, 0.0)
+    top = np.argsort(-S, axis=1, kind='stable')[:, :k]
+    discount = 1.0 / np.log2(np.arange(2, top.shape[1] + 2))
+    dcg = (np.take_along_axis(R, top, axis=1) * discount).sum(axis=1)
+    idcg = (-np.sort(-R, axis=1)[:, :top.shape[1]] * discount).sum(axis=1)
+    # LightGBM gibi: tüm label'ları 0 olan query'nin NDCG'si 1
+    return float(np.mean(np.divide(dcg, idcg, out=np.ones_like(dcg), where=idcg > 0)))
+
+
+def top_k_sharpe(scores, returns, groups, k=5, bars_per_year=None):
+    """Her tarih en yüksek skorlu k hisseye eşit ağırlık: günlük getirilerin yıllık Sharpe'ı."""
+    bars_per_year = bars_per_year or config.get_bars_per_year()
+    S = _padded(scores, groups, -np.inf)
+    R = _padded(np.nan_to_num(returns, nan=0.0), groups, 0.0)
+    top = np.argsort(-S, axis=1, kind='stable')[:, :k]
+    picked = np.take_along_axis(R, top, axis=1)
+    valid = np.isfinite(np.take_along_axis(S, top, axis=1))
+    daily = (picked * valid).sum(axis=1) / np.maximum(valid.sum(axis=1), 1)
+    std = daily.std(ddof=1) if len(daily) > 1 else 0.0
+    return float(daily.mean() / std * np.sqrt(bars_per_year)) if std > 0 else 0.0
+
+
+def shap_importance(model, X, sample_size=2000):
+    """
+    Ortalama |SHAP| (LightGBM pred_contrib = TreeSHAP, shap paketi gerekmez).
+    Örnek ilk satırlar yerine tüm döneme eşit aralıklarla yayılır.
+    """
+    booster = getattr(model, 'booster_', model)
+    rows = np.unique(np.linspace(0, len(X) - 1, min(len(X), sample_size)).astype(int))
+    contrib = booster.predict(X[rows], pred_contrib=True)
+    return np.abs(contrib[:, :-1]).mean(axis=0) # Son kolon: beklenen değer (bias)
+
+
+def permutation_importance(model, matrix, k=5, n_repeats=1, seed=0):
+    """
+    Her feature validasyon setinde karıştırıldığında NDCG@k düşüşü.
+
+    Returns:
+        (base_ndcg, drops): drops[j] > 0 -> feature j validasyonda sıralamaya katkı veriyor
+    """
+    booster = getattr(model, 'booster_', model)
+    X = np.array(matrix.X) # Yazılabilir kopya (cache'teki matris salt-okunur)
+    base = ndcg_at_k(booster.predict(X), matrix.y, matrix.groups, k)
+    rng = np.random.default_rng(seed)
+    drops = np.zeros(X.shape[1])
+    for j in range(X.shape[1]):
+        original = X[:, j].copy()
+        for _ in range(n_repeats):
+            X[:, j] = original[rng.permutation(len(X))]
+            drops[j] += base - ndcg_at_k(booster.predict(X), matrix.y, matrix.groups, k)
+        X[:, j] = original
+    return base, drops / n_repeats
+
+
+def run_fold(job):
+    """
+    Tek walk-forward fold'u (process pool'da çalışır).
+
+    job: {'fold', 'train', 'valid' (RankingMatrix), 'returns' (validasyon satırlarıyla hizalı
+          NextDay_Return), 'params', 'k', 'importance' (bool), 'shap_sample', 'n_repeats',
+          'matrix_seconds'}
+    """
+    train, valid = job['train'], job['valid']
+    k = job.get('k', 5)
+    model = lgb.LGBMRanker(**job['params'])
+    max_label = max(train.y.max(), valid.y.max())
+    if max_label > 30:
+        model.set_params(label_gain=list(range(int(max_label) + 1)))
+
+    t0 = time.perf_counter()
+    train_set = dataset_cache.dataset(train, model.get_params())
+    valid_set = dataset_cache.dataset(valid, model.get_params(), reference=train_set)
+    model = fit_ranker(model, train_set, valid_sets=[valid_set], eval_metric='ndcg', eval_at=[k],
+                       callbacks=[lgb.early_stopping(stopping_rounds=30, first_metric_only=True, verbose=False)])
+    train_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scores = model.booster_.predict(valid.X)
+    predict_seconds = time.perf_counter() - t0
+
+    result = {
+        'fold': job['fold'],
+        'n_features': len(train.feature_names),
+        'train_rows': len(train),
+        'valid_rows': len(valid),
+        'best_iteration': int(model.best_iteration_ or model.n_estimators),
+        'matrix_seconds': job.get('matrix_seconds'),
+        'train_seconds': train_seconds,
+        'predict_seconds': predict_seconds,
+        'ndcg': ndcg_at_k(scores, valid.y, valid.groups, k),
+        'sharpe': top_k_sharpe(scores, job['returns'], valid.groups, k),
+    }
+    if job.get('importance'):
+        result['shap'] = shap_importance(model, train.X, job.get('shap_sample', 2000))
+        _, result['permutation'] = permutation_importance(model, valid, k, job.get('n_repeats', 1), seed=job['fold'])
+    return result
+
+
+def aggregate_importance(fold_results, feature_names):
+    """
+    Fold'lar üzerinden önem tablosu.
+    shap_share: feature'ın fold toplam |SHAP|'ı içindeki payı (fold'lar arası ortalama)
+    permutation_positive: NDCG düşüşünün pozitif olduğu fold oranı
+    """
+    shap = np.array([r['shap'] for r in fold_results])
+    share = shap / np.maximum(shap.sum(axis=1, keepdims=True), 1e-12)
+    perm = np.array([r['permutation'] for r in fold_results])
+    table = pd.DataFrame({
+        'shap_share': share.mean(axis=0),
+        'shap_share_min': share.min(axis=0),
+        'permutation': perm.mean(axis=0),
+        'permutation_positive': (perm > 0).mean(axis=0),
+    }, index=pd.Index(feature_names, name='feature'))
+    return table.sort_values('shap_share', ascending=False)
+
+
+def select_features(importance, min_shap_share=None, min_features=None):
+    """
+    Tutulacak feature'lar (önem sırasıyla).
+    Kural: SHAP payı >= min_shap_share VEYA fold'ların en az yarısında permutation düşüşü > 0.
+    En az min_features feature kalır (SHAP payına göre en yüksekler).
+    """
+    min_shap_share = getattr(config, 'FEATURE_PRUNING_MIN_SHAP_SHARE', 0.002) if min_shap_share is None else min_shap_share
+    min_features = getattr(config, 'FEATURE_PRUNING_MIN_FEATURES', 15) if min_features is None else min_features
+
+    keep = (importance['shap_share'] >= min_shap_share) | (importance['permutation_positive'] >= 0.5)
+    selected = set(importance.index[keep])
+    if len(selected) < min_features:
+        selected |= set(importance.index[:min_features])
+    return [f for f in importance.index if f in selected]
+
+
+def save_selection(features, report=None, path=None):
+    """Seçilen feature listesini (+ budama raporunu) atomik olarak yazar."""
+    path = path or SELECTION_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = {
+        'features': list(features),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'report': report or {},
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False, default=float)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_selection(path=None):
+    """Kayıtlı feature seçimi (yoksa None)."""
+    path = path or SELECTION_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def selection_summary(selection):
+    """Registry manifest'i için seçim özeti (feature listesi + tam/budanmış karşılaştırma)."""
+    if not selection:
+        return None
+    report = selection.get('report', {})
+    return {
+        'features': selection['features'],
+        'created_at': selection.get('created_at'),
+        'n_total': report.get('n_total'),
+        'comparison': report.get('comparison'),
+    }
@@ -0,0 +1,159 @@
+"""
+Artımlı (Warm-Start) Ranker Eğitimi
+Global ranker'ı her seferinde baştan (2015 -> bugün, 1000 ağaca kadar) eğitmek yerine
+önceki booster'dan devam eder: yeni ağaçlar son WARM_START_WINDOW_DAYS işlem gününde,
+önceki modelin skorları üzerine eğitilir (LightGBM init_model).
+
+- model_fingerprint: Modelin anlamını değiştiren ayarlar (label ayarları + parametreler)
+- retrain_decision: Önceki modelin soy bilgisine (lineage) göre 'full' / 'warm' / 'skip'
+- warm_start_train: Önceki ranker'dan devam eden eğitim
+- validation_ndcg / compare_with_full: Artımlı ve tam eğitimin süre / NDCG karşılaştırması
+
+Tam eğitim gerektiren durumlar: önceki model yok, LightGBM değil veya soy bilgisi yok;
+label ayarları / parametreler değişti; feature listesi değişti; son eğitimden bu yana
+WARM_START_MAX_NEW_DAYS'ten fazla yeni gün var; art arda WARM_START_MAX_CHAIN artımlı
+eğitim yapıldı; son tam eğitim WARM_START_MAX_AGE_DAYS günden eski. Artımlı model
+validasyonda önceki modelden WARM_START_NDCG_TOLERANCE'tan fazla kötüyse çağıran taraf
+tam eğitime döner.
+"""
+
+import time
+from datetime import date
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+import config
+from core.result_cache import make_key
+from models.feature_selection import ndcg_at_k
+from models.ranking_dataset import LABEL_SETTINGS, ranking_feature_columns, ranking_matrix
+from models.ranking_model import RankingModel
+
+
+def model_fingerprint(config_module, params=None):
+    """Label ayarları + eğitim parametreleri (değişirse önceki booster'dan devam edilemez)."""
+    return make_key([getattr(config_module, s, None) for s in LABEL_SETTINGS], params or {})
+
+
+def candidate_features(df, config_module, selected_features=None):
+    """Tam eğitimin kullanacağı feature'lar (tamamı NaN kolonlar hariç)."""
+    columns = [c for c in (selected_features or ranking_feature_columns(df, config_module)) if c in df.columns]
+    has_data = df[columns].notna().any()
+    return [c for c in columns if has_data[c]]
+
+
+def lineage(mode, train_last_date, fingerprint, base=None, base_version=None, today=None):
+    """Registry manifest'ine yazılan soy bilgisi (bir sonraki retrain_decision bunu okur)."""
+    base = base or {}
+    today = (today or date.today()).isoformat()
+    return {
+        'mode': mode,
+        'train_last_date': str(pd.Timestamp(train_last_date).date()),
+        'model_fingerprint': fingerprint,
+        'full_trained_at': today if mode == 'full' else base.get('full_trained_at'),
+        'warm_chain': 0 if mode == 'full' else base.get('warm_chain', 0) + 1,
+        'base_version': base_version,
+    }
+
+
+def retrain_decision(previous, features, fingerprint, train_last_date, today=None):
+    """
+    Artımlı eğitim politikası.
+
+    Args:
+        previous: Önceki modelin manifest'i (registry) veya None
+        features: Tam eğitimin kullanacağı feature listesi (candidate_features)
+        fingerprint: model_fingerprint
+        train_last_date: Yeni eğitim verisinin son tarihi
+    Returns:
+        (mode, reason): mode 'full' | 'warm' | 'skip'
+    """
+    if not previous:
+        return 'full', "önceki model yok"
+    if previous.get('kind') != 'lightgbm':
+        return 'full', "önceki model LightGBM değil"
+    base = previous.get('lineage')
+    if not base:
+        return 'full', "önceki modelin soy bilgisi yok"
+    if base.get('model_fingerprint') != fingerprint:
+        return 'full', "label ayarları / parametreler değişti"
+    if set(previous.get('feature_names', [])) != set(features):
+        return 'full', "feature listesi değişti"
+
+    last_date = pd.Timestamp(base['train_last_date'])
+    new_days = pd.bdate_range(last_date, pd.Timestamp(train_last_date)).size - 1
+    if new_days <= 0:
+        return 'skip', "yeni veri yok"
+    if new_days > getattr(config, 'WARM_START_MAX_NEW_DAYS', 60):
+        return 'full', f"son eğitimden bu yana {new_days} yeni gün"
+    if base.get('warm_chain', 0) >= getattr(config, 'WARM_START_MAX_CHAIN', 10):
+        return 'full', f"art arda {base['warm_chain']} artımlı eğitim"
+    full_trained_at = base.get('full_trained_at')
+    max_age = getattr(config, 'WARM_START_MAX_AGE_DAYS', 30)
+    if full_trained_at and ((today or date.today()) - date.fromisoformat(full_trained_at)).days > max_age:
+        return 'full', f"son tam eğitim {max_age} günden eski"
+    return 'warm', f"{new_days} yeni gün"
+
+
+def base_booster(model):
+    """Devam edilecek booster: önceki modelin en iyi iterasyonuna kadar olan ağaçları."""
+    booster = getattr(model, 'booster_', model)
+    return lgb.Booster(model_str=booster.model_to_string())
+
+
+def warm_start_train(previous, df_train, df_valid, config_module, custom_params=None, rounds=None, window_days=None):
+    """
+    Önceki ranker'dan devam eden eğitim: son window_days işlem gününde en fazla rounds ağaç.
+    Feature listesi ve sırası önceki modelden alınır.
+
+    Returns:
+        RankingModel
+    """
+    rounds = rounds or getattr(config, 'WARM_START_ROUNDS', 100)
+    window_days = window_days or getattr(config, 'WARM_START_WINDOW_DAYS', 250)
+
+    dates = df_train.index.get_level_values('Date')
+    unique_dates = dates.unique().sort_values()
+    window = df_train[dates >= unique_dates[max(0, len(unique_dates) - window_days)]]
+
+    params = dict(custom_params or {})
+    params['n_estimators'] = rounds
+    ranker = RankingModel(window, config_module, selected_features=list(previous.feature_names))
+    ranker.train(valid_df=df_valid, custom_params=params, init_model=base_booster(previous.model))
+    return ranker
+
+
+def validation_ndcg(ranker, df_valid, config_module, k=5):
+    """Ranker'ın validasyon setindeki NDCG@k'sı (eğitimdeki label ile)."""
+    matrix = ranking_matrix(df_valid, config_module, is_training=True, feature_names=list(ranker.feature_names),
+                            verbose=False)
+    if matrix.empty:
+        return np.nan
+    scores = getattr(ranker.model, 'booster_', ranker.model).predict(matrix.X)
+    return ndcg_at_k(scores, matrix.y, matrix.groups, k)
+
+
+def compare_with_full(previous, df_train, df_valid, config_module, custom_params=None):
+    """
+    Aynı veride artımlı ve tam eğitim: süre, ağaç sayısı ve validasyon NDCG@5.
+
+    Returns:
+        (table, warm_ranker, full_ranker)
+    """
+    rows = {}
+    t0 = time.perf_counter()
+    warm = warm_start_train(previous, df_train, df_valid, config_module, custom_params)
+    rows['warm'] = {'seconds': time.perf_counter() - t0}
+
+    t0 = time.perf_counter()
+    full = RankingModel(df_train, config_module, selected_features=list(previous.feature_names))
+    full.train(valid_df=df_valid, custom_params=custom_params)
+    rows['full'] = {'seconds': time.perf_counter() - t0}
+
+    for name, ranker in (('previous', previous), ('warm', warm), ('full', full)):
+        booster = getattr(ranker.model, 'booster_', ranker.model)
+        rows.setdefault(name, {})
+        rows[name]['trees'] = booster.num_trees()
+        rows[name]['ndcg@5'] = validation_ndcg(ranker, df_valid, config_module)
+    return pd.DataFrame(rows).T, warm, full
@@ -0,0 +1,124 @@
+"""
+Tarih Bazlı Label Motoru (Vektörize)
+Ranking label'larındaki tarih içi işlemlerin (groupby('Date').rank / qcut) tek sıralamalı
+numpy karşılıkları. Her değer kolonu (tarih kodu, değer) çiftine göre bir kez sıralanır;
+sıra (rank) ve quantile kovası aynı sıralamadan çıkar, tarih başına Python çağrısı yoktur.
+
+- per_date_ranks: groupby('Date')[col].rank(method='first') ile aynı (NaN -> NaN)
+- per_date_quantile_buckets: groupby('Date')[col].transform(
+      lambda x: pd.qcut(x, q, labels=False, duplicates='drop')) ile aynı (NaN -> NaN)
+- per_date_labels: İkisi birlikte, tek sıralama ile
+
+Quantile sınırları np.quantile (linear) ile aynı formülle hesaplanır; kova ataması
+pd.cut(right=True, include_lowest=True) kuralıdır. Bkz. tests/test_label_engine.py.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def date_codes(index, level='Date'):
+    """(Date, ...) indeksinden tarih grup kodları (0..G-1) ve grup sayısı."""
+    dates = index.get_level_values(level) if isinstance(index, pd.MultiIndex) else index
+    codes, uniques = pd.factorize(dates, sort=False)
+    return codes.astype(np.int64), len(uniques)
+
+
+def qcut_quantiles(q):
+    """pd.qcut'un kullandığı quantile noktaları (tam sayı q için)."""
+    quantiles = np.linspace(0, 1, q + 1)
+    np.putmask(quantiles, q * quantiles != np.arange(q + 1), np.nextafter(quantiles, 1))
+    return quantiles
+
+
+def _lerp(a, b, t):
+    # numpy quantile (_lerp) ile aynı: t >= 0.5 için b tarafından hesaplanır
+    diff = b - a
+    out = a + diff * t
+    upper = t >= 0.5
+    out[upper] = (b - diff * (1 - t))[upper]
+    return out
+
+
+def _sorted_by_date(values, codes, n_groups):
+    """Geçerli (NaN olmayan) değerleri (tarih, değer, orijinal sıra) düzeninde sıralar."""
+    valid = np.flatnonzero(~np.isnan(values))
+    # lexsort kararlıdır: eşit değerler orijinal sırasını korur (method='first')
+    order = valid[np.lexsort((values[valid], codes[valid]))]
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return order, counts, starts
+
+
+def _ranks(order, codes, counts, starts, n):
+    ranks = np.full(n, np.nan)
+    position = np.arange(len(order))
+    ranks[order] = position - starts[codes[order]] + 1
+    return ranks
+
+
+def _quantile_buckets(values, order, codes, counts, starts, q):
+    n = len(values)
+    buckets = np.full(n, np.nan)
+    if len(order) == 0:
+        return buckets
+
+    sorted_values = values[order]
+    quantiles = qcut_quantiles(q)
+    groups = np.flatnonzero(counts > 0)
+    n_valid = counts[groups].astype(np.float64)
+
+    # Grup × quantile sınırları (np.quantile, method='linear')
+    virtual = (n_valid[:, None] - 1) * quantiles[None, :]
+    last = n_valid[:, None] - 1
+    above = virtual >= last # Son elemanın ötesi: iki komşu da son eleman
+    previous = np.where(above, last, np.floor(virtual))
+    following = np.where(above, last, previous + 1)
+    gamma = virtual - previous
+    base = starts[groups][:, None]
+    edges = _lerp(sorted_values[(base + previous).astype(np.int64)],
+                  sorted_values[(base + following).astype(np.int64)], gamma)
+
+    # duplicates='drop': tekrar eden sınırlar atılır (2 sınırlı durum hariç, pd.cut kuralı)
+    keep = np.ones_like(edges, dtype=bool)
+    if edges.shape[1] != 2:
+        keep[:, 1:] = edges[:, 1:] != edges[:, :-1]
+    n_bins = keep.sum(axis=1)
+
+    # Her değer için kendi grubundaki sınırlar
+    row = np.empty(len(counts), dtype=np.int64)
+    row[groups] = np.arange(len(groups))
+    value_rows = row[codes[order]]
+    group_edges = edges[value_rows]
+    ids = ((group_edges < sorted_values[:, None]) & keep[value_rows]).sum(axis=1)
+    ids[sorted_values == group_edges[:, 0]] = 1 # include_lowest
+
+    inside = (ids > 0) & (ids < n_bins[value_rows])
+    buckets[order[inside]] = ids[inside] - 1
+    return buckets
+
+
+def per_date_ranks(values, codes, n_groups):
+    values = np.asarray(values, dtype=np.float64)
+    order, counts, starts = _sorted_by_date(values, codes, n_groups)
+    return _ranks(order, codes, counts, starts, len(values))
+
+
+def per_date_quantile_buckets(values, codes, n_groups, q):
+    values = np.asarray(values, dtype=np.float64)
+    order, counts, starts = _sorted_by_date(values, codes, n_groups)
+    return _quantile_buckets(values, order, codes, counts, starts, q)
+
+
+def per_date_labels(values, codes, n_groups, q=None):
+    """
+    Tek sıralama ile tarih içi rank ve (q verilirse) quantile kovası.
+
+    Returns:
+        (ranks, buckets): float dizileri; buckets q yoksa None
+    """
+    values = np.asarray(values, dtype=np.float64)
+    order, counts, starts = _sorted_by_date(values, codes, n_groups)
+    ranks = _ranks(order, codes, counts, starts, len(values))
+    buckets = _quantile_buckets(values, order, codes, counts, starts, q) if q else None
+    return ranks, buckets
@@ -0,0 +1,418 @@
+"""
+Model Registry (Versiyonlu Model Paketleri)
+Eğitilmiş ranker'ları versiyonlu paketler olarak saklar ve uzun yaşayan süreçte
+(API, paper trading döngüsü) yüklenmiş halde tutar.
+
+Paket düzeni (models/registry/<isim>/<versiyon>/):
+    model.txt | model.cbm   LightGBM booster metni / CatBoost native formatı (pickle yok)
+    manifest.json           feature listesi, parametreler, eğitim verisi hash'i, metrikler,
+                            feature budama özeti, tam / artımlı eğitim soy bilgisi (varsa)
+
+- register: Ranker'ı yeni versiyon olarak yazar (promote=True ise üretime alır)
+- register_params: Model dosyası olmayan parametre paketi (HybridEnsemble ağırlıkları,
+  models/ensemble_weights.py); production_manifest ile okunur
+- promote: <isim>/production.json işaretçisini atomik olarak değiştirir
+- get/load: Üretimdeki paket bellekte tutulur; işaretçi değiştiğinde (yeni versiyon
+  promote edildiğinde) bir sonraki çağrıda yeni paket yüklenip atomik olarak değiştirilir
+- Registry'de olmayan modeller için models/saved altındaki eski dosyalar (pkl/cbm)
+  bir kez yüklenip (dosya değişmedikçe) bellekte tutulur
+
+Kullanım:
+    from models.model_registry import model_registry
+    ranker = model_registry.load('global_ranker', config_banking)
+    scores = ranker.predict(df)
+
+    python models/model_registry.py import     # models/saved -> registry (native format)
+    python models/model_registry.py list
+    python models/model_registry.py promote global_ranker v0003
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+import config
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.path.join(ROOT_DIR, getattr(config, 'MODEL_REGISTRY_DIR', 'models/registry'))
+
+# Registry'ye geçmeden önceki kayıt yerleri (isim -> (tür, dosya))
+LEGACY_MODELS = {
+    'global_ranker': ('lightgbm', 'models/saved/global_ranker.pkl'),
+    'global_ranker_catboost': ('catboost', 'models/saved/global_ranker_catboost.cbm'),
+}
+
+MODEL_FILES = {'lightgbm': 'model.txt', 'catboost': 'model.cbm'}
+
+
+def model_kind(ranker):
+    """Ranker sarmalayıcısının (RankingModel / CatBoostRankingModel) model türü."""
+    module = type(getattr(ranker.model, 'booster_', ranker.model)).__module__ # TrainedRanker -> lgb.Booster
+    if module.startswith('catboost'):
+        return 'catboost'
+    if module.startswith('lightgbm'):
+        return 'lightgbm'
+    raise ValueError(f"Desteklenmeyen model türü: {type(ranker.model)}")
+
+
+def _wrapper(kind, config_module=None):
+    if kind == 'catboost':
+        from models.ranking_model_catboost import CatBoostRankingModel
+        return CatBoostRankingModel(pd.DataFrame(), config_module)
+    from models.ranking_model import RankingModel
+    return RankingModel(pd.DataFrame(), config_module)
+
+
+def save_native(ranker, path):
+    """Modeli native formatta yazar (LightGBM: en iyi iterasyona kadar booster metni, CatBoost: cbm)."""
+    model = ranker.model
+    if model_kind(ranker) == 'catboost':
+        model.save_model(path, format='cbm')
+    else:
+        booster = getattr(model, 'booster_', model)
+        best_iteration = getattr(model, 'best_iteration_', None) or None
+        booster.save_model(path, num_iteration=best_iteration)
+
+
+def load_native(kind, path, feature_names, config_module=None):
+    """Native model dosyasından tahmine hazır ranker sarmalayıcısı."""
+    ranker = _wrapper(kind, config_module)
+    if kind == 'catboost':
+        from catboost import CatBoostRanker
+        ranker.model = CatBoostRanker()
+        ranker.model.load_model(path, format='cbm')
+    else:
+        import lightgbm as lgb
+        ranker.model = lgb.Booster(model_file=path)
+    ranker.feature_names = list(feature_names)
+    return ranker
+
+
+def load_legacy(kind, path, config_module=None):
+    """models/saved altındaki eski kayıt (LightGBM pickle / CatBoost cbm + feature pickle)."""
+    if kind == 'catboost':
+        from models.ranking_model_catboost import CatBoostRankingModel
+        return CatBoostRankingModel.load(path, config_module)
+    from models.ranking_model import RankingModel
+    return RankingModel.load(path, config_module)
+
+
+def _json_safe(params):
+    return json.loads(json.dumps(params or {}, default=str))
+
+
+class ModelBundle:
+    """Registry'deki bir model versiyonu: ranker sarmalayıcısı + manifest bilgileri."""
+
+    def __init__(self, name, version, ranker, manifest):
+        self.name = name
+        self.version = version
+        self.ranker = ranker
+        self.manifest = manifest
+
+    @property
+    def kind(self):
+        return self.manifest['kind']
+
+    @property
+    def feature_names(self):
+        return self.ranker.feature_names
+
+    @property
+    def params(self):
+        return self.manifest.get('params', {})
+
+    @property
+    def data_hash(self):
+        return self.manifest.get('data_hash')
+
+    @property
+    def feature_selection(self):
+        return self.manifest.get('feature_selection')
+
+    @property
+    def lineage(self):
+        return self.manifest.get('lineage')
+
+    def predict(self, df):
+        return self.ranker.predict(df)
+
+
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._production = {} # isim -> (işaretçi mtime, ModelBundle)
+        self._files = {} # (dosya, mtime) -> eski kayıttan yüklenmiş ranker
+        self.stats = {'hits': 0, 'loads': 0, 'swaps': 0}
+
+    # --- Yazma -----------------------------------------------------------
+
+    def _name_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def _pointer_path(self, name):
+        return os.path.join(self._name_dir(name), 'production.json')
+
+    def versions(self, name):
+        path = self._name_dir(name)
+        if not os.path.isdir(path):
+            return []
+        return sorted(v for v in os.listdir(path) if v.startswith('v') and
+                      os.path.exists(os.path.join(path, v, 'manifest.json')))
+
+    def register(self, name, ranker, data_hash=None, params=None, metrics=None, feature_selection=None, lineage=None,
+                 promote=False):
+        """
+        Ranker'ı yeni versiyon olarak kaydeder.
+
+        Args:
+            data_hash: Eğitim verisinin hash'i (örn. core.result_cache.data_fingerprint)
+            params: Eğitim parametreleri (verilmezse modelden okunur)
+            metrics: Validasyon metrikleri (örn. {'ndcg@5': 0.29})
+            feature_selection: Offline budama özeti (models/feature_selection.py seçim dosyası)
+            lineage: Tam / artımlı eğitim soy bilgisi (models/incremental_training.py)
+            promote: Kayıttan sonra üretime al
+        Returns:
+            str: versiyon (v0001, v0002, ...)
+        """
+        kind = model_kind(ranker)
+        if params is None and hasattr(ranker.model, 'get_params'):
+            params = ranker.model.get_params()
+
+        version, version_dir = self._new_version(name)
+        save_native(ranker, os.path.join(version_dir, MODEL_FILES[kind]))
+        manifest = {
+            'name': name,
+            'version': version,
+            'kind': kind,
+            'model_file': MODEL_FILES[kind],
+            'feature_names': list(ranker.feature_names),
+            'params': _json_safe(params),
+            'data_hash': data_hash,
+            'metrics': _json_safe(metrics),
+            'feature_selection': _json_safe(feature_selection) or None,
+            'lineage': _json_safe(lineage) or None,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._write_manifest(version_dir, manifest)
+        if promote:
+            self.promote(name, version)
+        return version
+
+    def register_params(self, name, params, metrics=None, members=None, promote=False):
+        """
+        Model dosyası olmayan parametre paketi (örn. HybridEnsemble ağırlıkları) kaydeder.
+
+        Args:
+            params: Paketin kendisi (JSON'a çevrilebilir)
+            members: Paketin dayandığı modeller (örn. {'lgbm': 'global_ranker v0003'})
+        Returns:
+            str: versiyon
+        """
+        version, version_dir = self._new_version(name)
+        manifest = {
+            'name': name,
+            'version': version,
+            'kind': 'params',
+            'params': _json_safe(params),
+            'metrics': _json_safe(metrics),
+            'members': _json_safe(members) or None,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._write_manifest(version_dir, manifest)
+        if promote:
+            self.promote(name, version)
+        return version
+
+    def _new_version(self, name):
+        os.makedirs(self._name_dir(name), exist_ok=True)
+        existing = self.versions(name)
+        number = int(existing[-1][1:]) + 1 if existing else 1
+        while True:
+            version = f"v{number:04d}"
+            version_dir = os.path.join(self._name_dir(name), version)
+            try:
+                os.makedirs(version_dir) # Eşzamanlı kayıtlar aynı versiyonu alamaz
+                return version, version_dir
+            except FileExistsError:
+                number += 1
+
+    def _write_manifest(self, version_dir, manifest):
+        # Manifest en son yazılır: manifest'i olan versiyon eksiksizdir
+        tmp_path = os.path.join(version_dir, 'manifest.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(version_dir, 'manifest.json'))
+
+    def promote(self, name, version):
+        """Versiyonu üretime alır; çalışan süreçler bir sonraki get() çağrısında yeni paketi kullanır."""
+        if version not in self.versions(name):
+            raise ValueError(f"{name} için {version} bulunamadı")
+        pointer = self._pointer_path(name)
+        tmp_path = pointer + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'promoted_at': datetime.now().isoformat(timespec='seconds')}, f)
+        os.replace(tmp_path, pointer)
+
+    def production_version(self, name):
+        try:
+            with open(self._pointer_path(name), encoding='utf-8') as f:
+                return json.load(f)['version']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    # --- Okuma -----------------------------------------------------------
+
+    def manifest(self, name, version):
+        with open(os.path.join(self._name_dir(name), version, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def production_manifest(self, name):
+        """Üretim versiyonunun manifest'i (parametre paketleri için); yoksa None."""
+        version = self.production_version(name)
+        if version is None:
+            return None
+        try:
+            return self.manifest(name, version)
+        except (OSError, ValueError):
+            return None
+
+    def load_version(self, name, version, config_module=None):
+        """Belirli bir versiyonu diskten yükler (cache'lenmez)."""
+        version_dir = os.path.join(self._name_dir(name), version)
+        with open(os.path.join(version_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        ranker = load_native(manifest['kind'], os.path.join(version_dir, manifest['model_file']),
+                             manifest['feature_names'], config_module)
+        return ModelBundle(name, version, ranker, manifest)
+
+    def get(self, name, config_module=None):
+        """
+        Üretimdeki paket (bellekte tutulur). İşaretçi değiştiyse yeni versiyon yüklenip
+        değiştirilir; yükleme sırasında diğer çağıranlar eski paketi kullanmaya devam eder.
+        Registry'de üretim versiyonu yoksa None.
+        """
+        pointer = self._pointer_path(name)
+        try:
+            mtime = os.stat(pointer).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._production.get(name)
+        if cached is not None and cached[0] == mtime:
+            self.stats['hits'] += 1
+            return cached[1]
+
+        version = self.production_version(name)
+        if version is None:
+            return cached[1] if cached else None
+        if cached is not None and cached[1].version == version:
+            bundle = cached[1]
+        else:
+            bundle = self.load_version(name, version, config_module)
+            self.stats['loads'] += 1
+            if cached is not None:
+                self.stats['swaps'] += 1
+                print(f"[Registry] {name}: {cached[1].version} -> {version}")
+
+        with self._lock:
+            self._production[name] = (mtime, bundle)
+        return bundle
+
+    def load_file(self, path, kind=None, config_module=None):
+        """Eski kayıt dosyasını yükler; dosya değişmedikçe aynı süreçte tekrar okunmaz."""
+        if not os.path.isabs(path):
+            path = os.path.join(ROOT_DIR, path)
+        if not os.path.exists(path):
+            return None
+        kind = kind or ('catboost' if path.endswith('.cbm') else 'lightgbm')
+        key = (path, os.stat(path).st_mtime_ns)
+        with self._lock:
+            ranker = self._files.get(key)
+        if ranker is not None:
+            self.stats['hits'] += 1
+            return ranker
+
+        ranker = load_legacy(kind, path, config_module)
+        self.stats['loads'] += 1
+        with self._lock:
+            self._files = {k: v for k, v in self._files.items() if k[0] != path}
+            self._files[key] = ranker
+        return ranker
+
+    def load(self, name, config_module=None):
+        """
+        İsimli modelin tahmine hazır ranker'ı: registry'deki üretim versiyonu,
+        yoksa models/saved altındaki eski kayıt. Hiçbiri yoksa None.
+        """
+        bundle = self.get(name, config_module)
+        if bundle is not None:
+            return bundle.ranker
+        if name in LEGACY_MODELS:
+            kind, path = LEGACY_MODELS[name]
+            return self.load_file(path, kind, config_module)
+        return None
+
+    def load_path(self, path, config_module=None):
+        """Eski kayıt yolu verilen çağıranlar için: yol registry'deki bir isme karşılık geliyorsa oradan yükler."""
+        candidates = {os.path.abspath(path), os.path.abspath(os.path.join(ROOT_DIR, path))}
+        for name, (_, legacy_path) in LEGACY_MODELS.items():
+            if os.path.join(ROOT_DIR, legacy_path) in candidates:
+                return self.load(name, config_module)
+        return self.load_file(path, config_module=config_module)
+
+    def import_legacy(self, promote=True):
+        """models/saved altındaki eski kayıtları native formatta registry'ye aktarır."""
+        imported = {}
+        for name, (kind, path) in LEGACY_MODELS.items():
+            ranker = load_legacy(kind, os.path.join(ROOT_DIR, path))
+            if ranker is None or ranker.model is None:
+                continue
+            imported[name] = self.register(name, ranker, promote=promote)
+        return imported
+
+    def clear(self):
+        with self._lock:
+            self._production.clear()
+            self._files.clear()
+
+
+model_registry = ModelRegistry()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model registry yönetimi")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('import', help='models/saved altındaki modelleri registry\'ye aktar ve üretime al')
+    sub.add_parser('list', help='Kayıtlı modeller ve üretim versiyonları')
+    promote = sub.add_parser('promote', help='Bir versiyonu üretime al')
+    promote.add_argument('name')
+    promote.add_argument('version')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        for name, version in model_registry.import_legacy().items():
+            print(f"✅ {name} -> {version} (üretimde)")
+    elif args.command == 'promote':
+        model_registry.promote(args.name, args.version)
+        print(f"✅ {args.name}: {args.version} üretime alındı")
+    else:
+        names = sorted(os.listdir(model_registry.root)) if os.path.isdir(model_registry.root) else []
+        for name in names:
+            production = model_registry.production_version(name)
+            for version in model_registry.versions(name):
+                marker = ' (üretim)' if version == production else ''
+                print(f"{name:<25} {version}{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+"""
+Ranking Eğitim Matrisi ve LightGBM Binary Dataset Cache'i
+
+- build_ranking_matrix: (Date, Ticker) indeksli veriden tek seferde C-sıralı float32 feature
+  matrisi, label ve query group dizilerini üretir. Veri çerçevesi kopyalanmaz; feature
+  kolonları doğrudan tek bir float32 diziye okunur, NaN filtresi ve tarih sıralaması
+  numpy üzerinde yapılır.
+- ranking_matrix: Aynı veri + label ayarları için matrisi bellekte tutar (Optuna denemeleri
+  her seferinde yeniden hazırlamaz).
+- LGBMDatasetCache: Histogram bin'leri hesaplanmış `lgb.Dataset`'leri matris anahtarı +
+  bin parametrelerine göre `cache/lgbm_datasets/*.bin` olarak saklar. Eğitim ve tuning
+  aynı bin'leri yeniden kullanır; validasyon seti eğitim setinin bin sınırlarıyla kurulur.
+- fit_ranker: `LGBMRanker` parametreleriyle hazır Dataset'ler üzerinde `lgb.train` çalıştırır;
+  dönen TrainedRanker fit ile eğitilmiş LGBMRanker'ın kullanılan arayüzüne sahiptir
+  (best_score_, predict, booster_, get_params, joblib).
+
+Kullanım:
+    train = ranking_matrix(df_train, config_banking)
+    valid = ranking_matrix(df_valid, config_banking, feature_names=train.feature_names)
+    train_set = dataset_cache.dataset(train, params)
+    valid_set = dataset_cache.dataset(valid, params, reference=train_set)
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+import config
+from core.result_cache import frame_hash
+from models.label_engine import date_codes, per_date_labels, per_date_quantile_buckets, per_date_ranks
+
+# Label hesabını etkileyen config ayarları (matris anahtarına girer)
+LABEL_SETTINGS = ['LABEL_TYPE', 'FORWARD_WINDOWS', 'FORWARD_WEIGHTS', 'NUM_QUANTILES', 'HYBRID_WEIGHT', 'LEAKAGE_COLS']
+
+# Bin hesabını etkileyen LightGBM parametreleri (Dataset anahtarına girer)
+DATASET_PARAMS = ['max_bin', 'max_bin_by_feature', 'min_data_in_bin', 'subsample_for_bin', 'bin_construct_sample_cnt',
+                  'random_state', 'seed', 'data_random_seed', 'use_missing', 'zero_as_missing', 'linear_tree']
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "lgbm_datasets")
+
+
+class RankingMatrix:
+    """Eğitim/tahmin matrisi: X (float32, C-sıralı), y ve groups (tahmin modunda None)."""
+
+    def __init__(self, X, y, groups, feature_names, index, key=None):
+        self.X = X
+        self.y = y
+        self.groups = groups
+        self.feature_names = feature_names
+        self.index = index
+        self.key = key
+
+    def __len__(self):
+        return len(self.X)
+
+    @property
+    def empty(self):
+        return len(self.X) == 0 or len(self.feature_names) == 0
+
+    def frame(self):
+        """X'in DataFrame görünümü (kopyasız)."""
+        return pd.DataFrame(self.X, index=self.index, columns=self.feature_names, copy=False)
+
+    def label_series(self):
+        return None if self.y is None else pd.Series(self.y, index=self.index)
+
+
+def ranking_feature_columns(df, config_module):
+    """Meta veri, sızıntı ve hedef kolonları hariç sayısal feature kolonları."""
+    exclude_cols = set(config_module.LEAKAGE_COLS + ['Ticker', 'Date', 'FUNDAMENTAL_DATA_AVAILABLE'])
+    feature_cols = [c for c in df.columns if c not in exclude_cols]
+    # Prevent Leakage from dynamic target columns
+    feature_cols = [c for c in feature_cols if not c.startswith('Excess_Return') and not c.startswith('NextDay')]
+    return [c for c in feature_cols if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])]
+
+
+def ranking_labels(df, config_module):
+    """
+    Tarih sıralı (Date, Ticker) veriden ranking label'ı (RawRank / Quantile / Hybrid).
+    Tarih içi rank ve quantile kovaları models/label_engine.py ile tek sıralamada hesaplanır.
+
+    Returns:
+        Series: label (Hybrid ve Quantile int, RawRank float)
+    """
+    label_type = getattr(config_module, 'LABEL_TYPE', 'RawRank')
+    target_col = 'Excess_Return_RiskAdjusted' if label_type == 'RiskAdjusted' else 'Excess_Return'
+    windows = getattr(config_module, 'FORWARD_WINDOWS', [1])
+    num_q = getattr(config_module, 'NUM_QUANTILES', 5)
+    codes, n_groups = date_codes(df.index)
+
+    # 1. Base Target Selection: Multi-Window Weighted Average
+    if len(windows) > 1:
+        # Weighted average of ranks across windows
+        fwd_weights = getattr(config_module, 'FORWARD_WEIGHTS', [1.0/len(windows)]*len(windows))
+        base_target_ranks = np.zeros(len(df))
+        for i, win in enumerate(windows):
+            base_target_ranks += fwd_weights[i] * per_date_ranks(df[f'Excess_Return_T{win}'].to_numpy(), codes, n_groups)
+        quantile_ranks = None
+        if label_type in ('Hybrid', 'Quantile'):
+            quantile_ranks = per_date_quantile_buckets(df[target_col].to_numpy(), codes, n_groups, num_q)
+    else:
+        # Single window: rank ve quantile aynı sıralamadan
+        base_target_ranks, quantile_ranks = per_date_labels(
+            df[target_col].to_numpy(), codes, n_groups, num_q if label_type in ('Hybrid', 'Quantile') else None)
+
+    # 2. Label Type Logic
+    if label_type == 'Hybrid':
+        # Weighted average of Raw Rank and Quantile Rank (Excess_Return for quantile stability)
+        quantile_ranks = np.nan_to_num(quantile_ranks, nan=0.0)
+        hybrid_weight = getattr(config_module, 'HYBRID_WEIGHT', 0.7)
+        y_values = (hybrid_weight * base_target_ranks) + ((1 - hybrid_weight) * quantile_ranks)
+
+        # LightGBM lambdarank requires int labels. Scale and cast to preserve precision.
+        # Use scale * 100 to keep more gradients info
+        return pd.Series(np.round(y_values * 100).astype(int), index=df.index)
+
+    if label_type == 'Quantile':
+        return pd.Series(np.nan_to_num(quantile_ranks, nan=0.0).astype(int), index=df.index)
+
+    # Default: Raw Ranking (Multi-window result from step 1)
+    return pd.Series(base_target_ranks, index=df.index)
+
+
+def build_ranking_matrix(df, config_module, is_training=True, feature_names=None, verbose=True):
+    """
+    Ranking matrisi üretir (RankingModel.prepare_data ile aynı satırlar, sıra ve label'lar).
+
+    Args:
+        feature_names: Verilirse bu kolonlar kullanılır (validasyon seti eğitim kolonlarıyla kurulur)
+        verbose: Satır/NaN özetini yazdırır
+
+    Returns:
+        RankingMatrix
+    """
+    name = getattr(config_module, 'SECTOR_NAME', '')
+    fixed_features = feature_names is not None
+    feature_cols = list(feature_names) if fixed_features else ranking_feature_columns(df, config_module)
+
+    # Tek kopya: tüm feature blokları doğrudan float32 diziye
+    X = df[feature_cols].to_numpy(dtype=np.float32)
+    feature_nan = np.isnan(X)
+
+    if not is_training:
+        # Prediction mode
+        rows = np.flatnonzero(~feature_nan.any(axis=1))
+        if len(rows) < len(X):
+            X = X[rows]
+        return RankingMatrix(np.ascontiguousarray(X), None, None, feature_cols, df.index[rows])
+
+    windows = getattr(config_module, 'FORWARD_WINDOWS', [1])
+    target_cols = [f'Excess_Return_T{win}' for win in windows]
+    target_nan = df[target_cols].isna().to_numpy()
+
+    if verbose:
+        print(f"[{name}] Data Shape Before Drop: {df.shape}")
+        print(f"[{name}] Target Cols: {target_cols}")
+
+    # Check for columns that are ALL NaN
+    n_rows = len(df)
+    all_nan_features = feature_nan.sum(axis=0) == n_rows if n_rows else np.zeros(len(feature_cols), dtype=bool)
+    all_nan_targets = target_nan.sum(axis=0) == n_rows if n_rows else np.zeros(len(target_cols), dtype=bool)
+    if not fixed_features and (all_nan_features.any() or all_nan_targets.any()):
+        all_nan_cols = [c for c, bad in zip(feature_cols, all_nan_features) if bad] + \
+                       [c for c, bad in zip(target_cols, all_nan_targets) if bad]
+        if verbose:
+            print(f"[{name}] CRITICAL: The following columns are ALL NaN: {all_nan_cols}")
+            print(f"[{name}] Dropping these columns to save data rows.")
+        keep = ~all_nan_features
+        feature_cols = [c for c, k in zip(feature_cols, keep) if k]
+        X = X[:, keep]
+        feature_nan = feature_nan[:, keep]
+        target_nan = target_nan[:, ~all_nan_targets]
+
+    # Check rows with NaNs
+    row_nan = feature_nan.any(axis=1) | target_nan.any(axis=1)
+    rows = np.flatnonzero(~row_nan)
+    if verbose:
+        print(f"[{name}] Rows with NaN: {int(row_nan.sum())} / {n_rows}")
+        print(f"[{name}] Data Shape After Drop: {(len(rows), df.shape[1] - int(all_nan_features.sum()))}")
+
+    # Sort by Date (Important for grouping) - sort_index(level='Date') ile aynı sıra
+    index = df.index[rows]
+    reordered = False
+    if not index.is_monotonic_increasing:
+        if isinstance(index, pd.MultiIndex):
+            index, order = index.sortlevel('Date', sort_remaining=True)
+        else:
+            order = index.argsort(kind='stable')
+            index = index[order]
+        rows = rows[order]
+        reordered = True
+
+    if reordered or len(rows) < n_rows:
+        X = X[rows]
+    X = np.ascontiguousarray(X)
+
+    label_cols = [c for c in dict.fromkeys(target_cols + ['Excess_Return', 'Excess_Return_RiskAdjusted']) if c in df.columns]
+    labels = df[label_cols].iloc[rows]
+    y = ranking_labels(labels, config_module)
+
+    # Create Query Groups
+    groups = labels.groupby(level='Date').size().to_numpy()
+    return RankingMatrix(X, y.to_numpy(), groups, feature_cols, index)
+
+
+class _MatrixCache:
+    """Veri içerik hash'i + label ayarlarına göre RankingMatrix LRU'su (süreç içi)."""
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(df, config_module, is_training, feature_names, data_key=None):
+        """data_key: Çağıranın önceden hesapladığı frame_hash(df) (aynı çerçeve tekrar hash'lenmez)."""
+        digest = hashlib.sha1(repr((bool(is_training), feature_names and list(feature_names))).encode())
+        digest.update(repr([getattr(config_module, s, None) for s in LABEL_SETTINGS]).encode())
+        digest.update((data_key or frame_hash(df)).encode())
+        return digest.hexdigest()[:20]
+
+    def get(self, df, config_module, is_training=True, feature_names=None, verbose=True, data_key=None):
+        key = self.key(df, config_module, is_training, feature_names, data_key)
+        with self._lock:
+            matrix = self._entries.get(key)
+            if matrix is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return matrix
+
+        matrix = build_ranking_matrix(df, config_module, is_training, feature_names, verbose)
+        matrix.key = key
+        # Cache'teki diziler salt-okunur (paylaşılan matris bozulmasın)
+        for arr in (matrix.X, matrix.y, matrix.groups):
+            if arr is not None:
+                arr.flags.writeable = False
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = matrix
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return matrix
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+matrix_cache = _MatrixCache(max_entries=getattr(config, 'RANKING_MATRIX_CACHE_SIZE', 4))
+
+
+def ranking_matrix(df, config_module, is_training=True, feature_names=None, verbose=True, data_key=None):
+    """
+    build_ranking_matrix'in cache'li hali (aynı veri için matris bir kez hazırlanır).
+    data_key: frame_hash(df); aynı çerçeveyle tekrarlanan çağrılarda bir kez hesaplanıp verilir.
+    """
+    return matrix_cache.get(df, config_module, is_training, feature_names, verbose, data_key)
+
+
+def dataset_params(params):
+    """Eğitim parametrelerinden bin hesabını etkileyenler (+ sabit Dataset ayarları)."""
+    out = {k: params[k] for k in DATASET_PARAMS if k in params and params[k] is not None}
+    # Kurulmuş Dataset farklı min_child_samples ile yeniden kullanılabilsin (tuning)
+    out['feature_pre_filter'] = False
+    out['verbosity'] = -1
+    return out
+
+
+class LGBMDatasetCache:
+    """
+    Bin'lenmiş LightGBM Dataset'leri: bellek (LRU, kurulmuş Dataset) + disk (save_binary).
+    Anahtar: matris anahtarı + bin parametreleri + LightGBM sürümü (+ validasyonda referans anahtarı).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=8, max_disk_mb=1024, persist=True):
+        self.dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.persist = persist
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def _key(self, matrix, params, reference):
+        ref_key = getattr(reference, '_cache_key', None) if reference is not None else None
+        payload = repr((matrix.key, sorted(params.items()), ref_key, lgb.__version__))
+        return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+    def _path(self, key):
+        return os.path.join(self.dir, f"{key}.bin")
+
+    def _remember(self, key, dataset):
+        with self._lock:
+            self._memory[key] = dataset
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def dataset(self, matrix, params, reference=None):
+        """
+        Matris için kurulmuş (bin'lenmiş) Dataset döner.
+        Anahtarsız matris (ranking_matrix dışından) cache'lenmez, doğrudan kurulur.
+        reference: Validasyon seti için eğitim Dataset'i (aynı bin sınırları)
+        """
+        ds_params = dataset_params(params)
+        if matrix.key is None:
+            return self._construct(matrix, ds_params, reference)
+
+        key = self._key(matrix, ds_params, reference)
+        with self._lock:
+            dataset = self._memory.get(key)
+            if dataset is not None:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                return dataset
+
+        path = self._path(key)
+        dataset = None
+        if self.persist and os.path.exists(path):
+            try:
+                dataset = lgb.Dataset(path, reference=reference, params=ds_params).construct()
+                os.utime(path) # LRU için erişim zamanını güncelle
+                self.stats['disk_hits'] += 1
+            except Exception as e:
+                print(f"[DatasetCache] Okuma hatası ({key}): {e}")
+                dataset = None
+
+        if dataset is None:
+            dataset = self._construct(matrix, ds_params, reference)
+            self.stats['misses'] += 1
+            if self.persist:
+                self._save(dataset, key)
+
+        dataset._cache_key = key
+        self._remember(key, dataset)
+        return dataset
+
+    @staticmethod
+    def _construct(matrix, ds_params, reference):
+        return lgb.Dataset(matrix.X, label=matrix.y, group=matrix.groups, feature_name=list(matrix.feature_names),
+                           reference=reference, params=ds_params, free_raw_data=True).construct()
+
+    def _save(self, dataset, key):
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            tmp_path = self._path(key) + '.tmp'
+            dataset.save_binary(tmp_path)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        except Exception as e:
+            print(f"[DatasetCache] Kaydetme hatası ({key}): {e}")
+
+    def _evict_disk(self):
+        """Disk sınırı aşılırsa en eski erişilen dosyaları siler."""
+        files = []
+        for fname in os.listdir(self.dir):
+            if fname.endswith('.bin'):
+                path = os.path.join(self.dir, fname)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self, disk=True):
+        with self._lock:
+            self._memory.clear()
+        if disk and os.path.isdir(self.dir):
+            for fname in os.listdir(self.dir):
+                if fname.endswith('.bin'):
+                    os.remove(os.path.join(self.dir, fname))
+
+
+dataset_cache = LGBMDatasetCache(
+    max_entries=getattr(config, 'LGBM_DATASET_CACHE_SIZE', 8),
+    max_disk_mb=getattr(config, 'LGBM_DATASET_CACHE_MAX_DISK_MB', 1024),
+    persist=getattr(config, 'LGBM_DATASET_CACHE', True)
+)
+
+
+def warm_start_dataset(matrix, params, reference=None):
+    """
+    init_model ile devam eden eğitim için kurulmamış Dataset (cache dışı).
+    LightGBM başlangıç skorlarını (init_score) kurulum sırasında ham veriden hesaplar;
+    paylaşılan (cache'teki) Dataset'lere yazılmaması için her seferinde yeni nesne üretilir.
+    """
+    return lgb.Dataset(matrix.X, label=matrix.y, group=matrix.groups, feature_name=list(matrix.feature_names),
+                       reference=reference, params=dataset_params(params), free_raw_data=False)
+
+
+# LGBMRanker'a özgü, lgb.train karşılığı olmayan parametreler
+SKLEARN_ONLY_PARAMS = ['n_estimators', 'importance_type', 'class_weight']
+EVAL_AT_ALIASES = ['eval_at', 'ndcg_eval_at', 'ndcg_at', 'map_eval_at', 'map_at']
+
+
+def train_params(params, eval_metric=None, eval_at=(1, 2, 3, 4, 5)):
+    """
+    LGBMRanker parametrelerinden (get_params) lgb.train parametreleri; LGBMRanker.fit ile aynı
+    varsayılanlar: objective lambdarank, eval_at, eval_metric + metric birleşimi.
+    """
+    out = {k: v for k, v in params.items() if k not in SKLEARN_ONLY_PARAMS and v is not None}
+    out['objective'] = out.get('objective') or 'lambdarank'
+    if not any(alias in out for alias in EVAL_AT_ALIASES):
+        out['eval_at'] = list(eval_at)
+
+    eval_metrics = [] if eval_metric is None else (list(eval_metric) if isinstance(eval_metric, list) else [eval_metric])
+    metric = out.get('metric') or 'ndcg'
+    metric = [metric] if isinstance(metric, str) else list(metric)
+    out['metric'] = [e for e in eval_metrics if e not in metric] + metric
+    out['feature_pre_filter'] = False
+    return out
+
+
+class TrainedRanker:
+    """
+    lgb.train ile eğitilmiş booster + LGBMRanker'ın kullanılan arayüzü
+    (predict, booster_, best_iteration_, best_score_, evals_result_, feature_name_,
+    feature_importances_, get_params). joblib ile saklanabilir.
+    """
+
+    def __init__(self, booster, params, evals_result=None):
+        self.booster_ = booster
+        self.params = dict(params)
+        self.evals_result_ = evals_result or {}
+
+    @property
+    def best_iteration_(self):
+        return self.booster_.best_iteration
+
+    @property
+    def best_score_(self):
+        return self.booster_.best_score
+
+    @property
+    def feature_name_(self):
+        return self.booster_.feature_name()
+
+    @property
+    def n_features_in_(self):
+        return self.booster_.num_feature()
+
+    @property
+    def n_estimators_(self):
+        return self.booster_.current_iteration()
+
+    @property
+    def feature_importances_(self):
+        return self.booster_.feature_importance(importance_type=self.params.get('importance_type') or 'split')
+
+    def get_params(self, deep=True):
+        return dict(self.params)
+
+    def predict(self, X, **kwargs):
+        """LGBMRanker.predict ile aynı: en iyi iterasyona kadar ağaçlar."""
+        return self.booster_.predict(X, **kwargs)
+
+
+def fit_ranker(model, train_set, valid_sets=None, eval_metric=None, callbacks=None, eval_at=(1, 2, 3, 4, 5),
+               init_model=None):
+    """
+    LGBMRanker.fit'in kurulmuş Dataset'lerle karşılığı (bin'ler yeniden hesaplanmaz).
+    Parametreler model.get_params()'tan alınır (model sadece parametre taşıyıcısıdır, eğitilmez).
+    init_model: Devam edilecek booster (Dataset'ler warm_start_dataset ile kurulmalı)
+
+    Returns:
+        TrainedRanker
+    """
+    params = model.get_params()
+    evals_result = {}
+    callbacks = list(callbacks or []) + [lgb.record_evaluation(evals_result)]
+
+    booster = lgb.train(
+        params=train_params(params, eval_metric, eval_at),
+        train_set=train_set,
+        num_boost_round=params.get('n_estimators', 100),
+        valid_sets=valid_sets or [],
+        init_model=init_model,
+        callbacks=callbacks,
+    )
+
+    # Dataset'ler cache'te kalır; booster referansı bırakılır
+    booster.free_dataset()
+    return TrainedRanker(booster, params, evals_result)
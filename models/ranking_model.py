@@ -4,157 +4,65 @@ import numpy as np
 import lightgbm as lgb
 import os
 import joblib
+from utils.tracing import traced
+from core.result_cache import frame_hash
+from models.ranking_dataset import ranking_matrix, dataset_cache, fit_ranker, warm_start_dataset
+from models.feature_selection import shap_importance
 
 class RankingModel:
-    def __init__(self, data, config_module):
-        self.data = data.copy()
+    def __init__(self, data, config_module, selected_features=None):
+        self.data = data # Salt-okunur kullanılır (matris ayrı diziye okunur)
         self.config = config_module
+        self.selected_features = selected_features # Offline budama seçimi (None: tüm feature'lar)
         self.model = None
         self.feature_names = []
+        self.low_importance_features = []
+        self._data_key = None
 
+    def data_key(self):
+        """self.data'nın içerik hash'i; çerçeve başına bir kez hesaplanır (matris cache anahtarı)."""
+        if self._data_key is None or self._data_key[0] is not self.data:
+            self._data_key = (self.data, frame_hash(self.data))
+        return self._data_key[1]
+
+    @traced('ranking.prepare_data', rows=lambda r: len(r[0]))
     def prepare_data(self, is_training=True):
         """
         Ranking için veriyi hazırlar.
         Veri (Date, Ticker) indeksli olmalı.
+        Matris models/ranking_dataset.py'de tek seferde (float32, kopyasız) üretilir.
         """
-        df = self.data.copy()
-        
-        # Feature Selection
-        # Use all available features except meta-data
-        # Target Selection from Config
-        label_type = getattr(self.config, 'LABEL_TYPE', 'RawRank')
-        
-        if label_type == 'RiskAdjusted':
-             target_col = 'Excess_Return_RiskAdjusted'
-        else:
-             target_col = 'Excess_Return' 
-             
-        exclude_cols = self.config.LEAKAGE_COLS + ['Ticker', 'Date', 'FUNDAMENTAL_DATA_AVAILABLE']
-        
-        feature_cols = [c for c in df.columns if c not in exclude_cols]
-        # Prevent Leakage from dynamic target columns
-        feature_cols = [c for c in feature_cols if not c.startswith('Excess_Return') and not c.startswith('NextDay')]
-        
-        # Keep numeric only
-        feature_cols = df[feature_cols].select_dtypes(include=[np.number]).columns.tolist()
-        self.feature_names = feature_cols
-        
-        if is_training:
-            # Drop NaNs
-            # Ensure all forward window targets are present if using multi-window
-            windows = getattr(self.config, 'FORWARD_WINDOWS', [1])
-            target_cols = [f'Excess_Return_T{win}' for win in windows]
-            
-            # DEBUG: Check for NaNs before drop
-            print(f"[{self.config.SECTOR_NAME}] Data Shape Before Drop: {df.shape}")
-            print(f"[{self.config.SECTOR_NAME}] Target Cols: {target_cols}")
-            
-            # Check for columns that are ALL NaN
-            nan_counts = df[feature_cols + target_cols].isnull().sum()
-            all_nan_cols = nan_counts[nan_counts == len(df)].index.tolist()
-            if all_nan_cols:
-                print(f"[{self.config.SECTOR_NAME}] CRITICAL: The following columns are ALL NaN: {all_nan_cols}")
-                print(f"[{self.config.SECTOR_NAME}] Dropping these columns to save data rows.")
-                df.drop(columns=all_nan_cols, inplace=True)
-                # Update cols lists
-                feature_cols = [c for c in feature_cols if c not in all_nan_cols]
-                target_cols = [c for c in target_cols if c not in all_nan_cols]
-                
-                # FIX: Update instance variable so predict works correctly
-                if is_training:
-                    self.feature_names = feature_cols
-            
-            # Check rows with NaNs
-            rows_with_nan = df[feature_cols + target_cols].isnull().any(axis=1).sum()
-            print(f"[{self.config.SECTOR_NAME}] Rows with NaN: {rows_with_nan} / {len(df)}")
+        matrix = ranking_matrix(self.data, self.config, is_training=is_training, feature_names=self.selected_features,
+                                data_key=self.data_key())
+        self.feature_names = list(matrix.feature_names)
+        return matrix.frame(), matrix.label_series(), matrix.groups
 
-            df = df.dropna(subset=feature_cols + target_cols)
-            print(f"[{self.config.SECTOR_NAME}] Data Shape After Drop: {df.shape}")
-            
-            # Sort by Date (Important for grouping)
-            df = df.sort_index(level='Date') 
-            
-            X = df[feature_cols]
-            
-            # 1. Base Target Selection: Multi-Window Weighted Average
-            if len(windows) > 1:
-                # Weighted average of ranks across windows
-                fwd_weights = getattr(self.config, 'FORWARD_WEIGHTS', [1.0/len(windows)]*len(windows))
-                raw_y_multi = pd.Series(0.0, index=df.index)
-                
-                for i, win in enumerate(windows):
-                    win_target = f'Excess_Return_T{win}'
-                    win_ranks = df.groupby('Date')[win_target].rank(method='first', ascending=True)
-                    raw_y_multi += fwd_weights[i] * win_ranks
-                
-                base_target_ranks = raw_y_multi
-            else:
-                # Single window
-                base_target_ranks = df.groupby('Date')[target_col].rank(method='first', ascending=True)
-
-            # 2. Label Type Logic
-            if label_type == 'Hybrid':
-                # Weighted average of Raw Rank and Quantile Rank
-                num_q = getattr(self.config, 'NUM_QUANTILES', 5)
-                # Use Excess_Return for quantile stability
-                quantile_ranks = df.groupby('Date')[target_col].transform(
-                    lambda x: pd.qcut(x, num_q, labels=False, duplicates='drop')
-                ).fillna(0).astype(float)
-                
-                hybrid_weight = getattr(self.config, 'HYBRID_WEIGHT', 0.7)
-                # FIX: Index alignment error prevention by using numpy values
-                y_values = (hybrid_weight * base_target_ranks.values) + ((1 - hybrid_weight) * quantile_ranks.values)
-                y = pd.Series(y_values, index=df.index)
-                
-                # LightGBM lambdarank requires int labels. Scale and cast to preserve precision.
-                # Use scale * 100 to keep more gradients info
-                y = (y * 100).round().astype(int)
-                
-            elif label_type == 'Quantile':
-                num_q = getattr(self.config, 'NUM_QUANTILES', 5)
-                y = df.groupby('Date')[target_col].transform(
-                    lambda x: pd.qcut(x, num_q, labels=False, duplicates='drop')
-                ).fillna(0).astype(int)
-            else:
-                # Default: Raw Ranking (Multi-window result from step 1)
-                y = base_target_ranks
-            
-            # Create Query Groups
-            groups = df.groupby(level='Date').size().to_numpy()
-            
-            return X, y, groups
-        else:
-            # Prediction mode
-            df = df.dropna(subset=feature_cols)
-            X = df[feature_cols]
-            return X, None, None
-
-    def train(self, valid_df=None, custom_params=None):
-        print(f"[{self.config.SECTOR_NAME}] Ranking Model Eğitimi (LambdaRank)...")
+    @traced('ranking.train', rows=None)
+    def train(self, valid_df=None, custom_params=None, init_model=None):
+        """
+        init_model: Verilirse eğitim bu booster'dan devam eder (warm start, bkz.
+        models/incremental_training.py); n_estimators eklenecek ağaç sayısıdır.
+        """
+        print(f"[{self.config.SECTOR_NAME}] Ranking Model Eğitimi (LambdaRank{', warm start' if init_model is not None else ''})...")
         
-        X_train, y_train, q_train = self.prepare_data(is_training=True)
+        train_matrix = ranking_matrix(self.data, self.config, is_training=True, feature_names=self.selected_features,
+                                      data_key=self.data_key())
+        self.feature_names = list(train_matrix.feature_names)
         
-        if X_train.empty or len(y_train) == 0:
+        if train_matrix.empty:
             raise ValueError(f"[{self.config.SECTOR_NAME}] Training data is empty! Check feature engineering or data range.")
         
+        valid_matrix = None
         if valid_df is not None and not valid_df.empty:
-             valid_model = RankingModel(valid_df, self.config)
+             # Validasyon matrisi eğitim kolonlarıyla kurulur (ikinci RankingModel gerekmez)
              try:
-                 X_val, y_val, q_val = valid_model.prepare_data(is_training=True)
-                 if X_val.empty or len(y_val) == 0:
+                 valid_matrix = ranking_matrix(valid_df, self.config, is_training=True, feature_names=self.feature_names)
+                 if valid_matrix.empty:
                      print(f"[{self.config.SECTOR_NAME}] Validation set empty after processing. Skipping validation.")
-                     eval_set = None
-                     eval_group = None
-                 else:
-                     eval_set = [(X_val, y_val)]
-                     eval_group = [q_val]
+                     valid_matrix = None
              except Exception as e:
                  print(f"[{self.config.SECTOR_NAME}] Validation prep error: {e}. Skipping validation.")
-                 eval_set = None
-                 eval_group = None
-        else:
-             eval_set = None
-             eval_group = None
+                 valid_matrix = None
              
         # LambdaRank Parameters
         default_params = {
@@ -183,55 +91,57 @@ class RankingModel:
         # Check for large labels (caused by scaling) and set label_gain if needed
         # LightGBM default label_gain only supports up to 31 labels. 
         # If we have more (e.g. 600+), we must provide a custom label_gain.
-        max_label = y_train.max()
-        if eval_set:
-             for _, y_eval_curr in eval_set:
-                 max_label = max(max_label, y_eval_curr.max())
+        max_label = train_matrix.y.max()
+        if valid_matrix is not None:
+             max_label = max(max_label, valid_matrix.y.max())
                  
         if max_label > 30:
             print(f"[{self.config.SECTOR_NAME}] Large labels detected (max: {max_label}). Using linear label_gain to avoid error.")
             # Use linear gain (0, 1, 2, ...) to avoid overflow with exponential gain on large labels
             model.set_params(label_gain=list(range(int(max_label) + 1)))
+        
+        if init_model is not None:
+            # Warm start: init_score önceki booster'dan hesaplanır, paylaşılan Dataset'ler kullanılmaz
+            train_set = warm_start_dataset(train_matrix, model.get_params())
+            valid_sets = None
+            if valid_matrix is not None:
+                valid_sets = [warm_start_dataset(valid_matrix, model.get_params(), reference=train_set)]
+        else:
+            # Bin'lenmiş Dataset'ler cache'ten (aynı veri + bin parametreleri için yeniden bin'leme yok)
+            train_set = dataset_cache.dataset(train_matrix, model.get_params())
+            valid_sets = None
+            if valid_matrix is not None:
+                valid_sets = [dataset_cache.dataset(valid_matrix, model.get_params(), reference=train_set)]
             
-        model.fit(
-            X_train, y_train,
-            group=q_train,
-            eval_set=eval_set,
-            eval_group=eval_group,
+        model = fit_ranker(
+            model, train_set,
+            valid_sets=valid_sets,
             eval_metric='ndcg',
+            init_model=init_model,
             callbacks=[
                 lgb.early_stopping(stopping_rounds=50, first_metric_only=True),
                 lgb.log_evaluation(50)
             ]
         )
         
-        # FEATURE SELECTION: SHAP Importance
+        # FEATURE SELECTION: SHAP Importance (rapor; kalıcı budama: research/feature_pruning.py)
         try:
-            import shap
-            explainer = shap.TreeExplainer(model)
-            # Use a sample of training data for speed
-            sample_size = min(len(X_train), 500)
-            X_sample = X_train.iloc[:sample_size]
-            shap_values = explainer.shap_values(X_sample)
-            
-            # shap_values can be a list for multi-class, but for Ranker it's often a single array
-            if isinstance(shap_values, list):
-                shap_importance = np.abs(shap_values[0]).mean(0)
-            else:
-                shap_importance = np.abs(shap_values).mean(0)
-                
-            low_imp_features = [self.feature_names[i] for i in range(len(shap_importance)) if shap_importance[i] < 0.005]
+            # Örnek eğitim dönemine eşit aralıklarla yayılır (sadece ilk satırlar değil)
+            shap_importance_values = shap_importance(model, train_matrix.X, sample_size=500)
+            low_imp_features = [self.feature_names[i] for i in range(len(shap_importance_values)) if shap_importance_values[i] < 0.005]
             if low_imp_features:
-                print(f"[{self.config.SECTOR_NAME}] Low Importance Features (SHAP < 0.01): {low_imp_features[:5]}... (Total: {len(low_imp_features)})")
-                # Auto-drop for future iterations (stateful within session)
-                self.feature_names = [f for f in self.feature_names if f not in low_imp_features]
+                print(f"[{self.config.SECTOR_NAME}] Low Importance Features (SHAP < 0.005): {low_imp_features[:5]}... (Total: {len(low_imp_features)})")
+                # Sadece raporlanır: model tüm feature_names ile eğitildi, predict aynı kolonları bekler.
+                # (prepare_data feature_names'i her eğitimde yeniden hesapladığı için buradan düşürmek
+                # sonraki iterasyonlara da yansımıyordu, sadece predict'i bozuyordu.)
+                self.low_importance_features = low_imp_features
         except Exception as e:
-            # print(f"SHAP Error: {e}")
-            pass
+            print(f"[{self.config.SECTOR_NAME}] SHAP importance hesaplanamadı: {e}")
 
         self.model = model
         return model
 
+    @traced('ranking.predict')
     def predict(self, df):
         if self.model is None: return None
         
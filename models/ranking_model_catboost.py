@@ -4,6 +4,10 @@ import numpy as np
 from catboost import CatBoostRanker, Pool
 import os
 import joblib
+from utils.tracing import traced
+from core.result_cache import frame_hash
+from models.catboost_pool_cache import fit_params, pool_cache
+from models.label_engine import date_codes, per_date_quantile_buckets
 
 class CatBoostRankingModel:
     def __init__(self, data, config_module):
@@ -11,13 +15,16 @@ class CatBoostRankingModel:
         self.config = config_module
         self.model = None
         self.feature_names = []
+        self._data_key = None
 
-    def prepare_data(self, is_training=True):
-        """
-        CatBoost Ranking için veriyi hazırlar.
-        """
-        df = self.data.copy()
-        
+    def data_key(self):
+        """self.data'nın içerik hash'i; çerçeve başına bir kez hesaplanır (Pool cache anahtarı)."""
+        if self._data_key is None or self._data_key[0] is not self.data:
+            self._data_key = (self.data, frame_hash(self.data))
+        return self._data_key[1]
+
+    def feature_columns(self, df):
+        """Sayısal feature kolonları (meta veri, sızıntı ve hedef kolonları hariç)."""
         # Feature Selection
         exclude_cols = self.config.LEAKAGE_COLS + ['Ticker', 'Date', 'FUNDAMENTAL_DATA_AVAILABLE']
         
@@ -27,7 +34,16 @@ class CatBoostRankingModel:
         
         # Keep numeric only for simplicity, though CatBoost handles cats well
         # If we had categorical cols like 'Sector', we could pass them to cat_features
-        numeric_cols = df[feature_cols].select_dtypes(include=[np.number]).columns.tolist()
+        return df[feature_cols].select_dtypes(include=[np.number]).columns.tolist()
+
+    @traced('ranking_catboost.prepare_data', rows=lambda r: r.num_row() if hasattr(r, 'num_row') else len(r))
+    def prepare_data(self, is_training=True):
+        """
+        CatBoost Ranking için veriyi hazırlar.
+        """
+        df = self.data.copy()
+        
+        numeric_cols = self.feature_columns(df)
         self.feature_names = numeric_cols
         
         # Target: NextDay_Return (Continuous)
@@ -53,10 +69,11 @@ class CatBoostRankingModel:
                 raw_y = df[target_col]
                 
                 # Quantile ranks (0 to num_quantiles-1)
-                # We use transform to rank within each date group
-                quantile_y = df.groupby('Date')[target_col].transform(
-                    lambda x: pd.qcut(x, num_quantiles, labels=False, duplicates='drop')
-                ).fillna(0).astype(float)
+                # Tarih içi kova: models/label_engine.py (tek sıralama, qcut ile aynı)
+                codes, n_groups = date_codes(df.index)
+                quantile_y = pd.Series(np.nan_to_num(
+                    per_date_quantile_buckets(df[target_col].to_numpy(), codes, n_groups, num_quantiles), nan=0.0
+                ), index=df.index)
                 
                 # Combine: Note that quantile_y is 0..4, raw_y is ~0.02.
                 # To make them comparable or effective, we might need scaling, 
@@ -81,18 +98,10 @@ class CatBoostRankingModel:
             X = df[numeric_cols]
             return X
 
+    @traced('ranking_catboost.train', rows=None)
     def train(self, valid_df=None, custom_params=None):
         print(f"[{self.config.SECTOR_NAME}] Ranking Model Eğitimi (CatBoost YetiRank)...")
         
-        train_pool = self.prepare_data(is_training=True)
-        
-        if valid_df is not None:
-             valid_model = CatBoostRankingModel(valid_df, self.config)
-             val_pool = valid_model.prepare_data(is_training=True)
-             eval_set = val_pool
-        else:
-             eval_set = None
-             
         # CatBoost Parameters
         params = {
             'loss_function': 'YetiRank',
@@ -112,6 +121,14 @@ class CatBoostRankingModel:
         
         if custom_params:
             params.update(custom_params)
+
+        # Quantize edilmiş pool'lar (models/catboost_pool_cache.py): çalıştırmalar / Optuna denemeleri
+        # arasında yeniden kullanılır, validasyon eğitimin border'larıyla quantize edilir
+        train_pool = pool_cache.pool(self, params)
+        eval_set = None
+        if valid_df is not None:
+            eval_set = pool_cache.pool(CatBoostRankingModel(valid_df, self.config), params, reference=train_pool)
+        params = fit_params(params)
             
         model = CatBoostRanker(**params)
         
@@ -124,6 +141,7 @@ class CatBoostRankingModel:
         self.model = model
         return model
 
+    @traced('ranking_catboost.predict')
     def predict(self, df):
         if self.model is None: return None
         X = df[self.feature_names]
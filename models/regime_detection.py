@@ -1,6 +1,18 @@
+import heapq
+from collections import deque
+
 import pandas as pd
 import numpy as np
 import config
+from core.market_state import crisis_window, market_crisis_components, market_state
+from core.regime_kernel import CONFIDENCE_WINDOW, debounce_regimes, expanding_quantiles, regime_confidence
+from utils.tracing import traced
+
+REGIME_MAP = {
+    0: 'Sideways',    # Normal/Yatay
+    1: 'Crash_Bear',  # Kriz
+    2: 'Trend_Up'     # Ralli
+}
 
 class RegimeDetector:
     def __init__(self, data, thresholds=None, use_adaptive=None):
@@ -24,7 +36,7 @@ class RegimeDetector:
             return self.thresholds # Veri yoksa config kullan
             
         # Volatilite Yıllıklandırma (Karşılaştırma aynı cinsten olmalı)
-        scale_factor = 52 if getattr(config, 'TIMEFRAME', 'D') == 'W' else 252
+        scale_factor = config.get_bars_per_year()
         annual_vol = df['Volatility_20'] * np.sqrt(scale_factor)
         
         # Quantile Hesapla
@@ -38,44 +50,36 @@ class RegimeDetector:
         print(f"  [Adaptive] Eşikler güncellendi: Low={vol_low:.2f}, High={vol_high:.2f}")
         return new_thresholds
 
-    def detect_turkey_crisis(self, df, verbose=True):
+    def stream(self):
+        """Mevcut veriyle ısıtılmış canlı rejim akışı (yeni bar'lar için RegimeStream.update)."""
+        stream = RegimeStream(self.thresholds, self.use_adaptive)
+        if all(col in self.data.columns for col in ['Volatility_20', 'Close']):
+            stream.warm_up(self.data)
+        return stream
+
+    def detect_turkey_crisis(self, df, verbose=True, market=None):
         """
         Turkey-specific crisis detection (Vectorized).
         Returns a SERIES of crisis scores aligned with the dataframe index.
+        
+        Args:
+            market: core.market_state bileşenleri (tarih indeksli). Verilirse piyasa geneli
+                    kontroller (USD/TRY, VIX, S&P500) yeniden hesaplanmaz, tarihe göre yayınlanır.
         """
-        crisis_score = pd.Series(0, index=df.index)
-        
-        # Check 1: Extreme USD/TRY movement (30-day persistent)
-        if 'USDTRY_Change' in df.columns:
-            # 30-day change (rolling sum of logs or simple pct change over window)
-            # Assuming USDTRY_Change is weekly/daily return.
-            # Rolling 30 period sum roughly approximates 30-period return if log returns.
-            # Convert to rolling 4-week return for weekly data
-            window = 4 if getattr(config, 'TIMEFRAME', 'D') == 'W' else 30
-            usd_rolling = df['USDTRY_Change'].rolling(window, min_periods=window).sum()
-            
-            crisis_score += (usd_rolling > 0.10).astype(int) * 2
-            crisis_score += ((usd_rolling > 0.05) & (usd_rolling <= 0.10)).astype(int) * 1
-        
-        # Check 2: VIX spike
-        if 'VIX_Risk' in df.columns:
-            crisis_score += (df['VIX_Risk'] > 30.0).astype(int) * 2
-        
-        # Check 3: S&P500 momentum (global risk-off)
-        if 'SP500_Return' in df.columns:
-            window = 4 if getattr(config, 'TIMEFRAME', 'D') == 'W' else 30
-            sp500_rolling = df['SP500_Return'].rolling(window, min_periods=window).sum()
-            crisis_score += (sp500_rolling < -0.10).astype(int) * 1
+        window = crisis_window()
+        
+        # Check 1-3: Piyasa geneli (USD/TRY şoku, VIX, S&P500 momentumu)
+        if market is None:
+            market = market_crisis_components(df, window)
+        crisis_score = market['Market_Crisis_Score'].reindex(df.index).fillna(0).astype(int)
             
         # Check 4: BIST30 collapse
         if 'Close' in df.columns:
-            window = 4 if getattr(config, 'TIMEFRAME', 'D') == 'W' else 30
-            # Rolling pct_change
             bist_rolling = df['Close'].pct_change(window)
             crisis_score += (bist_rolling < -0.10).astype(int) * 1
 
         # Check 5: High volatility
-        scale_factor = 52 if getattr(config, 'TIMEFRAME', 'D') == 'W' else 252
+        scale_factor = config.get_bars_per_year()
         if 'Volatility_20' in df.columns:
             annual_vol = df['Volatility_20'] * np.sqrt(scale_factor)
             vol_high = self.thresholds.get('volatility_high', 0.30)
@@ -83,7 +87,8 @@ class RegimeDetector:
             
         return crisis_score
     
-    def detect_regimes(self, verbose=True):
+    @traced('regime.detect_regimes')
+    def detect_regimes(self, verbose=True, market=None):
         """
         Piyasa rejimlerini belirler:
         0: NORMAL (Düşük Volatilite, Stabil Kur)
@@ -91,8 +96,11 @@ class RegimeDetector:
         2: RALLİ (Pozitif Trend, Düşük Risk, Yüksek Momentum)
         
         ENHANCED: Now includes Turkey-specific crisis detection (Fix 1).
+        
+        Args:
+            market: Panel için bir kez hesaplanmış piyasa bileşenleri (bkz. detect_regimes_panel)
         """
-        df = self.data.copy() # Hata önlemek için kopya
+        df = self.data # __init__ zaten kopyaladı
         
         # Gerekli metriklerin varlığını kontrol et
         required_cols = ['Volatility_20', 'Close']
@@ -102,7 +110,7 @@ class RegimeDetector:
             
         # Volatilite Yıllıklandırma
         # Config'e göre ölçeklendirme faktörü
-        scale_factor = 52 if getattr(config, 'TIMEFRAME', 'D') == 'W' else 252
+        scale_factor = config.get_bars_per_year()
         annual_volatility = df['Volatility_20'] * np.sqrt(scale_factor)
         
         # Parametreleri al (Varsayılanlar veya Config)
@@ -114,10 +122,10 @@ class RegimeDetector:
             # Min 1 yıl (252 gün / 52 hafta) veri olsun, yoksa default kullan
             min_per = scale_factor 
             
-            # Pandas expanding quantile (Bazen yavaştır ama doğru yöntem budur)
-            # Alternatif: Rolling 3-5 yıl
-            vol_low = annual_volatility.expanding(min_periods=min_per).quantile(0.25).fillna(default_low)
-            vol_high = annual_volatility.expanding(min_periods=min_per).quantile(0.75).fillna(default_high)
+            # Expanding quantile'lar tek geçişte (Fenwick ağacı, pandas expanding().quantile ile birebir)
+            quantiles = expanding_quantiles(annual_volatility.values, [0.25, 0.75], min_per)
+            vol_low = pd.Series(quantiles[:, 0], index=df.index).fillna(default_low)
+            vol_high = pd.Series(quantiles[:, 1], index=df.index).fillna(default_high)
             
             if verbose: print(f"  [Adaptive] Eşikler Expanding Window ile hesaplandı (Leakage-Free).")
             
@@ -145,7 +153,7 @@ class RegimeDetector:
         
         # ENHANCED CRISIS DETECTION (Fix 1)
         # Check Turkey-specific crisis score
-        turkey_crisis_score = self.detect_turkey_crisis(df, verbose=verbose)
+        turkey_crisis_score = self.detect_turkey_crisis(df, verbose=verbose, market=market)
         
         # Rejim Etiketleme
         # KRİZ: Yüksek Volatilite OR Turkey Crisis Score >= 3
@@ -167,67 +175,16 @@ class RegimeDetector:
         
         df['Regime_Raw'] = np.select(conditions, choices, default=0)
         
-        # Detection Loop (Debounce)
+        # Detection Loop (Debounce) - derlenmiş kernel
         # Rejim sinyali en az 'min_days' boyunca kalıcı olmalı
-        regimes_raw = df['Regime_Raw'].values
-        final_regimes = np.zeros_like(regimes_raw)
-        
-        current_stable = 0
-        candidate = 0
-        candidate_count = 0
-        
-        for i in range(len(regimes_raw)):
-            r = regimes_raw[i]
-            
-            if i < min_days:
-                # Başlangıçta yeterli veri yok, raw değeri veya varsayılanı kabul et
-                final_regimes[i] = r
-                current_stable = r
-                continue
-                
-            if r == current_stable:
-                # Sinyal zaten mevcut rejimle aynı, aday sayacı sıfırla
-                candidate = r
-                candidate_count = 0
-            else:
-                # Sinyal farklı
-                if r == candidate:
-                    candidate_count += 1
-                else:
-                    # Yeni bir aday
-                    candidate = r
-                    candidate_count = 1
-                
-                # Aday yeterince süreklilik gösterdi mi?
-                if candidate_count >= min_days:
-                    current_stable = candidate
-                    candidate_count = 0
-            
-            final_regimes[i] = current_stable
-
-        df['Regime_Num'] = final_regimes
+        df['Regime_Num'] = debounce_regimes(df['Regime_Raw'].values.astype(np.int64), min_days)
         
         # String Mapping
-        regime_map = {
-            0: 'Sideways',    # Normal/Yatay
-            1: 'Crash_Bear',  # Kriz
-            2: 'Trend_Up'     # Ralli
-        }
-        df['Regime'] = df['Regime_Num'].map(regime_map)
+        df['Regime'] = df['Regime_Num'].map(REGIME_MAP)
         
         # FIX 10: Regime confidence (Rejim ne kadar kesin?)
-        df['Regime_Confidence'] = 0.0
-        
-        for i in range(len(df)):
-            if i < 10:  # İlk 10 gün yetersiz veri
-                df.loc[df.index[i], 'Regime_Confidence'] = 0.5
-                continue
-                
-            # Son 10 günde rejim değişimi var mı?
-            recent_regimes = df['Regime_Num'].iloc[i-10:i+1]
-            regime_stability = (recent_regimes == recent_regimes.iloc[-1]).sum() / len(recent_regimes)
-            
-            df.loc[df.index[i], 'Regime_Confidence'] = regime_stability
+        # Son 10 günde rejim değişimi var mı? (İlk 10 gün yetersiz veri: 0.5)
+        df['Regime_Confidence'] = regime_confidence(df['Regime_Num'].values, CONFIDENCE_WINDOW)
         
         if verbose:
             print("Rejim Dağılımı:")
@@ -236,6 +193,232 @@ class RegimeDetector:
         self.data = df
         return df
 
+class StreamingQuantile:
+    """
+    Expanding quantile'ın canlı (bar bar) karşılığı: iki heap, her güncelleme O(log n).
+    Alt heap en küçük k+1 değeri tutar (k = int(q * (n-1))); sonuç pandas linear interpolasyonu ile aynı.
+    """
+
+    def __init__(self, q):
+        self.q = q
+        self.lower = []  # max-heap (negatif değerler)
+        self.upper = []  # min-heap
+        self.nobs = 0
+
+    def add(self, value):
+        if np.isnan(value):
+            return
+        if self.lower and value < -self.lower[0]:
+            heapq.heappush(self.lower, -value)
+        else:
+            heapq.heappush(self.upper, value)
+        self.nobs += 1
+
+        target = int(self.q * (self.nobs - 1)) + 1
+        while len(self.lower) > target:
+            heapq.heappush(self.upper, -heapq.heappop(self.lower))
+        while len(self.lower) < target:
+            heapq.heappush(self.lower, -heapq.heappop(self.upper))
+
+    def value(self, min_periods=1):
+        if self.nobs == 0 or self.nobs < min_periods:
+            return np.nan
+        idx_with_fraction = self.q * (self.nobs - 1)
+        idx = int(idx_with_fraction)
+        vlow = -self.lower[0]
+        if idx_with_fraction == idx:
+            return vlow
+        return vlow + (self.upper[0] - vlow) * (idx_with_fraction - idx)
+
+
+class _RollingWindow:
+    """Sabit pencereli toplam; pencere dolu değilse veya içinde NaN varsa NaN (pandas min_periods=window)."""
+
+    def __init__(self, window):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.n_nan = 0
+
+    def add(self, value):
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            if np.isnan(old):
+                self.n_nan -= 1
+            else:
+                self.total -= old
+        self.values.append(value)
+        if np.isnan(value):
+            self.n_nan += 1
+        else:
+            self.total += value
+
+    def sum(self):
+        if len(self.values) < self.values.maxlen or self.n_nan:
+            return np.nan
+        return self.total
+
+    def mean(self):
+        return self.sum() / self.values.maxlen
+
+
+class RegimeStream:
+    """
+    RegimeDetector.detect_regimes'in canlı oturum karşılığı: her yeni bar O(1)
+    (adaptive eşiklerin expanding quantile'ı O(log n)). Geçmiş bar'lar `warm_up` ile oynatılır.
+
+    Bar alanları detect_regimes kolonlarıyla aynıdır (Volatility_20, Close, RSI, SMA_200,
+    USDTRY_Change, VIX_Risk, SP500_Return). RSI yoksa nötr 50 kabul edilir; SMA_200 yoksa
+    Close'un 200 barlık ortalaması kullanılır.
+    """
+
+    def __init__(self, thresholds=None, use_adaptive=None):
+        self.thresholds = thresholds if thresholds else config.REGIME_THRESHOLDS
+        self.use_adaptive = getattr(config, 'USE_ADAPTIVE_REGIME', False) if use_adaptive is None else use_adaptive
+        self.scale_factor = config.get_bars_per_year()
+        self.mom_thresh = self.thresholds.get('momentum_threshold', 55)
+        self.min_days = int(self.thresholds.get('min_regime_days', 3))
+
+        window = crisis_window()
+        self.q_low = StreamingQuantile(0.25)
+        self.q_high = StreamingQuantile(0.75)
+        self.vol_smooth = _RollingWindow(3)
+        self.sma_200 = _RollingWindow(200)
+        self.usd_rolling = _RollingWindow(window)
+        self.sp500_rolling = _RollingWindow(window)
+        self.closes = deque(maxlen=window + 1)
+        self.recent_regimes = deque(maxlen=CONFIDENCE_WINDOW + 1)
+
+        self.n_bars = 0
+        self.current_stable = 0
+        self.candidate = 0
+        self.candidate_count = 0
+
+    def _vol_thresholds(self):
+        default_high = config.REGIME_THRESHOLDS['volatility_high']
+        default_low = config.REGIME_THRESHOLDS['volatility_low']
+        if self.use_adaptive:
+            vol_low = self.q_low.value(self.scale_factor)
+            vol_high = self.q_high.value(self.scale_factor)
+            return (default_low if np.isnan(vol_low) else vol_low,
+                    default_high if np.isnan(vol_high) else vol_high)
+        return (self.thresholds.get('volatility_low', default_low),
+                self.thresholds.get('volatility_high', default_high))
+
+    def _crisis_score(self, bar, annual_vol, close, market_score=None):
+        score = 0
+        if market_score is not None:
+            # Piyasa geneli kısım dışarıda (tarih başına bir kez) hesaplandı
+            score += int(market_score)
+        elif 'USDTRY_Change' in bar:
+            self.usd_rolling.add(float(bar['USDTRY_Change']))
+            usd = self.usd_rolling.sum()
+            if usd > 0.10:
+                score += 2
+            elif usd > 0.05:
+                score += 1
+        if market_score is None and 'VIX_Risk' in bar and bar['VIX_Risk'] > 30.0:
+            score += 2
+        if market_score is None and 'SP500_Return' in bar:
+            self.sp500_rolling.add(float(bar['SP500_Return']))
+            if self.sp500_rolling.sum() < -0.10:
+                score += 1
+        self.closes.append(close)
+        if len(self.closes) == self.closes.maxlen and close / self.closes[0] - 1 < -0.10:
+            score += 1
+        if annual_vol > self.thresholds.get('volatility_high', 0.30) * 1.5:
+            score += 1
+        return score
+
+    def update(self, bar, market_score=None):
+        """
+        Yeni bir bar işler.
+
+        Args:
+            bar: dict veya pd.Series (detect_regimes kolonları)
+            market_score: O tarihin Market_Crisis_Score'u (core.market_state); verilirse makro
+                          kolonlar hisse başına işlenmez
+
+        Returns:
+            dict: Regime_Raw, Regime_Num, Regime, Regime_Confidence
+        """
+        close = float(bar['Close'])
+        annual_vol = float(bar['Volatility_20']) * np.sqrt(self.scale_factor)
+
+        if self.use_adaptive:
+            self.q_low.add(annual_vol)
+            self.q_high.add(annual_vol)
+        vol_low, vol_high = self._vol_thresholds()
+
+        self.vol_smooth.add(annual_vol)
+        smooth = self.vol_smooth.mean()
+        if np.isnan(smooth):
+            smooth = annual_vol
+
+        crisis = self._crisis_score(bar, annual_vol, close, market_score)
+
+        self.sma_200.add(close)
+        sma_200 = float(bar['SMA_200']) if 'SMA_200' in bar else self.sma_200.mean()
+        rsi = float(bar['RSI']) if 'RSI' in bar else 50.0
+
+        if smooth > vol_high or crisis >= 3:
+            raw = 1
+        elif close > sma_200 and smooth < vol_high and rsi > self.mom_thresh:
+            raw = 2
+        else:
+            raw = 0
+
+        # Debounce (core/regime_kernel.debounce_regimes ile aynı)
+        if self.n_bars < self.min_days:
+            self.current_stable = raw
+        elif raw == self.current_stable:
+            self.candidate = raw
+            self.candidate_count = 0
+        else:
+            if raw == self.candidate:
+                self.candidate_count += 1
+            else:
+                self.candidate = raw
+                self.candidate_count = 1
+            if self.candidate_count >= self.min_days:
+                self.current_stable = self.candidate
+                self.candidate_count = 0
+        regime = self.current_stable
+        self.n_bars += 1
+
+        self.recent_regimes.append(regime)
+        if self.n_bars <= CONFIDENCE_WINDOW:
+            confidence = 0.5
+        else:
+            confidence = sum(1 for r in self.recent_regimes if r == regime) / len(self.recent_regimes)
+
+        return {'Regime_Raw': raw, 'Regime_Num': regime, 'Regime': REGIME_MAP[regime],
+                'Regime_Confidence': confidence}
+
+    def warm_up(self, df):
+        """Geçmiş bar'ları sırayla işler; son bar'ın sonucunu döner."""
+        result = None
+        for bar in df.to_dict('records'):
+            result = self.update(bar)
+        return result
+
+
+def detect_regimes_panel(panel, thresholds=None, use_adaptive=None, verbose=False):
+    """
+    Tüm hisselerin rejimleri: piyasa geneli bileşenler (USD/TRY, VIX, S&P500) panelin makro
+    kolonlarından tarih başına bir kez hesaplanır (core.market_state, cache'li) ve her hisseye
+    yayınlanır; hisse başına sadece kendi volatilitesi, Close, SMA200 ve RSI kontrolleri çalışır.
+
+    Args:
+        panel: {ticker: DataFrame}
+
+    Returns:
+        {ticker: detect_regimes çıktısı}
+    """
+    market = market_state.components_for_panel(panel)
+    return {ticker: RegimeDetector(df, thresholds, use_adaptive).detect_regimes(verbose=verbose, market=market)
+            for ticker, df in panel.items()}
+
+
 import lightgbm as lgb
 import optuna
 from sklearn.model_selection import TimeSeriesSplit
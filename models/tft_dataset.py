@@ -0,0 +1,252 @@
+"""
+TFT Dataset Cache'i
+TFT eğitiminde her çalıştırmada makro birleştirme + doldurma + kolon temizliği ve
+TimeSeriesDataSet satır encode'u (scaler / kategorik encoder / hedef normalizer) baştan
+yapılıyordu. Bu modül:
+
+- tft_frame: train_models.py'deki TFT veri hazırlığı (makro birleştirme, hisse içinde
+  ileri doldurma, '.' -> '_', vektörel time_idx) ve sadece modelin kolonları
+- TFTDatasetStore: Fit edilmiş dataset parametreleri (normalizer durumu, kategorik
+  encoder'lar, scaler'lar) ve encode edilmiş satırlar tft_config.joblib'in yanında
+  (models/saved/tft_dataset/) saklanır. Sonraki çalıştırmalarda aynı parametrelerle
+  sadece yeni (veya değişmiş) satırlar encode edilir; eğitim, validasyon ve sanity check
+  aynı parametreleri kullanır (validasyon seti artık kendi scaler'larını fit etmez)
+
+Parametreler şu durumlarda yeniden fit edilir: konfigürasyon / kolonlar değişti, yeni
+hisse geldi, son fit'ten bu yana TFT_DATASET_REFIT_DAYS'ten fazla yeni gün var veya
+refit=True.
+
+Kullanım:
+    store = TFTDatasetStore()
+    train_ds, val_ds, info = store.datasets(tft_data, tft_config_dict, cutoff_date)
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from pytorch_forecasting import TimeSeriesDataSet
+
+import config
+from core.result_cache import make_key
+from models.transformer_model import assign_time_idx, tft_dataset_kwargs
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(ROOT_DIR, getattr(config, 'TFT_DATASET_DIR', 'models/saved/tft_dataset'))
+
+
+def tft_frame(full_data, macro_df=None):
+    """
+    (Date, Ticker) indeksli feature paneli -> TFT veri çerçevesi (Date, Ticker, time_idx kolonlu).
+    Makro veriler tarihe göre eklenir; eksikler hisse içinde ileri doldurulur, kalanı 0.
+    """
+    frame = full_data.reset_index()
+    if macro_df is not None and not macro_df.empty:
+        frame = frame.merge(macro_df, left_on='Date', right_index=True, how='left')
+    # PyTorch Forecasting sütun isimlerinde '.' sevmez
+    frame.columns = frame.columns.astype(str).str.replace(".", "_", regex=False)
+    frame = frame.sort_values(['Ticker', 'Date'], ignore_index=True)
+    numeric = frame.select_dtypes('number').columns
+    frame[numeric] = frame.groupby('Ticker')[numeric].ffill().fillna(0)
+    frame['time_idx'] = assign_time_idx(frame['Date'])
+    return frame
+
+
+def model_columns(dataset_config):
+    """Dataset'in kullandığı kolonlar (geri kalan feature'lar encode edilmez)."""
+    return list(dict.fromkeys(
+        ['Date', 'Ticker', 'time_idx'] + list(dataset_config.get('static', [])) + list(dataset_config.get('known', []))
+        + list(dataset_config.get('unknown', [])) + [dataset_config['target']]))
+
+
+class EncodedTimeSeriesDataSet(TimeSeriesDataSet):
+    """
+    Satır encode'unu (_preprocess_data) aktif TFTDatasetStore'dan alan TimeSeriesDataSet.
+    Store aktif değilse TimeSeriesDataSet ile aynıdır.
+    """
+
+    _store = None
+
+    def _preprocess_data(self, data):
+        store = EncodedTimeSeriesDataSet._store
+        if store is None:
+            return super()._preprocess_data(data)
+        return store.preprocess(self, data)
+
+
+class TFTDatasetStore:
+    """Fit edilmiş dataset parametreleri + encode edilmiş satırlar (disk + bellek)."""
+
+    def __init__(self, directory=None, refit_days=None):
+        self.directory = directory or DATASET_DIR
+        self.refit_days = refit_days or getattr(config, 'TFT_DATASET_REFIT_DAYS', 250)
+        self.parameters = None
+        self.meta = {}
+        self._encoded = None # encode edilmiş satırlar (TimeSeriesDataSet._preprocess_data çıktısı)
+        self._keys = None    # (Ticker, Date) MultiIndex, _encoded ile hizalı
+        self._hashes = None
+        self.stats = {'encoded_rows': 0, 'cached_rows': 0}
+        self._load()
+
+    # ---------------------------------------------------------
+    # Disk
+    # ---------------------------------------------------------
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        try:
+            with open(self._path('meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            parameters = joblib.load(self._path('parameters.joblib'))
+            stored = pd.read_pickle(self._path('encoded.pkl'))
+        except (OSError, ValueError, EOFError, KeyError) as e:
+            if os.path.exists(self._path('meta.json')):
+                print(f"⚠️ TFT dataset cache'i okunamadı, yeniden oluşturulacak: {e}")
+            return
+        self.meta, self.parameters = meta, parameters
+        self._set_rows(stored['keys'], stored['hashes'], stored['encoded'])
+
+    def save(self):
+        """Parametreler + encode edilmiş satırlar (atomik)."""
+        if self.parameters is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._write('parameters.joblib', lambda path: joblib.dump(self.parameters, path))
+        self._write('encoded.pkl', lambda path: pd.to_pickle(
+            {'keys': self._keys, 'hashes': self._hashes, 'encoded': self._encoded}, path))
+        self._write('meta.json', lambda path: self._write_json(self.meta, path))
+
+    def _write(self, name, write):
+        tmp_path = self._path(f"{name}.tmp")
+        write(tmp_path)
+        os.replace(tmp_path, self._path(name))
+
+    @staticmethod
+    def _write_json(payload, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+
+    # ---------------------------------------------------------
+    # Satır cache'i
+    # ---------------------------------------------------------
+    def _set_rows(self, keys, hashes, encoded):
+        self._keys, self._hashes, self._encoded = keys, hashes, encoded.reset_index(drop=True)
+
+    def _row_keys(self, data):
+        return pd.MultiIndex.from_arrays([data['Ticker'].to_numpy(), pd.to_datetime(data['Date']).to_numpy()])
+
+    def _row_hashes(self, data):
+        columns = [c for c in self.meta['columns'] if c not in ('Ticker', 'Date', 'time_idx')]
+        return pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+
+    def preprocess(self, dataset, data):
+        """
+        TimeSeriesDataSet._preprocess_data yerine: aynı (Ticker, Date) ve aynı içerikle daha
+        önce encode edilmiş satırlar cache'ten gelir, kalanlar dataset'in kendi
+        (fit edilmiş) encode'undan geçer ve cache'e eklenir.
+        """
+        keys, hashes = self._row_keys(data), self._row_hashes(data)
+        hit = np.zeros(len(data), dtype=bool)
+        if self._encoded is not None and len(self._encoded):
+            idx = self._keys.get_indexer(keys)
+            hit = idx >= 0
+            hit[hit] = self._hashes[idx[hit]] == hashes[hit]
+
+        parts = []
+        if hit.any():
+            cached = self._encoded.iloc[idx[hit]]
+            cached.index = data.index[hit]
+            parts.append(cached)
+        # Tüm satırlar cache'te olsa da dataset'in kendi encode'u en az bir satırda çalışır:
+        # hedef ölçek kolonlarını reals listesine ekleme gibi yan etkileri vardır
+        fresh = TimeSeriesDataSet._preprocess_data(dataset, (data.loc[~hit] if (~hit).any() else data.iloc[:1]).copy())
+        if (~hit).any():
+            parts.append(fresh)
+            self._append(keys[~hit], hashes[~hit], fresh)
+        self.stats['cached_rows'] += int(hit.sum())
+        self.stats['encoded_rows'] += int((~hit).sum())
+
+        out = pd.concat(parts).loc[data.index] if len(parts) > 1 else parts[0]
+        # Tarih -> time_idx eşlemesi çalıştırmalar arasında değişebilir (eski tarih eklenirse)
+        out[dataset.time_idx] = data[dataset.time_idx].to_numpy()
+        out['__time_idx__'] = data[dataset.time_idx].to_numpy()
+        return out
+
+    def _append(self, keys, hashes, fresh):
+        fresh = fresh.reset_index(drop=True)
+        if self._encoded is None or not len(self._encoded):
+            self._set_rows(keys, hashes, fresh)
+            return
+        # Aynı anahtarın eski (değişmiş) satırı atılır
+        keep = ~self._keys.isin(keys)
+        self._set_rows(self._keys[keep].append(keys), np.concatenate([self._hashes[keep], hashes]),
+                       pd.concat([self._encoded[keep], fresh], ignore_index=True))
+
+    # ---------------------------------------------------------
+    # Dataset'ler
+    # ---------------------------------------------------------
+    def refit_reason(self, frame, dataset_config, fingerprint):
+        """Parametreler neden yeniden fit edilmeli (None: cache kullanılabilir)."""
+        if self.parameters is None:
+            return "cache yok"
+        if self.meta.get('fingerprint') != fingerprint:
+            return "konfigürasyon / kolonlar değişti"
+        if not set(frame['Ticker'].unique()) <= set(self.meta.get('tickers', [])):
+            return "yeni hisse"
+        fit_last = pd.Timestamp(self.meta['fit_last_date'])
+        new_days = int((frame['Date'].drop_duplicates() > fit_last).sum())
+        if new_days > self.refit_days:
+            return f"son fit'ten bu yana {new_days} yeni gün"
+        return None
+
+    def datasets(self, tft_data, dataset_config, cutoff_date, refit=False):
+        """
+        Eğitim (< cutoff_date) ve validasyon (>= cutoff_date tahminleri, encoder bağlamı önceki
+        günlerden) dataset'leri. Validasyon eğitimin parametrelerini kullanır.
+
+        Returns:
+            (train_ds, val_ds, info)
+        """
+        t0 = time.perf_counter()
+        frame = tft_data[model_columns(dataset_config)].copy()
+        frame['Date'] = pd.to_datetime(frame['Date'])
+        fingerprint = make_key(dataset_config, list(frame.columns))
+
+        train_frame = frame[frame['Date'] < pd.Timestamp(cutoff_date)]
+        # create_dataset(mode='train') ile aynı: son max_prediction_length gün eğitimde hedef değil
+        train_frame = train_frame[train_frame['time_idx'] <= train_frame['time_idx'].max()
+                                  - dataset_config['max_prediction_length']]
+
+        reason = "refit istendi" if refit else self.refit_reason(frame, dataset_config, fingerprint)
+        self.stats = {'encoded_rows': 0, 'cached_rows': 0}
+        EncodedTimeSeriesDataSet._store = self
+        try:
+            if reason:
+                self.parameters, self._encoded, self._keys, self._hashes = None, None, None, None
+                self.meta = {'fingerprint': fingerprint, 'columns': list(frame.columns)}
+                train_ds = EncodedTimeSeriesDataSet(train_frame, **tft_dataset_kwargs(dataset_config))
+                self.parameters = train_ds.get_parameters()
+                self.meta.update({
+                    'fitted_at': datetime.now().isoformat(timespec='seconds'),
+                    'fit_last_date': str(train_frame['Date'].max().date()),
+                    'tickers': sorted(frame['Ticker'].unique()),
+                })
+            else:
+                train_ds = EncodedTimeSeriesDataSet.from_parameters(self.parameters, train_frame)
+            val_ds = EncodedTimeSeriesDataSet.from_parameters(
+                self.parameters, frame, stop_randomization=True,
+                min_prediction_idx=int(frame.loc[frame['Date'] >= pd.Timestamp(cutoff_date), 'time_idx'].min()))
+        finally:
+            EncodedTimeSeriesDataSet._store = None
+
+        self.meta['last_date'] = str(frame['Date'].max().date())
+        self.meta['rows'] = int(len(self._encoded))
+        self.save()
+        info = dict(self.stats, mode='refit' if reason else 'reuse', reason=reason,
+                    seconds=time.perf_counter() - t0)
+        return train_ds, val_ds, info
@@ -0,0 +1,443 @@
+"""
+TFT Hızlı CPU Çıkarımı
+Ensemble'ın TFT üyesi için pytorch_forecasting'in predict() yolu (her çağrıda
+TimeSeriesDataSet + DataLoader + Lightning Trainer) yerine:
+
+- Model (tft_model.pth) ve hiperparametreleri (dataset parametreleri dahil,
+  tft_hparams.joblib) süreç başına bir kez yüklenir (get_predictor), eval + CPU
+- Satırlar modelin kendi (eğitimde fit edilmiş) scaler / normalizer'ları ile bir kez
+  encode edilir; hisse başına encode edilmiş satırlar cache'te tutulur. Ardışık günlerde
+  sadece yeni (veya değişmiş) satırlar encode edilir
+- Tüm hisselerin / tarihlerin encoder pencereleri encode edilmiş satırlardan indeksle
+  kesilip tek (büyük) batch halinde torch.inference_mode altında ileri geçirilir;
+  intra-op thread sayısı TFT_INFERENCE_THREADS ile ayarlanır
+
+Pencereler TimeSeriesDataSet'in tahmin penceresiyle aynıdır (eksik günler önceki satırla
+doldurulur, encoder uzunluğu min_encoder_length..max_encoder_length); sonuçlar
+model.predict(mode='prediction') ile aynıdır (tests/test_tft_inference.py).
+
+Not: TorchScript'e çevirme denendi; TemporalFusionTransformer forward'ı Lightning
+modülüne bağlı olduğundan script edilemiyor, bu yüzden eager + inference_mode kullanılır.
+
+Kullanım:
+    from models.tft_inference import get_predictor
+    predictor = get_predictor()                 # dosyalar yoksa None
+    scores = predictor.predict(df)              # df satırlarıyla hizalı Series (geçmişi yetmeyen: NaN)
+    latest = predictor.predict_latest(df)       # hisse başına son gün
+
+    # Eski eğitimler (sadece state_dict kaydedilmiş) için hiperparametreleri checkpoint'ten çıkar:
+    python models/tft_inference.py export lightning_logs/version_7/checkpoints/epoch=10-step=7117.ckpt
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import torch
+
+import config
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(ROOT_DIR, getattr(config, 'TFT_MODEL_PATH', 'models/saved/tft_model.pth'))
+HPARAMS_PATH = os.path.join(ROOT_DIR, getattr(config, 'TFT_HPARAMS_PATH', 'models/saved/tft_hparams.joblib'))
+
+
+def save_artifacts(model, model_path=None, hparams_path=None):
+    """Ağırlıklar (state_dict) + hiperparametreler (dataset parametreleri dahil)."""
+    model_path = model_path or MODEL_PATH
+    hparams_path = hparams_path or HPARAMS_PATH
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    torch.save(model.state_dict(), model_path)
+    joblib.dump(dict(model.hparams), hparams_path)
+    return model_path, hparams_path
+
+
+def export_checkpoint(checkpoint_path, model_path=None, hparams_path=None):
+    """Lightning checkpoint'inden tft_model.pth + tft_hparams.joblib üretir."""
+    from pytorch_forecasting import TemporalFusionTransformer
+
+    model = TemporalFusionTransformer.load_from_checkpoint(checkpoint_path, map_location='cpu')
+    return save_artifacts(model, model_path, hparams_path)
+
+
+def load_tft(model_path=None, hparams_path=None):
+    """Kaydedilmiş TFT'yi CPU'da eval modunda kurar."""
+    from pytorch_forecasting import TemporalFusionTransformer
+
+    hparams = joblib.load(hparams_path or HPARAMS_PATH)
+    model = TemporalFusionTransformer(**hparams)
+    model.load_state_dict(torch.load(model_path or MODEL_PATH, map_location='cpu'))
+    return model.eval()
+
+
+class TFTPredictor:
+    """Yüklenmiş TFT + encode edilmiş satır cache'i + batch'li ileri geçiş."""
+
+    def __init__(self, model, num_threads=None, batch_size=None):
+        self.model = model.eval()
+        self.params = model.dataset_parameters
+        self.num_threads = num_threads or getattr(config, 'TFT_INFERENCE_THREADS', None) or os.cpu_count() or 1
+        self.batch_size = batch_size or getattr(config, 'TFT_INFERENCE_BATCH_SIZE', 256)
+
+        self.target = self.params['target']
+        self.group = self.params['group_ids'][0]
+        self.max_encoder_length = self.params['max_encoder_length']
+        self.min_encoder_length = self.params['min_encoder_length']
+        self.inputs = list(dict.fromkeys(
+            (self.params['time_varying_known_reals'] or []) + (self.params['time_varying_unknown_reals'] or [])
+            + (self.params['static_reals'] or [])))
+        # Kategorik girdiler (grup kimliği zaten groups tensöründe); değişken grupları kolonlarına açılır
+        variable_groups = self.params.get('variable_groups') or {}
+        self.categoricals = list(dict.fromkeys(
+            column
+            for name in ((self.params['static_categoricals'] or []) + (self.params['time_varying_known_categoricals'] or [])
+                         + (self.params['time_varying_unknown_categoricals'] or []))
+            for column in variable_groups.get(name, [name])
+            if column not in self.params['group_ids']))
+        # Eğitimde görülmeyen hisseler için hedef normalizer'ı yok -> tahmin NaN
+        self.known_groups = set(self.params['categorical_encoders'][self.group].classes_)
+
+        self._encoder = None # Fit edilmiş scaler'ları taşıyan TimeSeriesDataSet (ilk çağrıda kurulur)
+        self._rows = {}      # hisse -> encode edilmiş satırlar (tarih, içerik hash'i, tensörler)
+        self._lock = threading.Lock()
+        self.stats = {'encoded_rows': 0, 'cached_rows': 0}
+
+    # ---------------------------------------------------------
+    # Veri hazırlığı ve satır encode'u
+    # ---------------------------------------------------------
+    def prepare(self, df):
+        """
+        (Date, Ticker) satırlarını model kolonlarıyla döner (eğitimdeki gibi '.' -> '_',
+        eksikler hisse içinde ileri doldurulup 0; kategorikler sadece ileri doldurulur).
+        Çıktı df satır sırasındadır.
+        """
+        frame = df.reset_index()
+        frame.columns = frame.columns.astype(str).str.replace(".", "_", regex=False)
+        if 'Date' not in frame.columns or self.group not in frame.columns:
+            raise ValueError(f"TFT çıkarımı için Date ve {self.group} gerekli.")
+        missing = [c for c in self.inputs + self.categoricals if c not in frame.columns]
+        if missing:
+            raise ValueError(f"TFT girdileri eksik: {missing}")
+
+        frame = frame[['Date', self.group] + self.inputs + self.categoricals
+                      + ([self.target] if self.target in frame.columns else [])]
+        if self.target not in frame.columns:
+            frame[self.target] = 0.0 # Hedef modele girdi değil (sadece encoder_target)
+        columns = self.inputs + [self.target]
+        frame[columns] = frame.groupby(self.group)[columns].ffill().fillna(0).astype(float)
+        if self.categoricals:
+            frame[self.categoricals] = frame.groupby(self.group)[self.categoricals].ffill()
+        frame['Date'] = pd.to_datetime(frame['Date'])
+        return frame
+
+    def _encode(self, frame):
+        """Satırları modelin scaler / encoder'ları ile encode eder (reals, categoricals, target, group)."""
+        from pytorch_forecasting import TimeSeriesDataSet
+
+        data = frame.copy()
+        data['time_idx'] = 0
+        if self._encoder is None:
+            # Fit edilmiş encoder/scaler'lar dataset parametrelerinde; dataset sadece taşıyıcı
+            template = pd.concat([data.iloc[:1]] * (self.min_encoder_length + 1), ignore_index=True)
+            template['time_idx'] = np.arange(len(template))
+            self._encoder = TimeSeriesDataSet.from_parameters(self.params, template, predict=True)
+        data['relative_time_idx'] = 0.0
+        data['encoder_length'] = 0
+        tensors = self._encoder._data_to_tensors(self._encoder._preprocess_data(data))
+        return (tensors['reals'].clone(), tensors['categoricals'].long(), tensors['target'][0].float(),
+                tensors['groups'][:, 0])
+
+    def _encoded_rows(self, frame):
+        """
+        Hisse başına encode edilmiş satırlar. Önceki çağrıda aynı tarih + aynı içerikle
+        encode edilmiş satırlar cache'ten alınır; sadece yeni / değişmiş satırlar encode edilir.
+        """
+        hashes = pd.util.hash_pandas_object(frame[self.inputs + self.categoricals + [self.target]], index=False).to_numpy()
+        codes, tickers = pd.factorize(frame[self.group])
+        order = np.lexsort((frame['Date'].to_numpy(), codes)) # hisse içinde tarih sırası
+        bounds = np.searchsorted(codes[order], np.arange(len(tickers) + 1))
+        positions = {t: order[bounds[i]:bounds[i + 1]] for i, t in enumerate(tickers) if t in self.known_groups}
+
+        reuse = {}
+        to_encode = []
+        for ticker, pos in positions.items():
+            cached = self._rows.get(ticker)
+            if cached is None:
+                to_encode.append(pos)
+                continue
+            idx = cached['dates'].get_indexer(frame['Date'].to_numpy()[pos])
+            hit = idx >= 0
+            hit[hit] = cached['hash'][idx[hit]] == hashes[pos[hit]]
+            reuse[ticker] = (hit, idx)
+            to_encode.append(pos[~hit])
+
+        to_encode = np.concatenate(to_encode) if to_encode else np.array([], dtype=int)
+        fresh = self._encode(frame.iloc[to_encode]) if len(to_encode) else None
+        fresh_at = np.full(len(frame), -1)
+        fresh_at[to_encode] = np.arange(len(to_encode))
+        self.stats['encoded_rows'] += len(to_encode)
+
+        rows = {}
+        for ticker, pos in positions.items():
+            source = (fresh[0], fresh[1]) if fresh is not None else (self._rows[ticker]['reals'], self._rows[ticker]['cat'])
+            reals = torch.empty((len(pos), source[0].shape[1]))
+            cat = torch.empty((len(pos), source[1].shape[1]), dtype=torch.long)
+            target = torch.empty(len(pos))
+            hit, idx = reuse.get(ticker, (np.zeros(len(pos), dtype=bool), None))
+            if hit.any():
+                cached = self._rows[ticker]
+                reals[hit] = cached['reals'][idx[hit]]
+                cat[hit] = cached['cat'][idx[hit]]
+                target[hit] = cached['target'][idx[hit]]
+                self.stats['cached_rows'] += int(hit.sum())
+            if (~hit).any():
+                at = fresh_at[pos[~hit]]
+                reals[~hit] = fresh[0][at]
+                cat[~hit] = fresh[1][at]
+                target[~hit] = fresh[2][at]
+                group = fresh[3][at[0]]
+            else:
+                group = self._rows[ticker]['group']
+            rows[ticker] = {'dates': pd.DatetimeIndex(frame['Date'].to_numpy()[pos]), 'hash': hashes[pos],
+                            'reals': reals, 'cat': cat, 'target': target, 'group': group}
+        self._rows.update(rows)
+        return positions, rows
+
+    # ---------------------------------------------------------
+    # Pencereler ve ileri geçiş
+    # ---------------------------------------------------------
+    def _windows(self, time_idx, wanted):
+        """
+        Bir hissenin satırları için TimeSeriesDataSet ile aynı tahmin pencereleri.
+        Eksik günler önceki satırla doldurulur; encoder, decoder'dan en fazla
+        max_encoder_length gün önceki ilk gerçek satırdan başlar.
+
+        Returns:
+            (rows, enc_index, enc_length): tahmin edilebilen satırlar, [n, L] encoder satır
+            indeksleri (pad: -1), encoder uzunlukları
+        """
+        L = self.max_encoder_length
+        grid = time_idx - time_idx[0]
+        size = grid[-1] + 1
+        is_row = np.zeros(size, dtype=bool)
+        is_row[grid] = True
+        row_at = np.zeros(size, dtype=np.int64)
+        row_at[grid] = np.arange(len(grid))
+        filled = row_at[np.maximum.accumulate(np.where(is_row, np.arange(size), 0))] # ileri doldurma
+        next_row = np.minimum.accumulate(np.where(is_row, np.arange(size), size)[::-1])[::-1] # >= g ilk gerçek satır
+
+        decoder_at = grid[wanted]
+        start = next_row[np.maximum(decoder_at - L, 0)]
+        enc_length = decoder_at - start
+        ok = enc_length >= max(self.min_encoder_length, 1)
+        rows, decoder_at, start, enc_length = np.asarray(wanted)[ok], decoder_at[ok], start[ok], enc_length[ok]
+
+        offsets = np.arange(L)
+        enc_pos = start[:, None] + offsets[None, :]
+        enc_index = np.where(offsets[None, :] < enc_length[:, None], filled[np.minimum(enc_pos, size - 1)], -1)
+        return rows, enc_index, enc_length
+
+    def _batch(self, entries, max_length):
+        """Pencerelerden model girdisi (TimeSeriesDataSet collate çıktısıyla aynı düzen)."""
+        L = self.max_encoder_length
+        reals = self._encoder.reals
+        rel_col = reals.index('relative_time_idx') if 'relative_time_idx' in reals else None
+        len_col = reals.index('encoder_length') if 'encoder_length' in reals else None
+
+        enc_cat, enc_cont, enc_target, dec_cat, dec_cont, dec_target, lengths, groups, scales, dec_time = (
+            [] for _ in range(10))
+        for rows, enc_index, enc_length, decoder_rows, times in entries:
+            mask = torch.from_numpy(enc_index[:, :max_length] >= 0)
+            index = torch.from_numpy(np.maximum(enc_index[:, :max_length], 0))
+            cont = rows['reals'][index] * mask[..., None]
+            target = rows['target'][index] * mask
+            decoder = rows['reals'][torch.from_numpy(decoder_rows)][:, None, :].clone()
+            enc_cat.append(rows['cat'][index] * mask[..., None])
+            dec_cat.append(rows['cat'][torch.from_numpy(decoder_rows)][:, None, :])
+            length = torch.from_numpy(enc_length)
+            if rel_col is not None:
+                positions = torch.arange(max_length)[None, :] - length[:, None]
+                cont[..., rel_col] = positions / L * mask
+                decoder[..., rel_col] = 0.0
+            if len_col is not None:
+                value = ((length - 0.5 * L) / L * 2.0).float()
+                cont[..., len_col] = value[:, None] * mask
+                decoder[..., len_col] = value[:, None]
+            enc_cont.append(cont)
+            enc_target.append(target)
+            dec_cont.append(decoder)
+            dec_target.append(rows['target'][torch.from_numpy(decoder_rows)][:, None])
+            lengths.append(length)
+            groups.append(rows['group'].repeat(len(length), 1))
+            scale = torch.as_tensor(self._encoder.target_normalizer.get_parameters(
+                rows['group'].reshape(1), self._encoder.group_ids))
+            scales.append(scale.repeat(len(length), 1))
+            dec_time.append(torch.from_numpy(times)[:, None])
+
+        enc_cont = torch.cat(enc_cont)
+        n = len(enc_cont)
+        return {
+            'encoder_cat': torch.cat(enc_cat),
+            'encoder_cont': enc_cont,
+            'encoder_target': torch.cat(enc_target),
+            'encoder_lengths': torch.cat(lengths).long(),
+            'decoder_cat': torch.cat(dec_cat),
+            'decoder_cont': torch.cat(dec_cont),
+            'decoder_target': torch.cat(dec_target),
+            'decoder_lengths': torch.ones(n, dtype=torch.long),
+            'decoder_time_idx': torch.cat(dec_time).long(),
+            'groups': torch.cat(groups).long(),
+            'target_scale': torch.cat(scales),
+        }
+
+    def _forward(self, x):
+        return self.model.to_prediction(self.model(x))[:, 0]
+
+    def predict(self, df, latest_only=False, rows=None):
+        """
+        TFT nokta tahmini (medyan quantile), df satırlarıyla hizalı.
+        Geçmişi min_encoder_length'ten kısa satırlar NaN döner.
+
+        Args:
+            latest_only: Sadece her hissenin son satırı (günlük çalıştırma)
+            rows: df ile hizalı boolean maske; sadece bu satırlar tahmin edilir (diğerleri NaN),
+                encoder geçmişi yine df'in tamamından alınır (core/score_store.py)
+        """
+        frame = self.prepare(df)
+        out = np.full(len(frame), np.nan)
+        mask = None if rows is None else np.asarray(rows, dtype=bool)
+        with self._lock:
+            positions, rows = self._encoded_rows(frame)
+
+            dates = pd.Index(np.sort(frame['Date'].unique()))
+            time_idx = dates.get_indexer(frame['Date'].to_numpy())
+            windows = []
+            for ticker, pos in positions.items():
+                if latest_only:
+                    wanted = np.arange(len(pos))[-1:]
+                elif mask is not None:
+                    wanted = np.flatnonzero(mask[pos])
+                    if not len(wanted):
+                        continue
+                else:
+                    wanted = np.arange(len(pos))
+                keep, enc_index, enc_length = self._windows(time_idx[pos], wanted)
+                if len(keep):
+                    windows.append((pos[keep], rows[ticker], enc_index, enc_length, keep, time_idx[pos][keep]))
+
+            previous = torch.get_num_threads()
+            torch.set_num_threads(self.num_threads)
+            try:
+                with torch.inference_mode():
+                    for batch in self._chunks(windows):
+                        max_length = int(max(w[3].max() for w in batch))
+                        x = self._batch([(w[1], w[2], w[3], w[4], w[5]) for w in batch], max_length)
+                        targets = np.concatenate([w[0] for w in batch])
+                        out[targets] = self._forward(x).numpy()
+            finally:
+                torch.set_num_threads(previous)
+        return pd.Series(out, index=df.index, name='tft_pred')
+
+    def _chunks(self, windows):
+        """Pencereleri batch_size'lık parçalara böler (hisse pencereleri gerekirse bölünür)."""
+        batch, size = [], 0
+        for rows_out, sub, enc_index, enc_length, keep, times in windows:
+            for lo in range(0, len(keep), self.batch_size):
+                hi = lo + self.batch_size
+                part = (rows_out[lo:hi], sub, enc_index[lo:hi], enc_length[lo:hi], keep[lo:hi], times[lo:hi])
+                if size and size + len(part[0]) > self.batch_size:
+                    yield batch
+                    batch, size = [], 0
+                batch.append(part)
+                size += len(part[0])
+        if batch:
+            yield batch
+
+    def predict_latest(self, df):
+        """Hisse başına son günün tahmini (Ticker indeksli)."""
+        scores = self.predict(df, latest_only=True)
+        frame = df.reset_index()
+        tickers = frame[self.group].to_numpy()
+        valid = scores.notna().to_numpy()
+        return pd.Series(scores.to_numpy()[valid], index=pd.Index(tickers[valid], name=self.group), name='tft_pred')
+
+    def clear_cache(self):
+        self._rows.clear()
+
+
+_predictors = {}
+_predictors_lock = threading.Lock()
+
+
+def get_predictor(model_path=None, hparams_path=None):
+    """
+    Süreç başına bir kez yüklenen TFTPredictor (dosya değişirse yeniden yüklenir).
+    Model veya hiperparametre dosyası yoksa None.
+    """
+    model_path = model_path or MODEL_PATH
+    hparams_path = hparams_path or HPARAMS_PATH
+    if not (os.path.exists(model_path) and os.path.exists(hparams_path)):
+        return None
+    stamp = (os.path.getmtime(model_path), os.path.getmtime(hparams_path))
+    key = (os.path.abspath(model_path), os.path.abspath(hparams_path))
+    with _predictors_lock:
+        cached = _predictors.get(key)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, TFTPredictor(load_tft(model_path, hparams_path)))
+            _predictors[key] = cached
+    return cached[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TFT hızlı çıkarım yardımcıları")
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help="Lightning checkpoint -> tft_model.pth + tft_hparams.joblib")
+    export.add_argument('checkpoint')
+    bench = sub.add_parser('benchmark', help="Sentetik veride model.predict vs hızlı yol")
+    bench.add_argument('--days', type=int, default=300)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        model_path, hparams_path = export_checkpoint(args.checkpoint)
+        print(f"✅ {model_path}\n✅ {hparams_path}")
+        return
+
+    predictor = get_predictor()
+    if predictor is None:
+        print("❌ TFT modeli / hiperparametreleri bulunamadı (önce 'export' veya train_models.py).")
+        return
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2022-01-03', periods=args.days)
+    frames = []
+    for ticker in sorted(predictor.known_groups): # Eğitimde görülen hisseler
+        frame = pd.DataFrame(rng.normal(size=(len(dates), len(predictor.inputs))), columns=predictor.inputs)
+        frame['Date'], frame[predictor.group] = dates, ticker
+        frames.append(frame)
+    panel = pd.concat(frames, ignore_index=True).set_index('Date')
+
+    t0 = time.perf_counter()
+    predictor.predict(panel)
+    panel_seconds = time.perf_counter() - t0
+    predictor.predict_latest(panel[panel.index < dates[-1]])
+    t0 = time.perf_counter()
+    predictor.predict_latest(panel)
+    daily_seconds = time.perf_counter() - t0
+
+    frame = predictor.prepare(panel)
+    frame['time_idx'] = dates.get_indexer(frame['Date'])
+    t0 = time.perf_counter()
+    predictor.model.predict(frame, mode='prediction')
+    reference_seconds = time.perf_counter() - t0
+    print(f"Panel ({len(panel)} satır, tüm günler): {panel_seconds:.2f} sn")
+    print(f"Günlük (hisse başına son gün, cache'li): {daily_seconds * 1000:.1f} ms "
+          f"| model.predict: {reference_seconds * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+CPU Verimli TFT Eğitimi
+GPU olmayan makinede (config.get_device() -> cpu) TFT eğitimi için ayarlar ve yardımcılar:
+
+- training_profile: Cihaza göre eğitim profili. CPU'da hassasiyet (TFT_CPU_PRECISION='auto':
+  işlemci bf16 destekliyorsa (avx512_bf16 / amx_bf16) bfloat16 autocast), DataLoader
+  worker'ları, intra-op thread sayısı (worker'lara bırakılan çekirdekler hariç) ve gradient
+  accumulation. Batch'ler sadece CUDA varsa pinlenir (pinned bellek sadece host -> GPU
+  kopyasını hızlandırır). LSTM ağırlıklı küçük TFT'de bf16 her işlemcide hızlı değildir;
+  varsayılan fp32, karar benchmark ile verilir
+- SamplesPerSecond: Epoch başına eğitim hızı (örnek/sn) ve kalan süre tahmini
+- CheckpointRun: Sabit dizinde (TFT_CHECKPOINT_DIR) son checkpoint (last.ckpt) ve çalışma
+  durumu. Yarıda kalan aynı eğitim (aynı run_key) son checkpoint'ten devam eder; bitmiş veya
+  farklı bir eğitimin checkpoint'leri yeni eğitimde silinir
+- benchmark: Sentetik veride baseline (fp32, worker yok), CPU profili ve (destekleniyorsa)
+  bf16 örnek/sn karşılaştırması
+
+Kullanım:
+    python -m models.tft_training benchmark --steps 30
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+import torch
+from lightning.pytorch.callbacks import Callback
+
+import config
+from core.result_cache import make_key
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKPOINT_DIR = os.path.join(ROOT_DIR, getattr(config, 'TFT_CHECKPOINT_DIR', 'models/saved/tft_checkpoints'))
+
+
+def available_cpus():
+    """Sürecin kullanabileceği çekirdek sayısı (affinity / container limiti dahil)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def cpu_bf16_supported():
+    """İşlemci bfloat16'yı donanımda destekliyor mu (yoksa bf16 autocast fp32'den yavaştır)."""
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return bool(flags & {'avx512_bf16', 'amx_bf16'})
+
+
+def training_profile(device=None, batch_size=64):
+    """
+    Eğitim ayarları (Trainer + DataLoader + thread). GPU'da mevcut davranış korunur
+    (fp32, worker yok); CPU'da config'deki TFT_CPU_* ayarları kullanılır (None: otomatik).
+
+    Returns:
+        dict: device, precision, num_workers, pin_memory, threads, accumulate_grad_batches, batch_size
+    """
+    device = torch.device(device or getattr(config, 'DEVICE', 'cpu'))
+    if device.type != 'cpu':
+        return {'device': device.type, 'precision': '32-true', 'num_workers': 0, 'pin_memory': device.type == 'cuda',
+                'threads': None, 'accumulate_grad_batches': 1, 'batch_size': batch_size}
+
+    cpus = available_cpus()
+    precision = getattr(config, 'TFT_CPU_PRECISION', '32-true')
+    if precision == 'auto':
+        precision = 'bf16-mixed' if cpu_bf16_supported() else '32-true'
+    num_workers = getattr(config, 'TFT_CPU_NUM_WORKERS', None)
+    if num_workers is None:
+        num_workers = min(2, cpus // 4) # Batch hazırlığı hafif; çekirdekler ileri/geri geçişe kalır
+    threads = getattr(config, 'TFT_CPU_THREADS', None) or max(1, cpus - num_workers)
+    return {
+        'device': 'cpu',
+        'precision': precision,
+        'num_workers': num_workers,
+        'pin_memory': torch.cuda.is_available(),
+        'threads': threads,
+        'accumulate_grad_batches': getattr(config, 'TFT_ACCUMULATE_GRAD_BATCHES', 1),
+        'batch_size': batch_size,
+    }
+
+
+def dataloader_kwargs(profile):
+    """to_dataloader argümanları (worker varsa epoch'lar arası açık kalır)."""
+    kwargs = {'num_workers': profile['num_workers'], 'pin_memory': profile['pin_memory']}
+    if profile['num_workers'] > 0:
+        kwargs.update(persistent_workers=True, prefetch_factor=4)
+    return kwargs
+
+
+def trainer_kwargs(profile):
+    """lightning.pytorch.Trainer argümanları."""
+    return {'precision': profile['precision'], 'accumulate_grad_batches': profile['accumulate_grad_batches']}
+
+
+class SamplesPerSecond(Callback):
+    """Epoch başına eğitim hızı (örnek/sn); ilk epoch'tan sonra kalan süreyi tahmin eder."""
+
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+        self.history = []
+        self._start = None
+        self._samples = 0
+
+    def on_train_epoch_start(self, trainer, pl_module):
+        self._start, self._samples = time.perf_counter(), 0
+
+    def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):
+        x, _ = batch
+        self._samples += len(x['encoder_lengths'])
+
+    def on_train_epoch_end(self, trainer, pl_module):
+        seconds = time.perf_counter() - self._start
+        rate = self._samples / seconds if seconds > 0 else float('nan')
+        self.history.append({'epoch': trainer.current_epoch, 'samples': self._samples,
+                             'seconds': seconds, 'samples_per_sec': rate})
+        if self.verbose:
+            remaining = max(0, trainer.max_epochs - trainer.current_epoch - 1)
+            print(f"  ⏱️ Epoch {trainer.current_epoch}: {rate:,.0f} örnek/sn ({seconds:.1f} sn) "
+                  f"| kalan {remaining} epoch için ~{remaining * seconds / 60:.1f} dk (validasyon hariç)")
+
+    @property
+    def samples_per_sec(self):
+        return self.history[-1]['samples_per_sec'] if self.history else None
+
+
+class CheckpointRun:
+    """
+    Sabit checkpoint dizini + çalışma durumu (run.json). run_key eğitimin kimliğidir
+    (dataset, model hiperparametreleri, epoch / batch ayarları).
+    """
+
+    def __init__(self, run_key, directory=None):
+        self.run_key = run_key
+        self.directory = directory or CHECKPOINT_DIR
+
+    @property
+    def last_path(self):
+        return os.path.join(self.directory, 'last.ckpt')
+
+    def _state(self):
+        try:
+            with open(os.path.join(self.directory, 'run.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self, status):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, 'run.json')
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({'run_key': self.run_key, 'status': status,
+                       'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')}, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def resume_path(self):
+        """Aynı eğitim yarıda kaldıysa son checkpoint, yoksa None."""
+        state = self._state()
+        if state.get('run_key') == self.run_key and state.get('status') == 'running' and os.path.exists(self.last_path):
+            return self.last_path
+        return None
+
+    def start(self, resume=True):
+        """
+        Eğitimi başlatır: devam edilecek checkpoint'i döner; yoksa eski checkpoint'ler silinir
+        (ModelCheckpoint aynı dizine -v1 ekleriyle yazmasın).
+        """
+        ckpt_path = self.resume_path() if resume else None
+        if ckpt_path is None:
+            for path in glob.glob(os.path.join(self.directory, '*.ckpt')):
+                os.remove(path)
+        self._write_state('running')
+        return ckpt_path
+
+    def finish(self):
+        self._write_state('done')
+
+
+def run_key(model, epochs, profile, extra=None):
+    """Eğitimin kimliği: model hiperparametreleri (dataset parametreleri dahil) + eğitim ayarları."""
+    hparams = {k: v for k, v in dict(model.hparams).items() if k not in ('loss', 'logging_metrics')}
+    settings = {k: profile[k] for k in ('batch_size', 'accumulate_grad_batches', 'precision')}
+    return make_key(hparams, epochs, settings, extra)
+
+
+# ---------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------
+def synthetic_dataset(n_tickers=10, n_days=500, n_features=20, encoder_length=60, seed=0):
+    """train_models.py'deki TFT datasetine benzer boyutlarda sentetik TimeSeriesDataSet."""
+    import numpy as np
+    import pandas as pd
+    from pytorch_forecasting import TimeSeriesDataSet
+
+    from models.transformer_model import tft_dataset_kwargs
+
+    rng = np.random.default_rng(seed)
+    known, unknown = ['DayOfWeek', 'Month'], [f'f{i}' for i in range(n_features)]
+    frames = []
+    for i in range(n_tickers):
+        frame = pd.DataFrame(rng.normal(size=(n_days, len(known) + n_features)), columns=known + unknown)
+        frame['Excess_Return'] = rng.normal(0, 0.02, n_days)
+        frame['Ticker'], frame['time_idx'] = f'T{i}', np.arange(n_days)
+        frames.append(frame)
+    dataset_config = {'target': 'Excess_Return', 'known': known, 'unknown': unknown,
+                      'max_encoder_length': encoder_length, 'max_prediction_length': 1}
+    return TimeSeriesDataSet(pd.concat(frames, ignore_index=True), **tft_dataset_kwargs(dataset_config))
+
+
+def measure(dataset, profile, steps=30):
+    """Profille steps adım eğitim (validasyonsuz); örnek/sn (ilk adımlar ısınma sayılmaz)."""
+    import lightning.pytorch
+
+    from models.transformer_model import BIST30TransformerModel
+
+    torch.manual_seed(0)
+    model = BIST30TransformerModel(config).build_model(dataset)
+    loader = dataset.to_dataloader(train=True, batch_size=profile['batch_size'], **dataloader_kwargs(profile))
+    speed = SamplesPerSecond(verbose=False)
+    trainer = lightning.pytorch.Trainer(
+        max_epochs=2, accelerator=profile['device'], devices=1, limit_train_batches=steps, limit_val_batches=0,
+        gradient_clip_val=0.1, callbacks=[speed], logger=False, enable_checkpointing=False,
+        enable_progress_bar=False, enable_model_summary=False, **trainer_kwargs(profile))
+    previous = torch.get_num_threads()
+    if profile['threads']:
+        torch.set_num_threads(profile['threads'])
+    try:
+        trainer.fit(model, train_dataloaders=loader)
+    finally:
+        torch.set_num_threads(previous)
+    return speed.samples_per_sec # İkinci epoch (ilk epoch worker başlatma + ısınma)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU TFT eğitim profili")
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench = sub.add_parser('benchmark', help="Sentetik veride baseline vs CPU profili (örnek/sn)")
+    bench.add_argument('--steps', type=int, default=30, help="Epoch başına batch sayısı")
+    bench.add_argument('--batch-size', type=int, default=64)
+    bench.add_argument('--train-samples', type=int, default=None,
+                       help="Epoch süresi tahmini için eğitim örneği sayısı (varsayılan: sentetik dataset)")
+    args = parser.parse_args()
+
+    dataset = synthetic_dataset()
+    profile = training_profile('cpu', batch_size=args.batch_size)
+    baseline = {'device': 'cpu', 'precision': '32-true', 'num_workers': 0, 'pin_memory': False,
+                'threads': None, 'accumulate_grad_batches': 1, 'batch_size': args.batch_size}
+    print(f"CPU profili: {profile} (çekirdek: {available_cpus()}, bf16: {cpu_bf16_supported()})")
+    variants = [('baseline', baseline), ('cpu profili', profile)]
+    if cpu_bf16_supported() and profile['precision'] != 'bf16-mixed':
+        variants.append(('bf16', dict(profile, precision='bf16-mixed')))
+    samples = args.train_samples or len(dataset)
+    for name, settings in variants:
+        rate = measure(dataset, settings, steps=args.steps)
+        print(f"{name:>12}: {rate:,.0f} örnek/sn | {samples} örneklik epoch ~{samples / rate:.0f} sn")
+
+
+if __name__ == "__main__":
+    main()
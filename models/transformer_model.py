@@ -6,6 +6,41 @@ from pytorch_forecasting import TemporalFusionTransformer, TimeSeriesDataSet
 from pytorch_forecasting.data import GroupNormalizer
 from pytorch_forecasting.metrics import RMSE, MAE, QuantileLoss
 from lightning.pytorch.callbacks import EarlyStopping, LearningRateMonitor
+from lightning.pytorch.loggers import CSVLogger
+
+def assign_time_idx(dates):
+    """Tarihlerin sıralı benzersiz tarihler içindeki sırası (time_idx)."""
+    dates = pd.Index(pd.to_datetime(dates))
+    return pd.Index(dates.unique().sort_values()).get_indexer(dates)
+
+
+def tft_dataset_kwargs(dataset_config):
+    """prepare_tft_dataset konfigürasyonundan TimeSeriesDataSet argümanları."""
+    max_encoder_length = dataset_config['max_encoder_length']
+    return dict(
+        time_idx="time_idx",
+        target=dataset_config['target'],
+        group_ids=["Ticker"],
+        min_encoder_length=max_encoder_length // 2, # Esneklik
+        max_encoder_length=max_encoder_length,
+        min_prediction_length=1,
+        max_prediction_length=dataset_config['max_prediction_length'],
+
+        static_categoricals=dataset_config.get('static', []),
+        time_varying_known_reals=dataset_config.get('known', []),
+        time_varying_unknown_reals=dataset_config.get('unknown', []),
+
+        # Normalizasyon
+        target_normalizer=GroupNormalizer(
+            groups=["Ticker"], transformation=None
+        ),  # Negatif değerler (Returns) için Softplus kullanılmamalı! Standard Scaling (None) uygundur.
+
+        add_relative_time_idx=True,
+        add_target_scales=True,
+        add_encoder_length=True,
+        allow_missing_timesteps=True # Tatil günleri vs.
+    )
+
 
 class BIST30TransformerModel:
     def __init__(self, config_module):
@@ -47,17 +82,8 @@ class BIST30TransformerModel:
                 df['Ticker'] = 'DUMMY'
                 tickers = df['Ticker']
 
-            # Create mapping
-            unique_dates = pd.Series(dates.unique()).sort_values(ignore_index=True)
-            date_map = {d: i for i, d in enumerate(unique_dates)}
-            
-            # Map time_idx
-            # We need to map the 'dates' series we extracted
-            # Note: df['time_idx'] assignment relies on index alignment.
-            # If dates came from index, it aligns. If from column, it aligns.
-            
-            # Safe assignment
-            df['time_idx'] = dates.map(date_map)
+            # Tarih -> sıra numarası (vektörel, Python dict eşlemesi yerine)
+            df['time_idx'] = assign_time_idx(dates)
             
             # Ensure Ticker is a column for GroupNormalizer/Main Group
             if 'Ticker' not in df.columns:
@@ -67,8 +93,6 @@ class BIST30TransformerModel:
         # TimeSeriesDataSet handles some checks.
         
         # Konfigürasyon
-        target = dataset_config['target']
-        max_encoder_length = dataset_config['max_encoder_length']
         max_prediction_length = dataset_config['max_prediction_length']
         
         training_cutoff = df['time_idx'].max() - max_prediction_length
@@ -77,27 +101,7 @@ class BIST30TransformerModel:
         try:
             dataset = TimeSeriesDataSet(
                 df[df['time_idx'] <= training_cutoff] if mode=='train' else df,
-                time_idx="time_idx",
-                target=target,
-                group_ids=["Ticker"],
-                min_encoder_length=max_encoder_length // 2, # Esneklik
-                max_encoder_length=max_encoder_length,
-                min_prediction_length=1,
-                max_prediction_length=max_prediction_length,
-                
-                static_categoricals=dataset_config.get('static', []),
-                time_varying_known_reals=dataset_config.get('known', []),
-                time_varying_unknown_reals=dataset_config.get('unknown', []),
-                
-                # Normalizasyon
-                target_normalizer=GroupNormalizer(
-                    groups=["Ticker"], transformation=None
-                ),  # Negatif değerler (Returns) için Softplus kullanılmamalı! Standard Scaling (None) uygundur.
-                
-                add_relative_time_idx=True,
-                add_target_scales=True,
-                add_encoder_length=True,
-                allow_missing_timesteps=True # Tatil günleri vs.
+                **tft_dataset_kwargs(dataset_config)
             )
             
             self.dataset_params = dataset.get_parameters()
@@ -125,14 +129,23 @@ class BIST30TransformerModel:
         print("✅ TFT Modeli oluşturuldu.")
         return self.model
     
-    def train(self, train_dataset, val_dataset, epochs=30, batch_size=64):
-        """Modeli eğitir"""
-        
+    def train(self, train_dataset, val_dataset, epochs=30, batch_size=64, resume=None, run_extra=None):
+        """
+        Modeli eğitir. CPU'da models/tft_training.training_profile ayarları kullanılır
+        (bf16 autocast, DataLoader worker'ları, thread sayısı, gradient accumulation).
+        resume=True (varsayılan: config.TFT_RESUME_TRAINING): aynı eğitim yarıda kaldıysa
+        TFT_CHECKPOINT_DIR'deki son checkpoint'ten devam eder.
+        """
+        from lightning.pytorch.callbacks import ModelCheckpoint
+        from models.tft_training import (CheckpointRun, SamplesPerSecond, dataloader_kwargs, run_key,
+                                         trainer_kwargs, training_profile)
+
+        profile = training_profile(self.device, batch_size=batch_size)
         train_dataloader = train_dataset.to_dataloader(
-            train=True, batch_size=batch_size, num_workers=0 # Win'de worker 0 olmalı bazen
+            train=True, batch_size=batch_size, **dataloader_kwargs(profile)
         )
         val_dataloader = val_dataset.to_dataloader(
-            train=False, batch_size=batch_size * 2, num_workers=0
+            train=False, batch_size=batch_size * 2, **dataloader_kwargs(profile)
         )
         
         # Callbacks
@@ -140,31 +153,52 @@ class BIST30TransformerModel:
             monitor="val_loss", min_delta=1e-4, patience=10, verbose=False, mode="min"
         )
         lr_logger = LearningRateMonitor()
-        
-        # Callbacks
-        early_stop_callback = EarlyStopping(
-            monitor="val_loss", min_delta=1e-4, patience=10, verbose=False, mode="min"
+        self.throughput = SamplesPerSecond()
+
+        # Sabit checkpoint dizini: en iyi model + last.ckpt (yarıda kalan eğitim buradan devam eder)
+        run = CheckpointRun(run_key(self.model, epochs, profile, run_extra))
+        if resume is None:
+            resume = getattr(self.config, 'TFT_RESUME_TRAINING', True)
+        ckpt_path = run.start(resume=resume)
+        checkpoint_callback = ModelCheckpoint(
+            dirpath=run.directory, filename="best", monitor="val_loss", mode="min", save_top_k=1, save_last=True
         )
-        lr_logger = LearningRateMonitor()
         
         # Trainer
-        print(f"DEBUG: Trainer configured for {self.device}")
+        print(f"DEBUG: Trainer configured for {self.device} | precision={profile['precision']}, "
+              f"workers={profile['num_workers']}, threads={profile['threads']}, "
+              f"accumulate={profile['accumulate_grad_batches']}")
         trainer = lightning.pytorch.Trainer(
             max_epochs=epochs,
             accelerator='auto', # 'cpu', 'gpu', 'tpu', 'ipu', 'hpu', 'mps', 'auto'
             devices=1,
             gradient_clip_val=0.1,
-            callbacks=[early_stop_callback, lr_logger],
+            callbacks=[early_stop_callback, lr_logger, checkpoint_callback, self.throughput],
+            # Loglar checkpoint dizininde (varsayılan logger repoda lightning_logs/version_N açıyordu)
+            logger=CSVLogger(run.directory, name='logs'),
             limit_train_batches=1.0, 
             enable_model_summary=True,
+            **trainer_kwargs(profile)
         )
         
+        if ckpt_path:
+            print(f"↩️ Yarıda kalan eğitime devam ediliyor: {ckpt_path}")
         print(f"🚀 Eğitim Başlıyor...")
-        trainer.fit(
-            self.model,
-            train_dataloaders=train_dataloader,
-            val_dataloaders=val_dataloader
-        )
+        previous_threads = torch.get_num_threads()
+        if profile['threads']:
+            torch.set_num_threads(profile['threads'])
+        try:
+            trainer.fit(
+                self.model,
+                train_dataloaders=train_dataloader,
+                val_dataloaders=val_dataloader,
+                ckpt_path=ckpt_path,
+                weights_only=False # Kendi checkpoint'imiz; dataset parametreleri (normalizer) pickle'lı
+            )
+        finally:
+            torch.set_num_threads(previous_threads)
+        if not trainer.interrupted: # Ctrl+C: last.ckpt'ten devam edilebilsin
+            run.finish()
         
         # En iyi modeli yükle
         best_model_path = trainer.checkpoint_callback.best_model_path
@@ -8,6 +8,8 @@ import os
 from datetime import datetime
 from typing import Dict, Optional, Tuple, List
 
+from utils.tracing import traced
+
 
 class PortfolioState:
     """
@@ -276,6 +278,7 @@ class PortfolioState:
     # PERSISTENCE
     # ─────────────────────────────────────────────────────────────
 
+    @traced('state.load')
     def _load_state(self):
         if os.path.exists(self.state_file):
             with open(self.state_file, "r", encoding="utf-8") as f:
@@ -286,6 +289,7 @@ class PortfolioState:
                 self.trade_history = state.get("trade_history", [])
                 self.closed_trades = state.get("closed_trades", [])
 
+    @traced('state.save')
     def _save_state(self):
         os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
         with open(self.state_file, "w", encoding="utf-8") as f:
@@ -19,33 +19,30 @@ from paper_trading.position_engine import PositionEngine
 from paper_trading.position_logger import PositionLogger
 from core.risk_manager import RiskManager
 from paper_trading.strategy_health import check_strategy_health
+from utils.tracing import tracer, traced
 
 
 def load_production_model():
-    """Load best available model"""
-    import os
-    import joblib
-    
-    # Try CatBoost first
-    catboost_path = "models/saved/global_ranker_catboost.cbm"
-    if os.path.exists(catboost_path):
-        from catboost import CatBoostClassifier
-        model = CatBoostClassifier()
-        model.load_model(catboost_path)
-        print(f"✅ CatBoost model loaded: {catboost_path}")
-        return model
-    
-    # Fallback to LightGBM
-    lgbm_path = "models/saved/global_ranker.pkl"
-    if os.path.exists(lgbm_path):
-        model = joblib.load(lgbm_path)
-        print(f"✅ LightGBM model loaded: {lgbm_path}")
-        return model
+    """
+    Load best available model (CatBoost ranker öncelikli).
+    Model registry üzerinden yüklenir: üretim versiyonu süreç boyunca bellekte tutulur,
+    yeni versiyon promote edilince otomatik değişir. Dönen ranker predict(df) ile
+    kendi feature kolonlarını seçer.
+    """
+    from models.model_registry import model_registry
+    
+    for name in ('global_ranker_catboost', 'global_ranker'):
+        ranker = model_registry.load(name)
+        if ranker is not None and ranker.model is not None:
+            print(f"✅ {type(ranker.model).__name__} model loaded: {name}")
+            return ranker
     
     raise FileNotFoundError("❌ No production model found")
 
 
-def run_position_aware_session(verbose: bool = True):
+@traced('paper.session', rows=None)
+def run_position_aware_session(verbose: bool = True, portfolio=None, model=None,
+                               loader=None, tickers=None, log_dir=None):
     """
     Modern Position-Aware Paper Trading Session
     
@@ -55,6 +52,9 @@ def run_position_aware_session(verbose: bool = True):
     4. Calculate target weights (Top 5)
     5. Execute trades via PositionEngine
     6. Log and save state
+
+    portfolio/model/loader/tickers/log_dir verilmezse üretim varsayılanları kullanılır
+    (benchmark ve testler sentetik veriyle çalıştırabilsin diye enjekte edilebilir).
     """
     
     print("\n" + "="*70)
@@ -63,10 +63,14 @@ def run_position_aware_session(verbose: bool = True):
     print("="*70)
     
     # 1. Initialize modules
-    portfolio = PortfolioState.load()
+    if portfolio is None:
+        portfolio = PortfolioState.load()
     risk_manager = RiskManager()
     engine = PositionEngine(portfolio_state=portfolio, risk_manager=risk_manager)
-    logger = PositionLogger()
+    if log_dir:
+        logger = PositionLogger(os.path.join(log_dir, "daily"), os.path.join(log_dir, "summary"))
+    else:
+        logger = PositionLogger()
     
     if verbose:
         print(f"\n📊 Portfolio State (Start):")
@@ -76,8 +80,9 @@ def run_position_aware_session(verbose: bool = True):
         print(f"   Exposure       : {portfolio.exposure_ratio()*100:.1f}%")
     
     # 2. Load model
-    print(f"\n⏳ Loading production model...")
-    model = load_production_model()
+    if model is None:
+        print(f"\n⏳ Loading production model...")
+        model = load_production_model()
     
     # 3. Strategy health check (kill-switch & position sizing hints)
     can_trade, health_msg, health_rec = check_strategy_health(portfolio)
@@ -95,8 +100,9 @@ def run_position_aware_session(verbose: bool = True):
 
     # 4. Download market data
     print(f"⏳ Downloading market data...")
-    loader = DataLoader(start_date=config.START_DATE)
-    tickers = config.TICKERS
+    if loader is None:
+        loader = DataLoader(start_date=config.START_DATE)
+    tickers = tickers or config.TICKERS
     
     all_data = {}
     for ticker in tickers:
@@ -108,6 +114,7 @@ def run_position_aware_session(verbose: bool = True):
         df = fe.process_all(ticker)
         
         if not df.empty:
+            df['Ticker'] = ticker # groupby('Ticker') ve hedef portföy çıktısı için gerekli
             all_data[ticker] = df
     
     if not all_data:
@@ -132,11 +139,13 @@ def run_position_aware_session(verbose: bool = True):
     MAX_POSITIONS = getattr(config, 'PORTFOLIO_SIZE', 5)
     MIN_CONFIDENCE = float(health_rec.get("confidence_threshold", 0.55))
     
-    top_picks = latest.head(MAX_POSITIONS)
+    top_picks = latest.head(MAX_POSITIONS).copy()
     
     # Simple equal weighting for Top N
-    total_score = top_picks['Score'].sum()
-    top_picks['target_weight'] = top_picks['Score'] / total_score if total_score > 0 else 1.0 / len(top_picks)
+    # Ranker skorları negatif olabilir; negatif ağırlık (açığa satış) üretmemek için 0'da kırp
+    positive_scores = top_picks['Score'].clip(lower=0)
+    total_score = positive_scores.sum()
+    top_picks['target_weight'] = positive_scores / total_score if total_score > 0 else 1.0 / len(top_picks)
     
     if verbose:
         print(f"\n🎯 Target Portfolio (Top {MAX_POSITIONS}):")
@@ -241,10 +250,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Position-Aware Paper Trading")
     parser.add_argument('--reset', action='store_true', help='Reset portfolio')
     parser.add_argument('--quiet', action='store_true', help='Quiet mode')
+    parser.add_argument('--trace', action='store_true', help='Write per-stage JSON trace (config.TRACE_DIR)')
     
     args = parser.parse_args()
     
     if args.reset:
         reset_portfolio()
     else:
-        run_position_aware_session(verbose=not args.quiet)
+        with tracer.run('paper_session', enabled=args.trace or None):
+            run_position_aware_session(verbose=not args.quiet)
@@ -16,6 +16,7 @@ from utils.feature_engineering import FeatureEngineer
 from models.ranking_model import RankingModel
 from configs import banking as config_banking
 from core.backtesting import Backtester
+from core.score_store import score_store
 
 # Suppress logs
 optuna.logging.set_verbosity(optuna.logging.WARNING)
@@ -262,7 +263,7 @@ def optimize(days_back=180, trials=30, mode='strategy'):
     print("Pre-calculating Model Scores...")
     try:
         ranker = RankingModel.load("models/saved/global_ranker.pkl", config_banking)
-        scores = ranker.predict(full_df)
+        scores = score_store.predict(ranker, full_df) # Depoda olmayanlar bu (kısa geçmişli) feature'larla tahmin edilir, depoya yazılmaz
         full_df['Score'] = scores
         
         # Keep only relevant cols for backtest to save memory
@@ -0,0 +1,510 @@
+"""
+Performans Benchmark Suite
+Ana sıcak yolların (feature engineering, KAP event feature'ları, rejim tespiti,
+backtest, ranking model, Monte Carlo, paper trading oturumu) süre ve bellek ölçümü.
+
+- Sentetik ve deterministik veri (core/augmented_feature_generator, seed sabit) -> internet/cache gerekmez
+- Her ölçüm: wall time (en iyi/medyan), CPU time, tracemalloc tepe bellek, RSS artışı
+- Sonuçlar makine-okunur JSON: reports/benchmarks/bench_<zaman>_<commit>.json + latest.json
+- --compare ile önceki bir sonuç dosyasına göre regresyon raporu
+
+Kullanım:
+    python research/benchmark_performance.py
+    python research/benchmark_performance.py --scale small --only backtest,regime_detection
+    python research/benchmark_performance.py --compare reports/benchmarks/latest.json
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.augmented_feature_generator import SyntheticDataLoader, SyntheticMarketGenerator, write_kap_cache
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+OUTPUT_DIR = os.path.join('reports', 'benchmarks')
+
+# Ölçek profilleri (ticker sayısı, gün sayısı, Monte Carlo senaryo sayısı)
+SCALES = {
+    'tiny': {'n_tickers': 3, 'n_days': 400, 'mc_scenarios': 100},
+    'small': {'n_tickers': 8, 'n_days': 1000, 'mc_scenarios': 500},
+    'default': {'n_tickers': 20, 'n_days': 2000, 'mc_scenarios': 2000},
+    'large': {'n_tickers': 500, 'n_days': 5040, 'mc_scenarios': 2000},
+}
+
+# Bu oranın üzerindeki yavaşlamalar --compare çıktısında regresyon olarak işaretlenir
+REGRESSION_THRESHOLD = 1.20
+
+
+# ==========================================
+# ÖLÇÜM
+# ==========================================
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def measure(fn, repeat=3, track_memory=True, quiet=True):
+    """
+    fn'i repeat kez çalıştırır (süre), ardından bir kez tracemalloc altında (bellek).
+    tracemalloc çalışmayı yavaşlattığı için süre ölçümlerine dahil edilmez.
+    """
+    sink = io.StringIO() if quiet else None
+    process = psutil.Process() if PSUTIL_AVAILABLE else None
+
+    wall, cpu = [], []
+    rss_before = process.memory_info().rss if process else None
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+            t0, c0 = time.perf_counter(), time.process_time()
+            result = fn()
+            wall.append(time.perf_counter() - t0)
+            cpu.append(time.process_time() - c0)
+    rss_after = process.memory_info().rss if process else None
+
+    peak_mb = None
+    if track_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+                fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = peak / 1024 ** 2
+
+    return {
+        'wall_best_s': min(wall),
+        'wall_median_s': statistics.median(wall),
+        'cpu_median_s': statistics.median(cpu),
+        'repeat': repeat,
+        'peak_traced_mb': peak_mb,
+        'rss_delta_mb': (rss_after - rss_before) / 1024 ** 2 if process else None,
+    }, result
+
+
+# ==========================================
+# BENCHMARK'LAR
+# ==========================================
+# Her benchmark (ctx) alır ve (ölçülecek_fonksiyon, satır_sayısı) döner.
+# Hazırlık (veri üretimi, önceki adımlar) ölçüme dahil değildir.
+
+def bench_synthetic_market(ctx):
+    generator = SyntheticMarketGenerator(seed=ctx['seed'])
+    n_tickers, n_days = len(ctx['panel']), ctx['n_days']
+
+    def run():
+        return generator.generate_panel(n_tickers=n_tickers, n_days=n_days)
+    return run, n_tickers * n_days
+
+
+def bench_feature_engineering(ctx):
+    from utils.feature_engineering import FeatureEngineer
+    panel = ctx['panel']
+
+    def run():
+        return {t: FeatureEngineer(df.copy()).process_all() for t, df in panel.items()}
+    return run, sum(len(df) for df in panel.values())
+
+
+def bench_kap_event_features(ctx):
+    from utils.kap_data_fetcher import PYKAP_AVAILABLE
+    if not PYKAP_AVAILABLE:
+        return None, 0
+
+    lookback_days = 30
+    fetcher = write_kap_cache(ctx['market'], os.path.join(ctx['tmp_dir'], 'kap'), lookback_days=lookback_days)
+    price_frames = {t: df[['Close']] for t, df in ctx['panel'].items()}
+
+    def run():
+        return {t: fetcher.create_event_features(t, df, lookback_days=lookback_days)
+                for t, df in price_frames.items()}
+    return run, sum(len(df) for df in price_frames.values())
+
+
+def bench_regime_detection(ctx):
+    from core.market_state import market_state
+    from models.regime_detection import detect_regimes_panel
+    processed = ctx['processed']()
+
+    def run():
+        # Piyasa bileşenleri her tekrarda yeniden hesaplansın (cache ölçümü çarpıtmasın)
+        market_state.clear()
+        return detect_regimes_panel(processed)
+    return run, sum(len(df) for df in processed.values())
+
+
+def bench_backtest(ctx):
+    from core.backtesting import Backtester
+    processed = ctx['processed']()
+    rng = np.random.default_rng(ctx['seed'])
+    inputs = {}
+    for t, df in processed.items():
+        weights = pd.Series(np.where(rng.random(len(df)) < 0.3, rng.choice([0.0, 0.2, 0.33], len(df)), np.nan),
+                            index=df.index).ffill().fillna(0.0)
+        inputs[t] = (df, weights)
+
+    def run():
+        return {t: Backtester(df).run_backtest(w) for t, (df, w) in inputs.items()}
+    return run, sum(len(df) for df, _ in inputs.values())
+
+
+def _ranking_split(ctx):
+    """İşlenmiş paneli (Date, Ticker) indeksli train/test parçalarına ayırır."""
+    if 'ranking_split' not in ctx:
+        frames = []
+        for t, df in ctx['processed']().items():
+            df = df.copy()
+            df['Ticker'] = t
+            frames.append(df)
+        full = pd.concat(frames).reset_index().set_index(['Date', 'Ticker']).sort_index()
+        dates = full.index.get_level_values('Date').unique()
+        cut = dates[int(len(dates) * 0.8)]
+        train = full[full.index.get_level_values('Date') < cut]
+        test = full[full.index.get_level_values('Date') >= cut]
+        ctx['ranking_split'] = (train, test)
+    return ctx['ranking_split']
+
+
+def _ranking_params(ctx):
+    return {'n_estimators': ctx['ranking_estimators']}
+
+
+@contextlib.contextmanager
+def _ranking_caches(ctx, cold=True):
+    """
+    Ranking matris/Dataset cache'leri: blok boyunca disk katmanı benchmark klasörüne yönlenir
+    (çıkışta eski dizin geri yüklenir); cold ise boşaltılır.
+    """
+    from models.ranking_dataset import dataset_cache, matrix_cache
+    previous_dir = dataset_cache.dir
+    dataset_cache.dir = os.path.join(ctx['tmp_dir'], 'lgbm_datasets')
+    try:
+        if cold:
+            matrix_cache.clear()
+            dataset_cache.clear()
+        yield
+    finally:
+        dataset_cache.dir = previous_dir
+
+
+def bench_ranking_prepare(ctx):
+    from configs import banking as config_banking
+    from models.ranking_model import RankingModel
+    train, _ = _ranking_split(ctx)
+
+    def run():
+        with _ranking_caches(ctx):
+            return RankingModel(train, config_banking).prepare_data(is_training=True)
+    return run, len(train)
+
+
+def _trained_ranker(ctx):
+    if 'ranker' not in ctx:
+        from configs import banking as config_banking
+        from models.ranking_model import RankingModel
+        train, test = _ranking_split(ctx)
+        with _ranking_caches(ctx, cold=False), contextlib.redirect_stdout(io.StringIO()):
+            ranker = RankingModel(train, config_banking)
+            ranker.train(valid_df=test, custom_params=_ranking_params(ctx))
+        ctx['ranker'] = ranker
+    return ctx['ranker']
+
+
+def bench_ranking_train(ctx):
+    from configs import banking as config_banking
+    from models.ranking_model import RankingModel
+    train, test = _ranking_split(ctx)
+
+    def run():
+        with _ranking_caches(ctx):
+            ranker = RankingModel(train, config_banking)
+            ranker.train(valid_df=test, custom_params=_ranking_params(ctx))
+        return ranker
+    return run, len(train)
+
+
+def bench_ranking_train_cached(ctx):
+    """Tuning denemesi gibi: matris ve bin'lenmiş Dataset'ler cache'te, sadece boosting."""
+    from configs import banking as config_banking
+    from models.ranking_model import RankingModel
+    train, test = _ranking_split(ctx)
+    _trained_ranker(ctx)
+
+    def run():
+        with _ranking_caches(ctx, cold=False):
+            ranker = RankingModel(train, config_banking)
+            ranker.train(valid_df=test, custom_params=_ranking_params(ctx))
+        return ranker
+    return run, len(train)
+
+
+def bench_ranking_predict(ctx):
+    _, test = _ranking_split(ctx)
+    ranker = _trained_ranker(ctx)
+
+    def run():
+        return ranker.predict(test)
+    return run, len(test)
+
+
+def bench_monte_carlo(ctx):
+    from research.monte_carlo_validation import monte_carlo_simulation
+    rng = np.random.default_rng(ctx['seed'])
+    returns = pd.Series(rng.normal(0.0005, 0.015, ctx['n_days']))
+    n_scenarios = ctx['mc_scenarios']
+
+    def run():
+        return monte_carlo_simulation(returns, n_scenarios=n_scenarios)
+    return run, n_scenarios
+
+
+def bench_walk_forward_strategy(ctx):
+    # Optuna walk-forward'ın test yılı backtest'i: hisse başına strategy_kernel
+    from research.optuna_nested_walk_forward import backtest_with_strategy
+    regime_nums = ctx['market'].regimes.map({'Sideways': 0, 'Crash_Bear': 1, 'Trend_Up': 2})
+    frames = []
+    for t, df in ctx['panel'].items():
+        frames.append(pd.DataFrame({
+            'Ticker': t,
+            'Close': df['Close'],
+            'ATR': (df['High'] - df['Low']).rolling(14, min_periods=1).mean(),
+            'Regime_Num': regime_nums.reindex(df.index).values,
+            'NextDay_Return': df['Close'].pct_change().shift(-1).fillna(0),
+        }, index=df.index))
+    data = pd.concat(frames).sort_index(kind='stable')
+    preds = np.random.default_rng(ctx['seed']).normal(0.006, 0.01, len(data))
+
+    def run():
+        return backtest_with_strategy(preds, data['NextDay_Return'], data, None, {})
+    # İlk çağrı kernel'i derler (cache=True ile diske yazılır), ölçüme dahil edilmez
+    run()
+    return run, len(data)
+
+
+def bench_paper_session(ctx):
+    from paper_trading.portfolio_state import PortfolioState
+    from paper_trading.position_runner import run_position_aware_session
+    ranker = _trained_ranker(ctx)
+    loader = SyntheticDataLoader(ctx['market'])
+    state_dir = os.path.join(ctx['tmp_dir'], 'paper')
+    tickers = list(ctx['panel'])
+
+    def run():
+        # Her tekrarda boş portföyle başla (önceki oturumun state'i ölçümü etkilemesin)
+        shutil.rmtree(state_dir, ignore_errors=True)
+        portfolio = PortfolioState(state_file=os.path.join(state_dir, 'portfolio_state.json'))
+        return run_position_aware_session(verbose=False, portfolio=portfolio, model=ranker,
+                                          loader=loader, tickers=tickers,
+                                          log_dir=os.path.join(state_dir, 'logs'))
+    return run, len(tickers)
+
+
+BENCHMARKS = {
+    'synthetic_market': bench_synthetic_market,
+    'feature_engineering': bench_feature_engineering,
+    'kap_event_features': bench_kap_event_features,
+    'regime_detection': bench_regime_detection,
+    'backtest': bench_backtest,
+    'ranking_prepare': bench_ranking_prepare,
+    'ranking_train': bench_ranking_train,
+    'ranking_train_cached': bench_ranking_train_cached,
+    'ranking_predict': bench_ranking_predict,
+    'monte_carlo': bench_monte_carlo,
+    'walk_forward_strategy': bench_walk_forward_strategy,
+    'paper_session': bench_paper_session,
+}
+
+
+def build_context(n_tickers, n_days, mc_scenarios, seed=42, ranking_estimators=200, tmp_dir=None):
+    """Benchmark'ların paylaştığı sentetik veri; işlenmiş panel ilk ihtiyaçta bir kez üretilir."""
+    ctx = {
+        'seed': seed,
+        'n_days': n_days,
+        'mc_scenarios': mc_scenarios,
+        'ranking_estimators': ranking_estimators,
+        'tmp_dir': tmp_dir or tempfile.mkdtemp(prefix='bench_'),
+    }
+    ctx['market'] = SyntheticMarketGenerator(seed=seed).generate_panel(n_tickers=n_tickers, n_days=n_days)
+    ctx['panel'] = ctx['market'].frames()
+
+    def processed():
+        if '_processed' not in ctx:
+            from utils.feature_engineering import FeatureEngineer
+            with contextlib.redirect_stdout(io.StringIO()):
+                ctx['_processed'] = {t: FeatureEngineer(df.copy()).process_all() for t, df in ctx['panel'].items()}
+        return ctx['_processed']
+
+    ctx['processed'] = processed
+    return ctx
+
+
+def run_suite(scale='default', only=None, repeat=3, track_memory=True, seed=42, overrides=None, quiet=True):
+    """
+    Seçili benchmark'ları çalıştırır ve sonuç sözlüğünü döner (JSON'a yazılabilir).
+
+    Args:
+        scale: SCALES anahtarı
+        only: Çalıştırılacak benchmark isimleri (None = hepsi)
+        overrides: Ölçek parametrelerini ezmek için (örn. {'n_tickers': 50})
+    """
+    params = dict(SCALES[scale])
+    params.update(overrides or {})
+    names = list(only) if only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen benchmark: {unknown}. Seçenekler: {list(BENCHMARKS)}")
+
+    tmp_dir = tempfile.mkdtemp(prefix='bench_')
+    try:
+        ctx = build_context(seed=seed, tmp_dir=tmp_dir, **params)
+        results = {}
+        for name in names:
+            with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                fn, rows = BENCHMARKS[name](ctx)
+            if fn is None:
+                results[name] = {'status': 'skipped'}
+                print(f"  {name:<22} atlandı (bağımlılık yok)")
+                continue
+            stats, _ = measure(fn, repeat=repeat, track_memory=track_memory, quiet=quiet)
+            stats['rows'] = rows
+            stats['rows_per_s'] = rows / stats['wall_median_s'] if stats['wall_median_s'] > 0 else None
+            stats['status'] = 'ok'
+            results[name] = stats
+            mem = f"{stats['peak_traced_mb']:8.1f} MB" if stats['peak_traced_mb'] is not None else "       -"
+            print(f"  {name:<22} {stats['wall_median_s']:9.3f} s  (best {stats['wall_best_s']:.3f})  {mem}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'scale': scale,
+            'params': params,
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def save_results(report, output_dir=OUTPUT_DIR):
+    """Sonucu zaman damgalı dosyaya ve latest.json'a yazar; dosya yolunu döner."""
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    commit = report['meta'].get('git_commit') or 'nogit'
+    path = os.path.join(output_dir, f"bench_{stamp}_{commit}.json")
+    for target in (path, os.path.join(output_dir, 'latest.json')):
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return path
+
+
+def compare_results(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    İki rapordaki ortak benchmark'ların medyan süre oranları.
+    Returns: {isim: {'baseline_s', 'current_s', 'ratio', 'regression'}}
+    """
+    if current['meta'].get('params') != baseline['meta'].get('params'):
+        print("[UYARI] Karşılaştırılan raporların ölçek parametreleri farklı; oranlar yanıltıcı olabilir.")
+
+    deltas = {}
+    for name, cur in current['results'].items():
+        base = baseline['results'].get(name)
+        if cur.get('status') != 'ok' or not base or base.get('status') != 'ok':
+            continue
+        ratio = cur['wall_median_s'] / base['wall_median_s'] if base['wall_median_s'] > 0 else float('inf')
+        deltas[name] = {
+            'baseline_s': base['wall_median_s'],
+            'current_s': cur['wall_median_s'],
+            'ratio': ratio,
+            'regression': ratio > threshold,
+        }
+    return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BIST30 sıcak yol performans benchmark'ı")
+    parser.add_argument('--scale', choices=list(SCALES), default='default')
+    parser.add_argument('--only', type=str, default=None, help='Virgülle ayrılmış benchmark isimleri')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tickers', type=int, default=None, help='Ölçekteki ticker sayısını ez')
+    parser.add_argument('--days', type=int, default=None, help='Ölçekteki gün sayısını ez')
+    parser.add_argument('--no-memory', action='store_true', help='tracemalloc ölçümünü atla')
+    parser.add_argument('--verbose', action='store_true', help='Ölçülen fonksiyonların çıktısını göster')
+    parser.add_argument('--output-dir', type=str, default=OUTPUT_DIR)
+    parser.add_argument('--compare', type=str, default=None, help='Karşılaştırılacak önceki sonuç dosyası')
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.tickers:
+        overrides['n_tickers'] = args.tickers
+    if args.days:
+        overrides['n_days'] = args.days
+
+    # latest.json yeni sonuçla ezilmeden önce baseline'ı oku
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f"🚀 Benchmark başlıyor (scale={args.scale}, repeat={args.repeat})")
+    report = run_suite(
+        scale=args.scale,
+        only=args.only.split(',') if args.only else None,
+        repeat=args.repeat,
+        track_memory=not args.no_memory,
+        seed=args.seed,
+        overrides=overrides,
+        quiet=not args.verbose,
+    )
+    path = save_results(report, args.output_dir)
+    print(f"\n💾 Sonuçlar: {path}")
+
+    if baseline is not None:
+        deltas = compare_results(report, baseline)
+        print(f"\n📊 Karşılaştırma ({baseline['meta'].get('git_commit')} -> {report['meta'].get('git_commit')})")
+        for name, d in deltas.items():
+            flag = "  ⚠️ REGRESYON" if d['regression'] else ""
+            print(f"  {name:<22} {d['baseline_s']:9.3f} s -> {d['current_s']:9.3f} s  (x{d['ratio']:.2f}){flag}")
+        if any(d['regression'] for d in deltas.values()):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Offline Feature Budama
+Walk-forward fold'larında SHAP + permutation önemini paralel (process pool) hesaplar,
+seçilen feature setini models/saved/feature_selection.json'a yazar ve tam set / budanmış
+set için süre (feature matrisi, eğitim, tahmin) ile kalite (NDCG@5, top-5 Sharpe)
+karşılaştırmasını raporlar.
+
+Seçim train_models.py tarafından okunur (USE_FEATURE_SELECTION); eğitilen modelin
+registry manifest'ine seçim özeti yazılır.
+
+Kullanım:
+    python research/feature_pruning.py --folds 4 --jobs 4
+    python research/feature_pruning.py --synthetic 20 --days 1500   # internet/cache gerekmez
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from configs import banking as config_banking
+from models.feature_selection import (FOLD_PARAMS, aggregate_importance, load_selection, run_fold,
+                                      save_selection, select_features, walk_forward_folds)
+from models.ranking_dataset import build_ranking_matrix
+
+REPORT_DIR = os.path.join('reports', 'feature_pruning')
+METRICS = ['matrix_seconds', 'train_seconds', 'predict_seconds', 'ndcg', 'sharpe']
+
+
+def load_panel(loader, tickers):
+    """train_models.py ile aynı panel: (Date, Ticker) indeksli, TRAIN_END_DATE öncesi."""
+    from utils.feature_engineering import FeatureEngineer
+
+    frames = []
+    t0 = time.perf_counter()
+    for ticker in tickers:
+        raw_data = loader.get_combined_data(ticker)
+        if raw_data is None or len(raw_data) < 100:
+            continue
+        features_df = FeatureEngineer(raw_data).process_all(ticker=ticker)
+        features_df['Ticker'] = ticker
+        if getattr(config, 'TRAIN_END_DATE', None):
+            features_df = features_df[features_df.index < config.TRAIN_END_DATE]
+        frames.append(features_df)
+    fe_seconds = time.perf_counter() - t0
+
+    if not frames:
+        raise ValueError("Hiç veri yüklenemedi.")
+    full_data = pd.concat(frames).reset_index().set_index(['Date', 'Ticker']).sort_index()
+    return full_data, fe_seconds
+
+
+def fold_jobs(full_data, folds, params, features=None, importance=False, k=5, shap_sample=2000, n_repeats=1):
+    """Her fold için eğitim/validasyon matrisleri (matris kurulum süresi ölçülür)."""
+    dates = full_data.index.get_level_values('Date')
+    jobs = []
+    for i, (train_end, valid_start, valid_end) in enumerate(folds):
+        train_df = full_data[dates < train_end]
+        valid_df = full_data[(dates >= valid_start) & (dates <= valid_end)]
+
+        t0 = time.perf_counter()
+        train = build_ranking_matrix(train_df, config_banking, feature_names=features, verbose=False)
+        valid = build_ranking_matrix(valid_df, config_banking, feature_names=train.feature_names, verbose=False)
+        matrix_seconds = time.perf_counter() - t0
+        if train.empty or valid.empty:
+            continue
+
+        jobs.append({
+            'fold': i, 'train': train, 'valid': valid,
+            'returns': valid_df['NextDay_Return'].reindex(valid.index).to_numpy(),
+            'params': params, 'k': k, 'importance': importance,
+            'shap_sample': shap_sample, 'n_repeats': n_repeats, 'matrix_seconds': matrix_seconds,
+        })
+    return jobs
+
+
+def run_folds(jobs, n_jobs=1):
+    """Fold'ları paralel çalıştırır (n_jobs=1: aynı process)."""
+    n_jobs = min(n_jobs, len(jobs))
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            return list(pool.map(run_fold, jobs))
+    return [run_fold(job) for job in jobs]
+
+
+def summarize(results):
+    return {m: float(np.mean([r[m] for r in results])) for m in METRICS + ['n_features']}
+
+
+def comparison_table(baseline, pruned):
+    """Tam set vs budanmış set (fold ortalamaları) ve değişim yüzdesi."""
+    rows = []
+    for metric in ['n_features'] + METRICS:
+        before, after = baseline[metric], pruned[metric]
+        change = (after - before) / abs(before) * 100 if before else 0.0
+        rows.append({'metric': metric, 'full': before, 'pruned': after, 'change_pct': change})
+    return pd.DataFrame(rows).set_index('metric')
+
+
+def run_pruning(full_data, n_folds=None, n_jobs=None, params=None, k=5, shap_sample=2000, n_repeats=1,
+                min_shap_share=None, min_features=None, fe_seconds=None, verbose=True):
+    """
+    Budama işi: önem (paralel fold'lar) -> seçim -> budanmış set ile aynı fold'larda değerlendirme.
+
+    Returns:
+        (selected, importance, report)
+    """
+    n_folds = n_folds or getattr(config, 'FEATURE_PRUNING_FOLDS', 4)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    params = dict(FOLD_PARAMS, **(params or {}))
+    # Her worker'a düşen LightGBM thread sayısı (çekirdekler fold'lar arasında paylaşılır)
+    params.setdefault('n_jobs', max(1, (os.cpu_count() or 1) // max(1, min(n_jobs, n_folds))))
+
+    folds = walk_forward_folds(full_data.index.get_level_values('Date'), n_folds=n_folds)
+    if verbose:
+        print(f"Walk-forward fold'ları: {len(folds)} (paralel iş: {n_jobs})")
+
+    t0 = time.perf_counter()
+    jobs = fold_jobs(full_data, folds, params, importance=True, k=k, shap_sample=shap_sample, n_repeats=n_repeats)
+    if not jobs:
+        raise ValueError("Fold'lar boş: veri aralığı budama için yetersiz.")
+    feature_names = jobs[0]['train'].feature_names
+    baseline = run_folds(jobs, n_jobs)
+    importance_seconds = time.perf_counter() - t0
+
+    importance = aggregate_importance(baseline, feature_names)
+    selected = select_features(importance, min_shap_share, min_features)
+    if verbose:
+        print(f"Seçilen feature: {len(selected)} / {len(feature_names)} (önem hesabı {importance_seconds:.1f} sn)")
+
+    pruned = run_folds(fold_jobs(full_data, folds, params, features=selected, k=k), n_jobs)
+    comparison = comparison_table(summarize(baseline), summarize(pruned))
+
+    report = {
+        'n_total': len(feature_names),
+        'n_selected': len(selected),
+        'dropped': [f for f in feature_names if f not in selected],
+        'folds': [[str(d) for d in fold] for fold in folds],
+        'params': {key: v for key, v in params.items() if key != 'n_jobs'},
+        'importance_seconds': importance_seconds,
+        'feature_engineering_seconds': fe_seconds,
+        'comparison': comparison.to_dict(orient='index'),
+    }
+    return selected, importance, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward SHAP + permutation feature budama")
+    parser.add_argument('--folds', type=int, default=None)
+    parser.add_argument('--jobs', type=int, default=None, help="Paralel fold sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument('--repeats', type=int, default=1, help="Permutation tekrar sayısı")
+    parser.add_argument('--shap-sample', type=int, default=2000)
+    parser.add_argument('--min-shap-share', type=float, default=None)
+    parser.add_argument('--min-features', type=int, default=None)
+    parser.add_argument('--synthetic', type=int, default=0, help="Sentetik piyasa (hisse sayısı)")
+    parser.add_argument('--days', type=int, default=1500, help="Sentetik gün sayısı")
+    parser.add_argument('--output', default=None, help="Seçim dosyası (varsayılan: FEATURE_SELECTION_PATH)")
+    parser.add_argument('--dry-run', action='store_true', help="Seçimi kaydetme, sadece raporla")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from core.augmented_feature_generator import SyntheticDataLoader, SyntheticMarketGenerator
+        market = SyntheticMarketGenerator(seed=42).generate_panel(n_tickers=args.synthetic, n_days=args.days)
+        loader, tickers = SyntheticDataLoader(market), list(market.tickers)
+    else:
+        from utils.data_loader import DataLoader
+        loader, tickers = DataLoader(start_date=config.START_DATE), config.TICKERS
+
+    print("Veri yükleniyor ve feature'lar hesaplanıyor...")
+    full_data, fe_seconds = load_panel(loader, tickers)
+    print(f"  {len(full_data)} satır, feature engineering {fe_seconds:.1f} sn")
+
+    selected, importance, report = run_pruning(
+        full_data, n_folds=args.folds, n_jobs=args.jobs, n_repeats=args.repeats, shap_sample=args.shap_sample,
+        min_shap_share=args.min_shap_share, min_features=args.min_features, fe_seconds=fe_seconds)
+
+    print("\nÖnem tablosu (ilk 15):")
+    print(importance.head(15).to_string(float_format=lambda v: f"{v:.4f}"))
+    print("\nTam set vs budanmış set (fold ortalamaları):")
+    print(pd.DataFrame(report['comparison']).T.to_string(float_format=lambda v: f"{v:.4f}"))
+
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    importance.to_csv(os.path.join(REPORT_DIR, 'importance.csv'))
+    with open(os.path.join(REPORT_DIR, 'report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=float)
+
+    if args.dry_run:
+        print("\n--dry-run: seçim kaydedilmedi.")
+        return
+    previous = load_selection(args.output)
+    path = save_selection(selected, report, args.output)
+    print(f"\n✅ Seçim kaydedildi: {path}" + (" (önceki seçimin üzerine)" if previous else ""))
+    print("   train_models.py bir sonraki eğitimde bu feature'ları kullanır.")
+
+
+if __name__ == "__main__":
+    main()
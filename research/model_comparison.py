@@ -0,0 +1,361 @@
+"""
+Tek Geçişli Model Karşılaştırması
+benchmark_architectures.run_benchmark her mimari için veriyi yeniden hazırlayıp modelleri
+sırayla eğitiyordu (toplam süre = modellerin süreleri toplamı). Bu modül:
+
+- SharedPanel: Feature paneli bir kez (Date, Ticker) sıralı float32 matris + ranking label +
+  NextDay_Return + tarih / hisse kodları olarak .npy dosyalarına yazılır; worker'lar dosyaları
+  np.load(mmap_mode='r') ile açar (kopya yok, işletim sistemi sayfaları paylaşır)
+- Walk-forward fold'ları bir kez hesaplanır; satırlar tarih sıralı olduğu için her fold
+  matrisin ardışık bir dilimidir
+- CANDIDATES: Aday modeller (global LightGBM ranker, hisse bazlı LightGBM regresyon, Ridge +
+  LightGBM artık, CatBoost YetiRank). (model × fold) işleri process pool'da paralel
+  çalışır; en uzun süren modeller önce başlatılır
+- score_candidates: Tüm adayların skorları (model × gün × hisse) küpünde tek vektörel
+  top-k backtest (Sharpe, toplam getiri, max drawdown) ve günlük rank IC
+
+Çekirdek sayısı iş sayısına yetiyorsa karşılaştırma en yavaş modelin süresi kadar sürer.
+
+Kullanım:
+    python research/model_comparison.py --folds 2 --jobs 4
+    python research/model_comparison.py --synthetic 20 --days 1500 --models lgbm_ranker ridge_lgbm
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from configs import banking as config_banking
+from models.ensemble_weights import candidate_metrics
+from models.feature_selection import walk_forward_folds
+from models.ranking_dataset import ranking_feature_columns, ranking_labels
+
+REPORT_DIR = os.path.join('reports', 'model_comparison')
+PANEL_ARRAYS = ['X', 'label', 'returns', 'date_codes', 'ticker_codes']
+
+
+# ---------------------------------------------------------
+# Paylaşılan panel
+# ---------------------------------------------------------
+class SharedPanel:
+    """Memory-mapped feature paneli (.npy dosyaları + meta.json)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        self.feature_names = meta['feature_names']
+        self.dates = pd.DatetimeIndex(meta['dates'])
+        self.tickers = meta['tickers']
+        self._arrays = None
+
+    @classmethod
+    def build(cls, full_data, config_module, directory):
+        """
+        (Date, Ticker) indeksli panelden paylaşılan diziler. Feature NaN'ları korunur (her aday
+        kendi doldurma / eleme kuralını uygular); hedefi eksik satırların label'ı NaN'dır.
+        """
+        df = full_data.sort_index()
+        features = [c for c in ranking_feature_columns(df, config_module) if df[c].notna().any()]
+        windows = getattr(config_module, 'FORWARD_WINDOWS', [1])
+        target_cols = [f'Excess_Return_T{w}' for w in windows]
+        label_cols = [c for c in dict.fromkeys(target_cols + ['Excess_Return', 'Excess_Return_RiskAdjusted'])
+                      if c in df.columns]
+        has_target = df[target_cols].notna().all(axis=1).to_numpy()
+
+        label = np.full(len(df), np.nan, dtype=np.float32)
+        label[has_target] = ranking_labels(df[label_cols][has_target], config_module).to_numpy()
+        date_codes, dates = pd.factorize(df.index.get_level_values('Date'), sort=True)
+        ticker_codes, tickers = pd.factorize(df.index.get_level_values('Ticker'), sort=True)
+        arrays = {
+            'X': df[features].to_numpy(dtype=np.float32),
+            'label': label,
+            'returns': df['NextDay_Return'].to_numpy(dtype=np.float32),
+            'date_codes': date_codes.astype(np.int32),
+            'ticker_codes': ticker_codes.astype(np.int32),
+        }
+        os.makedirs(directory, exist_ok=True)
+        for name, values in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(values))
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'feature_names': features, 'dates': [str(d) for d in dates],
+                       'tickers': [str(t) for t in tickers]}, f)
+        return cls(directory)
+
+    @property
+    def arrays(self):
+        """Salt-okunur memory-mapped diziler (process başına bir kez açılır)."""
+        if self._arrays is None:
+            self._arrays = {name: np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode='r')
+                            for name in PANEL_ARRAYS}
+        return self._arrays
+
+    def __len__(self):
+        return len(self.arrays['date_codes'])
+
+    def rows(self, first_date, last_date):
+        """[first_date, last_date] tarih kodları arasındaki satırlar (ardışık dilim)."""
+        codes = self.arrays['date_codes']
+        return slice(int(np.searchsorted(codes, first_date, side='left')),
+                     int(np.searchsorted(codes, last_date, side='right')))
+
+
+def fold_slices(panel, n_folds=1, min_train_frac=0.8, gap=5):
+    """walk_forward_folds -> (train_rows, valid_rows) satır dilimleri."""
+    folds = walk_forward_folds(panel.dates, n_folds=n_folds, min_train_frac=min_train_frac, gap=gap)
+    slices = []
+    for train_end, valid_start, valid_end in folds:
+        train_last = panel.dates.get_loc(train_end) - 1
+        slices.append((panel.rows(0, train_last),
+                       panel.rows(panel.dates.get_loc(valid_start), panel.dates.get_loc(valid_end))))
+    return folds, slices
+
+
+# ---------------------------------------------------------
+# Aday modeller: fn(arrays, train_rows, valid_rows, params) -> valid satır skorları
+# ---------------------------------------------------------
+def _group_sizes(date_codes):
+    """Tarih sıralı satırların query grup boyutları."""
+    return np.unique(date_codes, return_counts=True)[1]
+
+
+def fit_lgbm_ranker(arrays, train, valid, params):
+    """
+    Global LightGBM LambdaRank (train_models.py ile aynı label). Hiperparametreler sabit
+    (params ile değiştirilebilir) ve tüm ranking feature'ları kullanılır: üretim RankingModel
+    konfigürasyonu (parametreleri, early stopping, seçilmiş feature'lar) değildir.
+    """
+    import lightgbm as lgb
+
+    label = arrays['label'][train]
+    keep = np.flatnonzero(np.isfinite(label))
+    y = label[keep].astype(int)
+    model = lgb.LGBMRanker(**dict({'objective': 'lambdarank', 'n_estimators': 300, 'learning_rate': 0.05,
+                                   'num_leaves': 31, 'random_state': 42, 'verbosity': -1}, **params))
+    if y.max() > 30:
+        model.set_params(label_gain=list(range(int(y.max()) + 1)))
+    model.fit(arrays['X'][train][keep], y, group=_group_sizes(arrays['date_codes'][train][keep]))
+    return model.predict(arrays['X'][valid])
+
+
+def fit_ticker_lgbm(arrays, train, valid, params):
+    """Hisse bazlı LightGBM regresyon (NextDay_Return), her hisse ayrı model."""
+    import lightgbm as lgb
+
+    X_train, y_train = arrays['X'][train], arrays['returns'][train]
+    train_tickers, valid_tickers = arrays['ticker_codes'][train], arrays['ticker_codes'][valid]
+    X_valid = arrays['X'][valid]
+    scores = np.full(len(valid_tickers), np.nan)
+    for ticker in np.unique(valid_tickers):
+        fit_rows = np.flatnonzero((train_tickers == ticker) & np.isfinite(y_train))
+        if len(fit_rows) < 50:
+            continue
+        model = lgb.LGBMRegressor(**dict({'objective': 'regression', 'n_estimators': 100, 'verbosity': -1,
+                                          'random_state': 42}, **params))
+        model.fit(X_train[fit_rows], y_train[fit_rows])
+        rows = np.flatnonzero(valid_tickers == ticker)
+        scores[rows] = model.predict(X_valid[rows])
+    return scores
+
+
+def fit_ridge_lgbm(arrays, train, valid, params):
+    """Ridge + artıklar üzerinde LightGBM (global regresyon, NaN -> 0)."""
+    import lightgbm as lgb
+    from sklearn.linear_model import Ridge
+
+    X_train = np.nan_to_num(arrays['X'][train])
+    y_train = np.nan_to_num(arrays['returns'][train])
+    X_valid = np.nan_to_num(arrays['X'][valid])
+    linear = Ridge(alpha=1.0).fit(X_train, y_train)
+    residual = lgb.LGBMRegressor(**dict({'objective': 'regression', 'n_estimators': 100, 'verbosity': -1,
+                                         'random_state': 42}, **params))
+    residual.fit(X_train, y_train - linear.predict(X_train))
+    return linear.predict(X_valid) + residual.predict(X_valid)
+
+
+def fit_catboost_ranker(arrays, train, valid, params):
+    """Global CatBoost YetiRank (label: ranking label)."""
+    from catboost import CatBoostRanker
+
+    label = arrays['label'][train]
+    keep = np.flatnonzero(np.isfinite(label))
+    params = dict(params)
+    threads = params.pop('n_jobs', None)
+    model = CatBoostRanker(**dict({'loss_function': 'YetiRank', 'iterations': 300, 'learning_rate': 0.05,
+                                   'depth': 6, 'random_seed': 42, 'logging_level': 'Silent',
+                                   'allow_writing_files': False, 'thread_count': threads or -1}, **params))
+    model.fit(arrays['X'][train][keep], label[keep], group_id=arrays['date_codes'][train][keep])
+    return model.predict(arrays['X'][valid])
+
+
+# Aday adı -> (fonksiyon, görünen ad). Sıra: tahmini süre (uzun önce)
+CANDIDATES = {
+    'catboost_ranker': (fit_catboost_ranker, 'Global Ranker (CatBoost)'),
+    'lgbm_ranker': (fit_lgbm_ranker, 'Global Ranker (LGBM)'),
+    'ticker_lgbm': (fit_ticker_lgbm, 'Ticker-Specific Regressor'),
+    'ridge_lgbm': (fit_ridge_lgbm, 'Hybrid (Ridge + LGBM)'),
+}
+
+
+def run_candidate(job):
+    """Tek (model, fold) işi (process pool'da çalışır): paylaşılan paneli mmap ile açar."""
+    panel = SharedPanel(job['panel_dir'])
+    fit, _ = CANDIDATES[job['model']]
+    t0 = time.perf_counter()
+    scores = fit(panel.arrays, job['train'], job['valid'], job.get('params', {}))
+    return {'model': job['model'], 'fold': job['fold'], 'valid': job['valid'],
+            'scores': np.asarray(scores, dtype=np.float64), 'seconds': time.perf_counter() - t0}
+
+
+def run_candidates(panel, slices, models, n_jobs=1, params=None):
+    """
+    (model × fold) işleri. Dönen skorlar panel uzunluğunda (validasyon dışı NaN).
+
+    Returns:
+        (scores {model: array}, seconds {model: toplam fit süresi})
+    """
+    params = params or {}
+    workers = max(1, min(n_jobs, len(models) * len(slices)))
+    threads = max(1, (os.cpu_count() or 1) // workers) # Çekirdekler işler arasında paylaşılır
+    jobs = [{'panel_dir': panel.directory, 'model': model, 'fold': i, 'train': train, 'valid': valid,
+             'params': dict({'n_jobs': threads}, **params.get(model, {}))}
+            for model in models for i, (train, valid) in enumerate(slices)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_candidate, jobs))
+    else:
+        results = [run_candidate(job) for job in jobs]
+
+    scores = {model: np.full(len(panel), np.nan) for model in models}
+    seconds = dict.fromkeys(models, 0.0)
+    for result in results:
+        scores[result['model']][result['valid']] = result['scores']
+        seconds[result['model']] += result['seconds']
+    return scores, seconds
+
+
+# ---------------------------------------------------------
+# Vektörel skorlama
+# ---------------------------------------------------------
+def score_candidates(scores, panel, k=5, bars_per_year=None):
+    """
+    Tüm adaylar tek seferde: (model × gün × hisse) skor küpünde her gün en yüksek skorlu k
+    hisseye eşit ağırlık (NextDay_Return) ve günlük rank IC (models.ensemble_weights.candidate_metrics).
+    Sadece skoru olan günler sayılır.
+
+    Returns:
+        DataFrame (model indeksli): sharpe, total_return, max_drawdown, rank_ic, ic_ir, days
+    """
+    bars_per_year = bars_per_year or config.get_bars_per_year()
+    arrays = panel.arrays
+    names = list(scores)
+    d, t = np.asarray(arrays['date_codes']), np.asarray(arrays['ticker_codes'])
+    n_dates, n_tickers = len(panel.dates), len(panel.tickers)
+
+    S = np.full((len(names), n_dates, n_tickers), np.nan)
+    S[:, d, t] = np.stack([scores[name] for name in names])
+    R = np.full((n_dates, n_tickers), np.nan)
+    R[d, t] = arrays['returns']
+
+    metrics = candidate_metrics(S, R, k, bars_per_year)
+    table = pd.DataFrame(metrics, index=names)
+    return table[['sharpe', 'total_return', 'max_drawdown', 'rank_ic', 'ic_ir', 'days']]
+
+
+def compare_models(full_data, models=None, n_folds=1, min_train_frac=0.8, n_jobs=None, params=None, k=5,
+                   config_module=None, directory=None, verbose=True):
+    """
+    Tek geçişte karşılaştırma: panel + fold'lar bir kez, adaylar paralel, tek vektörel backtest.
+
+    Returns:
+        (table, info): table model indeksli metrikler (+ fit_seconds), info süre özeti
+    """
+    config_module = config_module or config_banking
+    models = [m for m in (models or list(CANDIDATES)) if m in CANDIDATES]
+    if 'catboost_ranker' in models:
+        try:
+            import catboost # noqa: F401
+        except ImportError:
+            models.remove('catboost_ranker')
+    # En uzun süren adaylar önce (CANDIDATES sırası)
+    models = sorted(models, key=list(CANDIDATES).index)
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        t0 = time.perf_counter()
+        panel = SharedPanel.build(full_data, config_module, tmp)
+        folds, slices = fold_slices(panel, n_folds=n_folds, min_train_frac=min_train_frac)
+        if not slices:
+            raise ValueError("Fold'lar boş: veri aralığı karşılaştırma için yetersiz.")
+        panel_seconds = time.perf_counter() - t0
+        if verbose:
+            print(f"Panel: {len(panel)} satır × {len(panel.feature_names)} feature, {len(folds)} fold "
+                  f"({panel_seconds:.1f} sn) | adaylar: {models} | paralel iş: {n_jobs}")
+
+        t0 = time.perf_counter()
+        scores, seconds = run_candidates(panel, slices, models, n_jobs=n_jobs, params=params)
+        fit_wall = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        table = score_candidates(scores, panel, k=k)
+        score_seconds = time.perf_counter() - t0
+
+    table['fit_seconds'] = pd.Series(seconds)
+    table.index = [CANDIDATES[m][1] for m in table.index]
+    info = {'panel_seconds': panel_seconds, 'fit_wall_seconds': fit_wall, 'fit_serial_seconds': sum(seconds.values()),
+            'score_seconds': score_seconds, 'folds': [[str(d) for d in fold] for fold in folds]}
+    return table.sort_values('sharpe', ascending=False), info
+
+
+def main():
+    from research.feature_pruning import load_panel
+
+    parser = argparse.ArgumentParser(description="Tek geçişli model karşılaştırması")
+    parser.add_argument('--models', nargs='+', default=None, choices=list(CANDIDATES))
+    parser.add_argument('--folds', type=int, default=1)
+    parser.add_argument('--min-train-frac', type=float, default=0.8)
+    parser.add_argument('--jobs', type=int, default=None, help="Paralel iş sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--synthetic', type=int, default=0, help="Sentetik piyasa (hisse sayısı)")
+    parser.add_argument('--days', type=int, default=1500, help="Sentetik gün sayısı")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from core.augmented_feature_generator import SyntheticDataLoader, SyntheticMarketGenerator
+        market = SyntheticMarketGenerator(seed=42).generate_panel(n_tickers=args.synthetic, n_days=args.days)
+        loader, tickers = SyntheticDataLoader(market), list(market.tickers)
+    else:
+        from utils.data_loader import DataLoader
+        loader, tickers = DataLoader(start_date=config.START_DATE), config.TICKERS
+
+    print("Veri yükleniyor ve feature'lar hesaplanıyor...")
+    full_data, fe_seconds = load_panel(loader, tickers)
+    print(f"  {len(full_data)} satır, feature engineering {fe_seconds:.1f} sn")
+
+    table, info = compare_models(full_data, models=args.models, n_folds=args.folds,
+                                 min_train_frac=args.min_train_frac, n_jobs=args.jobs, k=args.top_k)
+    print("\n" + "=" * 50)
+    print("MODEL KARŞILAŞTIRMASI")
+    print("=" * 50)
+    print(table.to_string(float_format=lambda v: f"{v:.4f}"))
+    print(f"\nEğitim: {info['fit_wall_seconds']:.1f} sn (sırayla: {info['fit_serial_seconds']:.1f} sn) | "
+          f"panel {info['panel_seconds']:.1f} sn | skorlama {info['score_seconds']:.2f} sn")
+
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    table.to_csv(os.path.join(REPORT_DIR, 'comparison.csv'))
+    with open(os.path.join(REPORT_DIR, 'info.json'), 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
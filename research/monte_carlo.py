@@ -2,56 +2,110 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+RESULT_COLUMNS = ['Final Return', 'Max Drawdown', 'Time Under Water', 'Longest Drawdown', 'CVaR']
+
+
+def path_statistics(paths_returns, cvar_alpha=0.05):
+    """
+    (senaryo × gün) getiri matrisinden yol bazlı istatistikler.
+
+    Returns:
+        dict: Final Return, Max Drawdown, Time Under Water (zirve altında geçen gün oranı),
+              Longest Drawdown (en uzun kesintisiz zirve altı gün sayısı),
+              CVaR (en kötü %alpha günlerin ortalama getirisi)
+    """
+    n_days = paths_returns.shape[1]
+    cumulative_ret = np.cumprod(1 + paths_returns, axis=1)
+    running_max = np.maximum.accumulate(cumulative_ret, axis=1)
+    drawdown = cumulative_ret / running_max - 1
+
+    # Kesintisiz zirve altı seriler: sayaç her zirvede sıfırlanır
+    underwater = drawdown < 0
+    counter = np.cumsum(underwater, axis=1, dtype=np.int32)
+    reset = np.maximum.accumulate(np.where(underwater, 0, counter), axis=1)
+
+    k = max(1, int(np.ceil(cvar_alpha * n_days)))
+    worst_days = np.partition(paths_returns, k - 1, axis=1)[:, :k]
+
+    return {
+        'Final Return': cumulative_ret[:, -1] - 1,
+        'Max Drawdown': drawdown.min(axis=1),
+        'Time Under Water': underwater.mean(axis=1),
+        'Longest Drawdown': (counter - reset).max(axis=1),
+        'CVaR': worst_days.mean(axis=1),
+    }
+
+
+def simulate_chunk(returns_array, n_paths, seed_seq, cvar_alpha=0.05):
+    """Bir grup bootstrap yolu üretip istatistiklerini döner (process pool'da çalışır)."""
+    rng = np.random.default_rng(seed_seq)
+    idx = rng.integers(0, len(returns_array), size=(n_paths, len(returns_array)))
+    return path_statistics(returns_array[idx], cvar_alpha)
+
+
 class MonteCarloSimulator:
-    def __init__(self, returns, n_simulations=1000):
+    def __init__(self, returns, n_simulations=1000, seed=None, chunk_size=10_000, n_jobs=1, cvar_alpha=0.05):
         self.returns = returns # Günlük getiri serisi (pandas Series)
         self.n_simulations = n_simulations
-        
+        self.seed = seed
+        self.chunk_size = chunk_size # Bellek sınırı: chunk_size × gün matrisi
+        self.n_jobs = n_jobs # 1: aynı process, None/-1: tüm çekirdekler
+        self.cvar_alpha = cvar_alpha
+
     def run_simulation(self):
-        """Bootstrap yöntemiyle simülasyon çalıştırır."""
+        """
+        Bootstrap yöntemiyle simülasyon çalıştırır.
+        Yollar chunk'lar halinde (senaryo × gün) matris olarak üretilir; her chunk kendi
+        SeedSequence alt akışını kullanır, sonuç n_jobs'tan bağımsızdır.
+        """
         print(f"Monte Carlo Simülasyonu ({self.n_simulations} senaryo)...")
-        
-        sim_results = []
-        n_days = len(self.returns)
-        
-        for i in range(self.n_simulations):
-            # Mevcut getirilerden rastgele örneklem al (Replacement ile)
-            sim_returns = np.random.choice(self.returns, size=n_days, replace=True)
-            cumulative_ret = (1 + sim_returns).cumprod()
-            final_return = cumulative_ret[-1] - 1
-            
-            # Max Drawdown
-            running_max = np.maximum.accumulate(cumulative_ret)
-            drawdown = (cumulative_ret - running_max) / running_max
-            max_dd = drawdown.min()
-            
-            sim_results.append({
-                'Final Return': final_return,
-                'Max Drawdown': max_dd
-            })
-            
-        self.results_df = pd.DataFrame(sim_results)
+
+        returns_array = np.asarray(self.returns, dtype=float)
+        sizes = [min(self.chunk_size, self.n_simulations - lo)
+                 for lo in range(0, self.n_simulations, self.chunk_size)]
+        streams = np.random.SeedSequence(self.seed).spawn(len(sizes))
+
+        n_jobs = self.n_jobs
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        n_jobs = min(n_jobs, len(sizes))
+
+        args = ([returns_array] * len(sizes), sizes, streams, [self.cvar_alpha] * len(sizes))
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                chunks = list(pool.map(simulate_chunk, *args))
+        else:
+            chunks = list(map(simulate_chunk, *args))
+
+        self.results_df = pd.DataFrame({col: np.concatenate([c[col] for c in chunks]) for col in RESULT_COLUMNS})
         return self.results_df
-        
+
     def get_stats(self):
         """İstatistikleri raporlar."""
         if not hasattr(self, 'results_df'): return None
-        
+
         df = self.results_df
+        worst_final = df['Final Return'].quantile(self.cvar_alpha)
         stats = {
             'Mean Return': df['Final Return'].mean(),
             'Median Return': df['Final Return'].median(),
             'Worst Case (5%)': df['Final Return'].quantile(0.05),
             'Best Case (95%)': df['Final Return'].quantile(0.95),
-            'Worst Drawdown (5%)': df['Max Drawdown'].quantile(0.05)
+            'Worst Drawdown (5%)': df['Max Drawdown'].quantile(0.05),
+            'CVaR Final Return': df.loc[df['Final Return'] <= worst_final, 'Final Return'].mean(),
+            'Mean Time Under Water': df['Time Under Water'].mean(),
+            'Longest Drawdown (95%)': df['Longest Drawdown'].quantile(0.95),
+            'Mean Daily CVaR': df['CVaR'].mean(),
         }
-        
+
         print("\nMonte Carlo Analizi:")
         for k, v in stats.items():
             print(f"{k}: {v:.4f}")
-            
+
         return stats
@@ -10,8 +10,13 @@ import seaborn as sns
 from scipy import stats
 import warnings
 import os
+import sys
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
 def load_daily_returns():
     """Load the concatenated daily returns"""
     results_file = 'reports/daily_returns_concatenated.csv'
@@ -26,7 +31,60 @@ def load_daily_returns():
     
     return portfolio_return
 
-def monte_carlo_simulation(daily_returns_series, n_scenarios=2000, years_ahead=5, block_size=20):
+# --- BLACK SWAN CONFIG ---
+CRISIS_YEAR_PROB = 0.10   # Her yıl %10 ihtimalle "Kriz Yılı" olur
+BLACK_SWAN_DAILY_PROB = 0.001 # Her gün binde 1 ihtimalle "Ani Çöküş" (Flash Crash)
+
+# Getiri serisinin yıllık bar sayısı config.TIMEFRAME'den (günlük 252, haftalık 52)
+ANNUAL_TRADING_DAYS = config.get_bars_per_year()
+
+
+def draw_scenario_chunk(rng, n_scenarios, n_samples, years_ahead, block_size,
+                        annual_trading_days=ANNUAL_TRADING_DAYS):
+    """
+    Bir senaryo grubunun tüm rastgele çekimlerini dizi olarak üretir.
+
+    Returns:
+        dict: block_starts (m, n_blocks), crisis (m, years), crisis_severity (m, years),
+              black_swan (m, total_days) bool maskesi, shocks (maskedeki gün sayısı kadar)
+    """
+    total_days = years_ahead * annual_trading_days
+    n_blocks = -(-total_days // block_size)
+    black_swan = rng.random((n_scenarios, total_days)) < BLACK_SWAN_DAILY_PROB
+    return {
+        # 1. Base Market Path (Bootstrap): blok başlangıçları
+        'block_starts': rng.integers(0, n_samples - block_size + 1, size=(n_scenarios, n_blocks)),
+        # 2. Kriz yılları ve şiddeti (yıllık -%30 ile -%50 arası ek kayıp)
+        'crisis': rng.random((n_scenarios, years_ahead)) < CRISIS_YEAR_PROB,
+        'crisis_severity': rng.uniform(0.30, 0.50, size=(n_scenarios, years_ahead)),
+        # 3. Black Swan (Flash Crash): -%10 ile -%20 arası ani düşüş
+        'black_swan': black_swan,
+        'shocks': rng.uniform(-0.20, -0.10, size=int(black_swan.sum())),
+    }
+
+
+def simulate_scenario_chunk(returns_array, draws, block_size, annual_trading_days=ANNUAL_TRADING_DAYS):
+    """Çekimlerden senaryo yollarını kurar ve kümülatif getirileri (m,) döner."""
+    block_starts = draws['block_starts']
+    n_scenarios, n_blocks = block_starts.shape
+    years_ahead = draws['crisis'].shape[1]
+    total_days = years_ahead * annual_trading_days
+
+    # Blokları tek seferde topla: (m, n_blocks, block_size) -> (m, total_days)
+    day_idx = block_starts[:, :, None] + np.arange(block_size)
+    simulated_path = returns_array[day_idx].reshape(n_scenarios, n_blocks * block_size)[:, :total_days]
+
+    # Kriz yılı: o yılın günlerine ek negatif drift, (1-severity)^(1/yıllık_gün) - 1
+    weekly_drag = np.where(draws['crisis'], (1 - draws['crisis_severity']) ** (1 / annual_trading_days) - 1, 0.0)
+    simulated_path = simulated_path + np.repeat(weekly_drag, annual_trading_days, axis=1)
+
+    simulated_path[draws['black_swan']] += draws['shocks']
+
+    return np.prod(1 + simulated_path, axis=1)
+
+
+def monte_carlo_simulation(daily_returns_series, n_scenarios=2000, years_ahead=5, block_size=20,
+                           seed=42, chunk_size=1000):
     """
     Run Monte Carlo simulation using Block Bootstrap with BLACK SWAN events.
     
@@ -35,79 +93,33 @@ def monte_carlo_simulation(daily_returns_series, n_scenarios=2000, years_ahead=5
         n_scenarios: Number of scenarios to simulate (Increased to 2000 for better tail resolution)
         years_ahead: Number of years to project
         block_size: Size of blocks to sample (in days)
+        seed: SeedSequence kökü; her senaryo grubu kendi alt akışını (spawn) kullanır
+        chunk_size: Bir seferde simüle edilen senaryo sayısı (bellek sınırı: chunk_size × gün)
     """
     print(f"\n🎲 Monte Carlo Simülasyonu Başlatılıyor (Block Bootstrap + Black Swan)...")
     print(f"   Senaryo: {n_scenarios}")
     print(f"   Projeksiyon: {years_ahead} yıl")
     print(f"   Blok Boyutu: {block_size} gün")
     
-    # --- BLACK SWAN CONFIG ---
-    CRISIS_YEAR_PROB = 0.10   # Her yıl %10 ihtimalle "Kriz Yılı" olur
-    BLACK_SWAN_DAILY_PROB = 0.001 # Her gün binde 1 ihtimalle "Ani Çöküş" (Flash Crash)
-    
     print(f"   ⚠️  Kriz Yılı Olasılığı: %{CRISIS_YEAR_PROB*100}")
     print(f"   ⚠️  Black Swan (Flash Crash) Olasılığı: %{BLACK_SWAN_DAILY_PROB*100} (Günlük)")
     
     if len(daily_returns_series) < block_size:
         raise ValueError(f"Yetersiz veri. Minimum {block_size} birim veri gerekli.")
     
-    # Config TIMEFRAME='W' ise annual_days=52, değilse 252.
-    # Ancak daily_returns_series haftalıksa prob'ları ona göre scale etmeliyiz.
-    # Varsayım: daily_returns_series aslında 'Portfolio_Return' (haftalık veya günlük).
-    # Optuna scripti 'W' modunda haftalık getiri üretiyor.
-    # O zaman annual_trading_days = 52.
-    annual_trading_days = 52 
-    total_days = years_ahead * annual_trading_days
-    
-    scenario_final_values = []
-    
-    np.random.seed(42)  # For reproducibility
-    returns_array = daily_returns_series.values
+    returns_array = np.asarray(daily_returns_series, dtype=float)
     n_samples = len(returns_array)
     
-    for scenario in range(n_scenarios):
-        # 1. Base Market Path (Bootstrap)
-        simulated_path = []
-        days_generated = 0
-        
-        while days_generated < total_days:
-            start_idx = np.random.randint(0, n_samples - block_size + 1)
-            block = returns_array[start_idx : start_idx + block_size]
-            simulated_path.extend(block)
-            days_generated += len(block)
-            
-        simulated_path = np.array(simulated_path[:total_days])
-        
-        # 2. Inject Crisis Years
-        # Her yıl için (total_days / annual_trading_days) kriz kontrolü
-        for year in range(years_ahead):
-            if np.random.random() < CRISIS_YEAR_PROB:
-                # Kriz Yılı! O yıla denk gelen günlere ekstra negatif drift ekle
-                # Yılın başlangıç ve bitiş indeksleri
-                start_day = year * annual_trading_days
-                end_day = (year + 1) * annual_trading_days
-                
-                # Kriz şiddeti: Yıllık -%30 ile -%50 arası ek kayıp
-                # Bu kaybı günlere yayalım
-                crisis_severity = np.random.uniform(0.30, 0.50)
-                # Haftalık periyotta (1-severity)^(1/52) - 1
-                weekly_drag = (1 - crisis_severity)**(1/annual_trading_days) - 1
-                
-                simulated_path[start_day:end_day] += weekly_drag
-        
-        # 3. Inject Black Swans (Flash Crashes)
-        # Bütün simülasyon boyunca rastgele günlerde şok
-        for day in range(total_days):
-            if np.random.random() < BLACK_SWAN_DAILY_PROB:
-                # Flash Crash: -%10 ile -%20 arası ani düşüş
-                shock = np.random.uniform(-0.10, -0.20)
-                simulated_path[day] += shock
-                
-        # Calculate Cumulative
-        cumulative = np.prod(1 + simulated_path)
-        scenario_final_values.append(cumulative)
-    
-    scenario_final_values = np.array(scenario_final_values)
+    # Senaryolar chunk'lar halinde üretilir; chunk i her zaman i. alt akışı kullanır (reproducible)
+    n_chunks = -(-n_scenarios // chunk_size)
+    streams = np.random.SeedSequence(seed).spawn(n_chunks)
+    scenario_final_values = np.empty(n_scenarios)
+    
+    for i, stream in enumerate(streams):
+        lo = i * chunk_size
+        hi = min(lo + chunk_size, n_scenarios)
+        draws = draw_scenario_chunk(np.random.default_rng(stream), hi - lo, n_samples, years_ahead, block_size)
+        scenario_final_values[lo:hi] = simulate_scenario_chunk(returns_array, draws, block_size)
     
     # Calculate statistics
     results = {
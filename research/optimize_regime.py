@@ -9,7 +9,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.data_loader import DataLoader
 from utils.feature_engineering import FeatureEngineer
-from models.regime_detection import RegimeDetector
+from models.regime_detection import detect_regimes_panel
 import config
 
 class RegimeOptimizer:
@@ -54,9 +54,9 @@ class RegimeOptimizer:
             'min_regime_days': min_days
         }
         
-        # 2. Rejim Tespiti
-        detector = RegimeDetector(self.data, thresholds)
-        df_regime = detector.detect_regimes(verbose=False)
+        # 2. Rejim Tespiti - piyasa geneli bileşenler (USD/TRY, VIX, S&P500) eşiklerden bağımsız;
+        # core.market_state ilk trial'da hesaplayıp cache'ler, sonraki trial'lar sadece eşikleri uygular
+        df_regime = detect_regimes_panel({self.ticker: self.data}, thresholds)[self.ticker]
         
         # 3. Basit Backtest (Market Timing)
         # Strateji:
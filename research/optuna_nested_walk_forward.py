@@ -31,6 +31,8 @@ def _progress_log(msg):
 import config
 from utils.data_loader import DataLoader
 from utils.feature_engineering import FeatureEngineer
+from core.backtest_kernel import njit
+from research.significance import TRIAL_RETURNS_FILE, save_trial_returns, significance_report
 
 # --- CONFIGURATION FROM USER PLAN ---
 FIXED_STRATEGY_PARAMS = {
@@ -181,9 +183,12 @@ def load_data():
     print(f"Data Loaded: {len(full_data)} rows. Unique dates: {len(full_data.index.unique())}")
     return full_data
 
-def objective(trial, train_data):
+def objective(trial, train_data, trial_returns=None):
     """
     Her trial için TimeSeriesSplit ile cross-validation yaparak Sharpe hesapla.
+
+    trial_returns (dict) verilirse tamamlanan trial'ın validation fold'larındaki günlük net
+    getirileri trial.number altında saklanır (PBO için gün × trial tablosu).
     """
     
     # 1. Hiperparametreleri öner
@@ -222,6 +227,7 @@ def objective(trial, train_data):
     tscv = TimeSeriesSplit(n_splits=5, gap=5)
     
     sharpe_scores = []
+    fold_returns = []
     
     # Drops for X
     drop_cols = ['NextDay_Return', 'Excess_Return', 'Ticker', 'NextDay_Close', 'NextDay_Direction', 
@@ -280,12 +286,16 @@ def objective(trial, train_data):
              sharpe = 0
              
         sharpe_scores.append(sharpe)
+        # Havuzlanmış validation satırları gün bazında eşit ağırlıklı portföy getirisine indirgenir
+        fold_returns.append(pd.Series(net_returns, index=y_val.index).groupby(level=0).mean())
         
         trial.report(sharpe, fold)
         if trial.should_prune():
              raise optuna.TrialPruned()
              
     if not sharpe_scores: return 0.0
+    if trial_returns is not None:
+        trial_returns[trial.number] = pd.concat(fold_returns)
     return np.mean(sharpe_scores)
 
 
@@ -296,28 +306,17 @@ def backtest_with_strategy(predictions, actual_returns, data, model, params):
     """
     import config
     
-    tickers = data['Ticker'].unique()
     all_trades = []
     
     total_capital = 1.0
     allocated_returns = []
     
-    for ticker in tickers:
-        ticker_mask = (data['Ticker'] == ticker)
-        if not ticker_mask.any(): continue
-        
-        t_data = data[ticker_mask]
-        t_preds = predictions[ticker_mask] # Numpy array sliced? No, prediction needs alignment.
-        # Predictions array passed in is aligned with 'data' (which is sorted by date but mixed tickers? No load_data sorted by index (Date)).
-        # So 'predictions' corresponds 1-to-1 with 'data'.
-        
-        # Align prediction
-        # predictions array matches 'data' row-by-row.
-        # ticker_mask identifies rows belonging to this ticker.
-        # We can simply index the numpy array with the boolean mask.
-        
-        t_preds_subset = predictions[ticker_mask.values]
-        t_actual = actual_returns[ticker_mask]
+    # Satır indeksleri tek geçişte gruplanır (hisse başına boolean maske taraması yerine).
+    # predictions array matches 'data' row-by-row, so positional indices align both.
+    for ticker, rows in data.groupby('Ticker', sort=False).indices.items():
+        t_data = data.iloc[rows]
+        t_preds_subset = predictions[rows]
+        t_actual = actual_returns.iloc[rows]
         
         # Run Strategy Logic with FIX 4: sector info
         res = run_single_ticker_strategy(t_preds_subset, t_actual, t_data, ticker=ticker)
@@ -361,13 +360,161 @@ def backtest_with_strategy(predictions, actual_returns, data, model, params):
         'daily_returns_series': portfolio_daily_ret
     }
 
-def run_single_ticker_strategy(preds, actuals, data, ticker=None):
+# --- STRATEGY KERNEL (tek geçiş, derlenmiş) ---
+# Çıkış nedeni kodları (kernel içinde string kullanılamaz)
+STRATEGY_EXIT_REASONS = [None, 'STOP', 'PROFIT', 'SIGNAL']
+WIN_RATE_WINDOW = 20
+WIN_RATE_MIN_TRADES = 10
+
+
+@njit(cache=True)
+def _adaptive_threshold(regime_num, current_drawdown, recent_win_rate, base_threshold=0.005):
+    # get_adaptive_threshold ile aynı dallar; recent_win_rate < 0 -> None
+    threshold = base_threshold
+    if regime_num == 1:
+        threshold *= 2.0
+    elif regime_num == 0:
+        threshold *= 1.5
+    if current_drawdown < -0.20:
+        threshold *= 1.5
+    elif current_drawdown < -0.15:
+        threshold *= 1.2
+    if recent_win_rate >= 0:
+        if recent_win_rate < 0.35:
+            threshold *= 3.0
+        elif recent_win_rate < 0.40:
+            threshold *= 2.5
+        elif recent_win_rate < 0.45:
+            threshold *= 1.5
+    return threshold
+
+
+@njit(cache=True)
+def _volatility_size(current_vol, avg_vol):
+    # get_volatility_adjusted_size (base_size=1.0)
+    if avg_vol <= 0:
+        return 1.0
+    vol_ratio = current_vol / avg_vol
+    if vol_ratio > 2.0:
+        return 0.5
+    elif vol_ratio > 1.5:
+        return 0.7
+    elif vol_ratio > 1.2:
+        return 0.85
+    return 1.0
+
+
+@njit(cache=True)
+def strategy_kernel(preds, regime_nums, prices, atr_vals, sector_penalty, avg_atr,
+                    commission, take_profit_mult, min_holding, adaptive_feedback):
+    """
+    run_single_ticker_strategy'nin tek geçişlik çekirdeği: O(n).
+
+    adaptive_feedback=False: eşik sadece rejime bağlıdır (eski iki döngülü davranışla birebir;
+    orada sinyaller equity ve trade sonuçları oluşmadan hesaplandığı için drawdown=0, win-rate=None).
+    adaptive_feedback=True: eşik o bara kadarki running peak drawdown'u ve son 20 trade'in
+    win-rate'i (ring buffer, O(1)) ile ayarlanır.
+
+    Returns:
+        (bar getirileri, trade getirileri, trade çıkış kodları)
+    """
+    n = len(preds)
+    returns = np.zeros(n)
+    trade_returns = np.zeros(n)
+    trade_reasons = np.zeros(n, dtype=np.int64)
+    n_trades = 0
+
+    outcomes = np.zeros(WIN_RATE_WINDOW)
+    win_sum = 0.0
+
+    position = 0
+    entry_price = 0.0
+    entry_idx = 0
+    equity = 1.0
+    peak_equity = 1.0
+
+    for i in range(n):
+        regime = regime_nums[i]
+
+        current_dd = 0.0
+        recent_win_rate = -1.0
+        if adaptive_feedback:
+            current_dd = (equity - peak_equity) / peak_equity if peak_equity > 0 else 0.0
+            if n_trades >= WIN_RATE_MIN_TRADES:
+                recent_win_rate = win_sum / min(n_trades, WIN_RATE_WINDOW)
+        adaptive_thresh = _adaptive_threshold(regime, current_dd, recent_win_rate) * sector_penalty
+        signal = 1 if preds[i] > adaptive_thresh else 0
+
+        price = prices[i]
+        atr = atr_vals[i]
+        ret = 0.0
+
+        if position == 1:
+            holding_curr = i - entry_idx
+
+            # get_dynamic_stop_loss (atr_multiplier=1.5)
+            if regime == 1:
+                stop_multiplier, max_stop_pct = 1.5 * 0.8, 0.05
+            elif regime == 0:
+                stop_multiplier, max_stop_pct = 1.5, 0.06
+            else:
+                stop_multiplier, max_stop_pct = 1.5, 0.07
+
+            stop_loss_atr = entry_price - (stop_multiplier * atr)
+            stop_loss_pct = entry_price * (1 - max_stop_pct)
+            # Python max() semantiği (NaN dahil)
+            stop_price = stop_loss_pct if stop_loss_pct > stop_loss_atr else stop_loss_atr
+            tp_price = entry_price + (take_profit_mult * atr)
+
+            exit_reason = 0
+            if price <= stop_price:
+                exit_reason = 1
+            elif price >= tp_price:
+                exit_reason = 2
+            elif holding_curr >= min_holding and signal == 0:
+                exit_reason = 3
+
+            if exit_reason:
+                net_ret = price / entry_price - 1 - commission
+                ret = net_ret * _volatility_size(atr, avg_atr)
+
+                trade_returns[n_trades] = ret
+                trade_reasons[n_trades] = exit_reason
+                slot = n_trades % WIN_RATE_WINDOW
+                win = 1.0 if ret > 0 else 0.0
+                win_sum += win - outcomes[slot]
+                outcomes[slot] = win
+                n_trades += 1
+
+                equity *= (1 + ret)
+                position = 0
+            else:
+                ret = price / prices[i - 1] - 1 if i > 0 else 0.0
+                equity *= (1 + ret)
+
+        elif signal == 1:
+            position = 1
+            entry_price = price
+            entry_idx = i
+            ret = -commission
+            equity *= (1 + ret)
+
+        returns[i] = ret
+        if equity > peak_equity:
+            peak_equity = equity
+
+    return returns, trade_returns[:n_trades], trade_reasons[:n_trades]
+
+
+def run_single_ticker_strategy(preds, actuals, data, ticker=None, adaptive_feedback=False):
     """
     Applies user strategy logic for a single ticker sequence.
     NOW WITH ADAPTIVE RISK MANAGEMENT (Phase 1) + FIX 4 (Sector Penalty).
     
     Args:
         ticker: Ticker symbol for sector-based adjustments (FIX 4)
+        adaptive_feedback: Eşiği canlı drawdown ve son 20 trade win-rate'i ile ayarla
+                           (False: eski sonuçlarla birebir, bkz. strategy_kernel)
     """
     import config
     
@@ -386,127 +533,28 @@ def run_single_ticker_strategy(preds, actuals, data, ticker=None):
     
     # Extract regime info if available
     regime_nums = data['Regime_Num'].values if 'Regime_Num' in data.columns else np.ones(len(data)) * 2  # Default: Trend
-    
-    # Initial signals (will be refined with adaptive threshold)
-    signals = np.zeros(len(preds), dtype=int)
-    
-    position = 0
-    entry_price = 0
-    entry_idx = 0
-    
-    trades = []
-    equity = 1.0
-    returns = []
-    
     atr_vals = data['ATR'].values if 'ATR' in data.columns else np.ones(len(data))*0.02
-    prices = data['Close'].values
-    dates = data.index
-    
-    # Track portfolio drawdown for adaptive threshold
-    equity_curve = [1.0]
-    
-    # FIX 2: Track recent win-rate (rolling 20 trades)
-    recent_trade_outcomes = []  # 1 for win, 0 for loss
+    atr_vals = np.asarray(atr_vals, dtype=np.float64)
     
     # FIX 3: Calculate long-term average ATR for volatility sizing
     vol_window = 52 if len(data) > 52 else len(data) // 2  # 52-week or half available data
     avg_atr = np.mean(atr_vals[-vol_window:]) if len(atr_vals) > vol_window else np.mean(atr_vals)
     
-    for i in range(len(preds)):
-        # Calculate current portfolio drawdown
-        current_equity = equity_curve[-1] if equity_curve else 1.0
-        peak_equity = max(equity_curve) if equity_curve else 1.0
-        current_dd = (current_equity - peak_equity) / peak_equity if peak_equity > 0 else 0.0
-        
-        # Calculate rolling win rate (last 20 trades)
-        recent_win_rate = None
-        if len(recent_trade_outcomes) >= 10:  # Need at least 10 trades for meaningful signal
-            recent_win_rate = np.mean(recent_trade_outcomes[-20:])  # Last 20 trades
-        
-        # Get adaptive threshold for this step
-        regime = int(regime_nums[i])
-        adaptive_thresh = get_adaptive_threshold(regime, current_dd, recent_win_rate=recent_win_rate)
-        
-        # FIX 4: Apply sector penalty
-        adaptive_thresh *= sector_penalty
-        
-        # Generate signal based on adaptive threshold
-        signal = 1 if preds[i] > adaptive_thresh else 0
-        signals[i] = signal
-    
-    # Now run strategy with adaptive signals
-    position = 0
-    entry_price = 0
-    entry_idx = 0
-    trades = []
-    returns = []
-    equity = 1.0
-    
-    for i in range(len(signals)):
-        price = prices[i]
-        signal = signals[i]
-        atr = atr_vals[i]
-        
-        ret = 0.0
-        
-        if position == 1:
-            # Check Exit
-            holding_curr = i - entry_idx
-            
-            # PHASE 1: Dynamic stop-loss based on regime
-            regime = int(regime_nums[i])
-            stop_multiplier, max_stop_pct = get_dynamic_stop_loss(regime)
-            
-            stop_loss_atr = entry_price - (stop_multiplier * atr)
-            stop_loss_pct = entry_price * (1 - max_stop_pct)
-            stop_price = max(stop_loss_atr, stop_loss_pct)  # Use tighter of the two
-            
-            tp_price = entry_price + (FIXED_STRATEGY_PARAMS['TAKE_PROFIT_MULTIPLIER'] * atr)
-            
-            exit_reason = None
-            if price <= stop_price: exit_reason = 'STOP'
-            elif price >= tp_price: exit_reason = 'PROFIT'
-            elif holding_curr >= FIXED_STRATEGY_PARAMS['MIN_HOLDING_PERIODS'] and signal == 0:
-                 exit_reason = 'SIGNAL'
-                 
-            if exit_reason:
-                # Sell
-                raw_ret = price / entry_price - 1
-                net_ret = raw_ret - FIXED_STRATEGY_PARAMS['COMMISSION_RATE']
-                
-                # FIX 3: Apply volatility-adjusted position sizing
-                current_atr = atr_vals[i]
-                vol_size_multiplier = get_volatility_adjusted_size(current_atr, avg_atr)
-                scaled_ret = net_ret * vol_size_multiplier
-                
-                trades.append({'return': scaled_ret, 'reason': exit_reason})
-                
-                # FIX 2: Record outcome for win-rate tracking
-                recent_trade_outcomes.append(1 if scaled_ret > 0 else 0)
-                
-                # Apply return to this step (simplified, actually return happens at Close)
-                ret = scaled_ret
-                equity *= (1 + ret)
-                position = 0
-            else:
-                # Holding (Mark to Market return)
-                step_ret = price / prices[i-1] - 1 if i > 0 else 0
-                ret = step_ret
-                equity *= (1 + ret) 
-                
-        elif position == 0:
-            if signal == 1:
-                # Buy
-                position = 1
-                entry_price = price
-                entry_idx = i
-                # Comm cost immediately
-                ret = -FIXED_STRATEGY_PARAMS['COMMISSION_RATE']
-                equity *= (1 + ret)
-        
-        returns.append(ret)
-        equity_curve.append(equity)
-        
+    returns, trade_returns, trade_reasons = strategy_kernel(
+        np.asarray(preds, dtype=np.float64),
+        np.asarray(regime_nums).astype(np.int64),
+        np.asarray(data['Close'].values, dtype=np.float64),
+        atr_vals,
+        float(sector_penalty),
+        float(avg_atr),
+        float(FIXED_STRATEGY_PARAMS['COMMISSION_RATE']),
+        float(FIXED_STRATEGY_PARAMS['TAKE_PROFIT_MULTIPLIER']),
+        int(FIXED_STRATEGY_PARAMS['MIN_HOLDING_PERIODS']),
+        bool(adaptive_feedback),
+    )
+    
+    trades = [{'return': r, 'reason': STRATEGY_EXIT_REASONS[c]}
+              for r, c in zip(trade_returns.tolist(), trade_reasons.tolist())]
     return {'trades': trades, 'returns': returns}
 
 def optimize_and_test_per_year(dry_run=False):
@@ -519,6 +567,7 @@ def optimize_and_test_per_year(dry_run=False):
     
     all_results = []
     all_daily_returns_list = []
+    trial_files = {}
     
     for test_year in test_years:
         _progress_log(f"optimize: test_year={test_year} start")
@@ -542,8 +591,9 @@ def optimize_and_test_per_year(dry_run=False):
         n_trials = 5 if dry_run else 50
         print(f"Optimizasyon Başlıyor ({n_trials} trials)...")
         
+        trial_returns = {}
         study.optimize(
-            lambda t: objective(t, train_data),
+            lambda t: objective(t, train_data, trial_returns),
             n_trials=n_trials,
             timeout=1800 if dry_run else 3600
         )
@@ -551,6 +601,10 @@ def optimize_and_test_per_year(dry_run=False):
         _progress_log(f"optimize: test_year={test_year} done best_value={study.best_value:.4f}")
         print(f"Best CV Sharpe: {study.best_value:.4f}")
         
+        # Trial getiri tablosu (PBO) + denenen trial sayısı (DSR; pruned dahil)
+        trial_files[test_year] = f'reports/trial_returns_{test_year}.csv'
+        save_trial_returns(trial_returns, len(study.trials), trial_files[test_year])
+        
         # Final Train
         best_params = study.best_params
         best_params.update({'objective':'regression', 'metric':'rmse', 'verbosity':-1, 'n_estimators': 500})
@@ -577,6 +631,7 @@ def optimize_and_test_per_year(dry_run=False):
         
         res['test_year'] = test_year
         res['cv_sharpe'] = study.best_value
+        res['n_trials'] = len(study.trials)
         res['test_return'] = res['total_return'] # Rename key
         res['test_sharpe'] = res['sharpe']
         res['test_drawdown'] = res['max_drawdown']
@@ -612,9 +667,18 @@ def optimize_and_test_per_year(dry_run=False):
             os.makedirs("models/saved", exist_ok=True)
             joblib.dump(best_params_global, "models/saved/optimized_lgbm_params.joblib")
             print("\n✅ Best LightGBM params saved to models/saved/optimized_lgbm_params.joblib")
+            # Üretim parametrelerinin seçildiği çalışmanın trial tablosu anlamlılık raporunun girdisi
+            best_file = trial_files[int(best_row['test_year'])]
+            save_trial_returns(pd.read_csv(best_file, index_col=0, parse_dates=True), int(best_row['n_trials']),
+                               TRIAL_RETURNS_FILE)
+            print(f"✅ Trial returns saved: {TRIAL_RETURNS_FILE}")
         except Exception as e:
             print(f"\n⚠️ Failed to save optimized params: {e}")
     
+    if all_daily_returns_list and os.path.exists(TRIAL_RETURNS_FILE):
+        significance_report(n_resamples=getattr(config, 'SIGNIFICANCE_RESAMPLES', 2000),
+                            trial_returns=TRIAL_RETURNS_FILE)
+    
     _progress_log("optimize_and_test_per_year: DONE")
     print("\nDONE.")
     print(df_res[['test_year', 'cv_sharpe', 'test_sharpe', 'test_return', 'test_drawdown', 'win_rate']])
@@ -0,0 +1,319 @@
+"""
+Strateji Sonuçları için İstatistiksel Anlamlılık
+Backtest'in yazdığı günlük getiriler (reports/daily_returns_concatenated.csv) üzerinde:
+
+- Stationary bootstrap (Politis & Romano) ile Sharpe / CAGR / Max Drawdown güven aralıkları
+- Deflated Sharpe Ratio (Bailey & López de Prado): Optuna deneme sayısına göre çoklu test düzeltmesi
+- Probability of Backtest Overfitting (CSCV): walk-forward fold'ları üzerinde kombinatoryal IS/OOS.
+  Aralarından seçim yapılan strateji / deneme varyantlarının (örn. Optuna trial'ları) günlük getiri
+  tablosu gerekir (--trial-returns); hisse bazlı getiri kolonları rakip konfigürasyon değildir.
+  research/optuna_nested_walk_forward.py bu tabloyu ve denenen trial sayısını (pruned dahil)
+  reports/trial_returns.csv (+ .json) olarak yazar; DSR trial sayısı oradan okunur
+
+Tüm yeniden örneklemeler (resample × gün) dizileri halinde, chunk'lar ile yapılır;
+binlerce resample bir saniyenin altında hesaplanır.
+
+Kullanım:
+    python research/significance.py                # reports/trial_returns.csv varsa: PBO + gerçek trial sayısı
+    python research/significance.py --n-trials 50 --trial-returns ''   # trial tablosu olmadan
+"""
+
+import json
+import os
+import sys
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+RETURNS_FILE = 'reports/daily_returns_concatenated.csv'
+TRIAL_RETURNS_FILE = 'reports/trial_returns.csv'
+EULER_GAMMA = 0.5772156649015329
+
+
+def load_daily_returns(path=RETURNS_FILE):
+    """Hisse bazlı günlük getiri tablosu (gün × hisse). Portföy getirisi run_backtest ile aynı: kolon toplamı."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} bulunamadı. Önce run_backtest.py çalıştırılmalı.")
+    return pd.read_csv(path, index_col=0, parse_dates=True).fillna(0)
+
+
+def _trial_meta_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def save_trial_returns(trial_returns, n_trials, path=TRIAL_RETURNS_FILE):
+    """
+    Optuna çalışmasının (gün × trial) getiri tablosunu ve denenen trial sayısını yazar.
+    Tabloda sadece tamamlanan trial'lar vardır; n_trials pruned olanları da sayar (DSR için).
+    """
+    frame = pd.DataFrame(trial_returns).sort_index()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    frame.to_csv(path)
+    with open(_trial_meta_path(path), 'w') as f:
+        json.dump({'n_trials': int(n_trials), 'n_complete': int(frame.shape[1])}, f, indent=2)
+    return frame
+
+
+def load_trial_returns(path=TRIAL_RETURNS_FILE):
+    """(gün × trial getirileri, denenen trial sayısı); dosya yoksa (None, None)."""
+    if not path or not os.path.exists(path):
+        return None, None
+    n_trials = None
+    if os.path.exists(_trial_meta_path(path)):
+        with open(_trial_meta_path(path)) as f:
+            n_trials = json.load(f).get('n_trials')
+    return load_daily_returns(path), n_trials
+
+
+# ==========================================
+# BATCH METRİKLER
+# ==========================================
+
+def batch_metrics(returns_matrix, bars_per_year=None):
+    """
+    (resample × gün) getiri matrisinin her satırı için CAGR, Sharpe ve Max Drawdown.
+    Tanımlar Backtester.calculate_metrics ile aynı: Sharpe = CAGR / yıllık vol (risk_free = 0).
+    """
+    bars_per_year = bars_per_year or config.get_bars_per_year()
+    R = np.atleast_2d(returns_matrix)
+    n_days = max(R.shape[1], 1)
+
+    equity = np.cumprod(1 + R, axis=1)
+    total_return = equity[:, -1] - 1
+    with np.errstate(invalid='ignore'):
+        cagr = np.where(total_return > -1, np.abs(1 + total_return) ** (bars_per_year / n_days) - 1, 0.0)
+    ann_vol = R.std(axis=1, ddof=1) * np.sqrt(bars_per_year)
+    sharpe = np.divide(cagr, ann_vol, out=np.zeros_like(cagr), where=ann_vol > 0)
+    max_drawdown = (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1)
+
+    return {'Sharpe Ratio': sharpe, 'CAGR': cagr, 'Max Drawdown': max_drawdown}
+
+
+# ==========================================
+# STATIONARY BOOTSTRAP
+# ==========================================
+
+def stationary_bootstrap_indices(rng, n_obs, n_resamples, mean_block):
+    """
+    Stationary bootstrap indeksleri (n_resamples × n_obs).
+    Her gün 1/mean_block olasılıkla yeni blok başlar; blok içi indeksler dairesel olarak ilerler.
+    """
+    positions = np.arange(n_obs)
+    new_block = rng.random((n_resamples, n_obs)) < 1.0 / mean_block
+    new_block[:, 0] = True
+    starts = rng.integers(0, n_obs, size=(n_resamples, n_obs))
+
+    # Her gün için içinde bulunduğu bloğun başladığı pozisyon
+    block_origin = np.maximum.accumulate(np.where(new_block, positions, 0), axis=1)
+    origin_start = np.take_along_axis(starts, block_origin, axis=1)
+    return (origin_start + positions - block_origin) % n_obs
+
+
+def bootstrap_confidence_intervals(returns, n_resamples=5000, mean_block=None, alpha=0.05,
+                                   seed=42, chunk_size=2000, bars_per_year=None):
+    """
+    Sharpe / CAGR / Max Drawdown için stationary bootstrap persentil güven aralıkları.
+
+    Args:
+        returns: Günlük portföy getirisi (Series veya 1-D dizi)
+        mean_block: Ortalama blok uzunluğu (varsayılan: n^(1/3))
+        alpha: 0.05 -> %95 güven aralığı
+        chunk_size: Bir seferde üretilen resample sayısı (bellek: chunk_size × gün)
+
+    Returns:
+        dict: metrik -> {'estimate', 'lower', 'upper', 'std'}
+    """
+    returns_array = np.asarray(returns, dtype=float)
+    n_obs = len(returns_array)
+    if n_obs < 2:
+        raise ValueError("Güven aralığı için en az 2 gözlem gerekli.")
+    mean_block = mean_block or max(1.0, n_obs ** (1 / 3))
+
+    n_chunks = -(-n_resamples // chunk_size)
+    streams = np.random.SeedSequence(seed).spawn(n_chunks)
+    samples = {}
+    for i, stream in enumerate(streams):
+        m = min(chunk_size, n_resamples - i * chunk_size)
+        idx = stationary_bootstrap_indices(np.random.default_rng(stream), n_obs, m, mean_block)
+        for key, values in batch_metrics(returns_array[idx], bars_per_year).items():
+            samples.setdefault(key, []).append(values)
+
+    point = batch_metrics(returns_array, bars_per_year)
+    intervals = {}
+    for key, chunks in samples.items():
+        values = np.concatenate(chunks)
+        intervals[key] = {
+            'estimate': float(point[key][0]),
+            'lower': float(np.percentile(values, 100 * alpha / 2)),
+            'upper': float(np.percentile(values, 100 * (1 - alpha / 2))),
+            'std': float(values.std(ddof=1)),
+        }
+    return intervals
+
+
+# ==========================================
+# DEFLATED SHARPE RATIO
+# ==========================================
+
+def deflated_sharpe_ratio(returns, n_trials, trials_sharpe_std=None):
+    """
+    Deflated Sharpe Ratio: gözlenen Sharpe'ın, n_trials denemenin en iyisi olarak seçilmesine
+    rağmen sıfırdan büyük olma olasılığı. Sharpe periyot bazındadır (yıllıklandırılmamış).
+
+    Args:
+        n_trials: Denenen bağımsız konfigürasyon sayısı (örn. Optuna trial sayısı)
+        trials_sharpe_std: Denemelerin Sharpe'larının standart sapması; bilinmiyorsa
+                           Sharpe tahmin edicisinin standart hatası kullanılır
+
+    Returns:
+        dict: sharpe, expected_max_sharpe (SR0), dsr (olasılık), n_obs
+    """
+    returns_array = np.asarray(returns, dtype=float)
+    n_obs = len(returns_array)
+    std = returns_array.std(ddof=1)
+    sr = returns_array.mean() / std if std > 0 else 0.0
+    skew = stats.skew(returns_array)
+    kurt = stats.kurtosis(returns_array, fisher=False)
+
+    # Sharpe tahmin edicisinin varyansı (non-normal getiriler için düzeltilmiş)
+    sr_var = max(1 - skew * sr + (kurt - 1) / 4 * sr ** 2, 1e-12)
+    if trials_sharpe_std is None:
+        trials_sharpe_std = np.sqrt(sr_var / (n_obs - 1))
+
+    # n_trials denemenin beklenen maksimum Sharpe'ı (gerçek Sharpe = 0 hipotezi altında)
+    if n_trials > 1:
+        sr0 = trials_sharpe_std * ((1 - EULER_GAMMA) * stats.norm.ppf(1 - 1 / n_trials)
+                                   + EULER_GAMMA * stats.norm.ppf(1 - 1 / (n_trials * np.e)))
+    else:
+        sr0 = 0.0
+
+    dsr = stats.norm.cdf((sr - sr0) * np.sqrt(n_obs - 1) / np.sqrt(sr_var))
+    return {'sharpe': float(sr), 'expected_max_sharpe': float(sr0), 'dsr': float(dsr), 'n_obs': n_obs}
+
+
+# ==========================================
+# PROBABILITY OF BACKTEST OVERFITTING (CSCV)
+# ==========================================
+
+def probability_of_backtest_overfitting(returns_matrix, folds=None, n_splits=8):
+    """
+    Combinatorially Symmetric Cross-Validation ile PBO.
+    Fold'lar ikiye bölünür (tüm C(S, S/2) kombinasyon); IS'te en iyi Sharpe'lı konfigürasyonun
+    OOS sıralaması medyanın altındaysa o kombinasyon overfit sayılır.
+
+    Args:
+        returns_matrix: (gün × konfigürasyon) getiri tablosu (DataFrame veya 2-D dizi)
+        folds: Her gün için fold etiketi (örn. walk-forward test yılı). None ise gün ekseni
+               n_splits eşit parçaya bölünür.
+
+    Returns:
+        dict: pbo, logits (kombinasyon başına), n_combinations, n_folds
+    """
+    if isinstance(returns_matrix, pd.DataFrame) and folds is None and isinstance(returns_matrix.index, pd.DatetimeIndex):
+        folds = returns_matrix.index.year
+    M = np.asarray(returns_matrix, dtype=float)
+    n_obs, n_configs = M.shape
+    if n_configs < 2:
+        raise ValueError("PBO için en az 2 konfigürasyon gerekli.")
+
+    if folds is None:
+        labels = np.arange(n_obs) * n_splits // n_obs
+    else:
+        labels = pd.factorize(np.asarray(folds), sort=True)[0]
+    n_folds = labels.max() + 1
+    if n_folds % 2:
+        # Simetrik bölme için çift sayıda fold: son iki fold birleştirilir
+        labels = np.where(labels == n_folds - 1, n_folds - 2, labels)
+        n_folds -= 1
+    if n_folds < 2:
+        raise ValueError("PBO için en az 2 fold gerekli.")
+
+    # Fold bazlı yeterli istatistikler (fold × konfigürasyon): n, Σr, Σr²
+    one_hot = np.eye(n_folds)[labels]
+    fold_n = one_hot.sum(axis=0)[:, None]
+    fold_sum = one_hot.T @ M
+    fold_sq = one_hot.T @ (M ** 2)
+
+    combos = np.array([np.isin(np.arange(n_folds), c) for c in combinations(range(n_folds), n_folds // 2)],
+                      dtype=float)
+
+    def sharpe_of(weights):
+        n = weights @ fold_n
+        mean = (weights @ fold_sum) / n
+        var = (weights @ fold_sq) / n - mean ** 2
+        return mean / np.sqrt(np.maximum(var, 1e-18))
+
+    sr_is = sharpe_of(combos)
+    sr_oos = sharpe_of(1 - combos)
+
+    best = sr_is.argmax(axis=1)
+    # En iyi IS konfigürasyonun OOS'taki göreli sırası (1..N) -> (0, 1)
+    rank = (sr_oos < sr_oos[np.arange(len(combos)), best][:, None]).sum(axis=1) + 1
+    w = rank / (n_configs + 1)
+    logits = np.log(w / (1 - w))
+
+    return {'pbo': float(np.mean(logits <= 0)), 'logits': logits,
+            'n_combinations': len(combos), 'n_folds': int(n_folds)}
+
+
+def significance_report(returns_path=RETURNS_FILE, n_trials=None, n_resamples=5000, seed=42, verbose=True,
+                        trial_returns=None):
+    """
+    Günlük getiri dosyasından güven aralıkları ve DSR raporu.
+
+    Args:
+        n_trials: DSR için denenen konfigürasyon sayısı. Verilmezse trial dosyasında kayıtlı
+            sayı, o da yoksa config.SIGNIFICANCE_N_TRIALS kullanılır.
+        trial_returns: Aralarından seçim yapılan varyantların (gün × trial) getiri tablosu veya
+            CSV yolu (save_trial_returns); verilirse PBO da hesaplanır. Hisse kolonları varyant
+            olmadığından PBO backtest getiri dosyasından hesaplanmaz.
+    """
+    df = load_daily_returns(returns_path)
+    portfolio = df.sum(axis=1)
+
+    if isinstance(trial_returns, str):
+        trial_returns, stored_trials = load_trial_returns(trial_returns)
+        n_trials = n_trials or stored_trials
+    n_trials = n_trials or getattr(config, 'SIGNIFICANCE_N_TRIALS', 1)
+
+    report = {
+        'confidence_intervals': bootstrap_confidence_intervals(portfolio, n_resamples=n_resamples, seed=seed),
+        'deflated_sharpe': deflated_sharpe_ratio(portfolio, n_trials),
+    }
+    if trial_returns is not None and trial_returns.shape[1] >= 2:
+        report['pbo'] = probability_of_backtest_overfitting(trial_returns)
+
+    if verbose:
+        print("\n📐 İSTATİSTİKSEL ANLAMLILIK")
+        for key, ci in report['confidence_intervals'].items():
+            print(f"  {key:<14}: {ci['estimate']:8.4f}  [{ci['lower']:8.4f}, {ci['upper']:8.4f}]")
+        dsr = report['deflated_sharpe']
+        print(f"  Deflated Sharpe: {dsr['dsr']:.2%} (trial={n_trials}, SR={dsr['sharpe']:.4f}, SR0={dsr['expected_max_sharpe']:.4f})")
+        if 'pbo' in report:
+            print(f"  PBO           : {report['pbo']['pbo']:.2%} ({report['pbo']['n_combinations']} kombinasyon, "
+                  f"{trial_returns.shape[1]} varyant)")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backtest getirileri için anlamlılık testleri")
+    parser.add_argument('--path', default=RETURNS_FILE)
+    parser.add_argument('--n-trials', type=int, default=None,
+                        help="Deflated Sharpe için denenen konfigürasyon sayısı (varsayılan: trial dosyasındaki "
+                             "Optuna trial sayısı, yoksa config.SIGNIFICANCE_N_TRIALS)")
+    parser.add_argument('--resamples', type=int, default=getattr(config, 'SIGNIFICANCE_RESAMPLES', 5000))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--trial-returns', default=TRIAL_RETURNS_FILE,
+                        help="PBO için aralarından seçim yapılan varyantların günlük getirileri (CSV: gün × trial)")
+    args = parser.parse_args()
+
+    significance_report(args.path, n_trials=args.n_trials, n_resamples=args.resamples, seed=args.seed,
+                        trial_returns=args.trial_returns)
@@ -8,11 +8,15 @@ import pandas as pd
 
 import config
 from configs import banking as config_banking
-from core.backtesting import Backtester
+from core.backtesting import Backtester, BacktestCheckpoint
 from core.macro_gate import vectorized_macro_gate
-from models.ranking_model import RankingModel
+from core.score_store import score_store
+from models.model_registry import model_registry
+from research.significance import (bootstrap_confidence_intervals, deflated_sharpe_ratio, load_trial_returns,
+                                   probability_of_backtest_overfitting)
 from utils.data_loader import DataLoader
 from utils.feature_engineering import FeatureEngineer
+from utils.tracing import tracer
 
 def main():
     if not os.path.exists("reports"):
@@ -22,8 +26,21 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--mode', type=str, default='oos', choices=['oos', 'is'])
     parser.add_argument('--model', type=str, default='lightgbm', choices=['lightgbm', 'catboost', 'ensemble'], help='Model type to use')
+    parser.add_argument('--resume', action='store_true',
+                        help='Hisse bazlı checkpoint varsa sadece yeni günleri simüle et, sonunda checkpoint kaydet')
+    parser.add_argument('--trace', action='store_true',
+                        help='Aşama sürelerini config.TRACE_DIR altına JSON trace olarak yaz')
     args = parser.parse_args()
 
+    with tracer.run(f"backtest_{args.mode}_{args.model}", enabled=args.trace or None,
+                    mode=args.mode, model=args.model):
+        run(args)
+
+
+def run(args):
+    checkpoint_dir = os.path.join(getattr(config, 'BACKTEST_CHECKPOINT_DIR', 'reports/checkpoints'),
+                                  f"{args.mode}_{args.model}")
+
     print(f"\n{'='*50}")
     print(f"BIST30 AI TRADER - DAILY RANKING BACKTEST ({args.mode.upper()})")
     print(f"Model: {args.model.upper()}")
@@ -33,11 +50,10 @@ def main():
     try:
         ranker = None
         if args.model == 'lightgbm':
-             ranker = RankingModel.load("models/saved/global_ranker.pkl", config_banking)
+             ranker = model_registry.load('global_ranker', config_banking)
         elif args.model == 'catboost':
              # Deprecated or optional
-             from models.ranking_model_catboost import CatBoostRankingModel
-             ranker = CatBoostRankingModel.load("models/saved/global_ranker_catboost.cbm", config_banking)
+             ranker = model_registry.load('global_ranker_catboost', config_banking)
         elif args.model == 'ensemble':
              from models.ensemble_model import HybridEnsemble
              # Load Hybrid Ensemble (LGBM loaded inside, TFT requires path/config)
@@ -127,11 +143,9 @@ def main():
     print("Predicting Ranks...")
     full_df = pd.concat(all_data.values())
     
-    # Save original index to restore after predict
-    # Predict expects columns, doesn't care about index structure
-    # But we need to assign scores back.
-    
-    scores = ranker.predict(full_df)
+    # Skorlar örneklem dışı skor deposundan (core/score_store.py, `fill` ile doldurulur);
+    # depoda olmayan (model versiyonu, tarih, hisse) satırları tahmin edilir (depoya yazılmaz)
+    scores = score_store.predict(ranker, full_df)
     full_df['Score'] = scores
     
     # 4. Allocation (Top N)
@@ -222,6 +236,7 @@ def main():
     all_daily_returns = []
     
     print(f"\nExecuting Trades (Top {port_size} {weight_strategy} Portfolio)...")
+    n_resumed = 0
     for t in all_data.keys():
         if t not in weights_pivot.columns: continue
         
@@ -229,7 +244,14 @@ def main():
         ticker_weights = weights_pivot[t].reindex(df.index).fillna(0)
         
         bt = Backtester(df, initial_capital=10000) 
-        bt.run_backtest(ticker_weights)
+        if args.resume:
+            # Checkpoint'ten devam: Sadece son çalıştırmadan sonraki günler simüle edilir
+            checkpoint_path = os.path.join(checkpoint_dir, f"{t.replace('.', '_')}.joblib")
+            bt.run_backtest(ticker_weights, checkpoint=BacktestCheckpoint.load(checkpoint_path))
+            n_resumed += int(bt.resumed)
+            bt.get_checkpoint().save(checkpoint_path)
+        else:
+            bt.run_backtest(ticker_weights)
         
         metrics = bt.calculate_metrics()
         metrics['Ticker'] = t
@@ -240,6 +262,9 @@ def main():
         d_rets.name = t
         all_daily_returns.append(d_rets)
 
+    if args.resume:
+        print(f"Checkpoint: {n_resumed}/{len(all_metrics)} hisse kaldığı yerden devam etti ({checkpoint_dir}).")
+
     # 6. Aggregation
     if all_metrics:
         df_res = pd.DataFrame(all_metrics)
@@ -261,8 +286,8 @@ def main():
 
             # FIX-A2: CAGR + risk_free = 0  (önceki 0.05 sabit Türkiye için meaningless)
             n_port_days  = max(len(port_daily_ret), 1)
-            port_cagr    = (1 + total_ret) ** (252.0 / n_port_days) - 1 if total_ret > -1 else 0.0
-            port_ann_vol = port_daily_ret.std() * np.sqrt(252)
+            port_cagr    = (1 + total_ret) ** (config.get_bars_per_year() / n_port_days) - 1 if total_ret > -1 else 0.0
+            port_ann_vol = port_daily_ret.std() * np.sqrt(config.get_bars_per_year())
             sharpe       = port_cagr / port_ann_vol if port_ann_vol > 0 else 0
 
             # Portfolio Max Drawdown & Calmar
@@ -277,6 +302,24 @@ def main():
             print(f"  Max Drawdown   : {port_max_dd:.2%}")
             print(f"  Calmar Ratio   : {port_calmar:.2f}")
 
+            # ── İstatistiksel Anlamlılık (stationary bootstrap + Deflated Sharpe) ──
+            if len(port_daily_ret) > 20:
+                # Optuna walk-forward'ın yazdığı trial tablosu: gerçek trial sayısı + PBO
+                trial_returns, n_trials = load_trial_returns()
+                n_trials = n_trials or getattr(config, 'SIGNIFICANCE_N_TRIALS', 1)
+                with tracer.span('backtest.significance', rows=len(port_daily_ret)):
+                    intervals = bootstrap_confidence_intervals(
+                        port_daily_ret, n_resamples=getattr(config, 'SIGNIFICANCE_RESAMPLES', 2000))
+                    dsr = deflated_sharpe_ratio(port_daily_ret, n_trials)
+                    pbo = (probability_of_backtest_overfitting(trial_returns)
+                           if trial_returns is not None and trial_returns.shape[1] >= 2 else None)
+                print(f"  %95 Güven Aralıkları (stationary bootstrap):")
+                for key, ci in intervals.items():
+                    print(f"    {key:<13}: [{ci['lower']:8.4f}, {ci['upper']:8.4f}]")
+                print(f"  Deflated Sharpe: {dsr['dsr']:.1%} (trial={n_trials})")
+                if pbo is not None:
+                    print(f"  PBO            : {pbo['pbo']:.1%} ({trial_returns.shape[1]} trial)")
+
             # ── Per-ticker özet (Top 5 / Bottom 3) ──────────────────
             print(f"\n  {'─'*52}")
             print(f"  Per-Ticker Özet  (tam CSV: reports/final_backtest_results.csv)")
@@ -302,7 +345,7 @@ def main():
                     # FIX-A2: benchmark de CAGR kullana
                     bench_total   = (1 + x).prod() - 1
                     n_bench       = max(len(x), 1)
-                    ann_ret_bench = (1 + bench_total) ** (252.0 / n_bench) - 1 if bench_total > -1 else 0.0
+                    ann_ret_bench = (1 + bench_total) ** (config.get_bars_per_year() / n_bench) - 1 if bench_total > -1 else 0.0
 
                     # Jensen Alpha: R_p - (R_f + β·(R_m - R_f))  →  R_f = 0  →  R_p - β·R_m
                     alpha_jensen  = port_cagr - (beta * ann_ret_bench)
@@ -0,0 +1,100 @@
+"""
+Backtest Kernel - Parity Testleri
+Derlenmiş (Numba) bar döngüsünün Python referans döngüsüyle aynı sonucu ürettiğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from core.backtesting import Backtester
+from core.backtest_kernel import NUMBA_AVAILABLE
+from core.position_sizing import KellyPositionSizer
+from tests.test_streaming_backtest import make_bars
+
+
+def make_intraday_bars(days=120, timeframe='1h', seed=0):
+    """Seans saatlerinde (10:00-18:00) intraday barlar."""
+    bars_per_day = config.get_bars_per_day(timeframe)
+    freq = '1h' if timeframe == '1h' else '15min'
+    sessions = pd.bdate_range('2024-01-01', periods=days)
+    idx = pd.DatetimeIndex([d + pd.Timedelta(hours=10) + k * pd.Timedelta(freq)
+                            for d in sessions for k in range(bars_per_day)], name='Date')
+    df = make_bars(len(idx), seed)
+    df.index = idx
+    return df
+
+
+def run_both(df, kelly_lookback=None):
+    python_bt = Backtester(df)
+    python_bt.use_compiled = False
+    if kelly_lookback is not None:
+        python_bt.position_sizer = KellyPositionSizer(lookback=kelly_lookback)
+    expected = python_bt.run_backtest(df['Weight'])
+
+    compiled_bt = Backtester(df)
+    compiled_bt.use_compiled = True
+    if kelly_lookback is not None:
+        compiled_bt.position_sizer = KellyPositionSizer(lookback=kelly_lookback)
+    result = compiled_bt.run_backtest(df['Weight'])
+    return python_bt, expected, compiled_bt, result
+
+
+@pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba yüklü değil")
+class TestKernelParity:
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_daily_matches_python_loop(self, seed):
+        df = make_bars(n=1500, seed=seed)
+        python_bt, expected, compiled_bt, result = run_both(df)
+
+        pd.testing.assert_frame_equal(result, expected, rtol=1e-10)
+        assert [t['pnl'] for t in compiled_bt.position_sizer.trade_history] == \
+            pytest.approx([t['pnl'] for t in python_bt.position_sizer.trade_history])
+
+    @pytest.mark.parametrize("lookback", [12, 0])
+    def test_bounded_kelly_window_matches_python_loop(self, lookback, monkeypatch):
+        monkeypatch.setattr(config, 'ENABLE_RISK_SIZING', False) # Boyutlandırma Kelly'den
+        df = make_bars(n=1500, seed=0)
+        python_bt, expected, compiled_bt, result = run_both(df, kelly_lookback=lookback)
+
+        pd.testing.assert_frame_equal(result, expected, rtol=1e-10)
+        history = compiled_bt.position_sizer.trade_history
+        assert history.maxlen == (lookback or None)
+        if lookback:
+            assert len(history) == lookback
+        assert [t['pnl'] for t in history] == pytest.approx([t['pnl'] for t in python_bt.position_sizer.trade_history])
+
+    def test_binary_signals(self):
+        df = make_bars(n=800, seed=3)
+        df['Weight'] = (df['Weight'] > 0).astype(int)
+        _, expected, _, result = run_both(df)
+        pd.testing.assert_frame_equal(result, expected, rtol=1e-10)
+
+    def test_intraday_matches_python_loop(self):
+        df = make_intraday_bars(days=150, timeframe='15m')
+        _, expected, _, result = run_both(df)
+        pd.testing.assert_frame_equal(result, expected, rtol=1e-10)
+
+
+class TestIntradayHelpers:
+
+    def test_bars_per_year(self):
+        assert config.get_bars_per_year('D') == 252
+        assert config.get_bars_per_year('W') == 52
+        assert config.get_bars_per_year('1h') == 252 * 8
+        assert config.days_to_bars(5, 'D') == 5
+        assert config.days_to_bars(5, '15m') == 160
+
+    def test_days_held_counts_calendar_days(self):
+        # Aynı seanstaki barlar aynı gün sayılır
+        df = make_intraday_bars(days=3, timeframe='1h')
+        days = Backtester.day_numbers(df.index)
+        assert len(np.unique(days)) == 3
+        assert (np.diff(days) >= 0).all()
@@ -0,0 +1,47 @@
+"""
+Benchmark Suite Testleri
+Küçük ölçekte çalışıp makine-okunur sonuç ürettiğini ve karşılaştırmanın regresyonu işaretlediğini doğrular.
+"""
+
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from research import benchmark_performance as bench
+
+
+class TestBenchmarkSuite:
+
+    def test_suite_writes_machine_readable_report(self, tmp_path):
+        report = bench.run_suite(scale='tiny', only=['backtest', 'monte_carlo', 'kap_event_features'],
+                                 repeat=1, overrides={'n_tickers': 2, 'n_days': 300, 'mc_scenarios': 20})
+        path = bench.save_results(report, str(tmp_path))
+
+        with open(path, encoding='utf-8') as f:
+            loaded = json.load(f)
+        assert os.path.exists(tmp_path / 'latest.json')
+        assert loaded['meta']['params']['n_tickers'] == 2
+        backtest = loaded['results']['backtest']
+        assert backtest['status'] == 'ok'
+        assert backtest['rows'] > 0
+        assert backtest['wall_median_s'] > 0
+
+    def test_compare_flags_regressions(self):
+        meta = {'params': {'n_tickers': 1}}
+        baseline = {'meta': meta, 'results': {'backtest': {'status': 'ok', 'wall_median_s': 1.0},
+                                              'monte_carlo': {'status': 'ok', 'wall_median_s': 1.0}}}
+        current = {'meta': meta, 'results': {'backtest': {'status': 'ok', 'wall_median_s': 1.5},
+                                             'monte_carlo': {'status': 'ok', 'wall_median_s': 0.9}}}
+        deltas = bench.compare_results(current, baseline)
+        assert deltas['backtest']['regression']
+        assert not deltas['monte_carlo']['regression']
+
+    def test_ranking_benchmarks_restore_dataset_cache_dir(self):
+        from models.ranking_dataset import dataset_cache
+        previous = dataset_cache.dir
+        report = bench.run_suite(scale='tiny', only=['ranking_prepare', 'ranking_train_cached'], repeat=1,
+                                 overrides={'n_tickers': 3, 'n_days': 300, 'ranking_estimators': 5})
+        assert report['results']['ranking_train_cached']['status'] == 'ok'
+        assert dataset_cache.dir == previous # benchmark klasörü süreç geneline sızmaz
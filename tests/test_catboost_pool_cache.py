@@ -0,0 +1,86 @@
+"""
+CatBoost Pool Cache Testleri
+Quantize edilmiş pool'ların (bellek + disk) eğitimi değiştirmeden yeniden kullanıldığını ve
+validasyon pool'unun eğitim border'larıyla quantize edildiğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+catboost = pytest.importorskip('catboost')
+
+import models.ranking_model_catboost as ranking_model_catboost
+from models.catboost_pool_cache import CatBoostPoolCache
+from models.ranking_model_catboost import CatBoostRankingModel
+from tests.test_ranking_dataset import CONFIG, make_panel
+
+PARAMS = {'iterations': 30, 'early_stopping_rounds': None}
+
+
+def reference_model(df_train, df_valid):
+    """Cache'siz eğitim: ham Pool'lar, quantization fit içinde."""
+    ranker = CatBoostRankingModel(df_train, CONFIG)
+    train_pool = ranker.prepare_data(is_training=True)
+    val_pool = CatBoostRankingModel(df_valid, CONFIG).prepare_data(is_training=True)
+    params = {'loss_function': 'YetiRank', 'eval_metric': 'NDCG:top=5', 'learning_rate': 0.03, 'depth': 6,
+              'l2_leaf_reg': 5.0, 'bagging_temperature': 0.5, 'random_seed': 42, 'logging_level': 'Silent',
+              'allow_writing_files': False, 'custom_metric': ['NDCG:top=5'], 'iterations': 30}
+    return catboost.CatBoostRanker(**params).fit(train_pool, eval_set=val_pool)
+
+
+class TestCatBoostPoolCache:
+    def test_cached_pools_match_raw_training(self, tmp_path, monkeypatch):
+        panel = make_panel().drop(columns=['Empty']) # CatBoost yolu boş kolonu elemez (dropna tüm satırları siler)
+        dates = panel.index.get_level_values('Date')
+        cutoff = dates.unique()[-25]
+        df_train, df_valid = panel[dates < cutoff], panel[dates >= cutoff]
+        cache = CatBoostPoolCache(cache_dir=str(tmp_path))
+        monkeypatch.setattr(ranking_model_catboost, 'pool_cache', cache)
+
+        ranker = CatBoostRankingModel(df_train, CONFIG)
+        ranker.train(valid_df=df_valid, custom_params=PARAMS)
+        assert cache.stats == {'hits': 0, 'disk_hits': 0, 'misses': 2}
+        assert sum(f.endswith('.qpool') for f in os.listdir(tmp_path)) == 2
+
+        expected = reference_model(df_train, df_valid)
+        X = df_valid[ranker.feature_names]
+        np.testing.assert_allclose(ranker.predict(X), expected.predict(X))
+        assert ranker.model.get_best_score() == expected.get_best_score()
+
+        # Optuna denemesi: aynı veri, farklı ağaç parametresi -> bellekteki pool'lar
+        CatBoostRankingModel(df_train, CONFIG).train(valid_df=df_valid, custom_params=dict(PARAMS, depth=4))
+        assert cache.stats['hits'] == 2
+
+        # Yeni süreç: diskten
+        disk = CatBoostPoolCache(cache_dir=str(tmp_path))
+        monkeypatch.setattr(ranking_model_catboost, 'pool_cache', disk)
+        again = CatBoostRankingModel(df_train, CONFIG)
+        again.train(valid_df=df_valid, custom_params=PARAMS)
+        assert disk.stats == {'hits': 0, 'disk_hits': 2, 'misses': 0}
+        assert again.feature_names == ranker.feature_names
+        np.testing.assert_allclose(again.predict(X), ranker.predict(X))
+
+    def test_border_count_is_part_of_key(self, tmp_path, monkeypatch):
+        panel = make_panel(n_days=60, n_tickers=8).drop(columns=['Empty'])
+        cache = CatBoostPoolCache(cache_dir=str(tmp_path), persist=False)
+        monkeypatch.setattr(ranking_model_catboost, 'pool_cache', cache)
+        CatBoostRankingModel(panel, CONFIG).train(custom_params=PARAMS)
+        CatBoostRankingModel(panel, CONFIG).train(custom_params=dict(PARAMS, border_count=32))
+        assert cache.stats['misses'] == 2
+        assert not os.listdir(tmp_path)
+
+    def test_no_files_written_without_persist(self, tmp_path, monkeypatch):
+        panel = make_panel(n_days=60, n_tickers=8).drop(columns=['Empty'])
+        dates = panel.index.get_level_values('Date')
+        cutoff = dates.unique()[-15]
+        cache = CatBoostPoolCache(cache_dir=str(tmp_path / 'pools'), persist=False)
+        monkeypatch.setattr(ranking_model_catboost, 'pool_cache', cache)
+        ranker = CatBoostRankingModel(panel[dates < cutoff], CONFIG)
+        ranker.train(valid_df=panel[dates >= cutoff], custom_params=PARAMS)
+        assert cache.stats['misses'] == 2 # Validasyon pool'u eğitim border'larıyla quantize edildi
+        assert not os.path.exists(tmp_path / 'pools')
@@ -0,0 +1,122 @@
+"""
+Ensemble Ağırlık Optimizasyonu Testleri
+Vektörel aday metriklerinin aday başına pandas hesabıyla aynı olduğunu, varsayılan
+normalizasyonun HybridEnsemble'ın eski rank karışımını koruduğunu ve seçilen ağırlıkların
+registry üzerinden sadece aynı üyelerle kurulan ensemble'a yüklendiğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import rankdata
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models.ensemble_model as ensemble_module
+from models.ensemble_model import HybridEnsemble
+from models.ensemble_weights import (blend, candidate_metrics, ensemble_members, load_ensemble_weights,
+                                     optimize_ensemble_weights, save_ensemble_weights)
+from models.label_engine import date_codes
+from models.model_registry import ModelRegistry
+
+
+def make_scores(n_days=80, n_tickers=12, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.MultiIndex.from_product([pd.bdate_range('2024-01-01', periods=n_days), [f'T{i}' for i in range(n_tickers)]],
+                                       names=['Date', 'Ticker'])
+    ret = rng.normal(0, 0.02, len(index))
+    scores = pd.DataFrame({'lgbm': ret + rng.normal(0, 0.03, len(index)),
+                           'tft': 0.1 * ret + rng.normal(0, 0.005, len(index)),
+                           'NextDay_Return': ret}, index=index)
+    scores.loc[scores.index[:30], 'tft'] = np.nan # Kısa geçmiş: TFT tahmini yok
+    return scores
+
+
+class DummyMember:
+    def __init__(self, values):
+        self.values = values
+
+    def predict(self, df):
+        return self.values
+
+
+class TestEnsembleWeights:
+    def test_metrics_match_per_candidate_loop(self):
+        scores = make_scores()
+        best, table = optimize_ensemble_weights(scores, weights=[0.0, 0.5, 1.0], k=3)
+        assert len(table) == 9
+
+        codes, n_groups = date_codes(scores.index)
+        for row in table.itertuples():
+            blended = blend(scores['lgbm'], scores['tft'], row.lgbm, codes, n_groups, row.normalization)
+            frame = scores.assign(score=blended)
+            daily = frame.groupby(level='Date', sort=False).apply(
+                lambda g: g.nlargest(3, 'score', keep='first')['NextDay_Return'].mean())
+            ic = frame.groupby(level='Date', sort=False).apply(
+                lambda g: g['score'].corr(g['NextDay_Return'], method='spearman'))
+            sharpe = daily.mean() / daily.std() * np.sqrt(252)
+            assert row.sharpe == pytest.approx(sharpe, rel=1e-9)
+            assert row.rank_ic == pytest.approx(ic.mean(), rel=1e-9)
+            assert row.total_return == pytest.approx((1 + daily).prod() - 1, rel=1e-9)
+
+        assert best['sharpe'] == table['sharpe'].max()
+
+    def test_missing_scores_are_skipped(self):
+        S = np.array([[[1.0, 2.0, np.nan], [np.nan, np.nan, np.nan]]])
+        R = np.array([[0.01, 0.03, 0.5], [0.2, 0.2, 0.2]])
+        metrics = candidate_metrics(S, R, k=1, bars_per_year=252)
+        assert metrics['days'][0] == 1
+        assert metrics['total_return'][0] == pytest.approx(0.03)
+
+    def test_default_normalization_matches_rank_blend(self, monkeypatch):
+        monkeypatch.setattr(ensemble_module, 'load_ensemble_weights', lambda **kwargs: None)
+        scores = make_scores()
+        ensemble = HybridEnsemble(DummyMember(scores['lgbm'].to_numpy()), None)
+        ensemble.member_predictions = lambda df: (scores['lgbm'].to_numpy(), scores['tft'].to_numpy())
+
+        # models/ensemble_model.py'deki eski karışım
+        norm_lgbm = rankdata(scores['lgbm']) / len(scores)
+        valid = scores['tft'].notna().to_numpy()
+        norm_tft = norm_lgbm.copy()
+        norm_tft[valid] = rankdata(scores['tft'][valid]) / valid.sum()
+        expected = ensemble.weights['lgbm'] * norm_lgbm + ensemble.weights['tft'] * norm_tft
+        np.testing.assert_allclose(ensemble.predict(scores), expected)
+
+    def test_optimized_weights_are_loaded_from_registry(self, monkeypatch, tmp_path):
+        registry = ModelRegistry(str(tmp_path))
+        assert load_ensemble_weights(registry) is None
+
+        scores = make_scores(seed=1)
+        best, table = optimize_ensemble_weights(scores, objective='rank_ic')
+        lgbm, tft = DummyMember(scores['lgbm'].to_numpy()), DummyMember(scores['tft'].to_numpy())
+        version = save_ensemble_weights(best, table, members=ensemble_members(lgbm, tft), registry=registry)
+        manifest = registry.production_manifest('hybrid_ensemble')
+        assert manifest['version'] == version
+        assert manifest['metrics']['candidates'] == len(table)
+        assert manifest['members'] == ensemble_members(lgbm, tft)
+
+        monkeypatch.setattr(ensemble_module, 'load_ensemble_weights',
+                            lambda **kwargs: load_ensemble_weights(registry, **kwargs))
+        ensemble = HybridEnsemble(lgbm, tft)
+        assert ensemble.weights == {'lgbm': best['lgbm'], 'tft': best['tft']}
+        assert ensemble.normalization == best['normalization']
+
+    def test_weights_for_other_members_are_ignored(self, monkeypatch, tmp_path):
+        registry = ModelRegistry(str(tmp_path))
+        scores = make_scores(seed=2)
+        best, table = optimize_ensemble_weights(scores, objective='rank_ic')
+        lgbm, tft = DummyMember(scores['lgbm'].to_numpy()), DummyMember(scores['tft'].to_numpy())
+        save_ensemble_weights(best, table, members=ensemble_members(lgbm, tft), registry=registry)
+        monkeypatch.setattr(ensemble_module, 'load_ensemble_weights',
+                            lambda **kwargs: load_ensemble_weights(registry, **kwargs))
+
+        lgbm_w = ensemble_module.config.HYBRID_WEIGHT
+        default = {'lgbm': lgbm_w, 'tft': 1.0 - lgbm_w}
+        assert HybridEnsemble().weights == default # Üyeler bilinmiyor
+        assert HybridEnsemble(lgbm, None).weights == default # TFT yüklenemedi
+        retrained = DummyMember(scores['lgbm'].to_numpy() + 1.0)
+        ensemble = HybridEnsemble(retrained, tft) # Yeniden eğitilmiş LightGBM
+        assert ensemble.weights == default and ensemble.normalization == 'global_rank'
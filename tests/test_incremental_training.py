@@ -0,0 +1,106 @@
+"""
+Artımlı (Warm-Start) Eğitim Testleri
+Tam / artımlı eğitim politikasını ve artımlı modelin önceki booster'ın ağaçlarını
+koruyarak devam ettiğini doğrular.
+"""
+
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configs import banking as config_banking
+from models import feature_selection, ranking_dataset, ranking_model
+from models.incremental_training import (lineage, model_fingerprint, retrain_decision, validation_ndcg,
+                                         warm_start_train)
+from models.ranking_dataset import LGBMDatasetCache
+from models.ranking_model import RankingModel
+
+FEATURES = [f'F{i}' for i in range(6)]
+
+
+@pytest.fixture(autouse=True)
+def isolated_dataset_cache(tmp_path, monkeypatch):
+    """Bin'lenmiş Dataset'ler repodaki cache/ yerine geçici dizine yazılır."""
+    cache = LGBMDatasetCache(str(tmp_path / 'lgbm_datasets'))
+    for module in (ranking_dataset, ranking_model, feature_selection):
+        monkeypatch.setattr(module, 'dataset_cache', cache)
+
+
+def make_panel(n_days=400, n_tickers=15, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2022-01-03', periods=n_days, name='Date')
+    index = pd.MultiIndex.from_product([dates, [f'T{i:02d}' for i in range(n_tickers)]], names=['Date', 'Ticker'])
+    n = len(index)
+    df = pd.DataFrame({f: rng.normal(size=n) for f in FEATURES}, index=index)
+    df['Excess_Return'] = 0.01 * df['F0'] + 0.005 * df['F1'] * df['F2'] + rng.normal(0, 0.005, n)
+    df['Excess_Return_T1'] = df['Excess_Return']
+    df['Excess_Return_T5'] = df['Excess_Return']
+    return df
+
+
+def split(df, valid_days=40):
+    dates = df.index.get_level_values('Date')
+    cut = dates.unique()[-valid_days]
+    return df[dates < cut], df[dates >= cut]
+
+
+def manifest(**lineage_overrides):
+    base = lineage('full', '2024-03-01', 'fp', today=date(2024, 3, 2))
+    base.update(lineage_overrides)
+    return {'kind': 'lightgbm', 'feature_names': FEATURES, 'lineage': base}
+
+
+class TestRetrainPolicy:
+    def decide(self, previous, features=FEATURES, fingerprint='fp', last='2024-03-15', today=date(2024, 3, 16)):
+        return retrain_decision(previous, features, fingerprint, last, today=today)[0]
+
+    def test_warm_when_compatible(self):
+        assert self.decide(manifest()) == 'warm'
+        assert self.decide(manifest(), last='2024-03-01') == 'skip'
+
+    def test_full_retrain_conditions(self):
+        assert self.decide(None) == 'full'
+        assert self.decide({**manifest(), 'kind': 'catboost'}) == 'full'
+        assert self.decide({**manifest(), 'lineage': None}) == 'full'
+        assert self.decide(manifest(), fingerprint='other') == 'full'
+        assert self.decide(manifest(), features=FEATURES + ['NEW']) == 'full'
+        assert self.decide(manifest(), last='2024-09-01', today=date(2024, 3, 20)) == 'full' # çok yeni gün
+        assert self.decide(manifest(warm_chain=10)) == 'full'
+        assert self.decide(manifest(), today=date(2024, 5, 1)) == 'full' # tam eğitim eski
+
+    def test_lineage_chain(self):
+        first = lineage('full', '2024-03-01', 'fp', today=date(2024, 3, 2))
+        second = lineage('warm', '2024-03-08', 'fp', base=first, base_version='v0001', today=date(2024, 3, 9))
+        assert second['warm_chain'] == 1 and second['full_trained_at'] == '2024-03-02'
+        assert second['base_version'] == 'v0001'
+        assert model_fingerprint(config_banking, {'num_leaves': 7}) != model_fingerprint(config_banking)
+
+
+class TestWarmStart:
+    PARAMS = {'n_estimators': 40, 'num_leaves': 7, 'min_child_samples': 10}
+
+    def test_continues_from_previous_booster(self):
+        df = make_panel()
+        dates = df.index.get_level_values('Date')
+        old_train, old_valid = split(df[dates < dates.unique()[-20]])
+        previous = RankingModel(old_train, config_banking)
+        previous.train(valid_df=old_valid, custom_params=self.PARAMS)
+        base = previous.model.booster_
+        base_trees = base.best_iteration or base.num_trees()
+
+        new_train, new_valid = split(df)
+        warm = warm_start_train(previous, new_train, new_valid, config_banking, self.PARAMS, rounds=20, window_days=100)
+        booster = warm.model.booster_
+
+        assert warm.feature_names == previous.feature_names
+        assert base_trees < booster.num_trees() <= base_trees + 20
+        # İlk ağaçlar önceki modelin (en iyi iterasyona kadar) ağaçları
+        X = new_valid[FEATURES].to_numpy()
+        np.testing.assert_allclose(booster.predict(X, num_iteration=base_trees), base.predict(X, num_iteration=base_trees))
+        assert validation_ndcg(warm, new_valid, config_banking) > 0
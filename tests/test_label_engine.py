@@ -0,0 +1,63 @@
+"""
+Label Motoru Testleri
+Tek sıralamalı tarih içi rank / quantile kovalarının pandas groupby.rank(method='first') ve
+qcut(duplicates='drop') sonuçlarıyla birebir aynı olduğunu doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.label_engine import date_codes, per_date_labels, per_date_quantile_buckets, per_date_ranks
+
+
+def make_series(seed, n_days=25, max_tickers=14):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for day in pd.bdate_range('2023-01-02', periods=n_days):
+        for ticker in range(rng.integers(1, max_tickers)): # tek elemanlı günler de olsun
+            rows.append((day, f'T{ticker:02d}'))
+    index = pd.MultiIndex.from_tuples(rows, names=['Date', 'Ticker'])
+    values = np.round(rng.normal(0, 0.02, len(index)), int(rng.integers(2, 4))) # eşit değerler
+    values[rng.random(len(index)) < 0.1] = np.nan
+    values[:3] = 0.0
+    return pd.Series(values, index=index).sample(frac=1.0, random_state=seed) # tarih sırası karışık
+
+
+def reference(series, q):
+    grouped = series.groupby(level='Date')
+    ranks = grouped.rank(method='first')
+    buckets = grouped.transform(lambda x: pd.qcut(x, q, labels=False, duplicates='drop'))
+    return ranks.to_numpy(), buckets.to_numpy(dtype=float)
+
+
+class TestLabelEngine:
+    @pytest.mark.parametrize('seed', range(12))
+    @pytest.mark.parametrize('q', [5, 3, 2, 1])
+    def test_matches_pandas(self, seed, q):
+        series = make_series(seed)
+        ranks_ref, buckets_ref = reference(series, q)
+        codes, n_groups = date_codes(series.index)
+
+        ranks, buckets = per_date_labels(series.to_numpy(), codes, n_groups, q)
+        np.testing.assert_array_equal(ranks, ranks_ref)
+        np.testing.assert_array_equal(buckets, buckets_ref)
+        np.testing.assert_array_equal(per_date_ranks(series.to_numpy(), codes, n_groups), ranks_ref)
+        np.testing.assert_array_equal(per_date_quantile_buckets(series.to_numpy(), codes, n_groups, q), buckets_ref)
+
+    def test_all_nan_and_constant_groups(self):
+        index = pd.MultiIndex.from_product([pd.bdate_range('2023-01-02', periods=3), ['A', 'B', 'C', 'D']],
+                                           names=['Date', 'Ticker'])
+        series = pd.Series([np.nan] * 4 + [0.01] * 4 + [0.03, -0.01, 0.02, 0.0], index=index)
+        ranks_ref, buckets_ref = reference(series, 5)
+        codes, n_groups = date_codes(series.index)
+
+        ranks, buckets = per_date_labels(series.to_numpy(), codes, n_groups, 5)
+        np.testing.assert_array_equal(ranks, ranks_ref)
+        np.testing.assert_array_equal(buckets, buckets_ref)
+        assert per_date_labels(series.to_numpy(), codes, n_groups)[1] is None
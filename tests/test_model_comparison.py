@@ -0,0 +1,52 @@
+"""
+Model Karşılaştırma Testleri
+Paylaşılan (memory-mapped) panel üzerinde paralel eğitimin seri eğitimle aynı skorları
+ürettiğini ve tek vektörel backtest'in aday başına hesaplanan metriklerle aynı olduğunu doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.feature_selection import top_k_sharpe
+from research.model_comparison import SharedPanel, fold_slices, run_candidates, score_candidates
+from tests.test_ranking_dataset import CONFIG, make_panel
+
+
+def reference_metrics(scores, panel, k=5):
+    """Aday başına pandas ile: günlük top-k Sharpe ve Spearman rank IC."""
+    arrays = panel.arrays
+    frame = pd.DataFrame({'score': scores, 'ret': np.asarray(arrays['returns'], dtype=np.float64),
+                          'date': np.asarray(arrays['date_codes'])}).dropna(subset=['score'])
+    groups = frame.groupby('date').size().to_numpy()
+    sharpe = top_k_sharpe(frame['score'].to_numpy(), frame['ret'].to_numpy(), groups, k)
+    ic = frame.groupby('date').apply(lambda g: g['score'].corr(g['ret'], method='spearman'))
+    return sharpe, ic.mean()
+
+
+class TestModelComparison:
+    def test_parallel_matches_serial_and_vectorized_scores(self, tmp_path):
+        panel = SharedPanel.build(make_panel(n_days=200, n_tickers=10), CONFIG, str(tmp_path))
+        assert isinstance(panel.arrays['X'], np.memmap)
+        folds, slices = fold_slices(panel, n_folds=2, min_train_frac=0.6)
+        assert len(slices) == 2 and slices[0][1].stop == slices[1][1].start
+
+        models = ['lgbm_ranker', 'ridge_lgbm']
+        params = {'lgbm_ranker': {'n_estimators': 20}, 'ridge_lgbm': {'n_estimators': 20}}
+        serial, _ = run_candidates(panel, slices, models, n_jobs=1, params=params)
+        parallel, seconds = run_candidates(panel, slices, models, n_jobs=2, params=params)
+        for model in models:
+            np.testing.assert_allclose(parallel[model], serial[model], equal_nan=True)
+            assert np.isnan(serial[model][:slices[0][1].start]).all() # eğitim satırları skorlanmaz
+            assert seconds[model] > 0
+
+        table = score_candidates(serial, panel, k=5)
+        for model in models:
+            sharpe, ic = reference_metrics(serial[model], panel)
+            assert np.isclose(table.loc[model, 'sharpe'], sharpe)
+            assert np.isclose(table.loc[model, 'rank_ic'], ic)
+        assert (table['days'] == 200 - slices[0][1].start // 10).all()
@@ -0,0 +1,113 @@
+"""
+Model Registry Testleri
+Native formatta (booster metni / cbm) kaydedilen paketlerin eğitilmiş modelle aynı tahmini
+ürettiğini, üretim paketinin bellekte tutulduğunu ve promote ile değiştirildiğini doğrular.
+"""
+
+import os
+import sys
+import types
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.model_registry import ModelRegistry
+from models.ranking_model import RankingModel
+
+CONFIG = types.SimpleNamespace(SECTOR_NAME='TEST')
+
+
+def make_ranker(seed=0, n_estimators=20):
+    rng = np.random.default_rng(seed)
+    features = [f'F{i}' for i in range(6)]
+    X = pd.DataFrame(rng.normal(size=(600, 6)), columns=features)
+    y = rng.integers(0, 5, 600)
+    model = lgb.LGBMRanker(n_estimators=n_estimators, num_leaves=7, min_child_samples=5, verbosity=-1, random_state=seed)
+    model.fit(X, y, group=np.full(60, 10))
+    ranker = RankingModel(pd.DataFrame(), CONFIG)
+    ranker.model = model
+    ranker.feature_names = features
+    return ranker
+
+
+def make_frame(seed=1):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(40, 6)), columns=[f'F{i}' for i in range(6)])
+    df['Close'] = 10.0 # Fazladan kolonlar predict'te seçilmez
+    return df
+
+
+class TestModelRegistry:
+    def test_native_roundtrip_matches_model(self, tmp_path):
+        registry = ModelRegistry(str(tmp_path))
+        ranker = make_ranker()
+        version = registry.register('global_ranker', ranker, data_hash='abc', metrics={'ndcg@5': 0.3}, promote=True)
+
+        bundle = registry.get('global_ranker')
+        assert version == 'v0001' and bundle.version == version
+        assert os.path.exists(tmp_path / 'global_ranker' / version / 'model.txt')
+        assert not any(f.endswith('.pkl') for f in os.listdir(tmp_path / 'global_ranker' / version))
+        assert bundle.feature_names == ranker.feature_names
+        assert bundle.data_hash == 'abc' and bundle.params['num_leaves'] == 7
+        np.testing.assert_allclose(bundle.predict(make_frame()), ranker.predict(make_frame()))
+
+    def test_production_bundle_stays_warm(self, tmp_path):
+        registry = ModelRegistry(str(tmp_path))
+        registry.register('global_ranker', make_ranker(), promote=True)
+        first = registry.get('global_ranker')
+        assert registry.get('global_ranker') is first
+        assert registry.stats['loads'] == 1 and registry.stats['hits'] == 1
+
+    def test_promote_hot_swaps(self, tmp_path):
+        registry = ModelRegistry(str(tmp_path))
+        registry.register('global_ranker', make_ranker(seed=0), promote=True)
+        old = registry.load('global_ranker')
+
+        # Başka bir süreç (eğitim scripti) yeni versiyon yazıp promote ediyor
+        new_ranker = make_ranker(seed=5, n_estimators=30)
+        version = ModelRegistry(str(tmp_path)).register('global_ranker', new_ranker)
+        assert registry.load('global_ranker') is old # promote edilmeden değişmez
+
+        ModelRegistry(str(tmp_path)).promote('global_ranker', version)
+        os.utime(tmp_path / 'global_ranker' / 'production.json', ns=(1, 1)) # mtime çözünürlüğüne bağlı kalma
+        swapped = registry.load('global_ranker')
+        assert swapped is not old and registry.stats['swaps'] == 1
+        np.testing.assert_allclose(swapped.predict(make_frame()), new_ranker.predict(make_frame()))
+
+    def test_promote_unknown_version_raises(self, tmp_path):
+        registry = ModelRegistry(str(tmp_path))
+        with pytest.raises(ValueError):
+            registry.promote('global_ranker', 'v0042')
+
+    def test_legacy_file_loaded_once(self, tmp_path):
+        ranker = make_ranker()
+        path = str(tmp_path / 'legacy_ranker.pkl')
+        ranker.save(path)
+        registry = ModelRegistry(str(tmp_path / 'registry'))
+
+        first = registry.load_path(path)
+        assert registry.load_path(path) is first
+        assert registry.get('global_ranker') is None
+        np.testing.assert_allclose(first.predict(make_frame()), ranker.predict(make_frame()))
+
+    def test_catboost_bundle_is_ranker(self, tmp_path):
+        catboost = pytest.importorskip('catboost')
+        from models.ranking_model_catboost import CatBoostRankingModel
+        rng = np.random.default_rng(0)
+        features = [f'F{i}' for i in range(6)]
+        X = pd.DataFrame(rng.normal(size=(300, 6)), columns=features)
+        ranker = CatBoostRankingModel(pd.DataFrame(), CONFIG)
+        ranker.model = catboost.CatBoostRanker(iterations=20, loss_function='YetiRank', verbose=False,
+                                               allow_writing_files=False, random_seed=0)
+        ranker.model.fit(X, rng.normal(size=300), group_id=np.repeat(np.arange(30), 10))
+        ranker.feature_names = features
+
+        registry = ModelRegistry(str(tmp_path))
+        registry.register('global_ranker_catboost', ranker, promote=True)
+        loaded = registry.load('global_ranker_catboost')
+        assert isinstance(loaded.model, catboost.CatBoostRanker)
+        np.testing.assert_allclose(loaded.predict(make_frame()), ranker.predict(make_frame()))
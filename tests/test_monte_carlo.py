@@ -0,0 +1,99 @@
+"""
+Monte Carlo (Block Bootstrap + Black Swan) Testleri
+Vektörize chunk simülasyonunun senaryo bazlı döngüyle birebir aynı sonucu ürettiğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from research.monte_carlo_validation import (
+    ANNUAL_TRADING_DAYS,
+    draw_scenario_chunk,
+    monte_carlo_simulation,
+    simulate_scenario_chunk,
+)
+
+
+def simulate_loop(returns_array, draws, block_size):
+    """Eski senaryo × blok × gün döngüsü; rastgele sayılar aynı çekimlerden okunur."""
+    n_scenarios, years_ahead = draws['crisis'].shape
+    total_days = years_ahead * ANNUAL_TRADING_DAYS
+    shocks = iter(draws['shocks'])
+    finals = []
+    for s in range(n_scenarios):
+        simulated_path = []
+        for start_idx in draws['block_starts'][s]:
+            if len(simulated_path) >= total_days:
+                break
+            simulated_path.extend(returns_array[start_idx:start_idx + block_size])
+        simulated_path = np.array(simulated_path[:total_days])
+
+        for year in range(years_ahead):
+            if draws['crisis'][s, year]:
+                drag = (1 - draws['crisis_severity'][s, year]) ** (1 / ANNUAL_TRADING_DAYS) - 1
+                simulated_path[year * ANNUAL_TRADING_DAYS:(year + 1) * ANNUAL_TRADING_DAYS] += drag
+
+        for day in range(total_days):
+            if draws['black_swan'][s, day]:
+                simulated_path[day] += next(shocks)
+
+        finals.append(np.prod(1 + simulated_path))
+    return np.array(finals)
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    return pd.Series(rng.normal(0.004, 0.03, 400))
+
+
+class TestMonteCarlo:
+
+    @pytest.mark.parametrize("block_size", [20, 7])
+    def test_vectorized_matches_loop(self, returns, block_size):
+        values = returns.values
+        # Black swan'ların test edilmesi için olasılığı yüksek tutulmuş bir çekim kullan
+        draws = draw_scenario_chunk(np.random.default_rng(1), 300, len(values), 5, block_size)
+        draws['black_swan'] |= np.random.default_rng(2).random(draws['black_swan'].shape) < 0.01
+        draws['shocks'] = np.random.default_rng(3).uniform(-0.20, -0.10, int(draws['black_swan'].sum()))
+
+        np.testing.assert_allclose(simulate_scenario_chunk(values, draws, block_size),
+                                   simulate_loop(values, draws, block_size), rtol=1e-12)
+
+    def test_reproducible_across_calls(self, returns):
+        a = monte_carlo_simulation(returns, n_scenarios=2500, seed=7, chunk_size=1000)
+        b = monte_carlo_simulation(returns, n_scenarios=2500, seed=7, chunk_size=1000)
+        np.testing.assert_array_equal(a['final_values'], b['final_values'])
+        assert a['percentiles'] == b['percentiles']
+
+    def test_first_chunks_independent_of_total(self, returns):
+        # Chunk i her zaman i. alt akışı kullanır: senaryo sayısını artırmak ilk senaryoları değiştirmez
+        small = monte_carlo_simulation(returns, n_scenarios=1000, seed=7, chunk_size=500)
+        large = monte_carlo_simulation(returns, n_scenarios=3000, seed=7, chunk_size=500)
+        np.testing.assert_array_equal(small['final_values'], large['final_values'][:1000])
+
+    def test_statistics_shape(self, returns):
+        res = monte_carlo_simulation(returns, n_scenarios=500, chunk_size=128)
+        assert res['final_values'].shape == (500,)
+        assert res['percentiles']['1st'] <= res['percentiles']['50th'] <= res['percentiles']['95th']
+        assert 0.0 <= res['prob_loss'] <= 1.0
+
+    @pytest.mark.parametrize("timeframe, bars", [('D', 252), ('W', 52)])
+    def test_annualization_follows_timeframe(self, monkeypatch, timeframe, bars):
+        import importlib
+
+        import config
+        import research.monte_carlo_validation as mc
+
+        monkeypatch.setattr(config, 'TIMEFRAME', timeframe)
+        try:
+            assert importlib.reload(mc).ANNUAL_TRADING_DAYS == bars
+        finally:
+            monkeypatch.undo()
+            importlib.reload(mc)
@@ -0,0 +1,58 @@
+"""
+MonteCarloSimulator Testleri
+Vektörize yol istatistiklerinin tek tek yol hesabıyla aynı olduğunu ve sonucun process sayısından bağımsız olduğunu doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from research.monte_carlo import MonteCarloSimulator, path_statistics
+
+
+def single_path_statistics(sim_returns, cvar_alpha=0.05):
+    cumulative_ret = (1 + sim_returns).cumprod()
+    running_max = np.maximum.accumulate(cumulative_ret)
+    drawdown = (cumulative_ret - running_max) / running_max
+    longest = run = 0
+    for dd in drawdown:
+        run = run + 1 if dd < 0 else 0
+        longest = max(longest, run)
+    k = max(1, int(np.ceil(cvar_alpha * len(sim_returns))))
+    return {
+        'Final Return': cumulative_ret[-1] - 1,
+        'Max Drawdown': drawdown.min(),
+        'Time Under Water': np.mean(drawdown < 0),
+        'Longest Drawdown': longest,
+        'CVaR': np.sort(sim_returns)[:k].mean(),
+    }
+
+
+class TestMonteCarloSimulator:
+
+    def test_path_statistics_match_single_path(self):
+        paths = np.random.default_rng(0).normal(0.0005, 0.02, size=(50, 300))
+        stats = path_statistics(paths)
+        for i in range(len(paths)):
+            expected = single_path_statistics(paths[i])
+            for key, value in expected.items():
+                assert np.isclose(stats[key][i], value, rtol=1e-10, atol=1e-12), key
+
+    def test_result_independent_of_n_jobs(self):
+        returns = pd.Series(np.random.default_rng(1).normal(0.001, 0.02, 250))
+        serial = MonteCarloSimulator(returns, n_simulations=3000, seed=5, chunk_size=1000).run_simulation()
+        parallel = MonteCarloSimulator(returns, n_simulations=3000, seed=5, chunk_size=1000, n_jobs=2).run_simulation()
+        pd.testing.assert_frame_equal(serial, parallel)
+        assert len(serial) == 3000
+
+    def test_get_stats(self):
+        returns = pd.Series(np.random.default_rng(2).normal(0.001, 0.02, 100))
+        mc = MonteCarloSimulator(returns, n_simulations=500, seed=1)
+        mc.run_simulation()
+        stats = mc.get_stats()
+        assert stats['CVaR Final Return'] <= stats['Worst Case (5%)'] <= stats['Median Return']
+        assert 0.0 <= stats['Mean Time Under Water'] <= 1.0
@@ -0,0 +1,56 @@
+"""
+Position-Aware Oturum Testleri
+Sentetik veriyle run_position_aware_session: hisse kolonu ile hedef portföy kurulduğunu ve
+negatif ranker skorlarının negatif (açığa satış) hedef ağırlık üretmediğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import paper_trading.position_runner as position_runner
+from core.augmented_feature_generator import SyntheticDataLoader, SyntheticMarketGenerator
+from paper_trading.portfolio_state import PortfolioState
+
+
+class ScoreModel:
+    """Satır sırasına göre sabit skorlar (bir kısmı negatif)."""
+
+    def __init__(self, scores):
+        self.scores = np.asarray(scores, dtype=float)
+
+    def predict(self, df):
+        return self.scores[:len(df)]
+
+
+class RecordingEngine:
+    signals = []
+
+    def __init__(self, portfolio_state=None, risk_manager=None):
+        pass
+
+    def process_signal(self, symbol, target_weight, confidence, price):
+        RecordingEngine.signals.append((symbol, target_weight))
+        return {'action': 'HOLD'}
+
+
+class TestPositionAwareSession:
+    def test_target_weights_are_non_negative(self, tmp_path, monkeypatch):
+        market = SyntheticMarketGenerator().generate_panel(n_tickers=4, n_days=300)
+        RecordingEngine.signals = []
+        monkeypatch.setattr(position_runner, 'PositionEngine', RecordingEngine)
+        monkeypatch.setattr(position_runner.config, 'PORTFOLIO_SIZE', 4, raising=False)
+
+        portfolio = PortfolioState(state_file=str(tmp_path / 'portfolio_state.json'))
+        result = position_runner.run_position_aware_session(
+            verbose=False, portfolio=portfolio, model=ScoreModel([0.6, 0.2, -0.3, -0.5]),
+            loader=SyntheticDataLoader(market), tickers=list(market.tickers), log_dir=str(tmp_path / 'logs'))
+
+        assert result is not None
+        weights = dict(RecordingEngine.signals)
+        assert set(weights) == set(market.tickers) # Ticker kolonu ile hisse bazında
+        assert min(weights.values()) == 0.0
+        assert np.isclose(sum(weights.values()), 1.0)
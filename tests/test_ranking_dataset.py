@@ -0,0 +1,172 @@
+"""
+Ranking Dataset Testleri
+float32 matris üreticisinin eski prepare_data mantığıyla aynı satır/sıra/label'ı ürettiğini,
+bin'lenmiş Dataset cache'inin (bellek + binary dosya) eğitimi değiştirmeden yeniden
+kullanıldığını doğrular.
+"""
+
+import os
+import sys
+import types
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models.ranking_dataset as ranking_dataset
+from core.result_cache import frame_hash
+from models.ranking_dataset import (LGBMDatasetCache, TrainedRanker, build_ranking_matrix, fit_ranker,
+                                    matrix_cache, ranking_matrix)
+
+CONFIG = types.SimpleNamespace(
+    SECTOR_NAME='TEST', LEAKAGE_COLS=['NextDay_Return', 'Excess_Return', 'Log_Return'],
+    LABEL_TYPE='Hybrid', HYBRID_WEIGHT=0.85, NUM_QUANTILES=5,
+    FORWARD_WINDOWS=[1, 5], FORWARD_WEIGHTS=[0.6, 0.4],
+)
+
+
+def make_panel(n_days=120, n_tickers=12, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2022-01-03', periods=n_days, name='Date')
+    index = pd.MultiIndex.from_product([dates, [f'T{i:02d}' for i in range(n_tickers)]], names=['Date', 'Ticker'])
+    n = len(index)
+    df = pd.DataFrame({f'F{i}': rng.normal(size=n) for i in range(8)}, index=index)
+    df['Volume'] = rng.integers(1_000, 10_000, n)
+    df['Flag'] = rng.random(n) > 0.5 # bool kolon feature değil
+    df['Empty'] = np.nan
+    df['F3'] = df['F3'].mask(rng.random(n) < 0.05)
+    df['Excess_Return'] = rng.normal(0, 0.02, n)
+    df['Excess_Return_T1'] = df['Excess_Return']
+    df['Excess_Return_T5'] = df['Excess_Return_T1'].mask(rng.random(n) < 0.03)
+    df['NextDay_Return'] = rng.normal(0, 0.02, n)
+    return df
+
+
+def reference_prepare(df, cfg):
+    """Eski RankingModel.prepare_data'nın sadeleştirilmiş hali (float64, pandas)."""
+    features = [c for c in df.columns if c not in cfg.LEAKAGE_COLS
+                and not c.startswith('Excess_Return') and not c.startswith('NextDay')]
+    features = df[features].select_dtypes(include=[np.number]).columns.tolist()
+    features = [c for c in features if not df[c].isna().all()]
+    targets = [f'Excess_Return_T{w}' for w in cfg.FORWARD_WINDOWS]
+    df = df.dropna(subset=features + targets).sort_index(level='Date')
+    ranks = sum(w * df.groupby('Date')[f'Excess_Return_T{win}'].rank(method='first')
+                for w, win in zip(cfg.FORWARD_WEIGHTS, cfg.FORWARD_WINDOWS))
+    quantiles = df.groupby('Date')['Excess_Return'].transform(
+        lambda x: pd.qcut(x, cfg.NUM_QUANTILES, labels=False, duplicates='drop')).fillna(0)
+    y = ((cfg.HYBRID_WEIGHT * ranks.values + (1 - cfg.HYBRID_WEIGHT) * quantiles.values) * 100).round().astype(int)
+    return df[features], y, df.groupby(level='Date').size().to_numpy()
+
+
+class TestRankingMatrix:
+    def test_matches_reference_prepare(self):
+        df = make_panel()
+        shuffled = df.sample(frac=1.0, random_state=1) # tarih sıralaması da test edilsin
+        X_ref, y_ref, g_ref = reference_prepare(df, CONFIG)
+        matrix = build_ranking_matrix(shuffled, CONFIG, verbose=False)
+
+        assert matrix.feature_names == list(X_ref.columns)
+        assert 'Flag' not in matrix.feature_names and 'Empty' not in matrix.feature_names
+        assert matrix.X.dtype == np.float32 and matrix.X.flags.c_contiguous
+        assert matrix.index.equals(X_ref.index)
+        np.testing.assert_array_equal(matrix.X, X_ref.to_numpy(dtype=np.float32))
+        np.testing.assert_array_equal(matrix.y, y_ref)
+        np.testing.assert_array_equal(matrix.groups, g_ref)
+
+    def test_prediction_mode_and_fixed_features(self):
+        df = make_panel()
+        train = build_ranking_matrix(df, CONFIG, verbose=False)
+        pred = build_ranking_matrix(df, CONFIG, is_training=False, feature_names=train.feature_names)
+        assert pred.y is None and pred.groups is None
+        assert pred.feature_names == train.feature_names
+        assert len(pred) == df[train.feature_names].dropna().shape[0]
+
+    def test_matrix_cache_reuses_by_content(self):
+        matrix_cache.clear()
+        df = make_panel()
+        first = ranking_matrix(df, CONFIG, verbose=False)
+        again = ranking_matrix(df.copy(), CONFIG, verbose=False)
+        assert again is first and matrix_cache.hits == 1
+        assert not first.X.flags.writeable
+
+        changed = df.copy()
+        changed.iloc[0, 0] += 1.0
+        assert ranking_matrix(changed, CONFIG, verbose=False) is not first
+
+    def test_precomputed_data_key_skips_hashing(self, monkeypatch):
+        matrix_cache.clear()
+        df = make_panel()
+        first = ranking_matrix(df, CONFIG, verbose=False)
+        data_key = frame_hash(df)
+        monkeypatch.setattr(ranking_dataset, 'frame_hash', lambda frame: pytest.fail("çerçeve yeniden hash'lendi"))
+        assert ranking_matrix(df, CONFIG, verbose=False, data_key=data_key) is first
+
+
+class TestDatasetCache:
+    PARAMS = {'objective': 'lambdarank', 'n_estimators': 30, 'num_leaves': 15, 'min_child_samples': 10,
+              'random_state': 42, 'verbosity': -1}
+
+    def _fit(self, cache, train, valid, **overrides):
+        model = lgb.LGBMRanker(**{**self.PARAMS, **overrides}, label_gain=list(range(int(max(train.y.max(), valid.y.max())) + 1)))
+        train_set = cache.dataset(train, model.get_params())
+        valid_set = cache.dataset(valid, model.get_params(), reference=train_set)
+        return fit_ranker(model, train_set, valid_sets=[valid_set], eval_metric='ndcg')
+
+    def test_fit_ranker_matches_sklearn_fit(self, tmp_path):
+        matrix_cache.clear()
+        df = make_panel()
+        dates = df.index.get_level_values('Date')
+        train = ranking_matrix(df[dates < dates[900]], CONFIG, verbose=False)
+        valid = ranking_matrix(df[dates >= dates[900]], CONFIG, is_training=True,
+                               feature_names=train.feature_names, verbose=False)
+
+        cached = self._fit(LGBMDatasetCache(str(tmp_path)), train, valid)
+
+        reference = lgb.LGBMRanker(**self.PARAMS, label_gain=cached.get_params()['label_gain'])
+        reference.fit(train.frame(), train.y, group=train.groups,
+                      eval_set=[(valid.frame(), valid.y)], eval_group=[valid.groups], eval_metric='ndcg')
+
+        assert isinstance(cached, TrainedRanker)
+        np.testing.assert_allclose(cached.predict(valid.frame()), reference.predict(valid.frame()))
+        assert cached.best_score_['valid_0'].keys() == reference.best_score_['valid_0'].keys()
+        assert cached.best_iteration_ == reference.best_iteration_
+        assert cached.feature_name_ == train.feature_names
+        np.testing.assert_array_equal(cached.feature_importances_, reference.feature_importances_)
+
+        joblib.dump(cached, tmp_path / 'ranker.pkl')
+        restored = joblib.load(tmp_path / 'ranker.pkl')
+        np.testing.assert_allclose(restored.predict(valid.frame()), cached.predict(valid.frame()))
+
+    def test_binary_files_reused_across_processes(self, tmp_path):
+        matrix_cache.clear()
+        df = make_panel()
+        dates = df.index.get_level_values('Date')
+        train = ranking_matrix(df[dates < dates[900]], CONFIG, verbose=False)
+        valid = ranking_matrix(df[dates >= dates[900]], CONFIG, feature_names=train.feature_names, verbose=False)
+
+        first_cache = LGBMDatasetCache(str(tmp_path))
+        first = self._fit(first_cache, train, valid)
+        assert first_cache.stats['misses'] == 2
+        assert len([f for f in os.listdir(tmp_path) if f.endswith('.bin')]) == 2
+
+        # Yeni cache nesnesi (yeni süreç gibi): bin'ler diskten okunur
+        second_cache = LGBMDatasetCache(str(tmp_path))
+        second = self._fit(second_cache, train, valid)
+        assert second_cache.stats == {'hits': 0, 'disk_hits': 2, 'misses': 0}
+        np.testing.assert_array_equal(first.predict(valid.frame()), second.predict(valid.frame()))
+
+        # Aynı bin'lerle farklı ağaç parametreleri (tuning denemesi) -> bellekten
+        self._fit(second_cache, train, valid, min_child_samples=40, num_leaves=7)
+        assert second_cache.stats['hits'] == 2
+
+    def test_bin_params_change_key(self, tmp_path):
+        matrix_cache.clear()
+        train = ranking_matrix(make_panel(), CONFIG, verbose=False)
+        cache = LGBMDatasetCache(str(tmp_path))
+        cache.dataset(train, {'max_bin': 255})
+        cache.dataset(train, {'max_bin': 63})
+        assert cache.stats['misses'] == 2
@@ -0,0 +1,58 @@
+"""
+RankingModel Testleri
+SHAP raporunun düşük önemli feature'ları sadece raporladığını; eğitilen model ile predict'in
+aynı feature listesini kullanmaya devam ettiğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('shap')
+
+from configs import banking as config_banking
+from models import feature_selection, ranking_dataset, ranking_model
+from models.ranking_dataset import LGBMDatasetCache
+from models.ranking_model import RankingModel
+
+FEATURES = ['Signal', 'Noise1', 'Noise2', 'Noise3']
+
+
+@pytest.fixture(autouse=True)
+def isolated_dataset_cache(tmp_path, monkeypatch):
+    """Bin'lenmiş Dataset'ler repodaki cache/ yerine geçici dizine yazılır."""
+    cache = LGBMDatasetCache(str(tmp_path / 'lgbm_datasets'))
+    for module in (ranking_dataset, ranking_model, feature_selection):
+        monkeypatch.setattr(module, 'dataset_cache', cache)
+
+
+def make_panel(n_days=300, n_tickers=10, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2022-01-03', periods=n_days, name='Date')
+    index = pd.MultiIndex.from_product([dates, [f'T{i:02d}' for i in range(n_tickers)]], names=['Date', 'Ticker'])
+    n = len(index)
+    df = pd.DataFrame({f: rng.normal(size=n) for f in FEATURES}, index=index)
+    df[['Noise1', 'Noise2', 'Noise3']] *= 1e-6 # Skorlara katkısı yok -> SHAP ~ 0
+    df['Excess_Return'] = 0.01 * df['Signal'] + rng.normal(0, 0.002, n)
+    df['Excess_Return_T1'] = df['Excess_Return']
+    df['Excess_Return_T5'] = df['Excess_Return']
+    return df
+
+
+class TestRankingModel:
+    def test_low_importance_features_are_reported_not_dropped(self):
+        df = make_panel()
+        dates = df.index.get_level_values('Date')
+        cut = dates.unique()[-40]
+        ranker = RankingModel(df[dates < cut], config_banking)
+        ranker.train(valid_df=df[dates >= cut], custom_params={'n_estimators': 30, 'num_leaves': 7})
+
+        assert ranker.low_importance_features
+        assert ranker.feature_names == list(ranker.model.feature_name_)
+        scores = ranker.predict(df[dates >= cut])
+        assert len(scores) == (dates >= cut).sum()
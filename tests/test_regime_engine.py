@@ -0,0 +1,173 @@
+"""
+Rejim Motoru Testleri
+Derlenmiş kernel'lerin (expanding quantile, debounce, confidence) ve canlı RegimeStream'in
+eski pandas/Python döngüsü hesaplarıyla birebir aynı sonucu ürettiğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.regime_kernel import debounce_regimes, expanding_quantiles, regime_confidence
+from core.market_state import MarketStateService, market_crisis_components, panel_macro_frame
+from models.regime_detection import RegimeDetector, RegimeStream, StreamingQuantile, detect_regimes_panel
+
+
+def make_regime_data(n=1500, seed=0):
+    rng = np.random.default_rng(seed)
+    # Kalıcı volatilite rejimleri: yıllık ~%30-%90 (eşik 0.61 civarında gidip gelir)
+    vol = 0.035 + np.convolve(rng.normal(0, 0.004, n + 19), np.ones(20) / 4, mode='valid')
+    vol[rng.random(n) < 0.02] = np.nan
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, n)))
+    df = pd.DataFrame({
+        'Close': close,
+        'Volatility_20': vol,
+        'RSI': rng.uniform(20, 80, n),
+        'SMA_200': pd.Series(close).rolling(200).mean().values,
+        'USDTRY_Change': rng.normal(0.002, 0.01, n),
+        'VIX_Risk': rng.normal(22, 6, n),
+        'SP500_Return': rng.normal(0.0, 0.012, n),
+    }, index=pd.bdate_range('2016-01-01', periods=n, name='Date'))
+    return df
+
+
+def legacy_debounce(regimes_raw, min_days):
+    final_regimes = np.zeros_like(regimes_raw)
+    current_stable = candidate = candidate_count = 0
+    for i, r in enumerate(regimes_raw):
+        if i < min_days:
+            final_regimes[i] = current_stable = r
+            continue
+        if r == current_stable:
+            candidate, candidate_count = r, 0
+        else:
+            if r == candidate:
+                candidate_count += 1
+            else:
+                candidate, candidate_count = r, 1
+            if candidate_count >= min_days:
+                current_stable, candidate_count = candidate, 0
+        final_regimes[i] = current_stable
+    return final_regimes
+
+
+class TestRegimeKernels:
+
+    @pytest.mark.parametrize("min_periods", [1, 252])
+    def test_expanding_quantiles_match_pandas(self, min_periods):
+        values = make_regime_data(seed=1)['Volatility_20']
+        result = expanding_quantiles(values.values, [0.25, 0.75], min_periods)
+        for k, q in enumerate([0.25, 0.75]):
+            expected = values.expanding(min_periods=min_periods).quantile(q).values
+            np.testing.assert_array_equal(result[:, k], expected)
+
+    def test_streaming_quantile_matches_pandas(self):
+        values = np.round(np.random.default_rng(2).normal(0, 1, 600), 1)  # tekrarlı değerler
+        values[::37] = np.nan
+        sq = StreamingQuantile(0.75)
+        streamed = []
+        for v in values:
+            sq.add(v)
+            streamed.append(sq.value(min_periods=5))
+        expected = pd.Series(values).expanding(min_periods=5).quantile(0.75).values
+        np.testing.assert_allclose(streamed, expected, rtol=0, atol=1e-15)
+
+    def test_debounce_and_confidence_match_loops(self):
+        raw = np.random.default_rng(3).choice([0, 1, 2], size=2000, p=[0.6, 0.25, 0.15])
+        for min_days in (1, 2, 3, 6):
+            np.testing.assert_array_equal(debounce_regimes(raw, min_days), legacy_debounce(raw, min_days))
+
+        regimes = pd.Series(legacy_debounce(raw, 2))
+        expected = [0.5 if i < 10 else (regimes.iloc[i - 10:i + 1] == regimes.iloc[i]).mean()
+                    for i in range(len(regimes))]
+        np.testing.assert_allclose(regime_confidence(regimes.values), expected)
+
+
+class TestRegimeStream:
+
+    @pytest.mark.parametrize("use_adaptive", [True, False])
+    def test_stream_matches_batch(self, use_adaptive):
+        df = make_regime_data(seed=4)
+        batch = RegimeDetector(df, use_adaptive=use_adaptive).detect_regimes(verbose=False)
+        assert batch['Regime_Num'].nunique() >= 2
+
+        stream = RegimeStream(use_adaptive=use_adaptive)
+        streamed = pd.DataFrame([stream.update(bar) for bar in df.to_dict('records')], index=df.index)
+        for col in ['Regime_Raw', 'Regime_Num', 'Regime', 'Regime_Confidence']:
+            np.testing.assert_array_equal(streamed[col].values, batch[col].values)
+
+    def test_detector_stream_continues_history(self):
+        df = make_regime_data(n=900, seed=5)
+        history, live = df.iloc[:800], df.iloc[800:]
+        full = RegimeDetector(df, use_adaptive=True).detect_regimes(verbose=False)
+
+        stream = RegimeDetector(history, use_adaptive=True).stream()
+        live_regimes = [stream.update(bar)['Regime_Num'] for bar in live.to_dict('records')]
+        np.testing.assert_array_equal(live_regimes, full['Regime_Num'].values[800:])
+
+
+class TestMarketState:
+
+    def make_panel(self, n_tickers=4):
+        market = make_regime_data(seed=6)
+        panel = {}
+        for k in range(n_tickers):
+            own = make_regime_data(seed=10 + k)
+            own[['USDTRY_Change', 'VIX_Risk', 'SP500_Return']] = market[['USDTRY_Change', 'VIX_Risk', 'SP500_Return']]
+            panel[f'T{k}.IS'] = own
+        return panel
+
+    def test_panel_matches_per_ticker(self):
+        panel = self.make_panel()
+        result = detect_regimes_panel(panel, use_adaptive=True)
+        for ticker, df in panel.items():
+            expected = RegimeDetector(df, use_adaptive=True).detect_regimes(verbose=False)
+            pd.testing.assert_frame_equal(result[ticker], expected)
+
+    def test_components_cached_per_content(self):
+        panel = self.make_panel()
+        service = MarketStateService()
+        first = service.components_for_panel(panel)
+        second = service.components_for_panel(panel)
+        assert first is second and service.hits == 1 and service.misses == 1
+
+        macro = panel_macro_frame(panel)
+        pd.testing.assert_frame_equal(first, market_crisis_components(macro))
+        assert first['Market_Crisis_Score'].max() > 0
+
+    def test_stream_uses_broadcast_score(self):
+        panel = self.make_panel(n_tickers=1)
+        df = next(iter(panel.values()))
+        scores = market_crisis_components(df)['Market_Crisis_Score']
+        own = RegimeStream(use_adaptive=True)
+        shared = RegimeStream(use_adaptive=True)
+        for bar, score in zip(df.to_dict('records'), scores):
+            assert own.update(bar) == shared.update(bar, market_score=score)
+
+    def test_optimizer_trials_reuse_market_components(self, monkeypatch):
+        optuna = pytest.importorskip('optuna')
+        from core.market_state import market_state
+        from research.optimize_regime import RegimeOptimizer
+
+        data = self.make_panel(n_tickers=1)['T0.IS']
+        data['Log_Return'] = np.log(data['Close']).diff().fillna(0)
+        optimizer = RegimeOptimizer()
+        optimizer.data = data
+        market_state.clear()
+
+        calls = []
+        original = RegimeDetector.detect_regimes
+        monkeypatch.setattr(RegimeDetector, 'detect_regimes',
+                            lambda self, *a, **kw: calls.append(kw.get('market')) or original(self, *a, **kw))
+        params = {'volatility_high': 0.5, 'momentum_threshold': 55, 'min_regime_days': 3}
+        for _ in range(3):
+            optimizer.objective(optuna.trial.FixedTrial(params))
+
+        # Piyasa bileşenleri bir kez hesaplanır, trial'lar aynı sonucu paylaşır
+        assert market_state.misses == 1 and market_state.hits == 2
+        assert len(calls) == 3 and all(market is calls[0] for market in calls)
@@ -0,0 +1,137 @@
+"""
+Result Cache Testleri
+LRU/disk sınırları, eşzamanlı istek birleştirme, veri parmak izi ve run_dynamic_backtest entegrasyonu.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import dynamic_backtest
+from core.result_cache import ResultCache, data_fingerprint, make_key
+
+
+class TestResultCache:
+
+    def test_memory_lru_and_disk_fallback(self, tmp_path):
+        cache = ResultCache("payloads", str(tmp_path), max_entries=2)
+        for i in range(3):
+            cache.put(f"k{i}", {"value": i})
+
+        assert list(cache._memory) == ["k1", "k2"]
+        # Bellekten düşen kayıt diskten okunur
+        assert cache.get("k0") == {"value": 0}
+
+    def test_returned_payload_is_a_copy(self, tmp_path):
+        cache = ResultCache("payloads", str(tmp_path))
+        cache.put("k", {"metrics": {"sharpe": 1.0}})
+        cache.get("k")["metrics"]["sharpe"] = 99
+        assert cache.get("k")["metrics"]["sharpe"] == 1.0
+
+    def test_disk_eviction(self, tmp_path):
+        cache = ResultCache("payloads", str(tmp_path), max_entries=1, max_disk_mb=0.05)
+        blob = "x" * 20_000
+        for i in range(5):
+            cache.put(f"k{i}", blob)
+            time.sleep(0.01)
+
+        files = os.listdir(cache.dir)
+        assert 0 < len(files) < 5
+        assert "k4.joblib" in files
+
+    def test_concurrent_requests_are_coalesced(self, tmp_path):
+        cache = ResultCache("models", str(tmp_path))
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"model": "trained"}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == [{"model": "trained"}] * 5
+
+    def test_failed_result_not_cached(self, tmp_path):
+        cache = ResultCache("payloads", str(tmp_path))
+        cache.get_or_compute("k", lambda: {"success": False}, should_cache=lambda r: r["success"])
+        assert cache.get("k") is None
+
+    def test_errors_propagate_to_waiters(self, tmp_path):
+        cache = ResultCache("payloads", str(tmp_path))
+
+        def boom():
+            time.sleep(0.1)
+            raise ValueError("veri yok")
+
+        errors = []
+
+        def worker():
+            try:
+                cache.coalesce("k", boom)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(errors) == 3
+
+
+class TestDynamicBacktestCache:
+
+    def test_repeated_request_served_from_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(dynamic_backtest, "CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr(dynamic_backtest, "payload_cache", ResultCache("payloads", str(tmp_path)))
+
+        calls = []
+        args = ("2016-01-01", "2020-01-01", "2021-01-01")
+
+        def fake_compute(train_start, train_end, test_end, initial_capital, update_progress, **kwargs):
+            calls.append(1)
+            # Gerçek hesaplama işlenmiş veri cache'ini yazar
+            dynamic_backtest.save_to_cache(dynamic_backtest.get_cache_key(*args), {"train": [], "test": []})
+            return {"success": True, "metrics": {"totalReturn": 12.5}}
+
+        monkeypatch.setattr(dynamic_backtest, "_compute_dynamic_backtest", fake_compute)
+
+        first = dynamic_backtest.run_dynamic_backtest(*args, initial_capital=100000)
+        second = dynamic_backtest.run_dynamic_backtest(*args, initial_capital=100000)
+        other_capital = dynamic_backtest.run_dynamic_backtest(*args, initial_capital=50000)
+
+        assert len(calls) == 2
+        assert "cached" not in first
+        assert second["cached"] is True
+        assert second["metrics"] == first["metrics"]
+        assert "cached" not in other_capital
+
+    def test_key_depends_on_all_parts(self):
+        assert make_key("a", 1, {"x": 1}) == make_key("a", 1, {"x": 1})
+        assert make_key("a", 1, {"x": 1}) != make_key("a", 1, {"x": 2})
+
+    def test_data_fingerprint_covers_non_price_columns(self):
+        idx = pd.bdate_range('2024-01-01', periods=50, name='Date')
+        df = pd.DataFrame({'Close': np.linspace(10, 20, 50), 'USDTRY_Change': 0.01, 'RSI': 50.0,
+                           'NextDay_Return': 0.002}, index=idx)
+        base = data_fingerprint([df])
+        assert data_fingerprint([df.copy()]) == base
+        for column in ('USDTRY_Change', 'RSI', 'NextDay_Return'): # makro, feature, label
+            changed = df.copy()
+            changed.iloc[-1, changed.columns.get_loc(column)] += 1.0
+            assert data_fingerprint([changed]) != base, column
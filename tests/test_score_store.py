@@ -0,0 +1,104 @@
+"""
+Skor Deposu Testleri
+Depodan okunan skorların model.predict ile aynı olduğunu, ikinci çalıştırmada çıkarım
+yapılmadığını, yeni günlerde sadece yeni satırların skorlandığını ve HybridEnsemble
+üyelerinin (TFT dahil) ayrı saklanıp aynı karışımı ürettiğini doğrular.
+"""
+
+import os
+import sys
+import types
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.score_store import ScoreStore, model_version
+from models.ranking_model import RankingModel
+
+FEATURES = ['DayOfWeek', 'vix', 'Close', 'RSI']
+
+
+def make_ranker(seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(400, len(FEATURES))), columns=FEATURES)
+    model = lgb.LGBMRanker(n_estimators=15, num_leaves=7, min_child_samples=5, verbosity=-1, random_state=seed)
+    model.fit(X, rng.integers(0, 5, 400), group=np.full(40, 10))
+    ranker = RankingModel(pd.DataFrame(), types.SimpleNamespace(SECTOR_NAME='TEST'))
+    ranker.model = model
+    ranker.feature_names = FEATURES
+    return ranker
+
+
+def make_frame(n_days=60, seed=1):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2023-01-02', periods=n_days)
+    frames = []
+    for i in range(4):
+        frame = pd.DataFrame(rng.normal(size=(n_days, len(FEATURES))), columns=FEATURES, index=dates)
+        frame.index.name = 'Date'
+        frame['Ticker'] = f'T{i}'
+        frames.append(frame)
+    return pd.concat(frames) # run_backtest.py düzeni: Date indeksli, Ticker kolonlu
+
+
+class TestScoreStore:
+    def test_scores_are_stored_and_reused(self, tmp_path):
+        store = ScoreStore(str(tmp_path))
+        ranker = make_ranker()
+        frame = make_frame()
+        last_day = frame.index.max()
+
+        first = store.predict(ranker, frame[frame.index < last_day])
+        assert store.stats['scored_rows'] == len(first)
+        assert store.keys() == [] # Tüketiciler (persist=False) depoya yazmaz
+        store.predict(ranker, frame[frame.index < last_day], persist=True)
+        assert store.stats['scored_rows'] == 2 * len(first)
+
+        full = store.predict(ranker, frame, persist=True)
+        np.testing.assert_allclose(full, ranker.predict(frame))
+        assert store.stats['scored_rows'] == len(first) + len(frame) # sadece son günün 4 satırı yeni skorlandı
+
+        again = ScoreStore(str(tmp_path)).predict(ranker, frame) # yeni süreç: diskten
+        np.testing.assert_allclose(again, full)
+
+        pivot = store.matrix(model_version(ranker))
+        expected = frame.assign(Score=full).reset_index().pivot(index='Date', columns='Ticker', values='Score')
+        pd.testing.assert_frame_equal(pivot, expected, check_names=False)
+
+    def test_new_model_version_gets_new_key(self, tmp_path):
+        store = ScoreStore(str(tmp_path), max_parts=2)
+        frame = make_frame()
+        first, second = make_ranker(0), make_ranker(1)
+        assert model_version(first) != model_version(second)
+
+        for end in (20, 40, 60):
+            store.predict(first, frame[frame.index < frame.index.unique()[end - 1]], persist=True)
+        assert len(store._parts(model_version(first))) <= 2 # parçalar birleştirildi
+        np.testing.assert_allclose(store.predict(second, frame, persist=True), second.predict(frame))
+        assert store.keys() == sorted([model_version(first), model_version(second)])
+
+    def test_ensemble_members_are_stored_separately(self, tmp_path, monkeypatch):
+        pytest.importorskip('pytorch_forecasting')
+        import models.ensemble_model as ensemble_module
+        from models.tft_inference import TFTPredictor
+        from tests.test_tft_inference import build_model, make_panel
+
+        monkeypatch.setattr(ensemble_module, 'load_ensemble_weights', lambda **kwargs: None)
+        panel = make_panel()
+        model, _ = build_model(panel)
+        ensemble = ensemble_module.HybridEnsemble(make_ranker(), TFTPredictor(model, batch_size=32))
+        df = panel.set_index('Date')
+        last_day = df.index.max()
+
+        store = ScoreStore(str(tmp_path))
+        store.predict(ensemble, df[df.index < last_day], persist=True)
+        scored = store.stats['scored_rows']
+        actual = store.predict(ensemble, df)
+
+        # Son gün için üye başına sadece yeni satırlar (TFT encoder geçmişi df'in tamamından)
+        assert store.stats['scored_rows'] - scored == 2 * (df.index == last_day).sum()
+        np.testing.assert_allclose(actual, ensemble.predict(df), rtol=1e-6)
@@ -0,0 +1,114 @@
+"""
+İstatistiksel Anlamlılık Testleri
+Bootstrap güven aralıkları, Deflated Sharpe ve PBO'nun beklenen davranışlarını doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from research.significance import (
+    batch_metrics,
+    bootstrap_confidence_intervals,
+    deflated_sharpe_ratio,
+    load_trial_returns,
+    probability_of_backtest_overfitting,
+    save_trial_returns,
+    stationary_bootstrap_indices,
+    significance_report,
+)
+
+
+@pytest.fixture
+def returns():
+    return pd.Series(np.random.default_rng(0).normal(0.001, 0.015, 750))
+
+
+class TestSignificance:
+
+    def test_batch_metrics_match_series_definitions(self, returns):
+        metrics = batch_metrics(returns.values, bars_per_year=252)
+        equity = (1 + returns).cumprod()
+        total = equity.iloc[-1] - 1
+        cagr = (1 + total) ** (252 / len(returns)) - 1
+        assert metrics['CAGR'][0] == pytest.approx(cagr)
+        assert metrics['Sharpe Ratio'][0] == pytest.approx(cagr / (returns.std() * np.sqrt(252)))
+        assert metrics['Max Drawdown'][0] == pytest.approx(((equity - equity.cummax()) / equity.cummax()).min())
+
+    def test_stationary_bootstrap_blocks(self):
+        idx = stationary_bootstrap_indices(np.random.default_rng(1), 500, 200, mean_block=10)
+        assert idx.shape == (200, 500)
+        assert idx.min() >= 0 and idx.max() < 500
+        # Blok içinde indeksler dairesel olarak birer artar; yeni blok olasılığı ~1/10
+        continues = (np.diff(idx, axis=1) % 500) == 1
+        assert 0.85 < continues.mean() < 0.95
+
+    def test_confidence_intervals(self, returns):
+        ci = bootstrap_confidence_intervals(returns, n_resamples=1000, seed=3)
+        again = bootstrap_confidence_intervals(returns, n_resamples=1000, seed=3)
+        assert ci == again
+        for key in ('Sharpe Ratio', 'CAGR', 'Max Drawdown'):
+            assert ci[key]['lower'] < ci[key]['estimate'] < ci[key]['upper']
+
+    def test_deflated_sharpe_penalizes_trials(self, returns):
+        single = deflated_sharpe_ratio(returns, n_trials=1)
+        many = deflated_sharpe_ratio(returns, n_trials=100)
+        assert many['expected_max_sharpe'] > 0
+        assert many['dsr'] < single['dsr']
+
+    def test_pbo_detects_genuine_edge(self):
+        idx = pd.bdate_range('2015-01-01', periods=1500)
+        noise = pd.DataFrame(np.random.default_rng(4).normal(0, 0.01, (1500, 20)), index=idx)
+        edge = noise.copy()
+        edge[0] += 0.003
+        res = probability_of_backtest_overfitting(edge)
+        assert res['n_folds'] == 6 and res['n_combinations'] == 20
+        assert res['pbo'] == 0.0
+
+    def test_report_pbo_only_from_trial_returns(self, tmp_path):
+        idx = pd.bdate_range('2015-01-01', periods=1500)
+        per_ticker = pd.DataFrame(np.random.default_rng(5).normal(0, 0.01, (1500, 5)), index=idx)
+        path = tmp_path / 'daily_returns.csv'
+        per_ticker.to_csv(path)
+
+        report = significance_report(str(path), n_resamples=200, verbose=False)
+        assert 'pbo' not in report # Hisse kolonları rakip konfigürasyon değil
+
+        trials = pd.DataFrame(np.random.default_rng(6).normal(0, 0.01, (1500, 8)), index=idx)
+        report = significance_report(str(path), n_resamples=200, verbose=False, trial_returns=trials)
+        assert report['pbo']['pbo'] == probability_of_backtest_overfitting(trials)['pbo']
+
+    def test_report_uses_recorded_optuna_trials(self, tmp_path):
+        optuna = pytest.importorskip('optuna')
+        pytest.importorskip('lightgbm')
+        from research.optuna_nested_walk_forward import objective
+
+        rng = np.random.default_rng(7)
+        dates = np.repeat(pd.bdate_range('2018-01-01', periods=300), 3)
+        train = pd.DataFrame(rng.normal(size=(len(dates), 4)), columns=['f0', 'f1', 'f2', 'f3'], index=dates)
+        train['NextDay_Return'] = 0.01 * train['f0'] + rng.normal(0, 0.02, len(dates))
+
+        trial_returns = {}
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        study = optuna.create_study(direction='maximize', sampler=optuna.samplers.RandomSampler(seed=0))
+        study.optimize(lambda t: objective(t, train, trial_returns), n_trials=3)
+        assert sorted(trial_returns) == [t.number for t in study.trials]
+
+        path = str(tmp_path / 'trial_returns.csv')
+        saved = save_trial_returns(trial_returns, len(study.trials), path)
+        assert saved.shape[1] == 3 and saved.index.is_unique
+        loaded, n_trials = load_trial_returns(path)
+        assert n_trials == 3
+        np.testing.assert_allclose(loaded.to_numpy(), saved.to_numpy())
+
+        returns_path = tmp_path / 'daily_returns.csv'
+        saved.iloc[:, [0]].to_csv(returns_path)
+        report = significance_report(str(returns_path), n_resamples=200, verbose=False, trial_returns=path)
+        expected = deflated_sharpe_ratio(load_trial_returns(path)[0].iloc[:, 0], n_trials=3)
+        assert report['deflated_sharpe']['dsr'] == pytest.approx(expected['dsr'])
+        assert 0.0 <= report['pbo']['pbo'] <= 1.0
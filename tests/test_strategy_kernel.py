@@ -0,0 +1,131 @@
+"""
+Walk-Forward Strateji Kernel Testleri
+Tek geçişlik derlenmiş kernel'in eski iki döngülü Python stratejisiyle birebir aynı sonucu ürettiğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from research.optuna_nested_walk_forward import (
+    FIXED_STRATEGY_PARAMS,
+    get_adaptive_threshold,
+    get_dynamic_stop_loss,
+    get_volatility_adjusted_size,
+    run_single_ticker_strategy,
+    strategy_kernel,
+)
+
+
+def legacy_strategy(preds, data, ticker=None):
+    """Eski referans: önce sinyal döngüsü, sonra ayrı yürütme döngüsü."""
+    sector_penalty = 1.0
+    if ticker:
+        sector = config.get_sector(ticker)
+        if sector in ['Construction', 'RealEstate']:
+            sector_penalty = 1.4
+        elif sector in ['Banking']:
+            sector_penalty = 1.2
+
+    regime_nums = data['Regime_Num'].values if 'Regime_Num' in data.columns else np.ones(len(data)) * 2
+    atr_vals = data['ATR'].values if 'ATR' in data.columns else np.ones(len(data)) * 0.02
+    prices = data['Close'].values
+    vol_window = 52 if len(data) > 52 else len(data) // 2
+    avg_atr = np.mean(atr_vals[-vol_window:]) if len(atr_vals) > vol_window else np.mean(atr_vals)
+
+    equity_curve = [1.0]
+    recent_trade_outcomes = []
+    signals = np.zeros(len(preds), dtype=int)
+    for i in range(len(preds)):
+        current_equity = equity_curve[-1]
+        peak_equity = max(equity_curve)
+        current_dd = (current_equity - peak_equity) / peak_equity if peak_equity > 0 else 0.0
+        recent_win_rate = None
+        if len(recent_trade_outcomes) >= 10:
+            recent_win_rate = np.mean(recent_trade_outcomes[-20:])
+        thresh = get_adaptive_threshold(int(regime_nums[i]), current_dd, recent_win_rate=recent_win_rate)
+        signals[i] = 1 if preds[i] > thresh * sector_penalty else 0
+
+    position, entry_price, entry_idx = 0, 0, 0
+    trades, returns = [], []
+    for i in range(len(signals)):
+        price, signal, atr = prices[i], signals[i], atr_vals[i]
+        ret = 0.0
+        if position == 1:
+            stop_multiplier, max_stop_pct = get_dynamic_stop_loss(int(regime_nums[i]))
+            stop_price = max(entry_price - stop_multiplier * atr, entry_price * (1 - max_stop_pct))
+            tp_price = entry_price + FIXED_STRATEGY_PARAMS['TAKE_PROFIT_MULTIPLIER'] * atr
+            exit_reason = None
+            if price <= stop_price: exit_reason = 'STOP'
+            elif price >= tp_price: exit_reason = 'PROFIT'
+            elif i - entry_idx >= FIXED_STRATEGY_PARAMS['MIN_HOLDING_PERIODS'] and signal == 0:
+                exit_reason = 'SIGNAL'
+            if exit_reason:
+                net_ret = price / entry_price - 1 - FIXED_STRATEGY_PARAMS['COMMISSION_RATE']
+                ret = net_ret * get_volatility_adjusted_size(atr_vals[i], avg_atr)
+                trades.append({'return': ret, 'reason': exit_reason})
+                recent_trade_outcomes.append(1 if ret > 0 else 0)
+                position = 0
+            else:
+                ret = price / prices[i - 1] - 1 if i > 0 else 0
+        elif signal == 1:
+            position, entry_price, entry_idx = 1, price, i
+            ret = -FIXED_STRATEGY_PARAMS['COMMISSION_RATE']
+        returns.append(ret)
+    return {'trades': trades, 'returns': returns}
+
+
+def make_ticker_data(n=600, seed=0, with_nan_atr=False):
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0.0005, 0.03, n)))
+    atr = close * rng.uniform(0.01, 0.06, n)
+    if with_nan_atr:
+        atr[rng.random(n) < 0.05] = np.nan
+    data = pd.DataFrame({'Close': close, 'ATR': atr, 'Regime_Num': rng.integers(0, 3, n)},
+                        index=pd.date_range('2015-01-02', periods=n, freq='W-FRI'))
+    preds = rng.normal(0.006, 0.01, n)
+    return preds, data
+
+
+class TestStrategyKernel:
+
+    @pytest.mark.parametrize("seed,ticker,with_nan_atr", [
+        (0, None, False), (1, 'AKBNK.IS', False), (2, 'EKGYO.IS', True), (3, 'EREGL.IS', True)])
+    def test_matches_legacy_loops(self, seed, ticker, with_nan_atr):
+        preds, data = make_ticker_data(seed=seed, with_nan_atr=with_nan_atr)
+        expected = legacy_strategy(preds, data, ticker=ticker)
+        result = run_single_ticker_strategy(preds, data['Close'].pct_change(), data, ticker=ticker)
+
+        np.testing.assert_allclose(result['returns'], expected['returns'], rtol=1e-12)
+        assert [t['reason'] for t in result['trades']] == [t['reason'] for t in expected['trades']]
+        assert [t['return'] for t in result['trades']] == pytest.approx([t['return'] for t in expected['trades']])
+
+    def test_missing_columns_use_defaults(self):
+        preds, data = make_ticker_data(n=200, seed=4)
+        data = data[['Close']]
+        expected = legacy_strategy(preds, data)
+        result = run_single_ticker_strategy(preds, None, data)
+        np.testing.assert_allclose(result['returns'], expected['returns'], rtol=1e-12)
+
+    def test_adaptive_feedback_compiled_matches_python(self):
+        preds, data = make_ticker_data(n=800, seed=5)
+        args = (preds, data['Regime_Num'].values.astype(np.int64), data['Close'].values, data['ATR'].values,
+                1.2, float(data['ATR'].values[-52:].mean()), 0.0025, 2.5, 10, True)
+        compiled = strategy_kernel(*args)
+        python = getattr(strategy_kernel, 'py_func', strategy_kernel)(*args)
+        for a, b in zip(compiled, python):
+            np.testing.assert_allclose(a, b, rtol=1e-12)
+
+    def test_adaptive_feedback_is_more_selective_after_losses(self):
+        preds, data = make_ticker_data(n=800, seed=6)
+        # Sürekli düşen piyasa: trade'lerin çoğu kayıp, win-rate freni devreye girmeli
+        data['Close'] = 100 * np.exp(np.cumsum(np.full(len(data), -0.004)))
+        static = run_single_ticker_strategy(preds, None, data)
+        adaptive = run_single_ticker_strategy(preds, None, data, adaptive_feedback=True)
+        assert len(adaptive['trades']) < len(static['trades'])
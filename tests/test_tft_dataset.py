@@ -0,0 +1,73 @@
+"""
+TFT Dataset Cache Testleri
+Cache'ten kurulan dataset'lerin sıfırdan kurulanlarla aynı tensörleri ürettiğini ve
+sonraki çalıştırmada sadece yeni günlerin encode edildiğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('pytorch_forecasting')
+
+from pytorch_forecasting import TimeSeriesDataSet
+
+from models.tft_dataset import TFTDatasetStore, model_columns, tft_frame
+
+CONFIG = {'static': [], 'known': ['DayOfWeek', 'vix'], 'unknown': ['Close', 'RSI'], 'target': 'Excess_Return',
+          'max_encoder_length': 20, 'max_prediction_length': 1}
+
+
+def make_panel(n_days=120, n_tickers=4, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2023-01-02', periods=n_days, name='Date')
+    index = pd.MultiIndex.from_product([dates, [f'T{i}' for i in range(n_tickers)]], names=['Date', 'Ticker'])
+    df = pd.DataFrame(rng.normal(size=(len(index), 5)), index=index,
+                      columns=['DayOfWeek', 'vix', 'Close', 'RSI', 'Excess_Return'])
+    df['Other'] = rng.normal(size=len(index)) # modelde kullanılmayan feature
+    df.iloc[::17, 2] = np.nan
+    return df
+
+
+def tensors(dataset):
+    return [dataset.data['reals'], dataset.data['target'][0], dataset.data['groups'], dataset.data['time']]
+
+
+class TestTFTDatasetStore:
+    def test_reuses_encoded_rows_across_runs(self, tmp_path):
+        panel = make_panel()
+        dates = panel.index.get_level_values('Date').unique()
+        first = tft_frame(panel[panel.index.get_level_values('Date') < dates[-5]])
+        store = TFTDatasetStore(str(tmp_path))
+        _, _, info = store.datasets(first, CONFIG, dates[-40])
+        assert info['mode'] == 'refit'
+
+        full = tft_frame(panel)
+        store = TFTDatasetStore(str(tmp_path)) # diskten
+        train_ds, val_ds, info = store.datasets(full, CONFIG, dates[-35])
+        assert info['mode'] == 'reuse'
+        assert info['encoded_rows'] == 5 * 4
+
+        frame = full[model_columns(CONFIG)]
+        train_frame = frame[frame['Date'] < dates[-36]] # kesimden önceki son gün eğitimde hedef değil
+        expected_train = TimeSeriesDataSet.from_parameters(store.parameters, train_frame)
+        for actual, expected in zip(tensors(train_ds), tensors(expected_train)):
+            assert torch.equal(actual, expected)
+        assert train_ds.index.equals(expected_train.index)
+        # Validasyon eğitimin scaler'larını kullanır ve kesimden önceki günleri encoder bağlamı olarak alır
+        assert val_ds.get_parameters()['scalers']['Close'].mean_ == train_ds.get_parameters()['scalers']['Close'].mean_
+        assert val_ds.data['time'][val_ds.index['index_end'].to_numpy()].min() == frame.loc[frame['Date'] >= dates[-35], 'time_idx'].min()
+
+    def test_refits_on_new_ticker(self, tmp_path):
+        panel = make_panel()
+        dates = panel.index.get_level_values('Date').unique()
+        store = TFTDatasetStore(str(tmp_path))
+        store.datasets(tft_frame(panel.drop(index='T3', level='Ticker')), CONFIG, dates[-30])
+        _, _, info = TFTDatasetStore(str(tmp_path)).datasets(tft_frame(panel), CONFIG, dates[-30])
+        assert info['mode'] == 'refit' and info['reason'] == "yeni hisse"
@@ -0,0 +1,121 @@
+"""
+TFT Hızlı Çıkarım Testleri
+Batch'li hızlı yolun (encode edilmiş satır cache'i + indeksle kesilen pencereler)
+TimeSeriesDataSet + model ileri geçişiyle aynı tahminleri ürettiğini doğrular.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('pytorch_forecasting')
+
+from pytorch_forecasting import TemporalFusionTransformer, TimeSeriesDataSet
+from pytorch_forecasting.data import GroupNormalizer
+
+from models.tft_inference import TFTPredictor, get_predictor, save_artifacts
+
+KNOWN = ['DayOfWeek', 'vix']
+UNKNOWN = ['Close', 'RSI']
+
+
+def make_panel(n_days=90, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2023-01-02', periods=n_days)
+    frames = []
+    for i in range(3):
+        frame = pd.DataFrame(rng.normal(size=(n_days, 4)), columns=KNOWN + UNKNOWN)
+        frame['Excess_Return'] = rng.normal(0, 0.02, n_days)
+        frame['Date'], frame['Ticker'] = dates, f'T{i}'
+        if i == 1:
+            frame = frame.drop(index=[30, 31, 55]) # eksik günler
+        if i == 2:
+            frame = frame.iloc[60:] # kısa geçmiş
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_model(panel, **categoricals):
+    frame = panel.copy()
+    frame['time_idx'] = frame['Date'].map({d: i for i, d in enumerate(sorted(frame['Date'].unique()))})
+    dataset = TimeSeriesDataSet(
+        frame, time_idx='time_idx', target='Excess_Return', group_ids=['Ticker'],
+        min_encoder_length=10, max_encoder_length=20, min_prediction_length=1, max_prediction_length=1,
+        time_varying_known_reals=KNOWN, time_varying_unknown_reals=UNKNOWN,
+        target_normalizer=GroupNormalizer(groups=['Ticker'], transformation=None),
+        add_relative_time_idx=True, add_target_scales=True, add_encoder_length=True, allow_missing_timesteps=True,
+        **categoricals)
+    torch.manual_seed(0)
+    model = TemporalFusionTransformer.from_dataset(dataset, hidden_size=8, attention_head_size=2,
+                                                   hidden_continuous_size=4, output_size=7)
+    return model.eval(), frame
+
+
+def reference(model, frame):
+    """
+    TimeSeriesDataSet pencereleri üzerinden tahminler (satır sırasında). Seri sonunda aynı
+    decoder gününe kısa encoder'lı ek pencereler de üretilir; en uzun encoder'lı alınır.
+    """
+    dataset = TimeSeriesDataSet.from_parameters(model.dataset_parameters, frame, predict=False)
+    codes = dataset.get_parameters()['categorical_encoders']['__group_id__Ticker'].transform(frame['Ticker'].to_numpy())
+    preds = {}
+    with torch.inference_mode():
+        for x, _ in dataset.to_dataloader(train=False, batch_size=64):
+            out = model.to_prediction(model(x))[:, 0]
+            for g, t, n, v in zip(x['groups'][:, 0].numpy(), x['decoder_time_idx'][:, 0].numpy(),
+                                  x['encoder_lengths'].numpy(), out.numpy()):
+                preds[(g, t)] = max(preds.get((g, t), (-1, np.nan)), (n, v), key=lambda item: item[0])
+    return np.array([preds.get((c, t), (0, np.nan))[1] for c, t in zip(codes, frame['time_idx'])])
+
+
+class TestTFTInference:
+    def test_matches_dataset_windows(self):
+        panel = make_panel()
+        model, frame = build_model(panel)
+        expected = reference(model, frame)
+
+        predictor = TFTPredictor(model, batch_size=32)
+        shuffled = panel.sample(frac=1.0, random_state=0) # satır sırası korunmalı
+        scores = predictor.predict(shuffled.set_index('Date'))
+        actual = pd.Series(scores.to_numpy(), index=shuffled.index).sort_index().to_numpy()
+
+        np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+        np.testing.assert_allclose(actual[~np.isnan(actual)], expected[~np.isnan(expected)], rtol=1e-5, atol=1e-7)
+
+    def test_matches_dataset_windows_with_categoricals(self):
+        panel = make_panel()
+        rng = np.random.default_rng(1)
+        panel['Sector'] = panel['Ticker'].map({'T0': 'Banka', 'T1': 'Sanayi', 'T2': 'Banka'})
+        panel['Regime'] = rng.choice(['bull', 'bear', 'flat'], size=len(panel))
+        model, frame = build_model(panel, static_categoricals=['Sector'], time_varying_known_categoricals=['Regime'])
+        expected = reference(model, frame)
+
+        predictor = TFTPredictor(model, batch_size=32)
+        assert predictor.categoricals == ['Sector', 'Regime']
+        scores = predictor.predict(panel.set_index('Date')).to_numpy()
+
+        np.testing.assert_array_equal(np.isnan(scores), np.isnan(expected))
+        np.testing.assert_allclose(scores[~np.isnan(scores)], expected[~np.isnan(expected)], rtol=1e-5, atol=1e-7)
+
+    def test_next_day_encodes_only_new_rows(self, tmp_path):
+        panel = make_panel()
+        model, frame = build_model(panel)
+        save_artifacts(model, tmp_path / 'tft.pth', tmp_path / 'hparams.joblib')
+        predictor = get_predictor(str(tmp_path / 'tft.pth'), str(tmp_path / 'hparams.joblib'))
+        assert predictor is get_predictor(str(tmp_path / 'tft.pth'), str(tmp_path / 'hparams.joblib'))
+
+        last_day = panel['Date'].max()
+        predictor.predict_latest(panel[panel['Date'] < last_day].set_index('Date'))
+        encoded = predictor.stats['encoded_rows']
+        latest = predictor.predict_latest(panel.set_index('Date'))
+
+        assert predictor.stats['encoded_rows'] - encoded == (panel['Date'] == last_day).sum()
+        expected = reference(model, frame)
+        for ticker, value in latest.items():
+            np.testing.assert_allclose(value, expected[(frame['Ticker'] == ticker).to_numpy()][-1], rtol=1e-5, atol=1e-7)
@@ -0,0 +1,66 @@
+"""
+CPU TFT Eğitim Profili Testleri
+Checkpoint'ten devam etme kuralları ve profilin Trainer / DataLoader ayarları.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('pytorch_forecasting')
+
+import config
+import models.tft_training as tft_training
+from models.tft_training import CheckpointRun, dataloader_kwargs, synthetic_dataset, training_profile
+from models.transformer_model import BIST30TransformerModel
+
+
+class TestTFTTraining:
+    def test_resume_only_interrupted_same_run(self, tmp_path):
+        run = CheckpointRun('a', directory=str(tmp_path))
+        assert run.start() is None
+        (tmp_path / 'last.ckpt').write_bytes(b'x')
+        assert CheckpointRun('a', directory=str(tmp_path)).resume_path() == run.last_path
+        assert CheckpointRun('b', directory=str(tmp_path)).resume_path() is None # farklı eğitim
+
+        run.finish()
+        assert run.resume_path() is None # bitmiş eğitim
+        assert run.start() is None
+        assert not (tmp_path / 'last.ckpt').exists() # eski checkpoint'ler silinir
+
+    def test_cpu_profile(self, monkeypatch):
+        monkeypatch.setattr(config, 'TFT_CPU_NUM_WORKERS', 2, raising=False)
+        monkeypatch.setattr(config, 'TFT_CPU_PRECISION', 'bf16-mixed', raising=False)
+        profile = training_profile('cpu')
+        assert profile['precision'] == 'bf16-mixed'
+        assert profile['threads'] >= 1
+        assert dataloader_kwargs(profile)['persistent_workers']
+        assert training_profile('cuda')['precision'] == '32-true' # GPU davranışı değişmez
+
+    def test_train_resumes_from_last_checkpoint(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(tft_training, 'CHECKPOINT_DIR', str(tmp_path / 'ckpt'))
+        monkeypatch.setattr(config, 'TFT_CPU_NUM_WORKERS', 0, raising=False)
+        dataset = synthetic_dataset(n_tickers=2, n_days=60, n_features=3, encoder_length=20)
+
+        wrapper = BIST30TransformerModel(config)
+        wrapper.build_model(dataset)
+        wrapper.train(dataset, dataset, epochs=1, batch_size=32, run_extra='t')
+        assert len(wrapper.throughput.history) == 1
+        assert wrapper.throughput.samples_per_sec > 0
+        assert not (tmp_path / 'lightning_logs').exists() # loglar checkpoint dizininde
+        assert (tmp_path / 'ckpt' / 'logs').is_dir()
+
+        # Eğitim son epoch'tan sonra kesilmiş gibi: aynı eğitim last.ckpt'ten devam eder
+        state_path = tmp_path / 'ckpt' / 'run.json'
+        state = json.loads(state_path.read_text())
+        state_path.write_text(json.dumps(dict(state, status='running')))
+        wrapper = BIST30TransformerModel(config)
+        wrapper.build_model(dataset)
+        wrapper.train(dataset, dataset, epochs=1, batch_size=32, run_extra='t')
+        assert wrapper.throughput.history == [] # tamamlanmış epoch tekrar eğitilmez
+        assert json.loads(state_path.read_text())['status'] == 'done'
@@ -0,0 +1,129 @@
+"""
+Tracing Testleri
+İç içe span'ler, kapalıyken no-op davranış, JSON trace çıktısı, eşzamanlı run'ların
+bağımsızlığı ve pipeline entegrasyonu.
+"""
+
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.tracing import Tracer, _NOOP_SPAN, diff_traces, traced, tracer
+
+
+@pytest.fixture
+def active_tracer(tmp_path):
+    tracer.start('test')
+    yield tracer
+    if tracer.enabled:
+        tracer.stop(str(tmp_path))
+
+
+@traced('test.load', rows=len, arg='ticker')
+def load(ticker, n=3):
+    return list(range(n))
+
+
+@traced('test.outer', rows=None)
+def outer():
+    tracer.event('adım', pct=50)
+    return [load('AKBNK.IS', n=5), load('GARAN.IS')]
+
+
+class TestTracer:
+
+    def test_disabled_is_noop(self):
+        t = Tracer()
+        assert t.span('x') is _NOOP_SPAN
+        assert not tracer.enabled
+        assert load('AKBNK.IS') == [0, 1, 2]
+
+    def test_nested_spans_rows_and_attrs(self, active_tracer):
+        outer()
+        spans = active_tracer.to_dict()['spans']
+        assert [s['name'] for s in spans] == ['test.outer']
+        children = spans[0]['children']
+        assert [c['attrs']['ticker'] for c in children] == ['AKBNK.IS', 'GARAN.IS']
+        assert [c['rows'] for c in children] == [5, 3]
+        assert spans[0]['events'][0]['name'] == 'adım'
+
+        summary = active_tracer.summary()
+        assert summary['test.outer/test.load']['count'] == 2
+        assert summary['test.outer/test.load']['rows'] == 8
+
+    def test_errors_are_recorded(self, active_tracer):
+        with pytest.raises(ValueError):
+            with active_tracer.span('boom'):
+                raise ValueError()
+        assert active_tracer.to_dict()['spans'][0]['error'] == 'ValueError'
+
+    def test_run_writes_json_and_diff(self, tmp_path):
+        with tracer.run('pipeline', enabled=True, output_dir=str(tmp_path)):
+            outer()
+        assert not tracer.enabled
+        files = os.listdir(tmp_path)
+        assert len(files) == 1
+        with open(tmp_path / files[0], encoding='utf-8') as f:
+            trace = json.load(f)
+        assert trace['run'] == 'pipeline'
+        assert 'pipeline/test.outer/test.load' in trace['summary']
+
+        rows = diff_traces(trace, trace)
+        assert all(ratio == pytest.approx(1.0) for _, wa, _, ratio in rows if wa > 0)
+
+    def test_overlapping_runs_are_independent(self, tmp_path):
+        both_started, first_stopped = threading.Barrier(2), threading.Event()
+        traces, still_enabled = {}, {}
+
+        def job(name, ticker, stop_first):
+            with tracer.run(name, enabled=True, output_dir=str(tmp_path / name)) as run:
+                load(ticker)
+                both_started.wait()
+                if not stop_first:
+                    first_stopped.wait() # diğer iş stop() etti
+                    still_enabled[name] = tracer.enabled
+                    load(ticker, n=7)
+                traces[name] = run.to_dict()
+            if stop_first:
+                first_stopped.set()
+
+        threads = [threading.Thread(target=job, args=('job_a', 'AKBNK.IS', True)),
+                   threading.Thread(target=job, args=('job_b', 'GARAN.IS', False))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert still_enabled == {'job_b': True} # A'nın stop()'u B'nin trace'ini kapatmadı
+        assert not tracer.enabled # ana thread'de run yok
+        tickers = {name: [c['attrs']['ticker'] for c in trace['spans'][0]['children']]
+                   for name, trace in traces.items()}
+        assert tickers == {'job_a': ['AKBNK.IS'], 'job_b': ['GARAN.IS', 'GARAN.IS']}
+        assert traces['job_b']['summary']['job_b/test.load']['rows'] == 10
+        for name in ('job_a', 'job_b'):
+            assert len(os.listdir(tmp_path / name)) == 1
+
+    def test_run_disabled_writes_nothing(self, tmp_path):
+        with tracer.run('pipeline', enabled=False, output_dir=str(tmp_path)):
+            outer()
+        assert os.listdir(tmp_path) == []
+
+
+class TestPipelineInstrumentation:
+
+    def test_feature_engineering_steps_are_traced(self, active_tracer):
+        from core.augmented_feature_generator import SyntheticMarketGenerator
+        from utils.feature_engineering import FeatureEngineer
+
+        market = SyntheticMarketGenerator().generate_panel(n_tickers=1, n_days=300)
+        FeatureEngineer(market.frame(market.tickers[0])).process_all()
+
+        summary = active_tracer.summary()
+        assert 'feature.process_all' in summary
+        assert 'feature.process_all/feature.add_technical_indicators' in summary
+        assert summary['feature.process_all']['rows'] > 0
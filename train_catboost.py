@@ -8,6 +8,9 @@ from configs import banking as config_banking
 from utils.data_loader import DataLoader
 from utils.feature_engineering import FeatureEngineer
 from models.ranking_model_catboost import CatBoostRankingModel
+from models.catboost_pool_cache import pool_cache
+from models.model_registry import model_registry
+from core.result_cache import data_fingerprint
 
 def ensure_model_dir():
     if not os.path.exists("models/saved"):
@@ -66,13 +69,22 @@ def train_catboost_ranker():
     # Instantiate CatBoost Ranker
     ranker = CatBoostRankingModel(df_train, config_banking)
     ranker.train(valid_df=df_valid)
+    print(f"  > Pool cache: {pool_cache.stats} (quantize edilmiş pool'lar cache/catboost_pools altında)")
     
     # Save (Note: CatBoost uses .cbm or .pkl + internal save)
     # Our class handles saving
     save_path = "models/saved/global_ranker_catboost.cbm"
     ranker.save(save_path)
     
-    print(f"✅ CatBoost Ranker Eğitimi Tamamlandı: {save_path}")
+    # Registry: cbm + manifest; çalışan süreçler yeni versiyona geçer
+    version = model_registry.register(
+        'global_ranker_catboost', ranker,
+        data_hash=data_fingerprint([df_train]),
+        metrics=ranker.model.get_best_score().get('validation', {}),
+        promote=True
+    )
+    
+    print(f"✅ CatBoost Ranker Eğitimi Tamamlandı: {save_path} (registry: {version})")
 
 def main():
     train_catboost_ranker()
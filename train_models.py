@@ -1,4 +1,6 @@
+import argparse
 import os
+import time
 
 import joblib
 import numpy as np
@@ -12,12 +14,21 @@ from configs import banking as config_banking
 from utils.data_loader import DataLoader
 from utils.feature_engineering import FeatureEngineer
 from models.ranking_model import RankingModel
+from models.model_registry import model_registry
+from models.feature_selection import load_selection, selection_summary
+from models.incremental_training import (candidate_features, compare_with_full, lineage, model_fingerprint,
+                                         retrain_decision, validation_ndcg, warm_start_train)
+from core.result_cache import data_fingerprint
 
 def ensure_model_dir():
     if not os.path.exists("models/saved"):
         os.makedirs("models/saved")
 
-def train_global_ranker():
+def train_global_ranker(mode='auto', skip_tft=False, refit_tft_dataset=False, resume_tft=None):
+    """
+    mode: 'auto' (politika: artımlı veya tam), 'full', 'warm' (artımlıyı zorla),
+          'compare' (artımlı vs tam eğitim raporu, kayıt yok)
+    """
     print(f"\n{'='*50}")
     print(f"EĞİTİM BAŞLIYOR: GLOBAL DAILY RANKER")
     print(f"Timeframe: {config.TIMEFRAME}")
@@ -100,9 +111,13 @@ def train_global_ranker():
     df_train = full_data[train_mask]
     df_valid = full_data[valid_mask]
     
-    # Instantiate with Train
-    ranker = RankingModel(df_train, config_banking)
-    
+    # Offline budama seçimi (research/feature_pruning.py) varsa sadece seçili feature'lar
+    selection = load_selection() if getattr(config, 'USE_FEATURE_SELECTION', True) else None
+    selected_features = None
+    if selection:
+        selected_features = [f for f in selection['features'] if f in df_train.columns]
+        print(f"  > Feature seçimi kullanılıyor: {len(selected_features)} feature ({selection.get('created_at')})")
+
     # Check for optimized params from Optuna (file) first, then config fallback
     custom_params = None
     opt_path = "models/saved/optimized_lgbm_params.joblib"
@@ -114,10 +129,68 @@ def train_global_ranker():
         if cfg_params:
             custom_params = cfg_params
             print(f"  > Config içindeki OPTIMIZED_MODEL_PARAMS kullanılıyor: {cfg_params}")
-    
-    ranker.train(valid_df=df_valid, custom_params=custom_params)
-    ranker.save(f"models/saved/global_ranker.pkl")
-    print(f"✅ Global Ranker (LightGBM) Eğitimi Tamamlandı.")
+
+    # Tam / artımlı eğitim kararı (önceki üretim modelinin soy bilgisine göre)
+    previous = model_registry.get('global_ranker') if mode != 'full' else None
+    fingerprint = model_fingerprint(config_banking, custom_params)
+    train_last_date = df_train.index.get_level_values('Date').max()
+    if mode == 'full':
+        decision, reason = 'full', "--mode full"
+    else:
+        decision, reason = retrain_decision(previous and previous.manifest,
+                                            candidate_features(df_train, config_banking, selected_features),
+                                            fingerprint, train_last_date)
+        if mode in ('warm', 'compare') and previous is not None and decision != 'warm':
+            print(f"  > Politika tam eğitim öneriyor ({reason}); --mode {mode} ile artımlı eğitim zorlanıyor.")
+            decision = 'warm'
+    print(f"  > Eğitim modu: {decision} ({reason})")
+
+    if mode == 'compare':
+        if previous is None:
+            print("  ❌ Karşılaştırma için registry'de üretim modeli gerekli.")
+            return
+        table, _, _ = compare_with_full(previous.ranker, df_train, df_valid, config_banking, custom_params)
+        print("\n  Artımlı vs tam eğitim (validasyon):")
+        print(table.to_string(float_format=lambda v: f"{v:.4f}"))
+        return
+    base_version = None
+    if decision == 'warm':
+        t0 = time.perf_counter()
+        ranker = warm_start_train(previous.ranker, df_train, df_valid, config_banking, custom_params)
+        warm_ndcg = validation_ndcg(ranker, df_valid, config_banking)
+        previous_ndcg = validation_ndcg(previous.ranker, df_valid, config_banking)
+        print(f"  > Artımlı eğitim {time.perf_counter() - t0:.1f} sn | NDCG@5 önceki {previous_ndcg:.4f} -> {warm_ndcg:.4f}")
+        if warm_ndcg < previous_ndcg - getattr(config, 'WARM_START_NDCG_TOLERANCE', 0.01):
+            print("  > Artımlı model validasyonda geriledi, tam eğitime geçiliyor.")
+            decision = 'full'
+        else:
+            base_version = previous.version
+
+    if decision == 'full':
+        ranker = RankingModel(df_train, config_banking, selected_features=selected_features)
+        ranker.train(valid_df=df_valid, custom_params=custom_params)
+
+    if decision == 'skip':
+        # Sadece ranker eğitimi ve registry atlanır; TFT kendi bayrağına (--skip-tft) göre eğitilir
+        ranker = previous.ranker
+        print(f"✅ Global Ranker güncel (registry: {previous.version}), eğitim atlandı.")
+    else:
+        ranker.save(f"models/saved/global_ranker.pkl")
+
+        # Registry: native format (booster metni) + manifest; çalışan süreçler yeni versiyona geçer
+        version = model_registry.register(
+            'global_ranker', ranker,
+            data_hash=data_fingerprint([df_train]),
+            params=custom_params,
+            metrics=dict(ranker.model.best_score_.get('valid_0', {})),
+            feature_selection=selection_summary(selection),
+            lineage=lineage(decision, train_last_date, fingerprint, base=previous and previous.lineage,
+                            base_version=base_version),
+            promote=True
+        )
+        print(f"✅ Global Ranker (LightGBM) Eğitimi Tamamlandı. ({decision}, registry: {version})")
+    if skip_tft:
+        return
 
     # ---------------------------------------------------------
     # 2. TFT (TRANSFORMER) EĞİTİMİ
@@ -125,31 +198,14 @@ def train_global_ranker():
     try:
         print(f"\n  > TFT (Temporal Fusion Transformer) Eğitimi Başlıyor...")
         from models.transformer_model import BIST30TransformerModel
+        from models.tft_dataset import TFTDatasetStore, tft_frame
         from utils.feature_engineering import prepare_tft_dataset
-        
+
         # TFT feature'ları zaten FeatureEngineer içinde eklendi (process_all -> add_transformer_features)
-        # Sadece Macro verilerin merge edildiğinden emin olmalıyız.
-        # process_all içinde makro kullanılmadıysa burada merge edebiliriz ama FE içinde halledildi varsayalım.
-        # FE içinde macro_loader kullanılmadı, o zaman burada merge edilmesi lazım.
-        
-        # Merge Macro Data Logic (Eğer FE içinde yapılmadıysa)
-        # Note: full_data has MultiIndex (Date, Ticker) and macro_df has Index (Date)
-        
-        # Reset Index for Merge
-        tft_data = full_data.reset_index()
-        
+        # Makro veriler burada eklenir; '.' -> '_' (PyTorch uyumluluğu), hisse içinde ileri doldurma
+        tft_data = tft_frame(full_data, macro_df)
         if not macro_df.empty:
-            # Date format check
-            # macro_df index is datetime
-            # tft_data['Date'] is datetime
-            tft_data = pd.merge(tft_data, macro_df, left_on='Date', right_index=True, how='left')
-            tft_data.fillna(method='ffill', inplace=True) # Fill macro gaps
-            tft_data.fillna(0, inplace=True)
             print("  > Makro veriler TFT datasetine eklendi.")
-            
-        # FIX: PyTorch Forecasting sütun isimlerinde '.' sevmez
-        print("  > Sütun isimleri temizleniyor (PyTorch uyumluluğu için)...")
-        tft_data.columns = tft_data.columns.str.replace(".", "_", regex=False)
 
         # Dataset Config
         tft_config_dict = prepare_tft_dataset(tft_data, lookback=60)
@@ -161,20 +217,23 @@ def train_global_ranker():
         cutoff_idx = int(len(tft_data['Date'].unique()) * 0.9)
         cutoff_date = sorted(tft_data['Date'].unique())[cutoff_idx]
         
-        train_tft = tft_data[tft_data['Date'] < cutoff_date]
-        val_tft = tft_data[tft_data['Date'] >= cutoff_date]
-        
         # Create PyTorch Forecasting Datasets
-        # Mode='train' means we cutoff last prediction length points
-        train_ds = tft_model_wrapper.create_dataset(train_tft, tft_config_dict, mode='train')
-        val_ds = tft_model_wrapper.create_dataset(val_tft, tft_config_dict, mode='val') # Val dataset uses exact time range
+        # Fit edilmiş parametreler + encode edilmiş satırlar models/saved/tft_dataset altında:
+        # sadece yeni günler encode edilir, validasyon eğitimin parametrelerini kullanır
+        tft_store = TFTDatasetStore()
+        train_ds, val_ds, ds_info = tft_store.datasets(tft_data, tft_config_dict, cutoff_date, refit=refit_tft_dataset)
+        print(f"  > TFT dataset ({ds_info['mode']}{': ' + ds_info['reason'] if ds_info['reason'] else ''}): "
+              f"{ds_info['encoded_rows']} satır encode edildi, {ds_info['cached_rows']} cache'ten "
+              f"({ds_info['seconds']:.1f} sn)")
         
         # Build Model Structure
         tft_model_wrapper.build_model(train_ds)
 
         # Train
-        print(f"  > TFT Eğitiliyor (Epochs=30, CPU - Full Mode)...")
-        tft_model_wrapper.train(train_ds, val_ds, epochs=30, batch_size=64) # Batch size 64 for speed on CPU
+        # CPU'da models/tft_training profili; yarıda kalan aynı eğitim (aynı veri + ayarlar) son checkpoint'ten devam eder
+        print(f"  > TFT Eğitiliyor (Epochs=30, {tft_model_wrapper.device})...")
+        tft_model_wrapper.train(train_ds, val_ds, epochs=30, batch_size=64, resume=resume_tft, # Batch size 64 for speed on CPU
+                                run_extra=[str(pd.Timestamp(cutoff_date).date()), str(tft_data['Date'].max().date())])
         
 
         
@@ -213,10 +272,12 @@ def train_global_ranker():
         # ------------------------------
         
         # Save dataset parameters for inference (IMPORTANT)
-        # We need to save tft_config_dict and dataset params
+        # Ağırlıklar + hiperparametreler (dataset parametreleri dahil) -> ensemble hızlı çıkarım yolu
         import joblib
+        from models.tft_inference import save_artifacts
         joblib.dump(tft_config_dict, "models/saved/tft_config.joblib")
-        # joblib.dump(train_ds.get_parameters(), "models/saved/tft_dataset_params.joblib") # Complex object
+        model_path, hparams_path = save_artifacts(tft_model_wrapper.model)
+        print(f"  > TFT kaydedildi: {model_path} (+ {os.path.basename(hparams_path)})")
         
         print(f"✅ TFT Modeli Eğitimi Tamamlandı.")
         
@@ -226,7 +287,17 @@ def train_global_ranker():
         traceback.print_exc()
 
 def main():
-    train_global_ranker()
+    parser = argparse.ArgumentParser(description="Global ranker (+ TFT) eğitimi")
+    parser.add_argument('--mode', choices=['auto', 'full', 'warm', 'compare'], default='auto',
+                        help="auto: önceki modelden devam edilebiliyorsa artımlı eğitim (models/incremental_training.py)")
+    parser.add_argument('--skip-tft', action='store_true', help="Sadece ranker (gece güncellemesi)")
+    parser.add_argument('--refit-tft-dataset', action='store_true',
+                        help="TFT dataset parametrelerini (scaler/normalizer) cache'e bakmadan yeniden fit et")
+    parser.add_argument('--no-tft-resume', action='store_true',
+                        help="Yarıda kalan TFT eğitiminin checkpoint'inden devam etme, baştan eğit")
+    args = parser.parse_args()
+    train_global_ranker(mode=args.mode, skip_tft=args.skip_tft, refit_tft_dataset=args.refit_tft_dataset,
+                        resume_tft=False if args.no_tft_resume else None)
 
 if __name__ == "__main__":
     main()
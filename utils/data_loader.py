@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import config
 from datetime import datetime, timedelta
+from utils.tracing import traced
 
 class DataLoader:
     def __init__(self, start_date=config.START_DATE, end_date=config.END_DATE):
@@ -163,6 +164,7 @@ class DataLoader:
             
         return None
 
+    @traced('data.fetch_stock_data', arg='ticker')
     def fetch_stock_data(self, ticker):
         """Tek bir hisse senedi için veri çeker (Robust)."""
         print(f"{ticker} verisi indiriliyor (Kaynak: Yahoo)...")
@@ -200,6 +202,70 @@ class DataLoader:
             
         return data
     
+    @traced('data.fetch_intraday_data', arg='ticker')
+    def fetch_intraday_data(self, ticker, timeframe=None):
+        """
+        Intraday (1h/15m) bar verisi çeker.
+        Yahoo intraday geçmişi sınırlı olduğu için (60m: ~730 gün, 15m: ~60 gün)
+        çekilen barlar Feature Store'daki önceki barlarla birleştirilip geri yazılır;
+        böylece her çalıştırmada geçmiş birikir.
+        """
+        from core.feature_store import feature_store
+
+        timeframe = timeframe or config.TIMEFRAME
+        interval = config.YF_INTERVAL_MAP[timeframe]
+        period = config.INTRADAY_HISTORY_PERIOD.get(timeframe, '60d')
+        print(f"{ticker} intraday ({interval}) verisi indiriliyor (Kaynak: Yahoo)...")
+
+        data = None
+        try:
+            data = yf.download(ticker, period=period, interval=interval, progress=False)
+            if not data.empty:
+                if isinstance(data.columns, pd.MultiIndex):
+                    data.columns = data.columns.droplevel(1)
+                data = data[['Open', 'High', 'Low', 'Close', 'Volume']]
+                data.index = self._to_local_time(data.index)
+                # Sadece sürekli işlem seansı (seans dışı barlar hariç)
+                data = data.between_time(config.SESSION_START, config.SESSION_END, inclusive='left')
+        except Exception as e:
+            print(f"  [HATA] Yahoo intraday bağlantı sorunu: {e}")
+            data = None
+
+        stored = feature_store.load_market_data(ticker, timeframe)
+        if data is None or data.empty:
+            return stored if not stored.empty else None
+
+        if not stored.empty:
+            data = pd.concat([stored[data.columns], data])
+            data = data[~data.index.duplicated(keep='last')].sort_index()
+        feature_store.save_market_data(ticker, data, timeframe=timeframe)
+        return data
+
+    @staticmethod
+    def _to_local_time(index):
+        """Yahoo intraday index'ini (UTC/tz-aware) İstanbul saatine çevirip tz bilgisini atar."""
+        index = pd.DatetimeIndex(index)
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        return index.tz_convert('Europe/Istanbul').tz_localize(None)
+
+    @staticmethod
+    def align_daily_to_intraday(daily_df, intraday_index, lagged_cols=('VIX', 'SP500')):
+        """
+        Günlük seriyi intraday bar index'ine hizalar.
+        Look-ahead bias önlemi: Günün kapanış değeri ancak gün sonunda bilinir, bu yüzden
+        D günündeki barlar D-1 değerini görür. `lagged_cols` fetch_macro_data'da zaten 1 gün kaydırılır.
+        """
+        daily = daily_df.copy()
+        shift_cols = [c for c in daily.columns if c not in lagged_cols]
+        daily[shift_cols] = daily[shift_cols].shift(1)
+        daily.index = pd.DatetimeIndex(daily.index).normalize()
+        daily = daily[~daily.index.duplicated(keep='last')].sort_index()
+
+        aligned = daily.reindex(pd.DatetimeIndex(intraday_index).normalize(), method='ffill')
+        aligned.index = intraday_index
+        return aligned
+
     def resample_to_weekly(self, data):
         """Günlük OHLCV verisini haftalık periyoda dönüştürür."""
         if config.TIMEFRAME != 'W':
@@ -230,6 +296,7 @@ class DataLoader:
         print(f"  Günlük: {len(data)} satır -> Haftalık: {len(weekly_data)} satır")
         return weekly_data
 
+    @traced('data.fetch_macro_data')
     def fetch_macro_data(self):
         """Makroekonomik verileri çeker ve birleştirir."""
         print("Makroekonomik veriler indiriliyor...")
@@ -261,8 +328,12 @@ class DataLoader:
         
         return macro_df
 
+    @traced('data.get_combined_data', arg='ticker')
     def get_combined_data(self, ticker):
         """Hisse verisi ile makro verileri birleştirir."""
+        if config.is_intraday():
+            return self.get_combined_intraday_data(ticker)
+
         stock_data = self.fetch_stock_data(ticker)
         if stock_data is None:
             return None
@@ -280,6 +351,34 @@ class DataLoader:
         
         return combined_df
 
+    @traced('data.get_combined_intraday_data', arg='ticker')
+    def get_combined_intraday_data(self, ticker):
+        """
+        Intraday mod: Hisse ve BIST endeksleri (XU100, XBANK) aynı bar frekansında çekilir,
+        diğer makro seriler günlük kalır ve bir önceki günün değeriyle barlara hizalanır.
+        """
+        stock_data = self.fetch_intraday_data(ticker)
+        if stock_data is None or stock_data.empty:
+            return None
+
+        intraday_macro = ['XU100', 'XBANK']
+        combined_df = stock_data.copy()
+        for name in intraday_macro:
+            if name not in self.macro_tickers:
+                continue
+            index_data = self.fetch_intraday_data(self.macro_tickers[name])
+            if index_data is not None and not index_data.empty:
+                combined_df[name] = index_data['Close'].reindex(combined_df.index).ffill()
+
+        # Günlük makro veriler bir kez çekilir (hisseler arasında ortak)
+        if self._macro_cache is None:
+            self._macro_cache = self.fetch_macro_data()
+        daily_macro = self._macro_cache.drop(columns=intraday_macro, errors='ignore')
+        if not daily_macro.empty:
+            combined_df = combined_df.join(self.align_daily_to_intraday(daily_macro, combined_df.index))
+
+        return combined_df.ffill()
+
 if __name__ == "__main__":
     # Test
     loader = DataLoader()
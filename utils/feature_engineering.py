@@ -6,12 +6,14 @@ import yfinance as yf
 from datetime import datetime, timedelta
 
 from core.feature_store import feature_store
+from utils.tracing import traced
 
 class FeatureEngineer:
     def __init__(self, data):
         self.data = data.copy()
 
 
+    @traced('feature.add_multi_window_targets')
     def add_multi_window_targets(self):
         """
         Multi-window target creation (Excess Return for T+1, T+5 etc.)
@@ -61,6 +63,7 @@ class FeatureEngineer:
         self.data = df
         return df
 
+    @traced('feature.add_technical_indicators')
     def add_technical_indicators(self):
         """Teknik indikatörleri ekler (RSI, MACD, Bollinger, SMA, vb.)"""
         df = self.data
@@ -120,6 +123,7 @@ class FeatureEngineer:
         self.data = df
         return df
 
+    @traced('feature.add_custom_indicators')
     def add_custom_indicators(self):
         """
         Gelişmiş teknik indikatörleri ekler.
@@ -192,6 +196,7 @@ class FeatureEngineer:
         self.data = df
         return df
 
+    @traced('feature.add_sector_dummies', arg='ticker')
     def add_sector_dummies(self, ticker):
         """Sektörel dummy değişkenleri ekler."""
         df = self.data
@@ -206,6 +211,7 @@ class FeatureEngineer:
         self.data = df
         return df
 
+    @traced('feature.add_macro_interaction_features')
     def add_macro_interaction_features(self):
         """Makro veriler ile hisse/sektör özellikleri arasındaki etkileşimleri ekler."""
         df = self.data
@@ -235,6 +241,7 @@ class FeatureEngineer:
         self.data = df
         return df
 
+    @traced('feature.add_volume_and_extra_indicators')
     def add_volume_and_extra_indicators(self):
         """
         BUG-7 Fix: Stochastic, Volume (OBV/MFI/CMF), Choppiness, ATR.
@@ -281,6 +288,7 @@ class FeatureEngineer:
         self.data = df
         return df
 
+    @traced('feature.add_bank_features')
     def add_bank_features(self):
         """Bankalar için özel featurelar: XBANK Momentum, Sektör Korelasyonu"""
         df = self.data
@@ -288,11 +296,11 @@ class FeatureEngineer:
         # Eğer makro veriler içinde XBANK varsa
         if 'XBANK' in df.columns:
             # XBANK Momentum (Haftalık: 5 gün → 1 hafta)
-            momentum_lag = 1 if config.TIMEFRAME == 'W' else 5
+            momentum_lag = 1 if config.TIMEFRAME == 'W' else config.days_to_bars(5)
             df['XBANK_Momentum'] = df['XBANK'] / df['XBANK'].shift(momentum_lag) - 1
             
             # XBANK ile Korelasyon (Haftalık: 30 gün → 6 hafta)
-            corr_window = 6 if config.TIMEFRAME == 'W' else 30
+            corr_window = 6 if config.TIMEFRAME == 'W' else config.days_to_bars(30)
             df['XBANK_Corr'] = df['Close'].rolling(corr_window).corr(df['XBANK'])
 
         # XBANK / XU100 Rasyosu (Sektör vs Endeks)
@@ -305,6 +313,7 @@ class FeatureEngineer:
         return df
 
 
+    @traced('feature.add_fundamental_features_from_file', arg='ticker')
     def add_fundamental_features_from_file(self, ticker):
         """
         Feature Store'dan temel analiz verilerini okur (Parquet).
@@ -409,6 +418,7 @@ class FeatureEngineer:
         
         return aligned
         
+    @traced('feature.add_advanced_market_features')
     def add_advanced_market_features(self):
         """Gelişmiş piyasa özellikleri: Sadece Sektör Rotasyonu (Fiyat Bazlı)"""
         df = self.data
@@ -417,7 +427,7 @@ class FeatureEngineer:
         if 'XBANK' in df.columns and 'XU100' in df.columns:
             df['Sector_Rotation'] = df['XBANK'] / df['XU100']
             # Rotasyon trendi (Haftalık: 5 gün → 1 hafta)
-            rotation_lag = 1 if config.TIMEFRAME == 'W' else 5
+            rotation_lag = 1 if config.TIMEFRAME == 'W' else config.days_to_bars(5)
             df['Sector_Rotation_Trend'] = df['Sector_Rotation'].pct_change(rotation_lag)
             
         # DİĞER TÜM MAKRO FEATURELAR KALDIRILDI (Macro Gate Mimarisi)
@@ -426,6 +436,7 @@ class FeatureEngineer:
         self.data = df
         return df
 
+    @traced('feature.add_kap_features', arg='ticker')
     def add_kap_features(self, ticker):
         """
         KAP (Kamuyu Aydınlatma Platformu) bildirimlerinden feature üretir.
@@ -453,17 +464,50 @@ class FeatureEngineer:
         self.data = df
         return df
 
+    @traced('feature.add_time_features')
     def add_time_features(self):
         """Zaman bazlı özellikleri ekler."""
         df = self.data
         df['DayOfWeek'] = df.index.dayofweek
         df['Month'] = df.index.month
         df['Quarter'] = df.index.quarter
+        if config.is_intraday():
+            df['Hour'] = df.index.hour
         # df['IsMonday'] = (df.index.dayofweek == 0).astype(int) # Noise removal
         # df['IsFriday'] = (df.index.dayofweek == 4).astype(int) # Noise removal
         self.data = df
         return df
 
+    @traced('feature.add_session_features')
+    def add_session_features(self):
+        """
+        Intraday (1h/15m) barlar için seans bazlı özellikler.
+        - Bar_Of_Session: Seans içindeki bar sırası (0'dan)
+        - Session_Return: Seans açılışından bu yana getiri
+        - Overnight_Gap: Seans açılışının önceki seans kapanışına göre boşluğu
+        - Session_VWAP_Dist: Kapanışın seans içi kümülatif VWAP'a uzaklığı
+        """
+        df = self.data
+        session = df.index.normalize()
+        grouped = df.groupby(session)
+
+        df['Bar_Of_Session'] = grouped.cumcount()
+        session_open = grouped['Open'].transform('first')
+        df['Session_Return'] = df['Close'] / session_open - 1
+
+        prev_close = grouped['Close'].last().shift(1)
+        df['Overnight_Gap'] = session_open / prev_close.reindex(session).to_numpy() - 1
+
+        if 'Volume' in df.columns:
+            typical = (df['High'] + df['Low'] + df['Close']) / 3
+            cum_pv = (typical * df['Volume']).groupby(session).cumsum()
+            cum_vol = df['Volume'].groupby(session).cumsum()
+            df['Session_VWAP_Dist'] = df['Close'] / (cum_pv / cum_vol.replace(0, np.nan)) - 1
+
+        self.data = df
+        return df
+
+    @traced('feature.add_derived_features')
     def add_derived_features(self):
         """Getiri, volatilite ve lag özelliklerini ekler."""
         df = self.data
@@ -485,7 +529,7 @@ class FeatureEngineer:
         # BUG-8 Fix: Removed duplicate return/lag calculation block that was repeated below
             
         # Relative Volatility (Stock volatility / Long-term average)
-        df['Volatility_Ratio'] = df['Volatility_20'] / df['Volatility_20'].rolling(52 if config.TIMEFRAME=='W' else 252).mean()
+        df['Volatility_Ratio'] = df['Volatility_20'] / df['Volatility_20'].rolling(52 if config.TIMEFRAME=='W' else config.days_to_bars(252)).mean()
 
         # Excess Return (Alpha) = Stock Return - Index Return
         if 'XU100' in df.columns:
@@ -495,7 +539,8 @@ class FeatureEngineer:
             df['Excess_Return_Current'] = df['Log_Return']
             
         # Feature Cleansing: Remove raw price lags
-        lags = [1, 2, 4, 12] if config.TIMEFRAME == 'W' else [1, 5, 20, 60]
+        # Intraday: 1 bar + 1/5/20/60 günlük karşılıkları (Günlükte [1, 5, 20, 60])
+        lags = [1, 2, 4, 12] if config.TIMEFRAME == 'W' else sorted({1, *(config.days_to_bars(d) for d in (1, 5, 20, 60))})
         for lag in lags:
             df[f'Return_Lag_{lag}'] = df['Close'].pct_change(lag) 
             df[f'Excess_Return_Lag_{lag}'] = df['Excess_Return_Current'].shift(lag)
@@ -524,6 +569,7 @@ class FeatureEngineer:
         self.data = df
         return df
 
+    @traced('feature.add_macro_derived_features')
     def add_macro_derived_features(self):
         """
         Create derived macro features for crisis detection BEFORE raw columns are deleted.
@@ -533,7 +579,7 @@ class FeatureEngineer:
         
         # 1. USDTRY_Change (5-day or 1-week change)
         if 'USDTRY' in df.columns:
-            lookback = 1 if config.TIMEFRAME == 'W' else 5
+            lookback = 1 if config.TIMEFRAME == 'W' else config.days_to_bars(5)
             df['USDTRY_Change'] = df['USDTRY'].pct_change(lookback)
         
         # 2. VIX_Risk (direct copy for now, could add smoothing)
@@ -543,18 +589,18 @@ class FeatureEngineer:
         # 2a. Bond Change (Derived here to be available for interaction)
         if 'BOND_10Y' in df.columns:
              # 5-day change in bond yields
-             df['BOND_Change'] = df['BOND_10Y'].diff(5)
+             df['BOND_Change'] = df['BOND_10Y'].diff(config.days_to_bars(5))
         
         # 3. SP500_Return & RS_vs_SP500
         if 'SP500' in df.columns:
-            lookback = 1 if config.TIMEFRAME == 'W' else 5
+            lookback = 1 if config.TIMEFRAME == 'W' else config.days_to_bars(5)
             df['SP500_Return'] = df['SP500'].pct_change(lookback)
             # Relative Strength (Fiyat / SP500)
             df['RS_vs_SP500'] = df['Close'] / df['SP500']
 
         # 4. Gold & Oil (TRY Bazlı Momentum)
         # Endüstriyel hisseler için kritik
-        lookback = 1 if config.TIMEFRAME == 'W' else 5
+        lookback = 1 if config.TIMEFRAME == 'W' else config.days_to_bars(5)
         
         if 'GOLD' in df.columns and 'USDTRY' in df.columns:
             df['Gold_TRY'] = df['GOLD'] * df['USDTRY']
@@ -598,7 +644,7 @@ class FeatureEngineer:
             
         if 'USDTRY' in df.columns:
             try:
-                lookback = 1 if config.TIMEFRAME == 'W' else 5
+                lookback = 1 if config.TIMEFRAME == 'W' else config.days_to_bars(5)
                 if len(df) >= lookback:
                     current_price = last_row['USDTRY']
                     prev_price = df['USDTRY'].iloc[-lookback]
@@ -608,7 +654,7 @@ class FeatureEngineer:
 
         if 'SP500' in df.columns:
             try:
-                lookback = 1 if config.TIMEFRAME == 'W' else 5
+                lookback = 1 if config.TIMEFRAME == 'W' else config.days_to_bars(5)
                 if len(df) > lookback:
                     current = last_row['SP500']
                     prev = df['SP500'].iloc[-lookback]
@@ -644,18 +690,19 @@ class FeatureEngineer:
             if 'USDTRY_Change' in df.columns:
                  mask |= (df['USDTRY_Change'].shift(1) > thresholds['USDTRY_CHANGE_5D'])
             else:
-                 usd_change = df['USDTRY'].pct_change(5).shift(1)
+                 usd_change = df['USDTRY'].pct_change(config.days_to_bars(5)).shift(1)
                  mask |= (usd_change > thresholds['USDTRY_CHANGE_5D'])
                  
         if 'SP500' in df.columns:
             if 'SP500_Return' in df.columns: 
                  mask |= (df['SP500_Return'].shift(1) < thresholds['SP500_MOMENTUM'])
             else:
-                 sp_mom = df['SP500'].pct_change(5).shift(1)
+                 sp_mom = df['SP500'].pct_change(config.days_to_bars(5)).shift(1)
                  mask |= (sp_mom < thresholds['SP500_MOMENTUM'])
                  
         return mask
 
+    @traced('feature.clean_data')
     def clean_data(self):
         """NaN değerleri temizler ve MAKRO SÜTUNLARI SİLER."""
         # Tahvil faizi eklendi
@@ -698,6 +745,7 @@ class FeatureEngineer:
         
         return self.data
         
+    @traced('feature.process_all', arg='ticker')
     def process_all(self, ticker=None):
         """Tüm işlemleri sırasıyla çalıştırır."""
         # 1. Targets First (Before any drop/shift operations might mess up)
@@ -724,6 +772,8 @@ class FeatureEngineer:
                 self.add_kap_features(ticker)
         
         self.add_time_features()
+        if config.is_intraday():
+            self.add_session_features()
         self.add_derived_features()
         self.add_macro_derived_features()
 
@@ -742,6 +792,7 @@ class FeatureEngineer:
         self.clean_data()
         return self.data
 
+    @traced('feature.add_transformer_features')
     def add_transformer_features(self):
         """TFT için özel feature'lar"""
         df = self.data
@@ -11,10 +11,13 @@ PyKap kütüphanesini kullanarak KAP bildirimlerini çeker.
 import os
 import json
 import hashlib
+import time
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict
 import pandas as pd
 
+from utils.tracing import traced
+
 try:
     from pykap.bist import BISTCompany
     PYKAP_AVAILABLE = True
@@ -90,6 +93,7 @@ class KAPDataFetcher:
             return datetime.strptime(d, '%Y-%m-%d').date()
         raise ValueError(f"Geçersiz tarih formatı: {d}")
     
+    @traced('kap.fetch_disclosures', arg='ticker')
     def fetch_disclosures(
         self, 
         ticker: str, 
@@ -244,6 +248,7 @@ class KAPDataFetcher:
             print(f"[KAP] {ticker} mali rapor çekme hatası: {e}")
             return pd.DataFrame()
     
+    @traced('kap.create_event_features', arg='ticker')
     def create_event_features(
         self,
         ticker: str,
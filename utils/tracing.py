@@ -0,0 +1,364 @@
+"""
+Aşama Bazlı Zamanlama (Tracing)
+Pipeline adımlarını iç içe span'ler halinde ölçer: wall time, CPU time (thread), satır sayısı.
+
+- Kapalıyken maliyeti tek bir bool kontrolü (decorator fonksiyonu direkt çağırır)
+- Her çalıştırma için JSON trace: span ağacı + yol bazlı özet (diff'lenebilir, kararlı sıralı)
+- Thread güvenli: her thread kendi span yığınını tutar, kök span'ler run'ın listesinde toplanır
+- Aktif run contextvars ile tutulur: aynı süreçte eşzamanlı iki iş (API job'ları, backtest'ler)
+  birbirinin trace'ini ezmez / kapatmaz. Yeni thread boş context ile başlar; bir run içindeki
+  worker'lar contextvars.copy_context().run ile başlatılırsa aynı run'a yazar
+
+Kullanım:
+    from utils.tracing import tracer, traced
+
+    @traced('feature.add_technical_indicators')
+    def add_technical_indicators(self): ...
+
+    with tracer.run('backtest', enabled=args.trace):
+        with tracer.span('predict', rows=len(df)) as sp:
+            ...
+            sp.set('model', 'lightgbm')
+
+    python utils/tracing.py diff reports/traces/a.json reports/traces/b.json
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'rows', 'children', 'events', 'start_s', 'wall_s', 'cpu_s', 'error')
+
+    def __init__(self, name, rows=None, attrs=None):
+        self.name = name
+        self.rows = rows
+        self.attrs = attrs or {}
+        self.children = []
+        self.events = []
+        self.start_s = 0.0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.error = None
+
+    def set_rows(self, rows):
+        self.rows = int(rows) if rows is not None else None
+
+    def set(self, key, value):
+        self.attrs[key] = value
+
+    def to_dict(self):
+        out = {'name': self.name, 'start_s': round(self.start_s, 6),
+               'wall_s': round(self.wall_s, 6), 'cpu_s': round(self.cpu_s, 6)}
+        if self.rows is not None:
+            out['rows'] = self.rows
+        if self.attrs:
+            out['attrs'] = {k: self.attrs[k] for k in sorted(self.attrs)}
+        if self.events:
+            out['events'] = self.events
+        if self.error:
+            out['error'] = self.error
+        if self.children:
+            out['children'] = [c.to_dict() for c in self.children]
+        return out
+
+
+class _NoopSpan:
+    """Tracing kapalıyken dönen, hiçbir şey yapmayan span (tek örnek paylaşılır)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_rows(self, rows):
+        pass
+
+    def set(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _SpanContext:
+    __slots__ = ('run', 'span', '_t0', '_c0')
+
+    def __init__(self, run, span):
+        self.run = run
+        self.span = span
+
+    def __enter__(self):
+        stack = self.run._stack()
+        if stack:
+            stack[-1].children.append(self.span)
+        else:
+            with self.run._lock:
+                self.run.roots.append(self.span)
+        stack.append(self.span)
+        self._t0 = time.perf_counter()
+        self._c0 = time.thread_time()
+        self.span.start_s = self._t0 - self.run.t0
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.wall_s = time.perf_counter() - self._t0
+        self.span.cpu_s = time.thread_time() - self._c0
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        stack = self.run._stack()
+        if stack and stack[-1] is self.span:
+            stack.pop()
+        return False
+
+
+class TraceRun:
+    """Tek bir trace çalıştırmasının durumu (Tracer.start'ın döndürdüğü handle)."""
+
+    def __init__(self, run_name, meta=None):
+        self.run_name = run_name
+        self.meta = meta or {}
+        self.roots = []
+        self.t0 = time.perf_counter()
+        self.started_at = datetime.now()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._token = None
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def summary(self):
+        """Yol bazlı (kök/çocuk/...) toplamlar: çağrı sayısı, wall, CPU, satır."""
+        totals = {}
+
+        def visit(span, prefix):
+            path = f"{prefix}/{span.name}" if prefix else span.name
+            entry = totals.setdefault(path, {'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0})
+            entry['count'] += 1
+            entry['wall_s'] += span.wall_s
+            entry['cpu_s'] += span.cpu_s
+            entry['rows'] += span.rows or 0
+            for child in span.children:
+                visit(child, path)
+
+        with self._lock:
+            roots = list(self.roots)
+        for root in roots:
+            visit(root, '')
+        return {path: {k: round(v, 6) if isinstance(v, float) else v for k, v in totals[path].items()}
+                for path in sorted(totals)}
+
+    def to_dict(self):
+        with self._lock:
+            roots = list(self.roots)
+        return {
+            'run': self.run_name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'meta': self.meta,
+            'summary': self.summary(),
+            'spans': [r.to_dict() for r in roots],
+        }
+
+    def save(self, output_dir=None):
+        """Trace'i JSON'a yazar; dosya yolunu döner."""
+        output_dir = output_dir or getattr(config, 'TRACE_DIR', 'reports/traces')
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{self.run_name}_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False, default=str)
+        return path
+
+
+class Tracer:
+    def __init__(self):
+        # Aktif run context'e özel (thread / asyncio task başına); süreç geneli durum yok
+        self._current = contextvars.ContextVar(f'trace_run_{id(self)}', default=None)
+
+    @property
+    def enabled(self):
+        return self._current.get() is not None
+
+    @property
+    def current(self):
+        """Bu context'teki aktif TraceRun (yoksa None)."""
+        return self._current.get()
+
+    def span(self, name, rows=None, **attrs):
+        """İç içe kullanılabilen zamanlama bloğu. Kapalıyken paylaşılan no-op döner."""
+        run = self._current.get()
+        if run is None:
+            return _NOOP_SPAN
+        return _SpanContext(run, Span(name, rows, attrs))
+
+    def event(self, name, **attrs):
+        """Aktif span'e zaman damgalı olay ekler (örn. ilerleme adımları)."""
+        run = self._current.get()
+        if run is None:
+            return
+        stack = run._stack()
+        if stack:
+            stack[-1].events.append({'name': name, 't_s': round(time.perf_counter() - run.t0, 6), **attrs})
+
+    # ==========================================
+    # ÇALIŞTIRMA (RUN) YÖNETİMİ
+    # ==========================================
+
+    def start(self, run_name, **meta):
+        """Bu context'te yeni bir trace başlatır ve handle'ını (TraceRun) döner."""
+        run = TraceRun(run_name, meta)
+        run._token = self._current.set(run)
+        return run
+
+    def stop(self, output_dir=None, run=None):
+        """
+        Trace'i (varsayılan: bu context'teki aktif run) kapatır ve JSON'a yazar; dosya yolunu döner.
+        Sadece verilen run'ı kapatır, başka işlerin run'larına dokunmaz.
+        """
+        run = run or self._current.get()
+        if run is None:
+            raise RuntimeError("Aktif trace yok.")
+        if self._current.get() is run:
+            try:
+                self._current.reset(run._token)
+            except ValueError: # start başka bir context'te çağrıldı
+                self._current.set(None)
+        return run.save(output_dir)
+
+    @contextmanager
+    def run(self, run_name, enabled=None, output_dir=None, **meta):
+        """
+        Bir çalıştırmayı trace'ler. enabled=None ise config.TRACE_ENABLED kullanılır.
+        Bu context'te zaten aktif bir trace varsa yeni dosya açılmaz, çalıştırma onun içinde
+        span olur; eşzamanlı başka işlerin trace'leri birbirinden bağımsızdır.
+        """
+        if enabled is None:
+            enabled = getattr(config, 'TRACE_ENABLED', False)
+        if not enabled:
+            yield None
+            return
+        if self.enabled:
+            with self.span(run_name, **meta):
+                yield None
+            return
+
+        run = self.start(run_name, **meta)
+        try:
+            with self.span(run_name):
+                yield run
+        finally:
+            path = self.stop(output_dir, run=run)
+            print(f"[Trace] {path}")
+
+    # ==========================================
+    # ÇIKTI
+    # ==========================================
+
+    def summary(self):
+        """Aktif run'ın yol bazlı özeti (bkz. TraceRun.summary)."""
+        run = self._current.get()
+        return {} if run is None else run.summary()
+
+    def to_dict(self):
+        run = self._current.get()
+        return {} if run is None else run.to_dict()
+
+
+tracer = Tracer()
+
+
+def _default_rows(result):
+    """DataFrame/Series/ndarray sonuçların satır sayısı; diğerleri için None."""
+    shape = getattr(result, 'shape', None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+def traced(name=None, rows=_default_rows, arg=None):
+    """
+    Fonksiyonu span ile sarar. Tracing kapalıyken ek maliyet sadece bir bool kontrolüdür.
+
+    Args:
+        name: Span adı (varsayılan: fonksiyonun __qualname__'i)
+        rows: Sonuçtan satır sayısı çıkaran fonksiyon (None = kaydetme)
+        arg: Span özelliği olarak kaydedilecek argüman adı (örn. 'ticker')
+    """
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+        signature = inspect.signature(fn) if arg else None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            attrs = {}
+            if signature is not None:
+                try:
+                    bound = signature.bind_partial(*args, **kwargs)
+                    if arg in bound.arguments:
+                        attrs[arg] = bound.arguments[arg]
+                except TypeError:
+                    pass
+            with tracer.span(span_name, **attrs) as span:
+                result = fn(*args, **kwargs)
+                if rows is not None:
+                    span.set_rows(rows(result))
+                return result
+        return wrapper
+    return decorator
+
+
+def load_trace(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def diff_traces(before, after):
+    """
+    İki trace özetini yol bazında karşılaştırır.
+    Returns: [(yol, önce_wall, sonra_wall, oran)] sonra-önce farkına göre azalan sırada
+    """
+    a, b = before['summary'], after['summary']
+    rows = []
+    for path in sorted(set(a) | set(b)):
+        wa = a.get(path, {}).get('wall_s', 0.0)
+        wb = b.get(path, {}).get('wall_s', 0.0)
+        rows.append((path, wa, wb, wb / wa if wa > 0 else float('inf')))
+    return sorted(rows, key=lambda r: r[2] - r[1], reverse=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Trace dosyası özet / karşılaştırma")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    show = sub.add_parser('show')
+    show.add_argument('path')
+    diff = sub.add_parser('diff')
+    diff.add_argument('before')
+    diff.add_argument('after')
+    args = parser.parse_args()
+
+    if args.cmd == 'show':
+        for path, s in load_trace(args.path)['summary'].items():
+            print(f"{s['wall_s']:10.3f} s  {s['cpu_s']:10.3f} cpu  x{s['count']:<5} {path}")
+    else:
+        for path, wa, wb, ratio in diff_traces(load_trace(args.before), load_trace(args.after)):
+            print(f"{wa:10.3f} -> {wb:10.3f} s  (x{ratio:.2f})  {path}")